@@ -9,6 +9,19 @@ class Settings(BaseSettings):
     POSTGRES_DB: str = "resonant_dashboard"
     DEBUG: bool = True
     LOG_LEVEL: str = "DEBUG"
+    # Write-behind memory ingestion (messages router)
+    MEMORY_INGEST_SPOOL: str = "data/memory_ingest.spool"
+    MEMORY_INGEST_BATCH_SIZE: int = 64
+    MEMORY_INGEST_FLUSH_INTERVAL: float = 1.0
+    # none / reuse_embedding / count (memory_store.models.DedupMode)
+    MEMORY_INGEST_DEDUP: str = "reuse_embedding"
+    # OpenAI embedding rate control (0 = unlimited)
+    EMBEDDING_MAX_CONCURRENCY: int = 8
+    EMBEDDING_REQUESTS_PER_MINUTE: float = 0
+    EMBEDDING_TOKENS_PER_MINUTE: float = 0
+    # Shortened OpenAI embeddings (text-embedding-3-*; 0 = full size).
+    # Changing it on an existing table needs memory_store.ReembeddingMigration
+    EMBEDDING_DIMENSIONS: int = 0
 
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
@@ -1,5 +1,6 @@
 import asyncpg
 from app.config import settings
+from memory_store.vector_codec import init_vector_codec
 
 
 class Database:
@@ -15,7 +16,8 @@ class Database:
             database=settings.POSTGRES_DB,
             min_size=5,
             max_size=20,
-            command_timeout=60
+            command_timeout=60,
+            init=init_vector_codec,
         )
 
     async def disconnect(self):
@@ -31,8 +31,11 @@ async def lifespan(app: FastAPI):
     # Startup
     await db.connect()
     logger.info("✅ Database connected")
+    # Replays memories left in the ingestion spool by the previous run
+    await messages.get_ingestion_queue(db.pool)
     yield
     # Shutdown
+    await messages.shutdown_ingestion_queue()
     await db.disconnect()
     logger.info("Database disconnected")
 
@@ -109,6 +112,11 @@ from app.routers import file_modification
 app.include_router(file_modification.router)
 logger.info("✅ FileModificationService router registered")
 
+# Memory export (streaming NDJSON)
+from app.routers import memory_export
+app.include_router(memory_export.router)
+logger.info("✅ Memory export router registered")
+
 # WebSocket router (Sprint 15)
 from app.routers import websocket
 app.include_router(websocket.router)
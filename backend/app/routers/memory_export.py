@@ -0,0 +1,57 @@
+"""Memory Export API"""
+
+from typing import AsyncIterator, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from app.database import db
+from app.routers.messages import get_memory_store_service
+from memory_store.models import MemoryType
+from memory_store.service import MemoryStoreService
+
+router = APIRouter(prefix="/api/v1/memory", tags=["memory-export"])
+
+
+async def _ndjson(
+    service: MemoryStoreService,
+    query: str,
+    memory_type: Optional[MemoryType],
+    similarity_threshold: float,
+    include_archived: bool,
+    limit: Optional[int],
+    user_id: str,
+) -> AsyncIterator[bytes]:
+    """1行1記憶のNDJSON（送信が詰まればカーソルの読み出しも止まる）"""
+    async for result in service.stream_similar(
+        query,
+        memory_type=memory_type,
+        similarity_threshold=similarity_threshold,
+        include_archived=include_archived,
+        limit=limit,
+        user_id=user_id,
+    ):
+        yield (result.model_dump_json() + "\n").encode("utf-8")
+
+
+@router.get("/export")
+async def export_similar_memories(
+    query: str = Query(..., min_length=1),
+    memory_type: Optional[MemoryType] = Query(None),
+    similarity_threshold: float = Query(0.0, ge=-1.0, le=1.0),
+    include_archived: bool = Query(False),
+    limit: Optional[int] = Query(None, ge=1),
+    user_id: str = Query(..., min_length=1, max_length=100),
+):
+    """類似度順に記憶をNDJSONでストリーミングエクスポート"""
+    service = await get_memory_store_service(db.pool)
+    if service is None:
+        raise HTTPException(status_code=503, detail="Memory store unavailable")
+
+    return StreamingResponse(
+        _ndjson(
+            service, query, memory_type, similarity_threshold, include_archived, limit, user_id
+        ),
+        media_type="application/x-ndjson",
+    )
+
@@ -6,6 +6,9 @@ Messages Router with Memory Integration
 2. メモリストアに保存（Semantic Memory）
 3. AI応答を生成（Context Assembler経由で過去の記憶を参照）
 4. AI応答もメモリに保存
+
+メモリ保存はライトビハインドキュー（memory_store.ingestion）に積まれ、
+バッチ単位で Embedding 生成とバルク INSERT が行われる。
 """
 
 from uuid import UUID
@@ -15,6 +18,7 @@ import asyncpg
 from fastapi import APIRouter, HTTPException, Query, BackgroundTasks
 from app.models.message import MessageCreate, MessageUpdate, MessageResponse, MessageListResponse
 from app.repositories.message_repo import MessageRepository
+from app.config import settings
 from app.database import db
 import logging
 
@@ -22,9 +26,18 @@ router = APIRouter(prefix="/api/messages", tags=["messages"])
 repo = MessageRepository()
 logger = logging.getLogger(__name__)
 
+# Shared per pool so the embedding client and its cache live across requests
+_memory_service = None
+_memory_service_pool: Optional[asyncpg.Pool] = None
+_ingestion_queue = None
+
 
 async def get_memory_store_service(pool: asyncpg.Pool):
-    """Memory Store Service を取得"""
+    """Memory Store Service を取得（プールごとに1つを共有）"""
+    global _memory_service, _memory_service_pool
+    if _memory_service is not None and _memory_service_pool is pool:
+        return _memory_service
+
     try:
         from memory_store.postgres_repository import PostgresMemoryRepository
         from memory_store.embedding import MockEmbeddingService, OpenAIEmbeddingService
@@ -35,21 +48,67 @@ async def get_memory_store_service(pool: asyncpg.Pool):
         # Try OpenAI embedding if API key available, otherwise use mock
         openai_key = os.getenv("OPENAI_API_KEY")
         if openai_key:
-            embedding_service = OpenAIEmbeddingService(api_key=openai_key)
+            embedding_service = OpenAIEmbeddingService(
+                api_key=openai_key,
+                max_concurrency=settings.EMBEDDING_MAX_CONCURRENCY or None,
+                requests_per_minute=settings.EMBEDDING_REQUESTS_PER_MINUTE or None,
+                tokens_per_minute=settings.EMBEDDING_TOKENS_PER_MINUTE or None,
+                dimensions=settings.EMBEDDING_DIMENSIONS or None,
+            )
             logger.info("Using OpenAI embedding service")
         else:
             embedding_service = MockEmbeddingService()
             logger.info("Using Mock embedding service (OPENAI_API_KEY not set)")
         
-        return MemoryStoreService(
+        _memory_service = MemoryStoreService(
             repository=memory_repo,
             embedding_service=embedding_service,
         )
+        _memory_service_pool = pool
+        return _memory_service
     except Exception as e:
         logger.warning(f"Failed to create MemoryStoreService: {e}")
         return None
 
 
+async def get_ingestion_queue(pool: asyncpg.Pool):
+    """メモリ保存キューを取得（初回呼び出し時に起動）"""
+    global _ingestion_queue
+    memory_service = await get_memory_store_service(pool)
+    if memory_service is None:
+        return None
+    if _ingestion_queue is not None and _ingestion_queue.service is memory_service:
+        return _ingestion_queue
+
+    try:
+        from memory_store.ingestion import IngestionQueue
+        from memory_store.models import DedupMode
+
+        if _ingestion_queue is not None:
+            await _ingestion_queue.stop()
+        _ingestion_queue = IngestionQueue(
+            memory_service,
+            batch_size=settings.MEMORY_INGEST_BATCH_SIZE,
+            flush_interval=settings.MEMORY_INGEST_FLUSH_INTERVAL,
+            spool_path=settings.MEMORY_INGEST_SPOOL or None,
+            dedup=DedupMode(settings.MEMORY_INGEST_DEDUP),
+        )
+        _ingestion_queue.start()
+        return _ingestion_queue
+    except Exception as e:
+        logger.warning(f"Failed to start memory ingestion queue: {e}")
+        _ingestion_queue = None
+        return None
+
+
+async def shutdown_ingestion_queue() -> None:
+    """残りを保存してキューを停止（未保存分はスプールに残る）"""
+    global _ingestion_queue
+    if _ingestion_queue is not None:
+        await _ingestion_queue.stop()
+        _ingestion_queue = None
+
+
 async def get_ai_bridge_with_context(pool: asyncpg.Pool):
     """Context Assembler 統合版のAI Bridge を取得"""
     provider = os.getenv("AI_PROVIDER", "claude").lower()
@@ -77,26 +136,30 @@ async def save_to_memory(
     source_type: str = "thought",
     memory_type: str = "working"
 ):
-    """メッセージをMemory Storeに保存"""
+    """
+    メッセージをMemory Storeの保存キューに追加
+
+    Returns:
+        キューのシーケンス番号（保存はバックグラウンドでバッチ実行）
+    """
     try:
-        memory_service = await get_memory_store_service(pool)
-        if memory_service is None:
+        queue = await get_ingestion_queue(pool)
+        if queue is None:
             logger.warning("Memory service not available, skipping memory save")
-            return
-        
-        from memory_store.models import MemoryType, SourceType
-        
-        memory_id = await memory_service.save_memory(
-            content=content,
-            memory_type=MemoryType(memory_type),
-            source_type=SourceType(source_type) if source_type else None,
-            metadata={
+            return None
+
+        seq = queue.enqueue({
+            "content": content,
+            "memory_type": memory_type,
+            "source_type": source_type,
+            "metadata": {
                 "user_id": user_id,
                 "source": "message",
-            }
-        )
-        logger.info(f"Saved memory {memory_id} for user {user_id}")
-        return memory_id
+            },
+            "user_id": user_id,
+        })
+        logger.debug(f"Queued memory #{seq} for user {user_id}")
+        return seq
     except Exception as e:
         logger.error(f"Failed to save to memory: {e}")
         return None
@@ -160,6 +223,27 @@ async def generate_ai_response(user_message: str, user_id: str):
         logger.error(f"Failed to generate AI response: {e}", exc_info=True)
 
 
+@router.get("/ingest/stats")
+async def get_ingest_stats():
+    """メモリ保存キューの深さ・遅延・スループット"""
+    queue = await get_ingestion_queue(db.pool)
+    if queue is None:
+        raise HTTPException(status_code=503, detail="Memory store unavailable")
+    return queue.get_stats()
+
+
+@router.get("/embedding/stats")
+async def get_embedding_stats():
+    """Embedding API の同時実行数・キュー待ち時間・スロットリング"""
+    service = await get_memory_store_service(db.pool)
+    if service is None:
+        raise HTTPException(status_code=503, detail="Memory store unavailable")
+    get_rate_limit_stats = getattr(service.embedding_service, "get_rate_limit_stats", None)
+    if get_rate_limit_stats is None:
+        return {"rate_limited": False}
+    return {"rate_limited": True, **get_rate_limit_stats()}
+
+
 @router.get("", response_model=MessageListResponse)
 async def list_messages(
     user_id: Optional[str] = None,
@@ -191,11 +275,8 @@ async def create_message(data: MessageCreate, background_tasks: BackgroundTasks)
     
     # If it's a user message, save to memory and generate AI response
     if data.message_type == "user":
-        background_tasks.add_task(
-            _save_user_message_to_memory,
-            content=data.content,
-            user_id=data.user_id
-        )
+        # Only a spool append; the memory is saved by the ingestion queue
+        await _save_user_message_to_memory(content=data.content, user_id=data.user_id)
         background_tasks.add_task(
             generate_ai_response,
             user_message=data.content,
@@ -206,7 +287,7 @@ async def create_message(data: MessageCreate, background_tasks: BackgroundTasks)
 
 
 async def _save_user_message_to_memory(content: str, user_id: str):
-    """Background task to save user message to memory store"""
+    """Queue a user message for the memory store"""
     try:
         pool = db.pool
         await save_to_memory(
@@ -6,6 +6,7 @@ from typing import Optional
 
 from context_assembler.service import ContextAssemblerService
 from context_assembler.config import get_default_config, ContextConfig
+from memory_store.vector_codec import init_vector_codec
 
 
 def get_database_url() -> str:
@@ -63,6 +64,7 @@ async def create_context_assembler(
                 min_size=2,
                 max_size=10,
                 timeout=30,
+                init=init_vector_codec,
             )
         except Exception as e:
             raise ConnectionError(f"Failed to create database pool: {e}") from e
@@ -156,7 +158,12 @@ async def create_context_assembler(
         import logging
         logging.warning(f"User Profile Context Provider not available: {e}")
 
-    # 6. Context Assembler初期化
+    # 6. Summary Tree Retriever初期化（セッション→週→月の階層要約）
+    from memory_store.summary_tree import SummaryTreeRetriever
+    from memory_store.summary_tree_repository import PostgresSummaryTreeRepository
+    summary_tree = SummaryTreeRetriever(PostgresSummaryTreeRepository(pool), embedding_service)
+
+    # 7. Context Assembler初期化
     return ContextAssemblerService(
         retrieval_orchestrator=retrieval,
         message_repository=message_repo,
@@ -164,4 +171,5 @@ async def create_context_assembler(
         config=config or get_default_config(),
         session_summary_repository=session_summary_repo,
         profile_context_provider=profile_provider,
+        summary_tree_retriever=summary_tree,
     )
@@ -18,6 +18,7 @@ class MemoryLayer(str, Enum):
     WORKING = "working"
     SEMANTIC = "semantic"
     SESSION_SUMMARY = "session_summary"
+    HISTORY_SUMMARY = "history_summary"
     USER_MESSAGE = "user_message"
 
 
@@ -47,6 +48,9 @@ class AssemblyOptions(BaseModel):
     # Sprint 10: Choice Preservation support
     include_past_choices: bool = True
     past_choices_limit: int = Field(default=3, ge=1, le=10)
+    # Summary Tree support
+    include_history_summaries: bool = True
+    history_summary_limit: int = Field(default=3, ge=1, le=10)
 
 
 class ContextMetadata(BaseModel):
@@ -64,6 +68,8 @@ class ContextMetadata(BaseModel):
     profile_token_count: int = Field(default=0, ge=0)
     # Sprint 10: Choice Preservation support
     past_choices_count: int = Field(default=0, ge=0)
+    # Summary Tree support
+    history_summary_count: int = Field(default=0, ge=0)
 
 
 class AssembledContext(BaseModel):
@@ -26,6 +26,13 @@ try:
 except ImportError:
     HAS_SESSION_SUMMARY = False
 
+# Summary Tree support
+try:
+    from memory_store.summary_tree import SummaryTreeRetriever
+    HAS_SUMMARY_TREE = True
+except ImportError:
+    HAS_SUMMARY_TREE = False
+
 # Sprint 8: User Profile support
 try:
     from user_profile.context_provider import ProfileContextProvider
@@ -58,6 +65,7 @@ class ContextAssemblerService:
         session_summary_repository: Optional['SessionSummaryRepository'] = None,
         profile_context_provider: Optional['ProfileContextProvider'] = None,
         choice_query_engine: Optional['ChoiceQueryEngine'] = None,
+        summary_tree_retriever: Optional['SummaryTreeRetriever'] = None,
     ):
         self.retrieval = retrieval_orchestrator
         self.message_repo = message_repository
@@ -70,6 +78,8 @@ class ContextAssemblerService:
         self.profile_provider = profile_context_provider
         # Sprint 10: Choice Query Engine
         self.choice_query_engine = choice_query_engine
+        # Summary Tree: 過去セッションの階層要約
+        self.summary_tree = summary_tree_retriever
 
     async def assemble_context(
         self,
@@ -150,6 +160,7 @@ class ContextAssemblerService:
             profile_token_count=profile_context.token_count if profile_context else 0,
             # Sprint 10: Choice Preservation metadata
             past_choices_count=len(memory_layers.get("past_choices", [])),
+            history_summary_count=len(memory_layers.get("history_summaries", [])),
         )
 
         return AssembledContext(
@@ -210,14 +221,26 @@ class ContextAssemblerService:
                 return []
             tasks.append(empty_choices())
 
+        # Summary Tree: 過去セッションの要約
+        if options.include_history_summaries and self.summary_tree:
+            tasks.append(
+                self._fetch_history_summaries(user_id, user_message, options.history_summary_limit)
+            )
+        else:
+            # ダミータスク（空リストを返す）
+            async def empty_history():
+                return []
+            tasks.append(empty_history())
+
         # 並行実行
-        working, semantic, summary, past_choices = await asyncio.gather(*tasks)
+        working, semantic, summary, past_choices, history = await asyncio.gather(*tasks)
 
         return {
             "working": working,
             "semantic": semantic,
             "session_summary": summary,
             "past_choices": past_choices,
+            "history_summaries": history,
         }
 
     async def _fetch_working_memory(
@@ -260,6 +283,21 @@ class ContextAssemblerService:
             return session.metadata.get("summary")
         return None
 
+    async def _fetch_history_summaries(self, user_id: str, query: str, limit: int) -> List:
+        """
+        History Summaries: 要約ツリーを月→週→セッションと下り、関連する過去セッションの要約を取得
+
+        関連する枝だけを展開するため、セッション数が増えても検索コストと
+        トークン数は limit と beam 幅で抑えられる。
+        """
+        try:
+            hits = await self.summary_tree.retrieve(user_id, query, limit=limit)
+            return [node for node, _ in hits]
+        except Exception as e:
+            import logging
+            logging.warning(f"Failed to fetch history summaries: {e}")
+            return []
+
     async def _fetch_past_choices(self, user_id: str, current_question: str, limit: int) -> List:
         """
         Past Choices: 過去の選択履歴を取得（Sprint 10）
@@ -310,6 +348,15 @@ class ContextAssemblerService:
                 f"\n\n## セッション要約\n{memory_layers['session_summary']}"
             )
 
+        # Summary Tree: 過去セッションの要約
+        history_summaries = memory_layers.get("history_summaries", [])
+        if history_summaries:
+            system_parts.append("\n\n## 過去のセッション要約\n")
+            for node in history_summaries:
+                system_parts.append(
+                    f"- {node.period_start.strftime('%Y-%m-%d')}: {node.summary}\n"
+                )
+
         # Sprint 10: Past Decision History
         past_choices = memory_layers.get("past_choices", [])
         if past_choices:
@@ -389,6 +436,16 @@ class ContextAssemblerService:
             if tokens <= self._get_token_limit():
                 return messages, tokens
 
+        # Phase 1.5: History Summaries削減（関連度が低いものから）
+        history = compressed_layers.get("history_summaries", [])
+        while history:
+            history = history[:-1]
+            compressed_layers["history_summaries"] = history
+            messages = self._build_messages(compressed_layers, user_message, profile_context)
+            tokens = self.token_estimator.estimate(messages)
+            if tokens <= self._get_token_limit():
+                return messages, tokens
+
         # Phase 2: Past Choices削減（Sprint 10）
         past_choices = compressed_layers.get("past_choices", [])
         while len(past_choices) > 1:
@@ -0,0 +1,178 @@
+-- ========================================
+-- Memory counters: O(1) memory statistics
+-- memories / memory_archive の件数・サイズを集計テーブルで維持
+-- ========================================
+
+-- memory_counters: per-user / per-type / archived counts maintained by
+-- statement-level triggers (COPY and bulk UPDATE apply one delta per group)
+CREATE TABLE IF NOT EXISTS memory_counters (
+    user_id VARCHAR(255) NOT NULL DEFAULT '',  -- '' = NULL user_id
+    memory_type VARCHAR(50) NOT NULL,
+    archived BOOLEAN NOT NULL,
+    memory_count BIGINT NOT NULL DEFAULT 0,
+    content_length BIGINT NOT NULL DEFAULT 0,  -- SUM(LENGTH(content))
+    PRIMARY KEY (user_id, memory_type, archived)
+);
+
+CREATE OR REPLACE FUNCTION memory_counters_apply() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO memory_counters AS c (user_id, memory_type, archived, memory_count, content_length)
+        SELECT COALESCE(user_id, ''), memory_type, COALESCE(archived, false),
+               COUNT(*), COALESCE(SUM(LENGTH(content)), 0)
+        FROM new_rows
+        GROUP BY 1, 2, 3
+        ON CONFLICT (user_id, memory_type, archived) DO UPDATE
+        SET memory_count = c.memory_count + EXCLUDED.memory_count,
+            content_length = c.content_length + EXCLUDED.content_length;
+    END IF;
+
+    -- Only rows whose counted columns changed move between groups; updates of
+    -- other columns (duplicate_count, metadata, embeddings) touch no counter row
+    IF TG_OP = 'UPDATE' THEN
+        WITH moved AS (
+            SELECT n.user_id AS new_user, n.memory_type AS new_type, n.archived AS new_archived,
+                   LENGTH(n.content) AS new_length,
+                   o.user_id AS old_user, o.memory_type AS old_type, o.archived AS old_archived,
+                   LENGTH(o.content) AS old_length
+            FROM new_rows n JOIN old_rows o ON o.id = n.id
+            WHERE (n.user_id, n.memory_type, n.archived, LENGTH(n.content))
+                  IS DISTINCT FROM (o.user_id, o.memory_type, o.archived, LENGTH(o.content))
+        )
+        INSERT INTO memory_counters AS c (user_id, memory_type, archived, memory_count, content_length)
+        SELECT user_id, memory_type, archived, SUM(delta_count), SUM(delta_length)
+        FROM (
+            SELECT COALESCE(new_user, '') AS user_id, new_type AS memory_type,
+                   COALESCE(new_archived, false) AS archived, 1 AS delta_count, new_length AS delta_length
+            FROM moved
+            UNION ALL
+            SELECT COALESCE(old_user, ''), old_type, COALESCE(old_archived, false), -1, -old_length
+            FROM moved
+        ) deltas
+        GROUP BY 1, 2, 3
+        HAVING SUM(delta_count) <> 0 OR SUM(delta_length) <> 0
+        ON CONFLICT (user_id, memory_type, archived) DO UPDATE
+        SET memory_count = c.memory_count + EXCLUDED.memory_count,
+            content_length = c.content_length + EXCLUDED.content_length;
+    END IF;
+
+    IF TG_OP = 'DELETE' THEN
+        INSERT INTO memory_counters AS c (user_id, memory_type, archived, memory_count, content_length)
+        SELECT COALESCE(user_id, ''), memory_type, COALESCE(archived, false),
+               -COUNT(*), -COALESCE(SUM(LENGTH(content)), 0)
+        FROM old_rows
+        GROUP BY 1, 2, 3
+        ON CONFLICT (user_id, memory_type, archived) DO UPDATE
+        SET memory_count = c.memory_count + EXCLUDED.memory_count,
+            content_length = c.content_length + EXCLUDED.content_length;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS memories_counters_insert ON memories;
+CREATE TRIGGER memories_counters_insert
+    AFTER INSERT ON memories
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION memory_counters_apply();
+
+DROP TRIGGER IF EXISTS memories_counters_update ON memories;
+-- No UPDATE OF column list: PostgreSQL does not allow one together with
+-- transition tables, so the function filters for rows that changed groups
+CREATE TRIGGER memories_counters_update
+    AFTER UPDATE ON memories
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION memory_counters_apply();
+
+DROP TRIGGER IF EXISTS memories_counters_delete ON memories;
+CREATE TRIGGER memories_counters_delete
+    AFTER DELETE ON memories
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION memory_counters_apply();
+
+-- Rebuild memory_counters from memories; returns the number of drifted groups
+CREATE OR REPLACE FUNCTION reconcile_memory_counters() RETURNS INTEGER AS $$
+DECLARE
+    drifted INTEGER;
+BEGIN
+    LOCK TABLE memories IN SHARE MODE;  -- writers wait; readers continue
+
+    WITH actual AS (
+        SELECT COALESCE(user_id, '') AS user_id, memory_type, COALESCE(archived, false) AS archived,
+               COUNT(*) AS memory_count, COALESCE(SUM(LENGTH(content)), 0) AS content_length
+        FROM memories
+        GROUP BY 1, 2, 3
+    )
+    SELECT COUNT(*) INTO drifted
+    FROM actual a
+    FULL JOIN memory_counters c USING (user_id, memory_type, archived)
+    WHERE COALESCE(a.memory_count, 0) <> COALESCE(c.memory_count, 0)
+       OR COALESCE(a.content_length, 0) <> COALESCE(c.content_length, 0);
+
+    DELETE FROM memory_counters;
+    INSERT INTO memory_counters (user_id, memory_type, archived, memory_count, content_length)
+    SELECT COALESCE(user_id, ''), memory_type, COALESCE(archived, false),
+           COUNT(*), COALESCE(SUM(LENGTH(content)), 0)
+    FROM memories
+    GROUP BY 1, 2, 3;
+
+    RETURN drifted;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT reconcile_memory_counters();
+
+-- memory_archive_counters: per-user archive counts (006_memory_lifecycle_tables.sql)
+CREATE TABLE IF NOT EXISTS memory_archive_counters (
+    user_id VARCHAR(255) PRIMARY KEY,
+    archive_count BIGINT NOT NULL DEFAULT 0
+);
+
+CREATE OR REPLACE FUNCTION memory_archive_counters_apply() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO memory_archive_counters AS c (user_id, archive_count)
+        SELECT user_id, COUNT(*) FROM new_rows GROUP BY user_id
+        ON CONFLICT (user_id) DO UPDATE SET archive_count = c.archive_count + EXCLUDED.archive_count;
+    ELSE
+        INSERT INTO memory_archive_counters AS c (user_id, archive_count)
+        SELECT user_id, -COUNT(*) FROM old_rows GROUP BY user_id
+        ON CONFLICT (user_id) DO UPDATE SET archive_count = c.archive_count + EXCLUDED.archive_count;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS memory_archive_counters_insert ON memory_archive;
+CREATE TRIGGER memory_archive_counters_insert
+    AFTER INSERT ON memory_archive
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION memory_archive_counters_apply();
+
+DROP TRIGGER IF EXISTS memory_archive_counters_delete ON memory_archive;
+CREATE TRIGGER memory_archive_counters_delete
+    AFTER DELETE ON memory_archive
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION memory_archive_counters_apply();
+
+CREATE OR REPLACE FUNCTION reconcile_memory_archive_counters() RETURNS INTEGER AS $$
+DECLARE
+    drifted INTEGER;
+BEGIN
+    LOCK TABLE memory_archive IN SHARE MODE;
+
+    SELECT COUNT(*) INTO drifted
+    FROM (SELECT user_id, COUNT(*) AS archive_count FROM memory_archive GROUP BY user_id) a
+    FULL JOIN memory_archive_counters c USING (user_id)
+    WHERE COALESCE(a.archive_count, 0) <> COALESCE(c.archive_count, 0);
+
+    DELETE FROM memory_archive_counters;
+    INSERT INTO memory_archive_counters (user_id, archive_count)
+    SELECT user_id, COUNT(*) FROM memory_archive GROUP BY user_id;
+
+    RETURN drifted;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT reconcile_memory_archive_counters();
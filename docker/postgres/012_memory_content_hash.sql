@@ -0,0 +1,18 @@
+-- ========================================
+-- Memory content hash: duplicate detection on insert
+-- 正規化した content の SHA-256 で同一ユーザー・同一タイプの重複を検出
+-- ========================================
+
+-- content_hash: sha256 hex of the NFKC / whitespace-normalized content,
+-- computed by the application (memory_store.dedup.content_hash). Rows
+-- saved before this migration keep NULL and are never matched.
+ALTER TABLE memories ADD COLUMN IF NOT EXISTS content_hash TEXT;
+-- duplicate_count: repeated saves folded into this row (DedupMode.COUNT)
+ALTER TABLE memories ADD COLUMN IF NOT EXISTS duplicate_count INTEGER NOT NULL DEFAULT 0;
+
+-- find_duplicates: only unarchived rows are reused
+CREATE INDEX IF NOT EXISTS idx_memories_content_hash ON memories(content_hash, memory_type, user_id)
+    WHERE archived = false AND content_hash IS NOT NULL;
+
+COMMENT ON COLUMN memories.content_hash IS '正規化contentのSHA-256（重複検出用）';
+COMMENT ON COLUMN memories.duplicate_count IS '重複保存の回数（DedupMode.COUNT）';
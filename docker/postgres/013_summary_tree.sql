@@ -0,0 +1,37 @@
+-- ========================================
+-- Summary tree: session → week → month rollups
+-- セッション要約を週次・月次要約に集約し、階層的に検索する
+-- ========================================
+
+-- summary_nodes: one row per (user, level, period). A parent row summarizes
+-- its children; parent_id IS NULL marks nodes not yet rolled up (the
+-- current week / month, or children added after their parent was built).
+CREATE TABLE IF NOT EXISTS summary_nodes (
+    id BIGSERIAL PRIMARY KEY,
+    user_id VARCHAR(255) NOT NULL,
+    level VARCHAR(10) NOT NULL CHECK (level IN ('session', 'week', 'month')),
+    period_start TIMESTAMP WITH TIME ZONE NOT NULL,
+    period_end TIMESTAMP WITH TIME ZONE NOT NULL,
+    summary TEXT NOT NULL,
+    embedding VECTOR(1536),
+    parent_id BIGINT REFERENCES summary_nodes(id) ON DELETE SET NULL,
+    session_id UUID,  -- session ノードのみ
+    source_count INTEGER NOT NULL DEFAULT 0,
+    message_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Session nodes are keyed by session, rollups by their calendar period
+CREATE UNIQUE INDEX IF NOT EXISTS idx_summary_nodes_session ON summary_nodes(user_id, session_id)
+    WHERE level = 'session';
+CREATE UNIQUE INDEX IF NOT EXISTS idx_summary_nodes_period ON summary_nodes(user_id, level, period_start)
+    WHERE level <> 'session';
+-- Retrieval descends through children of the selected nodes
+CREATE INDEX IF NOT EXISTS idx_summary_nodes_parent ON summary_nodes(parent_id);
+-- Roots and pending rollups: nodes without a parent
+CREATE INDEX IF NOT EXISTS idx_summary_nodes_roots ON summary_nodes(user_id, level, period_start)
+    WHERE parent_id IS NULL;
+
+COMMENT ON TABLE summary_nodes IS '階層要約ツリー（session → week → month）';
+COMMENT ON COLUMN summary_nodes.parent_id IS '集約先の上位ノード（NULL = 未集約 / ルート）';
@@ -0,0 +1,11 @@
+-- ========================================
+-- Memory updated_at: last modification time of a memory row
+-- 重複カウント・統合・アーカイブで更新され、スナップショット復元で保持される
+-- ========================================
+
+-- Rows saved before this migration start from their created_at
+ALTER TABLE memories ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE;
+UPDATE memories SET updated_at = created_at WHERE updated_at IS NULL;
+ALTER TABLE memories ALTER COLUMN updated_at SET DEFAULT NOW();
+
+COMMENT ON COLUMN memories.updated_at IS '最終更新日時（重複カウント・統合・アーカイブ）';
@@ -0,0 +1,22 @@
+-- ========================================
+-- Embedding state: re-embedding migration state shared by all workers
+-- 移行中かどうかと cutover 済みの世代を全ワーカーが参照する
+-- ========================================
+
+-- Single row: generation counts completed cutovers, migrating is set while
+-- memories.embedding_next exists
+CREATE TABLE IF NOT EXISTS embedding_state (
+    id BOOLEAN PRIMARY KEY DEFAULT true CHECK (id),
+    generation INTEGER NOT NULL DEFAULT 0,
+    migrating BOOLEAN NOT NULL DEFAULT false,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+INSERT INTO embedding_state (id, migrating)
+SELECT true, EXISTS (
+    SELECT 1 FROM information_schema.columns
+    WHERE table_name = 'memories' AND column_name = 'embedding_next'
+)
+ON CONFLICT (id) DO NOTHING;
+
+COMMENT ON TABLE embedding_state IS 'Embeddingモデル移行の状態（世代・移行中フラグ）';
@@ -242,20 +242,188 @@ CREATE TABLE IF NOT EXISTS memories (
     source_type VARCHAR(50),  -- INTENT, THOUGHT, CORRECTION, DECISION
     metadata JSONB DEFAULT '{}',
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     expires_at TIMESTAMP WITH TIME ZONE,
     archived BOOLEAN DEFAULT FALSE,
-    user_id VARCHAR(255)
+    user_id VARCHAR(255),
+    content_hash TEXT,  -- 正規化contentのSHA-256（重複検出用）
+    duplicate_count INTEGER NOT NULL DEFAULT 0
 );
 
 CREATE INDEX IF NOT EXISTS idx_memories_type ON memories(memory_type);
 CREATE INDEX IF NOT EXISTS idx_memories_user ON memories(user_id);
-CREATE INDEX IF NOT EXISTS idx_memories_embedding ON memories USING ivfflat (embedding vector_cosine_ops);
+CREATE INDEX IF NOT EXISTS idx_memories_embedding ON memories USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64);
 CREATE INDEX IF NOT EXISTS idx_memories_created_at ON memories(created_at DESC);
 CREATE INDEX IF NOT EXISTS idx_memories_expires_at ON memories(expires_at) WHERE expires_at IS NOT NULL;
+-- archive_expired: only unarchived working memories with an expiry are scanned
+CREATE INDEX IF NOT EXISTS idx_memories_working_expiry ON memories(memory_type, expires_at)
+    WHERE archived = false AND expires_at IS NOT NULL;
+-- find_duplicates: content-hash lookup of unarchived rows
+CREATE INDEX IF NOT EXISTS idx_memories_content_hash ON memories(content_hash, memory_type, user_id)
+    WHERE archived = false AND content_hash IS NOT NULL;
 
 COMMENT ON TABLE memories IS 'メモリシステム - セマンティック検索対応';
 COMMENT ON COLUMN memories.embedding IS 'OpenAI embedding (1536次元)';
 COMMENT ON COLUMN memories.memory_type IS 'WORKING (短期), LONGTERM (長期)';
+COMMENT ON COLUMN memories.updated_at IS '最終更新日時（重複カウント・統合・アーカイブ）';
+
+-- memory_counters: per-user / per-type / archived counts maintained by
+-- statement-level triggers (COPY and bulk UPDATE apply one delta per group)
+CREATE TABLE IF NOT EXISTS memory_counters (
+    user_id VARCHAR(255) NOT NULL DEFAULT '',  -- '' = NULL user_id
+    memory_type VARCHAR(50) NOT NULL,
+    archived BOOLEAN NOT NULL,
+    memory_count BIGINT NOT NULL DEFAULT 0,
+    content_length BIGINT NOT NULL DEFAULT 0,  -- SUM(LENGTH(content))
+    PRIMARY KEY (user_id, memory_type, archived)
+);
+
+CREATE OR REPLACE FUNCTION memory_counters_apply() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO memory_counters AS c (user_id, memory_type, archived, memory_count, content_length)
+        SELECT COALESCE(user_id, ''), memory_type, COALESCE(archived, false),
+               COUNT(*), COALESCE(SUM(LENGTH(content)), 0)
+        FROM new_rows
+        GROUP BY 1, 2, 3
+        ON CONFLICT (user_id, memory_type, archived) DO UPDATE
+        SET memory_count = c.memory_count + EXCLUDED.memory_count,
+            content_length = c.content_length + EXCLUDED.content_length;
+    END IF;
+
+    -- Only rows whose counted columns changed move between groups; updates of
+    -- other columns (duplicate_count, metadata, embeddings) touch no counter row
+    IF TG_OP = 'UPDATE' THEN
+        WITH moved AS (
+            SELECT n.user_id AS new_user, n.memory_type AS new_type, n.archived AS new_archived,
+                   LENGTH(n.content) AS new_length,
+                   o.user_id AS old_user, o.memory_type AS old_type, o.archived AS old_archived,
+                   LENGTH(o.content) AS old_length
+            FROM new_rows n JOIN old_rows o ON o.id = n.id
+            WHERE (n.user_id, n.memory_type, n.archived, LENGTH(n.content))
+                  IS DISTINCT FROM (o.user_id, o.memory_type, o.archived, LENGTH(o.content))
+        )
+        INSERT INTO memory_counters AS c (user_id, memory_type, archived, memory_count, content_length)
+        SELECT user_id, memory_type, archived, SUM(delta_count), SUM(delta_length)
+        FROM (
+            SELECT COALESCE(new_user, '') AS user_id, new_type AS memory_type,
+                   COALESCE(new_archived, false) AS archived, 1 AS delta_count, new_length AS delta_length
+            FROM moved
+            UNION ALL
+            SELECT COALESCE(old_user, ''), old_type, COALESCE(old_archived, false), -1, -old_length
+            FROM moved
+        ) deltas
+        GROUP BY 1, 2, 3
+        HAVING SUM(delta_count) <> 0 OR SUM(delta_length) <> 0
+        ON CONFLICT (user_id, memory_type, archived) DO UPDATE
+        SET memory_count = c.memory_count + EXCLUDED.memory_count,
+            content_length = c.content_length + EXCLUDED.content_length;
+    END IF;
+
+    IF TG_OP = 'DELETE' THEN
+        INSERT INTO memory_counters AS c (user_id, memory_type, archived, memory_count, content_length)
+        SELECT COALESCE(user_id, ''), memory_type, COALESCE(archived, false),
+               -COUNT(*), -COALESCE(SUM(LENGTH(content)), 0)
+        FROM old_rows
+        GROUP BY 1, 2, 3
+        ON CONFLICT (user_id, memory_type, archived) DO UPDATE
+        SET memory_count = c.memory_count + EXCLUDED.memory_count,
+            content_length = c.content_length + EXCLUDED.content_length;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS memories_counters_insert ON memories;
+CREATE TRIGGER memories_counters_insert
+    AFTER INSERT ON memories
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION memory_counters_apply();
+
+DROP TRIGGER IF EXISTS memories_counters_update ON memories;
+-- No UPDATE OF column list: PostgreSQL does not allow one together with
+-- transition tables, so the function filters for rows that changed groups
+CREATE TRIGGER memories_counters_update
+    AFTER UPDATE ON memories
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION memory_counters_apply();
+
+DROP TRIGGER IF EXISTS memories_counters_delete ON memories;
+CREATE TRIGGER memories_counters_delete
+    AFTER DELETE ON memories
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION memory_counters_apply();
+
+-- Rebuild memory_counters from memories; returns the number of drifted groups
+CREATE OR REPLACE FUNCTION reconcile_memory_counters() RETURNS INTEGER AS $$
+DECLARE
+    drifted INTEGER;
+BEGIN
+    LOCK TABLE memories IN SHARE MODE;  -- writers wait; readers continue
+
+    WITH actual AS (
+        SELECT COALESCE(user_id, '') AS user_id, memory_type, COALESCE(archived, false) AS archived,
+               COUNT(*) AS memory_count, COALESCE(SUM(LENGTH(content)), 0) AS content_length
+        FROM memories
+        GROUP BY 1, 2, 3
+    )
+    SELECT COUNT(*) INTO drifted
+    FROM actual a
+    FULL JOIN memory_counters c USING (user_id, memory_type, archived)
+    WHERE COALESCE(a.memory_count, 0) <> COALESCE(c.memory_count, 0)
+       OR COALESCE(a.content_length, 0) <> COALESCE(c.content_length, 0);
+
+    DELETE FROM memory_counters;
+    INSERT INTO memory_counters (user_id, memory_type, archived, memory_count, content_length)
+    SELECT COALESCE(user_id, ''), memory_type, COALESCE(archived, false),
+           COUNT(*), COALESCE(SUM(LENGTH(content)), 0)
+    FROM memories
+    GROUP BY 1, 2, 3;
+
+    RETURN drifted;
+END;
+$$ LANGUAGE plpgsql;
+
+-- embedding_state: re-embedding migration state read by every worker
+-- (015_embedding_state.sql); generation counts completed cutovers
+CREATE TABLE IF NOT EXISTS embedding_state (
+    id BOOLEAN PRIMARY KEY DEFAULT true CHECK (id),
+    generation INTEGER NOT NULL DEFAULT 0,
+    migrating BOOLEAN NOT NULL DEFAULT false,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+INSERT INTO embedding_state (id) VALUES (true) ON CONFLICT (id) DO NOTHING;
+
+COMMENT ON TABLE embedding_state IS 'Embeddingモデル移行の状態（世代・移行中フラグ）';
+
+-- summary_nodes: session → week → month summary rollups (013_summary_tree.sql)
+CREATE TABLE IF NOT EXISTS summary_nodes (
+    id BIGSERIAL PRIMARY KEY,
+    user_id VARCHAR(255) NOT NULL,
+    level VARCHAR(10) NOT NULL CHECK (level IN ('session', 'week', 'month')),
+    period_start TIMESTAMP WITH TIME ZONE NOT NULL,
+    period_end TIMESTAMP WITH TIME ZONE NOT NULL,
+    summary TEXT NOT NULL,
+    embedding VECTOR(1536),
+    parent_id BIGINT REFERENCES summary_nodes(id) ON DELETE SET NULL,  -- NULL = 未集約 / ルート
+    session_id UUID,  -- session ノードのみ
+    source_count INTEGER NOT NULL DEFAULT 0,
+    message_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_summary_nodes_session ON summary_nodes(user_id, session_id)
+    WHERE level = 'session';
+CREATE UNIQUE INDEX IF NOT EXISTS idx_summary_nodes_period ON summary_nodes(user_id, level, period_start)
+    WHERE level <> 'session';
+CREATE INDEX IF NOT EXISTS idx_summary_nodes_parent ON summary_nodes(parent_id);
+CREATE INDEX IF NOT EXISTS idx_summary_nodes_roots ON summary_nodes(user_id, level, period_start)
+    WHERE parent_id IS NULL;
+
+COMMENT ON TABLE summary_nodes IS '階層要約ツリー（session → week → month）';
 
 -- ========================================
 -- 10. User Profiles (ユーザープロファイル)
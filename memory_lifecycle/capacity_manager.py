@@ -5,7 +5,7 @@ Capacity Manager - 容量管理
 """
 
 import asyncpg
-from typing import Dict, Any
+from typing import Any, Dict, Tuple
 import logging
 
 from .compression_service import MemoryCompressionService
@@ -51,23 +51,11 @@ class CapacityManager:
         """
         try:
             async with self.pool.acquire() as conn:
-                # アクティブメモリ数
-                active_count = await conn.fetchval("""
-                    SELECT COUNT(*) FROM memories WHERE user_id = $1
-                """, user_id) or 0
-
-                # アーカイブ数 (table may not exist)
                 try:
-                    archive_count = await conn.fetchval("""
-                        SELECT COUNT(*) FROM memory_archive WHERE user_id = $1
-                    """, user_id) or 0
-                except Exception:
-                    archive_count = 0
-
-                # 合計サイズ（概算）
-                total_size = await conn.fetchval("""
-                    SELECT SUM(LENGTH(content)) FROM memories WHERE user_id = $1
-                """, user_id) or 0
+                    active_count, archive_count, total_size = await self._read_counters(conn, user_id)
+                except asyncpg.UndefinedTableError:
+                    # 011_memory_counters.sql 未適用
+                    active_count, archive_count, total_size = await self._scan_usage(conn, user_id)
 
                 usage_ratio = active_count / self.MEMORY_LIMIT if self.MEMORY_LIMIT > 0 else 0.0
 
@@ -90,6 +78,62 @@ class CapacityManager:
                 "limit": self.MEMORY_LIMIT
             }
 
+    async def _read_counters(self, conn: asyncpg.Connection, user_id: str) -> Tuple[int, int, int]:
+        """トリガー維持のカウンターテーブルから O(1) で取得"""
+        row = await conn.fetchrow("""
+            SELECT COALESCE(SUM(memory_count), 0) AS active_count,
+                   COALESCE(SUM(content_length), 0) AS total_size
+            FROM memory_counters WHERE user_id = $1
+        """, user_id)
+        try:
+            archive_count = await conn.fetchval("""
+                SELECT archive_count FROM memory_archive_counters WHERE user_id = $1
+            """, user_id) or 0
+        except asyncpg.UndefinedTableError:
+            archive_count = 0
+        return int(row["active_count"]), int(archive_count), int(row["total_size"])
+
+    async def _scan_usage(self, conn: asyncpg.Connection, user_id: str) -> Tuple[int, int, int]:
+        """カウンター未導入時のフルスキャン"""
+        # アクティブメモリ数
+        active_count = await conn.fetchval("""
+            SELECT COUNT(*) FROM memories WHERE user_id = $1
+        """, user_id) or 0
+
+        # アーカイブ数 (table may not exist)
+        try:
+            archive_count = await conn.fetchval("""
+                SELECT COUNT(*) FROM memory_archive WHERE user_id = $1
+            """, user_id) or 0
+        except Exception:
+            archive_count = 0
+
+        # 合計サイズ（概算）
+        total_size = await conn.fetchval("""
+            SELECT SUM(LENGTH(content)) FROM memories WHERE user_id = $1
+        """, user_id) or 0
+        return active_count, archive_count, total_size
+
+    async def reconcile_counters(self) -> Dict[str, int]:
+        """
+        カウンターテーブルを実テーブルから再構築
+
+        Returns:
+            Dict: テーブルごとのずれていたグループ数
+        """
+        drifted = {}
+        async with self.pool.acquire() as conn:
+            for name, function in (
+                ("memories", "reconcile_memory_counters"),
+                ("memory_archive", "reconcile_memory_archive_counters"),
+            ):
+                try:
+                    async with conn.transaction():
+                        drifted[name] = await conn.fetchval(f"SELECT {function}()") or 0
+                except asyncpg.UndefinedFunctionError:
+                    drifted[name] = 0
+        return drifted
+
     async def check_and_manage(self, user_id: str) -> Dict[str, Any]:
         """
         容量チェックと自動管理
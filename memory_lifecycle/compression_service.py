@@ -78,9 +78,10 @@ class MemoryCompressionService:
             Dict: 圧縮結果
         """
         async with self.pool.acquire() as conn:
-            # メモリ取得
+            # メモリ取得（embeddingはDB内でコピーするため転送しない）
             memory = await conn.fetchrow("""
-                SELECT * FROM semantic_memories WHERE id = $1
+                SELECT id, user_id, content, importance_score
+                FROM semantic_memories WHERE id = $1
             """, memory_id)
 
             if not memory:
@@ -101,11 +102,12 @@ class MemoryCompressionService:
                      compressed_summary, compression_method, compressed_at,
                      original_size_bytes, compressed_size_bytes, compression_ratio,
                      final_importance_score, archive_reason)
-                VALUES ($1, $2, $3, $4, $5, 'claude_haiku', NOW(), $6, $7, $8, $9, $10)
+                SELECT user_id, id, content, embedding,
+                       $2, 'claude_haiku', NOW(), $3, $4, $5, importance_score, $6
+                FROM semantic_memories WHERE id = $1
                 RETURNING id
-            """, memory['user_id'], memory['id'], memory['content'],
-                memory['embedding'], summary, original_size, compressed_size,
-                compression_ratio, memory['importance_score'], reason)
+            """, memory['id'], summary, original_size, compressed_size,
+                compression_ratio, reason)
 
             # 元メモリ削除
             await conn.execute("DELETE FROM semantic_memories WHERE id = $1", memory_id)
@@ -198,23 +200,18 @@ class MemoryCompressionService:
             str: 復元されたメモリID
         """
         async with self.pool.acquire() as conn:
-            # アーカイブ取得
-            archive = await conn.fetchrow("""
-                SELECT * FROM memory_archive WHERE id = $1
-            """, archive_id)
-
-            if not archive:
-                raise ValueError(f"Archive not found: {archive_id}")
-
-            # メモリ復元
+            # メモリ復元（embeddingはDB内でコピーするため転送しない）
             memory_id = await conn.fetchval("""
                 INSERT INTO semantic_memories
                     (user_id, content, embedding, importance_score, created_at)
-                VALUES ($1, $2, $3, $4, $5)
+                SELECT user_id, original_content, original_embedding,
+                       final_importance_score, compressed_at
+                FROM memory_archive WHERE id = $1
                 RETURNING id
-            """, archive['user_id'], archive['original_content'],
-                archive['original_embedding'], archive['final_importance_score'],
-                archive['compressed_at'])
+            """, archive_id)
+
+            if memory_id is None:
+                raise ValueError(f"Archive not found: {archive_id}")
 
             # アーカイブ削除
             await conn.execute("DELETE FROM memory_archive WHERE id = $1", archive_id)
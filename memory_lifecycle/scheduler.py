@@ -47,6 +47,14 @@ class LifecycleScheduler:
         """日次メンテナンス"""
         logger.info("=== Daily Lifecycle Maintenance Started ===")
 
+        # 0. 統計カウンターの整合性チェック
+        try:
+            drifted = await self.capacity_manager.reconcile_counters()
+            if any(drifted.values()):
+                logger.warning(f"Memory counters drifted and were rebuilt: {drifted}")
+        except Exception as e:
+            logger.error(f"Counter reconciliation failed: {e}")
+
         users = await self.get_all_users()
         logger.info(f"Processing {len(users)} users")
 
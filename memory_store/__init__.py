@@ -8,30 +8,99 @@ for the Resonant Engine memory system.
 from .models import (
     MemoryType,
     SourceType,
+    DedupMode,
     MemoryCreate,
     MemoryRecord,
     MemoryResult,
     MemorySearchQuery,
+    VectorSearchTuning,
 )
+from .dedup import content_hash, normalize_content
 from .embedding import EmbeddingService, MockEmbeddingService, EmbeddingError
-from .repository import MemoryRepository, InMemoryRepository
+from .dimension_reduction import (
+    DimensionReducer,
+    PCAProjection,
+    PrefixTruncation,
+    ReducedEmbeddingService,
+    ReducedVectorIndex,
+    load_reducer,
+)
+from .embedding_cache import (
+    EmbeddingCache,
+    LRUEmbeddingCache,
+    SQLiteEmbeddingStore,
+    create_embedding_cache,
+)
+from .instrumentation import (
+    Instrumentation,
+    InstrumentationEvent,
+    InstrumentationSink,
+    LoggingSink,
+    PrometheusSink,
+    RingBufferSink,
+)
+from .repository import (
+    MemoryRepository,
+    ReembeddableRepository,
+    RestorableRepository,
+    InMemoryRepository,
+)
+from .vectorized_repository import VectorizedMemoryRepository
+from .segmented_repository import SegmentedMemoryRepository
 from .service import MemoryStoreService
+from .ingestion import IngestionQueue, IngestionQueueFull
+from .reembedding import ReembeddingMigration
+from .consolidation import ConsolidationJob
+from .snapshot import MemorySnapshot, SnapshotError, SnapshotReader, SnapshotWriter
 
 __all__ = [
     # Models
     "MemoryType",
     "SourceType",
+    "DedupMode",
     "MemoryCreate",
     "MemoryRecord",
     "MemoryResult",
     "MemorySearchQuery",
+    "VectorSearchTuning",
+    "content_hash",
+    "normalize_content",
     # Services
     "EmbeddingService",
     "MockEmbeddingService",
     "EmbeddingError",
+    "DimensionReducer",
+    "PCAProjection",
+    "PrefixTruncation",
+    "ReducedEmbeddingService",
+    "ReducedVectorIndex",
+    "load_reducer",
+    "EmbeddingCache",
+    "LRUEmbeddingCache",
+    "SQLiteEmbeddingStore",
+    "create_embedding_cache",
+    # Instrumentation
+    "Instrumentation",
+    "InstrumentationEvent",
+    "InstrumentationSink",
+    "LoggingSink",
+    "PrometheusSink",
+    "RingBufferSink",
     # Repository
     "MemoryRepository",
+    "ReembeddableRepository",
+    "RestorableRepository",
     "InMemoryRepository",
+    "VectorizedMemoryRepository",
+    "SegmentedMemoryRepository",
     # Main Service
     "MemoryStoreService",
+    "IngestionQueue",
+    "IngestionQueueFull",
+    "ReembeddingMigration",
+    "ConsolidationJob",
+    "MemorySnapshot",
+    "SnapshotError",
+    "SnapshotReader",
+    "SnapshotWriter",
 ]
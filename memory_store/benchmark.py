@@ -0,0 +1,502 @@
+"""
+Memory Store Benchmarks
+
+Run with:
+    python -m memory_store.benchmark vector-search --sizes 10000 100000 1000000
+    python -m memory_store.benchmark vector-codec
+    python -m memory_store.benchmark vector-quantized --size 100000
+    python -m memory_store.benchmark segment-load --size 100000
+    python -m memory_store.benchmark tenant-search --size 100000 --tenants 1 10 100 1000
+    python -m memory_store.benchmark mock-embeddings --sizes 100000 1000000
+    python -m memory_store.benchmark dimension-reduction --targets 64 128 256 512
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from .dimension_reduction import DimensionReducer, PCAProjection, PrefixTruncation, ReducedVectorIndex
+from .embedding import cosine_similarity, mock_embeddings
+from .quantized_index import QuantizedVectorIndex
+from .segmented_repository import SegmentedMemoryRepository
+from .vector_codec import parse_text_vector, decode_vector, encode_vector
+from .vector_index import VectorIndex
+from .vectorized_repository import VectorizedMemoryRepository
+
+_DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+_DEFAULT_DIMENSIONS = 1536
+_DEFAULT_QUERIES = 20
+_DEFAULT_LIMIT = 10
+_LOAD_CHUNK = 50_000
+# Pure Python baseline is only timed up to this size; larger sizes take minutes
+_PYTHON_BASELINE_MAX = 10_000
+
+
+def _random_vectors(rng: np.random.Generator, count: int, dimensions: int) -> np.ndarray:
+    return rng.standard_normal((count, dimensions), dtype=np.float32)
+
+
+def _time_ms(fn: Callable[[], object], repeats: int) -> List[float]:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def _summarize(timings: List[float]) -> Dict[str, float]:
+    ordered = sorted(timings)
+    p95_index = min(len(ordered) - 1, int(len(ordered) * 0.95))
+    return {
+        "p50_ms": round(statistics.median(ordered), 3),
+        "p95_ms": round(ordered[p95_index], 3),
+    }
+
+
+def bench_vector_search(
+    size: int,
+    dimensions: int = _DEFAULT_DIMENSIONS,
+    queries: int = _DEFAULT_QUERIES,
+    limit: int = _DEFAULT_LIMIT,
+    seed: int = 0,
+) -> Dict[str, float]:
+    """
+    Measure VectorIndex top-k latency for one corpus size.
+
+    A random 80% boolean mask stands in for the type / expiry / archived
+    filters applied by VectorizedMemoryRepository.
+    """
+    rng = np.random.default_rng(seed)
+    index = VectorIndex(dimensions, initial_capacity=size)
+
+    load_start = time.perf_counter()
+    for start in range(0, size, _LOAD_CHUNK):
+        index.add_batch(_random_vectors(rng, min(_LOAD_CHUNK, size - start), dimensions))
+    load_ms = (time.perf_counter() - load_start) * 1000
+
+    mask = rng.random(size) < 0.8
+    query_vectors = _random_vectors(rng, queries, dimensions)
+    query_iter = iter(query_vectors)
+
+    timings = _time_ms(lambda: index.search(next(query_iter), limit, mask=mask), queries)
+    result: Dict[str, float] = {
+        "size": size,
+        "load_ms": round(load_ms, 1),
+        "matrix_mb": round(index.matrix.nbytes / 1024 / 1024, 1),
+        **_summarize(timings),
+    }
+
+    if size <= _PYTHON_BASELINE_MAX:
+        rows = [index.get(i).tolist() for i in range(size)]
+        query = query_vectors[0].tolist()
+
+        def python_search() -> None:
+            scored = [(cosine_similarity(query, row), i) for i, row in enumerate(rows) if mask[i]]
+            scored.sort(reverse=True)
+            scored[:limit]
+
+        baseline = _summarize(_time_ms(python_search, 1))
+        result["python_p50_ms"] = baseline["p50_ms"]
+
+    return result
+
+
+def bench_vector_codec(
+    dimensions: int = _DEFAULT_DIMENSIONS,
+    iterations: int = 1000,
+    seed: int = 0,
+) -> List[Dict[str, float]]:
+    """
+    Compare pgvector text and binary encodings for one vector.
+
+    Text encoding mirrors the previous str(embedding) parameter path; text
+    decoding mirrors parsing pgvector's '[...]' output.
+    """
+    vector = np.random.default_rng(seed).standard_normal(dimensions).tolist()
+    text = str(vector)
+    binary = encode_vector(vector)
+
+    rows = []
+    for name, encode, decode, payload in (
+        ("text", lambda: str(vector), lambda: parse_text_vector(text), text.encode()),
+        ("binary", lambda: encode_vector(vector), lambda: decode_vector(binary), binary),
+    ):
+        encode_us = statistics.median(_time_ms(encode, iterations)) * 1000
+        decode_us = statistics.median(_time_ms(decode, iterations)) * 1000
+        rows.append({
+            "format": name,
+            "payload_bytes": len(payload),
+            "encode_us": round(encode_us, 1),
+            "decode_us": round(decode_us, 1),
+        })
+    return rows
+
+
+def bench_vector_quantized(
+    size: int,
+    dimensions: int = _DEFAULT_DIMENSIONS,
+    queries: int = _DEFAULT_QUERIES,
+    limit: int = _DEFAULT_LIMIT,
+    rerank_candidates: int = 200,
+    seed: int = 0,
+) -> List[Dict[str, float]]:
+    """
+    Compare float32, float16 and int8 indexes on resident size, latency and
+    recall@k against exact search.
+    """
+    rng = np.random.default_rng(seed)
+    exact = VectorIndex(dimensions, initial_capacity=size)
+    quantized = {
+        name: QuantizedVectorIndex(
+            dimensions, size, quantization=name, rerank_candidates=rerank_candidates
+        )
+        for name in ("float16", "int8")
+    }
+    for start in range(0, size, _LOAD_CHUNK):
+        chunk = _random_vectors(rng, min(_LOAD_CHUNK, size - start), dimensions)
+        exact.add_batch(chunk)
+        for index in quantized.values():
+            index.add_batch(chunk)
+
+    query_vectors = _random_vectors(rng, queries, dimensions)
+    rows: List[Dict[str, float]] = []
+
+    query_iter = iter(query_vectors)
+    rows.append({
+        "format": "float32",
+        "matrix_mb": round(exact.matrix.nbytes / 1024 / 1024, 1),
+        **_summarize(_time_ms(lambda: exact.search(next(query_iter), limit), queries)),
+        "recall_at_k": 1.0,
+    })
+
+    for name, index in quantized.items():
+        query_iter = iter(query_vectors)
+        timings = _time_ms(lambda: index.search(next(query_iter), limit), queries)
+        recall = index.measure_recall(query_vectors, limit)
+        rows.append({
+            "format": name,
+            "matrix_mb": round(index.memory_bytes() / 1024 / 1024, 1),
+            **_summarize(timings),
+            "recall_at_k": round(recall["recall_at_k"], 4),
+        })
+    return rows
+
+
+def bench_segment_load(
+    size: int,
+    dimensions: int = _DEFAULT_DIMENSIONS,
+    queries: int = _DEFAULT_QUERIES,
+    limit: int = _DEFAULT_LIMIT,
+    seed: int = 0,
+) -> List[Dict[str, float]]:
+    """
+    Time a warm restart: open an existing segment store and search it.
+
+    The cold row rebuilds the same VectorizedMemoryRepository from scratch,
+    which is what every worker did before segment files.
+    """
+    rng = np.random.default_rng(seed)
+    vectors = _random_vectors(rng, size, dimensions)
+    query_vectors = _random_vectors(rng, queries, dimensions)
+
+    async def fill(repo: VectorizedMemoryRepository) -> None:
+        for i, vector in enumerate(vectors):
+            await repo.insert_memory(f"memory {i}", vector, "longterm", None, {}, None)
+
+    def search_timings(repo: VectorizedMemoryRepository) -> Dict[str, float]:
+        query_iter = iter(query_vectors)
+        return _summarize(_time_ms(
+            lambda: asyncio.run(repo.search_similar(next(query_iter), None, limit, -1.0, False)),
+            queries,
+        ))
+
+    rows: List[Dict[str, float]] = []
+    with tempfile.TemporaryDirectory() as path:
+        writer = SegmentedMemoryRepository(path, dimensions)
+        asyncio.run(fill(writer))
+        writer.close()
+
+        start = time.perf_counter()
+        reader = SegmentedMemoryRepository(path, read_only=True)
+        open_ms = (time.perf_counter() - start) * 1000
+        rows.append({"mode": "segments", "size": size, "open_ms": round(open_ms, 1),
+                     **search_timings(reader)})
+        reader.close()
+
+    start = time.perf_counter()
+    cold = VectorizedMemoryRepository(dimensions, initial_capacity=size, keep_embeddings=False)
+    asyncio.run(fill(cold))
+    open_ms = (time.perf_counter() - start) * 1000
+    rows.append({"mode": "rebuild", "size": size, "open_ms": round(open_ms, 1),
+                 **search_timings(cold)})
+    return rows
+
+
+def bench_tenant_search(
+    size: int,
+    tenants: int,
+    dimensions: int = _DEFAULT_DIMENSIONS,
+    queries: int = _DEFAULT_QUERIES,
+    limit: int = _DEFAULT_LIMIT,
+    seed: int = 0,
+) -> Dict[str, float]:
+    """
+    Compare user-scoped and unscoped search as memories spread over tenants.
+
+    The total row count stays fixed, so each tenant holds size / tenants
+    rows; scoped latency should fall with the shard size while the
+    unscoped scan stays flat.
+    """
+    rng = np.random.default_rng(seed)
+    vectors = _random_vectors(rng, size, dimensions)
+    query_vectors = _random_vectors(rng, queries, dimensions)
+    repo = VectorizedMemoryRepository(dimensions, initial_capacity=size, keep_embeddings=False)
+
+    async def fill() -> None:
+        for i, vector in enumerate(vectors):
+            await repo.insert_memory(
+                f"memory {i}", vector, "longterm", None, {}, None, user_id=f"user-{i % tenants}"
+            )
+
+    asyncio.run(fill())
+    # Build the shards outside the timed loop
+    asyncio.run(repo.search_similar(query_vectors[0], None, limit, -1.0, False, user_id="user-0"))
+
+    def timings(scoped: bool) -> Dict[str, float]:
+        query_iter = iter(range(queries))
+
+        def run() -> None:
+            i = next(query_iter)
+            user_id = f"user-{i % tenants}" if scoped else None
+            asyncio.run(repo.search_similar(query_vectors[i], None, limit, -1.0, False, user_id=user_id))
+
+        return _summarize(_time_ms(run, queries))
+
+    unscoped = timings(scoped=False)
+    scoped = timings(scoped=True)
+    return {
+        "size": size,
+        "tenants": tenants,
+        "rows_per_tenant": size // tenants,
+        "all_p50_ms": unscoped["p50_ms"],
+        "all_p95_ms": unscoped["p95_ms"],
+        "user_p50_ms": scoped["p50_ms"],
+        "user_p95_ms": scoped["p95_ms"],
+    }
+
+
+def bench_mock_embeddings(size: int, dimensions: int = _DEFAULT_DIMENSIONS) -> Dict[str, float]:
+    """
+    Throughput of mock_embeddings() for synthetic corpora.
+
+    Generated in _LOAD_CHUNK batches, as a corpus loader would, so peak
+    memory stays at one chunk.
+    """
+    start = time.perf_counter()
+    for offset in range(0, size, _LOAD_CHUNK):
+        texts = [f"synthetic memory {i}" for i in range(offset, min(offset + _LOAD_CHUNK, size))]
+        mock_embeddings(texts, dimensions)
+    total_ms = (time.perf_counter() - start) * 1000
+    return {
+        "size": size,
+        "dimensions": dimensions,
+        "total_ms": round(total_ms, 1),
+        "us_per_text": round(total_ms * 1000 / size, 2),
+    }
+
+
+def _low_rank_vectors(
+    rng: np.random.Generator,
+    count: int,
+    dimensions: int,
+    rank: int,
+) -> np.ndarray:
+    """Synthetic corpus with a decaying spectrum over rank latent directions plus noise"""
+    basis, _ = np.linalg.qr(rng.standard_normal((dimensions, rank)))
+    spectrum = 1.0 / np.sqrt(np.arange(1, rank + 1))
+    latent = rng.standard_normal((count, rank)) * spectrum
+    noise = rng.standard_normal((count, dimensions)) * (0.05 / np.sqrt(dimensions))
+    return (latent @ basis.T.astype(np.float32) + noise).astype(np.float32)
+
+
+def bench_dimension_reduction(
+    size: int,
+    targets: List[int],
+    dimensions: int = _DEFAULT_DIMENSIONS,
+    queries: int = _DEFAULT_QUERIES,
+    limit: int = _DEFAULT_LIMIT,
+    rerank_candidates: int = 200,
+    corpus_path: Optional[str] = None,
+    rank: int = 128,
+    fit_sample: int = 20_000,
+    seed: int = 0,
+) -> List[Dict[str, float]]:
+    """
+    Recall@k vs. latency of PCA and prefix reduction at each target dimension.
+
+    Uses corpus_path (.npy embeddings, e.g. an export of memories.embedding)
+    when given, otherwise a synthetic low-rank corpus. Prefix truncation is
+    only meaningful for Matryoshka-trained embeddings, so on the synthetic
+    corpus it serves as a lower bound. Queries are perturbed corpus rows.
+    """
+    rng = np.random.default_rng(seed)
+    if corpus_path:
+        corpus = np.load(corpus_path, mmap_mode="r")
+        size = min(size, corpus.shape[0])
+        corpus = np.asarray(corpus[:size], dtype=np.float32)
+        dimensions = corpus.shape[1]
+    else:
+        corpus = _low_rank_vectors(rng, size, dimensions, rank)
+
+    picks = rng.choice(size, queries, replace=size < queries)
+    query_vectors = corpus[picks] + rng.standard_normal((queries, dimensions), dtype=np.float32) * (
+        0.1 * np.linalg.norm(corpus[picks], axis=1, keepdims=True) / np.sqrt(dimensions)
+    )
+
+    exact = VectorIndex(dimensions, initial_capacity=size)
+    exact.add_batch(corpus)
+    query_iter = iter(query_vectors)
+    rows: List[Dict[str, float]] = [{
+        "method": "full",
+        "dims": dimensions,
+        "rerank": 0,
+        "matrix_mb": round(exact.matrix.nbytes / 1024 / 1024, 1),
+        **_summarize(_time_ms(lambda: exact.search(next(query_iter), limit), queries)),
+        "recall_at_k": 1.0,
+    }]
+
+    for target in targets:
+        if target >= dimensions:
+            continue
+        reducers: Dict[str, DimensionReducer] = {
+            "pca": PCAProjection.fit(corpus, target, sample_size=fit_sample, seed=seed),
+            "prefix": PrefixTruncation(target),
+        }
+        for name, reducer in reducers.items():
+            for rerank in (0, rerank_candidates):
+                index = ReducedVectorIndex(
+                    reducer, dimensions, initial_capacity=size, rerank_candidates=rerank
+                )
+                index.add_batch(corpus)
+                query_iter = iter(query_vectors)
+                timings = _time_ms(lambda: index.search(next(query_iter), limit), queries)
+                recall = index.measure_recall(query_vectors, limit)
+                rows.append({
+                    "method": name,
+                    "dims": target,
+                    "rerank": rerank,
+                    "matrix_mb": round(index.memory_bytes() / 1024 / 1024, 1),
+                    **_summarize(timings),
+                    "recall_at_k": round(recall["recall_at_k"], 4),
+                })
+    return rows
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse CLI arguments"""
+    parser = argparse.ArgumentParser(description="Memory Store benchmarks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    vector = subparsers.add_parser("vector-search", help="In-process vector search latency")
+    vector.add_argument("--sizes", type=int, nargs="+", default=list(_DEFAULT_SIZES))
+    vector.add_argument("--dimensions", type=int, default=_DEFAULT_DIMENSIONS)
+    vector.add_argument("--queries", type=int, default=_DEFAULT_QUERIES)
+    vector.add_argument("--limit", type=int, default=_DEFAULT_LIMIT)
+
+    codec = subparsers.add_parser("vector-codec", help="pgvector text vs binary encoding")
+    codec.add_argument("--dimensions", type=int, default=_DEFAULT_DIMENSIONS)
+    codec.add_argument("--iterations", type=int, default=1000)
+
+    quantized = subparsers.add_parser(
+        "vector-quantized", help="int8 / float16 index size, latency and recall@k"
+    )
+    quantized.add_argument("--size", type=int, default=100_000)
+    quantized.add_argument("--dimensions", type=int, default=_DEFAULT_DIMENSIONS)
+    quantized.add_argument("--queries", type=int, default=_DEFAULT_QUERIES)
+    quantized.add_argument("--limit", type=int, default=_DEFAULT_LIMIT)
+    quantized.add_argument("--rerank-candidates", type=int, default=200)
+
+    segments = subparsers.add_parser("segment-load", help="Warm restart from segment files")
+    segments.add_argument("--size", type=int, default=100_000)
+    segments.add_argument("--dimensions", type=int, default=_DEFAULT_DIMENSIONS)
+    segments.add_argument("--queries", type=int, default=_DEFAULT_QUERIES)
+    segments.add_argument("--limit", type=int, default=_DEFAULT_LIMIT)
+
+    tenant = subparsers.add_parser("tenant-search", help="User-scoped search as tenants grow")
+    tenant.add_argument("--size", type=int, default=100_000)
+    tenant.add_argument("--tenants", type=int, nargs="+", default=[1, 10, 100, 1000])
+    tenant.add_argument("--dimensions", type=int, default=_DEFAULT_DIMENSIONS)
+    tenant.add_argument("--queries", type=int, default=_DEFAULT_QUERIES)
+    tenant.add_argument("--limit", type=int, default=_DEFAULT_LIMIT)
+
+    mock = subparsers.add_parser("mock-embeddings", help="Synthetic corpus embedding throughput")
+    mock.add_argument("--sizes", type=int, nargs="+", default=[100_000])
+    mock.add_argument("--dimensions", type=int, default=_DEFAULT_DIMENSIONS)
+
+    reduction = subparsers.add_parser(
+        "dimension-reduction", help="PCA / prefix reduction recall@k vs. latency"
+    )
+    reduction.add_argument("--size", type=int, default=100_000)
+    reduction.add_argument("--targets", type=int, nargs="+", default=[64, 128, 256, 512])
+    reduction.add_argument("--dimensions", type=int, default=_DEFAULT_DIMENSIONS)
+    reduction.add_argument("--queries", type=int, default=_DEFAULT_QUERIES)
+    reduction.add_argument("--limit", type=int, default=_DEFAULT_LIMIT)
+    reduction.add_argument("--rerank-candidates", type=int, default=200)
+    reduction.add_argument("--corpus", default=None, help=".npy embeddings (default: synthetic)")
+    reduction.add_argument("--rank", type=int, default=128, help="Synthetic corpus rank")
+
+    return parser.parse_args(argv)
+
+
+def _print_rows(rows: List[Dict[str, float]]) -> None:
+    if not rows:
+        return
+    columns: List[str] = []
+    for row in rows:
+        columns.extend(key for key in row if key not in columns)
+    print("  ".join(f"{column:>14}" for column in columns))
+    for row in rows:
+        print("  ".join(f"{row.get(column, '-'):>14}" for column in columns))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """CLI entry point"""
+    args = parse_args(argv)
+
+    if args.command == "vector-search":
+        _print_rows([
+            bench_vector_search(size, args.dimensions, args.queries, args.limit)
+            for size in args.sizes
+        ])
+    elif args.command == "vector-codec":
+        _print_rows(bench_vector_codec(args.dimensions, args.iterations))
+    elif args.command == "vector-quantized":
+        _print_rows(bench_vector_quantized(
+            args.size, args.dimensions, args.queries, args.limit, args.rerank_candidates
+        ))
+    elif args.command == "segment-load":
+        _print_rows(bench_segment_load(args.size, args.dimensions, args.queries, args.limit))
+    elif args.command == "tenant-search":
+        _print_rows([
+            bench_tenant_search(args.size, tenants, args.dimensions, args.queries, args.limit)
+            for tenants in args.tenants
+        ])
+    elif args.command == "mock-embeddings":
+        _print_rows([bench_mock_embeddings(size, args.dimensions) for size in args.sizes])
+    elif args.command == "dimension-reduction":
+        _print_rows(bench_dimension_reduction(
+            args.size, args.targets, args.dimensions, args.queries, args.limit,
+            args.rerank_candidates, args.corpus, args.rank,
+        ))
+
+
+if __name__ == "__main__":
+    main()
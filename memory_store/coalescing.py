@@ -0,0 +1,137 @@
+"""
+Single-Flight Request Coalescing
+
+Concurrent requests for the same key share one in-flight call, so
+identical embedding requests issued at the same time hit the provider once.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class _Flight:
+    """One detached call and the number of callers awaiting it"""
+
+    __slots__ = ("task", "keys", "waiters")
+
+    def __init__(self, task: asyncio.Future, keys: List[str]) -> None:
+        self.task = task
+        self.keys = keys
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Deduplicates concurrent work by key.
+
+    The first caller for a key (the leader) starts the work in a detached
+    task; every caller, the leader included, awaits it through
+    asyncio.shield. Cancelling one caller therefore never cancels the
+    others; the work itself is cancelled only when its last waiter leaves.
+    Failures propagate to every waiter. Nothing is cached once the work
+    finishes.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: Dict[str, Tuple[_Flight, int]] = {}
+        self._leaders = 0
+        self._deduplicated = 0
+
+    def _launch(self, keys: List[str], fn: Callable[[List[str]], Awaitable[List[Any]]]) -> _Flight:
+        """Start fn(keys) in a detached task and register it for each key"""
+        flight = _Flight(asyncio.ensure_future(fn(keys)), keys)
+        for i, key in enumerate(keys):
+            self._inflight[key] = (flight, i)
+        self._leaders += len(keys)
+
+        def done(task: asyncio.Future) -> None:
+            self._forget(flight)
+            if not task.cancelled():
+                # Mark retrieved so a failure nobody awaited is not logged as lost
+                task.exception()
+
+        flight.task.add_done_callback(done)
+        return flight
+
+    def _forget(self, flight: _Flight) -> None:
+        """Unregister the keys still pointing at flight"""
+        for key in flight.keys:
+            entry = self._inflight.get(key)
+            if entry is not None and entry[0] is flight:
+                del self._inflight[key]
+
+    async def _wait(self, flight: _Flight) -> List[Any]:
+        """Await a flight without cancelling it for other waiters"""
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                # Last waiter gone: stop the work and let later callers start afresh
+                self._forget(flight)
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+    async def do_many(
+        self,
+        keys: Sequence[str],
+        fn: Callable[[List[str]], Awaitable[List[T]]],
+    ) -> List[T]:
+        """
+        Resolve keys, sharing calls already in flight for any of them.
+
+        Keys nobody is working on are passed to one fn call.
+
+        Args:
+            keys: Distinct deduplication keys
+            fn: Coroutine factory called with the keys to compute; returns
+                their results in the same order
+
+        Returns:
+            Results in key order
+        """
+        joined: Dict[str, Tuple[_Flight, int]] = {}
+        owned: List[str] = []
+        for key in keys:
+            entry = self._inflight.get(key)
+            if entry is not None:
+                joined[key] = entry
+                self._deduplicated += 1
+            else:
+                owned.append(key)
+        if owned:
+            flight = self._launch(owned, fn)
+            joined.update((key, (flight, i)) for i, key in enumerate(owned))
+
+        flights = list({id(flight): flight for flight, _ in joined.values()}.values())
+        outcomes = await asyncio.gather(*(self._wait(flight) for flight in flights))
+        results = {id(flight): outcome for flight, outcome in zip(flights, outcomes)}
+        return [results[id(joined[key][0])][joined[key][1]] for key in keys]
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run fn once for all concurrent callers with the same key.
+
+        Args:
+            key: Deduplication key
+            fn: Coroutine factory executed by the leader
+
+        Returns:
+            The shared result
+        """
+        async def run(keys: List[str]) -> List[T]:
+            return [await fn()]
+
+        return (await self.do_many([key], run))[0]
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get coalescing statistics"""
+        return {
+            "inflight": len(self._inflight),
+            "leaders": self._leaders,
+            "deduplicated": self._deduplicated,
+        }
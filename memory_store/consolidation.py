@@ -0,0 +1,361 @@
+"""
+Consolidation - Near-duplicate Memory Merging
+
+Long-running users restate the same fact many times ("user prefers
+Python"); each copy takes a search slot that a different memory could
+have used. ConsolidationJob finds clusters of near-identical memories per
+user and memory type and folds each cluster into one canonical memory:
+
+- canonical: the cluster medoid (highest total similarity to the others)
+- canonical metadata["consolidated_from"]: ids of the merged memories
+- canonical duplicate_count: sum of the members' duplicate_count plus one
+  per merged memory; numeric metadata["access_count"] values are summed
+- merged memories are archived with metadata["consolidated_into"]
+
+Neighbours are found with blocked search, not all pairs: random-hyperplane
+signatures (several independent tables) put similar vectors in the same
+bucket, and only vectors sharing a bucket are compared.
+
+    job = ConsolidationJob(service, similarity_threshold=0.95)
+    report = await job.run(dry_run=True)   # what would be merged
+    report = await job.run()               # merge
+
+Run it as an offline maintenance job against the database:
+
+    python -m memory_store.consolidation --user u1 --dry-run
+    python -m memory_store.consolidation --all-users --max-clusters 1000
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .instrumentation import elapsed_ms
+from .models import MemoryRecord
+from .service import MemoryStoreService
+from .vector_index import normalize_rows
+
+logger = logging.getLogger(__name__)
+
+# Rows compared per step inside one bucket
+_BLOCK_ROWS = 256
+
+
+def near_duplicate_clusters(
+    vectors: np.ndarray,
+    similarity_threshold: float,
+    hash_bits: int = 12,
+    hash_tables: int = 8,
+    seed: int = 0,
+) -> List[List[int]]:
+    """
+    Group rows whose cosine similarity is at least similarity_threshold.
+
+    Each of hash_tables tables buckets rows by the signs of hash_bits random
+    projections; pairs are only scored within a bucket and linked with
+    union-find. Pairs above a high threshold share a bucket in at least one
+    table with high probability, so recall stays high while the work grows
+    with bucket sizes instead of rows squared.
+
+    Returns:
+        Clusters of two or more row numbers, each ascending, ordered by
+        their first row
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    count = vectors.shape[0]
+    if count < 2:
+        return []
+
+    normalized = normalize_rows(vectors)
+    parent = np.arange(count)
+
+    def find(row: int) -> int:
+        root = row
+        while parent[root] != root:
+            root = parent[root]
+        while parent[row] != root:
+            parent[row], row = root, parent[row]
+        return root
+
+    planes = np.random.default_rng(seed).standard_normal(
+        (hash_tables, hash_bits, normalized.shape[1])
+    ).astype(np.float32)
+    weights = 1 << np.arange(hash_bits, dtype=np.int64)
+
+    for table in planes:
+        codes = (normalized @ table.T > 0).astype(np.int64) @ weights
+        order = np.argsort(codes, kind="stable")
+        boundaries = np.flatnonzero(np.diff(codes[order])) + 1
+        for bucket in np.split(order, boundaries):
+            if bucket.size < 2:
+                continue
+            members = normalized[bucket]
+            for start in range(0, bucket.size, _BLOCK_ROWS):
+                sims = members[start:start + _BLOCK_ROWS] @ members.T
+                left, right = np.nonzero(sims >= similarity_threshold)
+                for i, j in zip((left + start).tolist(), right.tolist()):
+                    if i < j:
+                        a, b = find(int(bucket[i])), find(int(bucket[j]))
+                        if a != b:
+                            parent[max(a, b)] = min(a, b)
+
+    clusters: Dict[int, List[int]] = {}
+    for row in range(count):
+        clusters.setdefault(find(row), []).append(row)
+    return [rows for rows in clusters.values() if len(rows) > 1]
+
+
+class ConsolidationJob:
+    """
+    近似重複記憶の統合ジョブ
+
+    ユーザー・記憶タイプごとに類似度の高い記憶をクラスタリングし、
+    各クラスタを代表記憶1件に統合して残りをアーカイブする。
+    dry_run では変更せずに統合計画だけを返す。
+    """
+
+    def __init__(
+        self,
+        service: MemoryStoreService,
+        similarity_threshold: float = 0.95,
+        scan_batch_size: int = 1000,
+        max_memories_per_user: int = 50000,
+        merge_batch_size: int = 100,
+        pause_seconds: float = 0.0,
+        hash_bits: int = 12,
+        hash_tables: int = 8,
+        report_limit: int = 100,
+    ) -> None:
+        """
+        Args:
+            service: 対象の MemoryStoreService
+            similarity_threshold: 同一とみなすコサイン類似度
+            scan_batch_size: 記憶読み出しの1ページの件数
+            max_memories_per_user: 1回の実行で1ユーザーから読む上限（超過分は次回）
+            merge_batch_size: 休止を挟むまでに統合するクラスタ数
+            pause_seconds: 統合バッチ間の待機秒数（DB 負荷の抑制）
+            hash_bits: ブロッキング用ハッシュのビット数（大きいほどバケットが小さい）
+            hash_tables: ハッシュテーブル数（大きいほど取りこぼしが減る）
+            report_limit: レポートに含めるクラスタ数の上限
+        """
+        if not 0.0 < similarity_threshold <= 1.0:
+            raise ValueError("similarity_threshold must be in (0, 1]")
+        self.service = service
+        self.similarity_threshold = similarity_threshold
+        self.scan_batch_size = scan_batch_size
+        self.max_memories_per_user = max_memories_per_user
+        self.merge_batch_size = merge_batch_size
+        self.pause_seconds = pause_seconds
+        self.hash_bits = hash_bits
+        self.hash_tables = hash_tables
+        self.report_limit = report_limit
+
+    async def _load_user(self, user_id: Optional[str]) -> List[MemoryRecord]:
+        records: List[MemoryRecord] = []
+        after_id = 0
+        while len(records) < self.max_memories_per_user:
+            limit = min(self.scan_batch_size, self.max_memories_per_user - len(records))
+            page = await self.service.repository.scan_user_memories(user_id, after_id, limit)
+            if not page:
+                break
+            records.extend(page)
+            after_id = page[-1].id
+        return records
+
+    def plan(self, records: Sequence[MemoryRecord]) -> List[Dict[str, Any]]:
+        """
+        Clusters to merge among records (one user's memories).
+
+        Memories are only grouped with memories of the same type. Members
+        below similarity_threshold to the chosen canonical memory (possible
+        through chains of neighbours) are left out.
+        """
+        by_type: Dict[str, List[MemoryRecord]] = {}
+        for record in records:
+            if record.embedding:
+                by_type.setdefault(record.memory_type.value, []).append(record)
+
+        clusters = []
+        for group in by_type.values():
+            vectors = normalize_rows(np.asarray([r.embedding for r in group], dtype=np.float32))
+            for rows in near_duplicate_clusters(
+                vectors, self.similarity_threshold, self.hash_bits, self.hash_tables
+            ):
+                sims = vectors[rows] @ vectors[rows].T
+                canonical = int(np.argmax(sims.sum(axis=1)))
+                keep = [
+                    i for i in range(len(rows))
+                    if i != canonical and sims[canonical, i] >= self.similarity_threshold
+                ]
+                if not keep:
+                    continue
+                clusters.append(self._cluster(
+                    group[rows[canonical]],
+                    [group[rows[i]] for i in keep],
+                    float(sims[canonical, keep].min()),
+                ))
+        return clusters
+
+    @staticmethod
+    def _cluster(
+        canonical: MemoryRecord,
+        duplicates: List[MemoryRecord],
+        min_similarity: float,
+    ) -> Dict[str, Any]:
+        members = [canonical, *duplicates]
+        metadata = dict(canonical.metadata)
+        provenance = {r.id for r in duplicates}
+        for record in members:
+            provenance.update(record.metadata.get("consolidated_from", []))
+        metadata["consolidated_from"] = sorted(provenance)
+        access_counts = [
+            r.metadata["access_count"] for r in members
+            if isinstance(r.metadata.get("access_count"), (int, float))
+        ]
+        if access_counts:
+            metadata["access_count"] = sum(access_counts)
+        return {
+            "user_id": canonical.user_id,
+            "memory_type": canonical.memory_type.value,
+            "canonical_id": canonical.id,
+            "canonical_content": canonical.content,
+            "duplicate_ids": [r.id for r in duplicates],
+            "min_similarity": round(min_similarity, 4),
+            "duplicate_count": sum(r.duplicate_count for r in members) + len(duplicates),
+            "metadata": metadata,
+        }
+
+    async def run(
+        self,
+        user_ids: Optional[List[Optional[str]]] = None,
+        dry_run: bool = False,
+        max_clusters: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Consolidate each user's near-duplicate memories.
+
+        Args:
+            user_ids: Users to process (None = every user with memories;
+                None inside the list = memories without a user)
+            dry_run: Only report what would be merged
+            max_clusters: Stop after merging this many clusters
+
+        Returns:
+            {"dry_run", "users", "scanned", "clusters", "archived",
+             "truncated_users", "elapsed_ms", "report": [cluster, ...]}
+        """
+        start_time = time.perf_counter()
+        repository = self.service.repository
+        if user_ids is None:
+            user_ids = await repository.list_memory_users()
+
+        report: List[Dict[str, Any]] = []
+        scanned = 0
+        cluster_count = 0
+        archived = 0
+        truncated: List[Optional[str]] = []
+
+        for user_id in user_ids:
+            if max_clusters is not None and cluster_count >= max_clusters:
+                break
+            records = await self._load_user(user_id)
+            scanned += len(records)
+            if len(records) >= self.max_memories_per_user:
+                truncated.append(user_id)
+
+            for cluster in self.plan(records):
+                if max_clusters is not None and cluster_count >= max_clusters:
+                    break
+                cluster_count += 1
+                if len(report) < self.report_limit:
+                    report.append({k: v for k, v in cluster.items() if k != "metadata"})
+                if dry_run:
+                    archived += len(cluster["duplicate_ids"])
+                    continue
+
+                archived += await repository.merge_memories(
+                    cluster["canonical_id"],
+                    cluster["duplicate_ids"],
+                    cluster["metadata"],
+                    cluster["duplicate_count"],
+                )
+                if cluster_count % self.merge_batch_size == 0:
+                    await asyncio.sleep(self.pause_seconds)
+
+        latency_ms = elapsed_ms(start_time)
+        self.service.instrumentation.record(
+            "consolidate", latency_ms, archived,
+            dry_run=dry_run, users=len(user_ids), clusters=cluster_count,
+        )
+        logger.info(
+            f"Consolidation {'plan' if dry_run else 'run'}: {cluster_count} clusters, "
+            f"{archived} memories {'to archive' if dry_run else 'archived'}"
+        )
+        return {
+            "dry_run": dry_run,
+            "users": len(user_ids),
+            "scanned": scanned,
+            "clusters": cluster_count,
+            "archived": archived,
+            "truncated_users": truncated,
+            "elapsed_ms": round(latency_ms, 2),
+            "report": report,
+        }
+
+
+async def _run_cli(args: argparse.Namespace) -> Dict[str, Any]:
+    import asyncpg
+
+    from .embedding import MockEmbeddingService
+    from .postgres_repository import PostgresMemoryRepository
+    from .vector_codec import init_vector_codec
+
+    pool = await asyncpg.create_pool(args.dsn, init=init_vector_codec)
+    try:
+        # Consolidation compares stored embeddings only; nothing is embedded
+        service = MemoryStoreService(
+            repository=PostgresMemoryRepository(pool),
+            embedding_service=MockEmbeddingService(),
+        )
+        job = ConsolidationJob(
+            service,
+            similarity_threshold=args.threshold,
+            pause_seconds=args.pause_seconds,
+        )
+        return await job.run(
+            user_ids=None if args.all_users else args.users,
+            dry_run=args.dry_run,
+            max_clusters=args.max_clusters,
+        )
+    finally:
+        await pool.close()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Consolidate near-duplicate memories in the database"""
+    parser = argparse.ArgumentParser(description="Merge near-duplicate memories")
+    parser.add_argument("--dsn", default=os.getenv("DATABASE_URL"), help="Default: $DATABASE_URL")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--user", dest="users", action="append", help="User to process (repeatable)")
+    target.add_argument("--all-users", action="store_true", help="Process every user with memories")
+    parser.add_argument("--threshold", type=float, default=0.95)
+    parser.add_argument("--max-clusters", type=int, default=None)
+    parser.add_argument("--pause-seconds", type=float, default=0.1)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args(argv)
+    if not args.dsn:
+        parser.error("--dsn or DATABASE_URL is required")
+
+    logging.basicConfig(level=logging.INFO)
+    result = asyncio.run(_run_cli(args))
+    print(json.dumps(result, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Memory Counters - Maintained Memory Statistics
+
+In-process counterpart of the memory_counters table: per-user, per-type,
+archived counts and content lengths updated on insert / archive / delete,
+so statistics are dictionary lookups instead of scans.
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .models import MemoryRecord, MemoryType
+
+# (user_id or "", memory_type, archived)
+_Key = Tuple[str, str, bool]
+
+
+class MemoryCounters:
+    """
+    Counts and content lengths grouped like the memory_counters table.
+
+    user_id None is stored as "" (shared memories). Per-type totals are kept
+    separately so global type counts do not depend on the number of users.
+    """
+
+    def __init__(self) -> None:
+        self._groups: Dict[_Key, List[int]] = {}
+        self._by_user: Dict[str, Dict[Tuple[str, bool], List[int]]] = {}
+        self._totals: Dict[Tuple[str, bool], List[int]] = {}
+
+    @classmethod
+    def from_records(cls, records: Iterable[MemoryRecord]) -> "MemoryCounters":
+        counters = cls()
+        for record in records:
+            counters.add(record)
+        return counters
+
+    def apply(
+        self,
+        user_id: Optional[str],
+        memory_type: str,
+        archived: bool,
+        count: int,
+        length: int,
+    ) -> None:
+        """Add a (possibly negative) delta to one group"""
+        user = user_id or ""
+        for table, key in (
+            (self._groups, (user, memory_type, archived)),
+            (self._by_user.setdefault(user, {}), (memory_type, archived)),
+            (self._totals, (memory_type, archived)),
+        ):
+            entry = table.setdefault(key, [0, 0])
+            entry[0] += count
+            entry[1] += length
+            if entry[0] == 0 and entry[1] == 0:
+                del table[key]
+
+    def add(self, record: MemoryRecord, sign: int = 1) -> None:
+        """Count (sign=1) or uncount (sign=-1) a record in its current state"""
+        self.apply(
+            record.user_id,
+            record.memory_type.value,
+            record.is_archived,
+            sign,
+            sign * len(record.content),
+        )
+
+    def count(self, memory_type: str, archived: bool = False) -> int:
+        """Count for one type across all users"""
+        entry = self._totals.get((memory_type, archived))
+        return entry[0] if entry else 0
+
+    def type_counts(self, user_id: Optional[str] = None) -> Dict[str, int]:
+        """
+        Non-archived counts per memory type.
+
+        With user_id, counts that user's memories plus shared ones
+        (user_id None), matching get_user_memory_stats.
+        """
+        if user_id is None:
+            return {t.value: self.count(t.value) for t in MemoryType}
+        counts = {t.value: 0 for t in MemoryType}
+        for user in {user_id, ""}:
+            for (memory_type, archived), (count, _) in self._by_user.get(user, {}).items():
+                if not archived:
+                    counts[memory_type] = counts.get(memory_type, 0) + count
+        return counts
+
+    def user_stats(self, user_id: str) -> Dict[str, int]:
+        """Same keys as PostgresMemoryRepository.get_user_memory_stats"""
+        stats = {
+            "total_count": 0,
+            "active_count": 0,
+            "archive_count": 0,
+            "working_count": 0,
+            "longterm_count": 0,
+            "total_size_bytes": 0,
+        }
+        for user in {user_id, ""}:
+            for (memory_type, archived), (count, length) in self._by_user.get(user, {}).items():
+                stats["total_count"] += count
+                stats["archive_count" if archived else "active_count"] += count
+                stats["total_size_bytes"] += length
+                if memory_type in (MemoryType.WORKING.value, MemoryType.LONGTERM.value):
+                    stats[f"{memory_type}_count"] += count
+        return stats
+
+    def snapshot(self) -> Dict[_Key, Tuple[int, int]]:
+        """Copy of every group as (count, content_length)"""
+        return {key: (entry[0], entry[1]) for key, entry in self._groups.items()}
+
+    def drift(self, other: "MemoryCounters") -> int:
+        """Number of groups whose values differ from other"""
+        mine, theirs = self.snapshot(), other.snapshot()
+        return sum(1 for key in mine.keys() | theirs.keys() if mine.get(key) != theirs.get(key))
@@ -0,0 +1,32 @@
+"""
+Content Deduplication - Normalized Content Hashes
+
+Memories with the same normalized content, memory type and user share a
+DuplicateKey. Repositories index the hash so MemoryStoreService can reuse
+an existing embedding (or just count the repeat) instead of embedding and
+storing the same text again.
+"""
+
+import hashlib
+import re
+import unicodedata
+from typing import Optional, Tuple
+
+# (content_hash, memory_type, user_id)
+DuplicateKey = Tuple[str, str, Optional[str]]
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_content(content: str) -> str:
+    """NFKC-normalize and collapse whitespace (case is preserved)"""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", content)).strip()
+
+
+def content_hash(content: str) -> str:
+    """SHA-256 hex digest of the normalized content"""
+    return hashlib.sha256(normalize_content(content).encode("utf-8")).hexdigest()
+
+
+def duplicate_key(content: str, memory_type: str, user_id: Optional[str]) -> DuplicateKey:
+    return content_hash(content), memory_type, user_id
@@ -0,0 +1,356 @@
+"""
+Dimension Reduction - Compact Embeddings for Faster Search
+
+Every stored vector costs dimensions x 4 bytes and every similarity a
+dot product of the same length. A DimensionReducer maps full embeddings
+to a shorter space:
+
+- PCAProjection: principal components fitted offline on the local corpus
+- PrefixTruncation: the leading coordinates, for models trained with
+  Matryoshka representation (text-embedding-3-*; the API can also return
+  them directly, see OpenAIEmbeddingService(dimensions=...))
+
+Two ways to use one:
+
+- ReducedVectorIndex (VectorizedMemoryRepository(reducer=...)) searches
+  the compact matrix and optionally re-scores the top candidates against
+  full-dimension vectors kept in a memory-mapped file.
+- ReducedEmbeddingService stores and searches only the compact vectors,
+  e.g. in pgvector; move an existing table over with ReembeddingMigration.
+
+Fit and save a projection:
+
+    python -m memory_store.dimension_reduction --input corpus.npy \\
+        --dimensions 256 --output pca256.npz
+
+Report recall vs. latency at several target dimensions:
+
+    python -m memory_store.benchmark dimension-reduction --targets 64 128 256 512
+"""
+
+import argparse
+from abc import ABC, abstractmethod
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .embedding import EmbeddingService
+from .quantized_index import ArrayVectorStore, FileVectorStore, RerankingVectorIndex
+from .vector_index import VectorIndex, candidate_scores, normalize_rows, top_k
+
+# Rows accumulated per step of the PCA covariance
+_FIT_CHUNK = 8192
+
+
+class DimensionReducer(ABC):
+    """Maps normalized full-dimension embeddings to output_dimensions"""
+
+    output_dimensions: int
+
+    @abstractmethod
+    def transform(self, vectors: np.ndarray) -> np.ndarray:
+        """Reduce a 2-D array of vectors to float32 (len(vectors), output_dimensions)"""
+        pass
+
+    def transform_one(self, vector: Sequence[float]) -> List[float]:
+        """Reduce a single vector"""
+        return self.transform(np.asarray([vector], dtype=np.float32))[0].tolist()
+
+    @abstractmethod
+    def save(self, path: str) -> None:
+        """Write the reducer to an .npz file (see load_reducer)"""
+        pass
+
+
+class PrefixTruncation(DimensionReducer):
+    """Keep the first output_dimensions coordinates (Matryoshka embeddings)"""
+
+    def __init__(self, output_dimensions: int) -> None:
+        if output_dimensions < 1:
+            raise ValueError("output_dimensions must be at least 1")
+        self.output_dimensions = output_dimensions
+
+    def transform(self, vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.shape[1] < self.output_dimensions:
+            raise ValueError(
+                f"Cannot truncate {vectors.shape[1]} dimensions to {self.output_dimensions}"
+            )
+        return np.ascontiguousarray(vectors[:, : self.output_dimensions])
+
+    def save(self, path: str) -> None:
+        np.savez(path, kind="prefix", output_dimensions=self.output_dimensions)
+
+
+class PCAProjection(DimensionReducer):
+    """
+    Projection onto the top principal components of a corpus.
+
+    Vectors are normalized before centering, so the projection works in
+    the same space as cosine similarity.
+    """
+
+    def __init__(
+        self,
+        mean: np.ndarray,
+        components: np.ndarray,
+        explained_variance_ratio: Optional[np.ndarray] = None,
+    ) -> None:
+        """
+        Args:
+            mean: Corpus mean (input_dimensions,)
+            components: Orthonormal rows (output_dimensions, input_dimensions)
+            explained_variance_ratio: Variance share of each component
+        """
+        self.mean = np.asarray(mean, dtype=np.float32)
+        self.components = np.asarray(components, dtype=np.float32)
+        self.input_dimensions = self.components.shape[1]
+        self.output_dimensions = self.components.shape[0]
+        if explained_variance_ratio is None:
+            explained_variance_ratio = np.full(self.output_dimensions, np.nan)
+        self.explained_variance_ratio = np.asarray(explained_variance_ratio, dtype=np.float64)
+
+    @classmethod
+    def fit(
+        cls,
+        vectors: np.ndarray,
+        output_dimensions: int,
+        sample_size: Optional[int] = None,
+        seed: int = 0,
+    ) -> "PCAProjection":
+        """
+        Fit principal components.
+
+        The covariance is accumulated _FIT_CHUNK rows at a time, so memory
+        stays at one chunk plus a dimensions x dimensions matrix.
+
+        Args:
+            vectors: Corpus embeddings (rows)
+            output_dimensions: Components to keep
+            sample_size: Fit on a random sample of this many rows (None = all)
+            seed: Sampling seed
+        """
+        vectors = np.asarray(vectors)
+        if vectors.ndim != 2 or vectors.shape[0] == 0:
+            raise ValueError("vectors must be a non-empty 2-D array")
+        dimensions = vectors.shape[1]
+        if not 1 <= output_dimensions <= dimensions:
+            raise ValueError(f"output_dimensions must be between 1 and {dimensions}")
+
+        rows = np.arange(vectors.shape[0])
+        if sample_size is not None and sample_size < rows.size:
+            rows = np.sort(np.random.default_rng(seed).choice(rows, sample_size, replace=False))
+
+        total = np.zeros(dimensions, dtype=np.float64)
+        scatter = np.zeros((dimensions, dimensions), dtype=np.float64)
+        for start in range(0, rows.size, _FIT_CHUNK):
+            chunk = normalize_rows(vectors[rows[start:start + _FIT_CHUNK]].astype(np.float64))
+            total += chunk.sum(axis=0)
+            scatter += chunk.T @ chunk
+
+        mean = total / rows.size
+        covariance = scatter / rows.size - np.outer(mean, mean)
+        eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+        order = np.argsort(eigenvalues)[::-1][:output_dimensions]
+        variance = np.clip(eigenvalues, 0.0, None)
+        ratio = variance[order] / variance.sum() if variance.sum() > 0 else np.zeros(order.size)
+        return cls(mean, eigenvectors[:, order].T, ratio)
+
+    def transform(self, vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.shape[1] != self.input_dimensions:
+            raise ValueError("Vectors must have same length")
+        return (normalize_rows(vectors) - self.mean) @ self.components.T
+
+    def save(self, path: str) -> None:
+        np.savez(
+            path,
+            kind="pca",
+            mean=self.mean,
+            components=self.components,
+            explained_variance_ratio=self.explained_variance_ratio,
+        )
+
+
+def load_reducer(path: str) -> DimensionReducer:
+    """Load a reducer written by DimensionReducer.save()"""
+    with np.load(path) as data:
+        kind = str(data["kind"])
+        if kind == "prefix":
+            return PrefixTruncation(int(data["output_dimensions"]))
+        if kind == "pca":
+            return PCAProjection(data["mean"], data["components"], data["explained_variance_ratio"])
+    raise ValueError(f"Unknown reducer kind in {path}: {kind}")
+
+
+class ReducedVectorIndex(RerankingVectorIndex):
+    """
+    Drop-in alternative to VectorIndex that searches reduced vectors.
+
+    The resident search matrix holds reducer.output_dimensions floats per
+    row. With rerank_candidates > 0 the best candidates are re-scored
+    against the full-dimension rows (memory-mapped by default) and
+    search() returns exact similarities; with 0 it returns the reduced
+    similarities and never touches the full-dimension store.
+    """
+
+    def __init__(
+        self,
+        reducer: DimensionReducer,
+        dimensions: Optional[int] = None,
+        initial_capacity: int = 1024,
+        rerank_candidates: int = 200,
+        full_precision_path: Optional[str] = None,
+        full_precision_in_memory: bool = False,
+    ) -> None:
+        """
+        Initialize an empty index.
+
+        Args:
+            reducer: Projection applied to stored and query vectors
+            dimensions: Full vector dimensions (inferred from the first add if None)
+            initial_capacity: Number of rows to pre-allocate
+            rerank_candidates: Candidates re-scored at full dimension (0 = none)
+            full_precision_path: File for full-dimension rows (temporary if None)
+            full_precision_in_memory: Keep full-dimension rows in RAM instead
+        """
+        self.reducer = reducer
+        self.dimensions = dimensions
+        self.rerank_candidates = rerank_candidates
+        self._size = 0
+        self._compact = VectorIndex(reducer.output_dimensions, initial_capacity)
+        self._initial_capacity = initial_capacity
+        self._full_precision_path = full_precision_path
+        self._full_precision_in_memory = full_precision_in_memory
+        self._full = None
+
+    def add_batch(self, vectors: np.ndarray) -> range:
+        """
+        Append a 2-D array of vectors.
+
+        Returns:
+            Row numbers of the stored vectors
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2:
+            raise ValueError("vectors must be a 2-D array")
+        if self.dimensions is None:
+            self.dimensions = vectors.shape[1]
+        elif vectors.shape[1] != self.dimensions:
+            raise ValueError("Vectors must have same length")
+        if self._full is None:
+            if self._full_precision_in_memory:
+                self._full = ArrayVectorStore(self.dimensions, self._initial_capacity)
+            else:
+                self._full = FileVectorStore(self.dimensions, self._full_precision_path)
+
+        normalized = normalize_rows(vectors)
+        rows = self._compact.add_batch(self.reducer.transform(normalized))
+        self._full.add_batch(normalized)
+        self._size = rows.stop
+        return rows
+
+    def memory_bytes(self) -> int:
+        """Resident bytes of the reduced matrix"""
+        return int(self._compact.matrix.nbytes)
+
+    def _reduced_query(self, query: Sequence[float]) -> Optional[np.ndarray]:
+        q = self._normalized_query(query)
+        return None if q is None else self.reducer.transform(q[None, :])[0]
+
+    def similarities(
+        self,
+        query: Sequence[float],
+        rows: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        Reduced-space cosine similarity of query against every row (or only rows).
+
+        Returns:
+            float32 array of length len(self) (or len(rows))
+        """
+        count = self._size if rows is None else len(rows)
+        if self._size == 0 or count == 0:
+            return np.empty(0, dtype=np.float32)
+        q = self._reduced_query(query)
+        if q is None:
+            return np.zeros(count, dtype=np.float32)
+        return self._compact.similarities(q, rows)
+
+    def search(
+        self,
+        query: Sequence[float],
+        limit: int,
+        mask: Optional[np.ndarray] = None,
+        similarity_threshold: Optional[float] = None,
+        rows: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Reduced-space search, re-ranked at full dimension if rerank_candidates > 0.
+
+        Returns:
+            (rows, similarities) sorted by similarity descending
+        """
+        if self.rerank_candidates > 0:
+            return super().search(query, limit, mask, similarity_threshold, rows)
+
+        candidates, scores = candidate_scores(self, query, mask, rows)
+        if similarity_threshold is not None and candidates.size:
+            keep = scores >= similarity_threshold
+            candidates, scores = candidates[keep], scores[keep]
+        return top_k(candidates, scores, limit)
+
+
+class ReducedEmbeddingService(EmbeddingService):
+    """
+    Embedding service whose vectors are reduced by a DimensionReducer.
+
+    Wraps another service (its cache still holds full vectors), so the
+    repository stores and searches only the compact vectors.
+    """
+
+    def __init__(self, embedding_service: EmbeddingService, reducer: DimensionReducer) -> None:
+        """
+        Args:
+            embedding_service: Full-dimension embedding service
+            reducer: Projection applied to every embedding
+        """
+        self.embedding_service = embedding_service
+        self.reducer = reducer
+
+    async def generate_embedding(self, text: str) -> List[float]:
+        """Generate a reduced embedding for text"""
+        return self.reducer.transform_one(await self.embedding_service.generate_embedding(text))
+
+    async def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Generate reduced embeddings in one batch call"""
+        if not texts:
+            return []
+        embeddings = await self.embedding_service.generate_embeddings(texts)
+        return self.reducer.transform(np.asarray(embeddings, dtype=np.float32)).tolist()
+
+    def get_dimensions(self) -> int:
+        """Get reduced embedding dimensions"""
+        return self.reducer.output_dimensions
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Fit a PCA projection on corpus embeddings saved with numpy.save"""
+    parser = argparse.ArgumentParser(description="Fit a PCA projection for memory embeddings")
+    parser.add_argument("--input", required=True, help=".npy file of (rows, dimensions) embeddings")
+    parser.add_argument("--dimensions", type=int, required=True, help="Target dimensions")
+    parser.add_argument("--output", required=True, help="Output .npz file")
+    parser.add_argument("--sample-size", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    vectors = np.load(args.input, mmap_mode="r")
+    projection = PCAProjection.fit(vectors, args.dimensions, sample_size=args.sample_size)
+    projection.save(args.output)
+    print(
+        f"{projection.input_dimensions} -> {projection.output_dimensions} dimensions, "
+        f"explained variance {projection.explained_variance_ratio.sum():.4f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
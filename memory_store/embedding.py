@@ -10,7 +10,14 @@ import hashlib
 import math
 import random
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from .coalescing import SingleFlight
+from .embedding_cache import EmbeddingCache, LRUEmbeddingCache
+from .rate_limit import RateLimiter, backoff_delay, retry_after_seconds
+from .timing import phase
 
 
 class EmbeddingError(Exception):
@@ -26,13 +33,239 @@ class EmbeddingService(ABC):
         """Generate embedding vector for text"""
         pass
 
+    async def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        Generate embedding vectors for multiple texts.
+
+        Results are returned in input order. The default implementation
+        embeds one text at a time; subclasses should override it with a
+        real batch call.
+        """
+        return [await self.generate_embedding(text) for text in texts]
+
     @abstractmethod
     def get_dimensions(self) -> int:
         """Get the number of dimensions in the embedding"""
         pass
 
 
-class MockEmbeddingService(EmbeddingService):
+class _CachedEmbeddingService(EmbeddingService):
+    """
+    Shared cache and request-coalescing plumbing for embedding services.
+
+    Subclasses provide _generate_cache_key() and _embed_uncached(); cache
+    lookup, write-back, batch de-duplication and single-flight handling of
+    concurrent identical requests live here.
+    """
+
+    def __init__(
+        self,
+        cache_enabled: bool,
+        cache: Optional[EmbeddingCache],
+        max_cache_size: int,
+    ) -> None:
+        self.cache_enabled = cache_enabled
+        self._cache: EmbeddingCache = (
+            cache if cache is not None else LRUEmbeddingCache(max_entries=max_cache_size)
+        )
+        self._inflight = SingleFlight()
+
+    @abstractmethod
+    def _generate_cache_key(self, text: str) -> str:
+        """Generate cache key for text"""
+        pass
+
+    @abstractmethod
+    async def _embed_uncached(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts that missed the cache, returning vectors in input order"""
+        pass
+
+    async def _embed_and_cache(self, cache_key: str, text: str) -> List[float]:
+        return (await self._embed_and_cache_many([cache_key], [text]))[0]
+
+    async def _embed_and_cache_many(self, cache_keys: List[str], texts: List[str]) -> List[List[float]]:
+        embeddings = await self._embed_uncached(texts)
+        if self.cache_enabled:
+            await self._cache.set_many(dict(zip(cache_keys, embeddings)))
+        return embeddings
+
+    async def generate_embedding(self, text: str) -> List[float]:
+        """
+        Generate embedding for text.
+
+        Concurrent calls for the same text share one in-flight request.
+
+        Args:
+            text: Text to embed
+
+        Returns:
+            List[float]: Embedding vector
+
+        Raises:
+            EmbeddingError: If embedding generation fails
+        """
+        if not text:
+            raise EmbeddingError("Text cannot be empty")
+
+        with phase("embed_cache"):
+            cache_key = self._generate_cache_key(text)
+            cached = None
+            if self.cache_enabled:
+                cached = (await self._cache.get_many([cache_key])).get(cache_key)
+        if cached is not None:
+            return cached
+
+        with phase("embed"):
+            return await self._inflight.do(cache_key, lambda: self._embed_and_cache(cache_key, text))
+
+    async def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        Generate embeddings for multiple texts.
+
+        Cached texts are served locally, duplicates are embedded once, texts
+        already being embedded by another caller are awaited, and the rest
+        are passed to _embed_uncached() in one call.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            List[List[float]]: Embedding vectors in input order
+
+        Raises:
+            EmbeddingError: If any text is empty or embedding fails
+        """
+        if any(not text for text in texts):
+            raise EmbeddingError("Text cannot be empty")
+
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        pending: Dict[str, List[int]] = {}
+
+        with phase("embed_cache"):
+            keys = [self._generate_cache_key(text) for text in texts]
+            cached = await self._cache.get_many(list(dict.fromkeys(keys))) if self.cache_enabled else {}
+            for i, cache_key in enumerate(keys):
+                if cache_key in cached:
+                    results[i] = cached[cache_key]
+                else:
+                    pending.setdefault(cache_key, []).append(i)
+
+        if pending:
+            keys = list(pending)
+            texts_by_key = {key: texts[indices[0]] for key, indices in pending.items()}
+            with phase("embed"):
+                embeddings = await self._inflight.do_many(
+                    keys, lambda owned: self._embed_and_cache_many(owned, [texts_by_key[k] for k in owned])
+                )
+            for cache_key, embedding in zip(keys, embeddings):
+                for i in pending[cache_key]:
+                    results[i] = embedding
+
+        return results
+
+    def clear_cache(self) -> None:
+        """Clear the embedding cache (blocks on the disk tier; use clear_cache_async in async code)"""
+        self._cache.clear()
+
+    async def clear_cache_async(self) -> None:
+        """Clear the embedding cache without blocking the event loop"""
+        await self._cache.clear_async()
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get embedding cache statistics"""
+        return self._cache.get_stats()
+
+    def get_coalescing_stats(self) -> Dict[str, int]:
+        """Get in-flight request de-duplication statistics"""
+        return self._inflight.get_stats()
+
+
+# Mock semantic features: keyword -> embedding indices nudged by
+# _MOCK_FEATURE_WEIGHT so texts sharing a keyword are more similar
+_MOCK_FEATURES = {
+    "呼吸": [0, 1, 2],
+    "breathing": [0, 1, 2],
+    "resonant": [3, 4, 5],
+    "engine": [6, 7, 8],
+    "memory": [9, 10, 11],
+    "メモリ": [9, 10, 11],
+    "記憶": [12, 13, 14],
+    "vector": [15, 16, 17],
+    "embedding": [18, 19, 20],
+    "postgresql": [21, 22, 23],
+    "database": [24, 25, 26],
+    "intent": [27, 28, 29],
+    "decision": [30, 31, 32],
+    "working": [33, 34, 35],
+    "longterm": [36, 37, 38],
+    "design": [39, 40, 41],
+    "設計": [39, 40, 41],
+    "test": [42, 43, 44],
+    "テスト": [42, 43, 44],
+}
+_MOCK_FEATURE_WEIGHT = 0.5
+# Rows generated per step of mock_embeddings(), bounding temporaries
+_MOCK_CHUNK_ROWS = 2048
+
+_GOLDEN_GAMMA = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _splitmix64(x: np.ndarray) -> np.ndarray:
+    """SplitMix64 finalizer: a counter-based hash, applied elementwise"""
+    x = x + _GOLDEN_GAMMA
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def _text_seed(text: str) -> int:
+    return int(hashlib.sha256(text.encode()).hexdigest()[:16], 16)
+
+
+def mock_embeddings(texts: Sequence[str], dimensions: int) -> np.ndarray:
+    """
+    Deterministic pseudo-embeddings as a float32 (len(texts), dimensions) matrix.
+
+    Each row is a standard-normal vector drawn from a counter-based hash of
+    the text's SHA-256 seed (Box-Muller over SplitMix64), normalized, nudged
+    on the _MOCK_FEATURES indices of the keywords it contains and
+    normalized again. A row depends only on its text, never on the batch,
+    and the whole batch is generated with array operations, so corpora of
+    millions of embeddings take seconds per 100k rather than minutes.
+    """
+    count = len(texts)
+    out = np.empty((count, dimensions), dtype=np.float32)
+    if count == 0:
+        return out
+
+    seeds = np.array([_text_seed(text) for text in texts], dtype=np.uint64)
+    half = (dimensions + 1) // 2
+    counters = np.arange(half, dtype=np.uint64) * _GOLDEN_GAMMA
+    for start in range(0, count, _MOCK_CHUNK_ROWS):
+        bits = _splitmix64(seeds[start:start + _MOCK_CHUNK_ROWS, None] + counters)
+        # Two 24-bit uniforms per hash: u1 in (0, 1], u2 in [0, 1)
+        u1 = ((bits >> np.uint64(40)).astype(np.float32) + 1) * np.float32(2.0 ** -24)
+        u2 = (bits & np.uint64(0xFFFFFF)).astype(np.float32) * np.float32(2.0 ** -24)
+        radius = np.sqrt(np.float32(-2.0) * np.log(u1))
+        theta = np.float32(2.0 * np.pi) * u2
+        block = out[start:start + _MOCK_CHUNK_ROWS]
+        block[:, :half] = radius * np.cos(theta)
+        block[:, half:] = (radius * np.sin(theta))[:, :dimensions - half]
+
+    out /= np.linalg.norm(out, axis=1, keepdims=True)
+
+    lowered = [text.lower() for text in texts]
+    for keyword, indices in _MOCK_FEATURES.items():
+        columns = [i for i in indices if i < dimensions]
+        rows = [row for row, text in enumerate(lowered) if keyword in text]
+        if columns and rows:
+            out[np.ix_(rows, columns)] += np.float32(_MOCK_FEATURE_WEIGHT)
+
+    out /= np.linalg.norm(out, axis=1, keepdims=True)
+    return out
+
+
+class MockEmbeddingService(_CachedEmbeddingService):
     """
     Mock Embedding Service for testing without OpenAI API.
 
@@ -46,6 +279,8 @@ class MockEmbeddingService(EmbeddingService):
         cache_enabled: bool = True,
         simulate_latency: bool = False,
         latency_ms: int = 50,
+        cache: Optional[EmbeddingCache] = None,
+        max_cache_size: int = 10000,
     ):
         """
         Initialize mock embedding service.
@@ -55,123 +290,39 @@ class MockEmbeddingService(EmbeddingService):
             cache_enabled: Whether to cache embeddings
             simulate_latency: Whether to simulate API latency
             latency_ms: Simulated latency in milliseconds
+            cache: Embedding cache (default: LRU bounded by max_cache_size)
+            max_cache_size: Entry limit for the default cache
         """
+        super().__init__(cache_enabled, cache, max_cache_size)
         self.dimensions = dimensions
-        self.cache_enabled = cache_enabled
         self.simulate_latency = simulate_latency
         self.latency_ms = latency_ms
-        self._cache: Dict[str, List[float]] = {}
         self._call_count = 0
 
     def _generate_cache_key(self, text: str) -> str:
         """Generate cache key from text"""
         return hashlib.md5(text.encode()).hexdigest()
 
-    def _text_to_embedding(self, text: str) -> List[float]:
+    def embed_matrix(self, texts: Sequence[str]) -> np.ndarray:
         """
-        Generate deterministic embedding from text.
+        Embed texts directly into a float32 (len(texts), dimensions) matrix.
 
-        Uses character frequencies and text features to create
-        a reproducible embedding vector.
+        Bypasses the cache and call count, for building large synthetic
+        corpora (see mock_embeddings()).
         """
-        # Create a seed from the text hash
-        text_hash = hashlib.sha256(text.encode()).hexdigest()
-        seed = int(text_hash[:8], 16)
-
-        # Use seeded random for reproducibility
-        rng = random.Random(seed)
+        return mock_embeddings(texts, self.dimensions)
 
-        # Generate base embedding
-        embedding = [rng.gauss(0, 1) for _ in range(self.dimensions)]
-
-        # Normalize to unit vector
-        magnitude = math.sqrt(sum(x * x for x in embedding))
-        if magnitude > 0:
-            embedding = [x / magnitude for x in embedding]
-
-        # Add semantic features based on text
-        self._add_semantic_features(text, embedding)
-
-        # Re-normalize after adding features
-        magnitude = math.sqrt(sum(x * x for x in embedding))
-        if magnitude > 0:
-            embedding = [x / magnitude for x in embedding]
-
-        return embedding
-
-    def _add_semantic_features(self, text: str, embedding: List[float]) -> None:
-        """
-        Add semantic features to embedding based on text content.
-
-        This creates meaningful relationships between similar texts.
-        """
-        text_lower = text.lower()
-
-        # Feature mapping: keywords -> embedding indices to adjust
-        feature_map = {
-            "呼吸": [0, 1, 2],
-            "breathing": [0, 1, 2],
-            "resonant": [3, 4, 5],
-            "engine": [6, 7, 8],
-            "memory": [9, 10, 11],
-            "メモリ": [9, 10, 11],
-            "記憶": [12, 13, 14],
-            "vector": [15, 16, 17],
-            "embedding": [18, 19, 20],
-            "postgresql": [21, 22, 23],
-            "database": [24, 25, 26],
-            "intent": [27, 28, 29],
-            "decision": [30, 31, 32],
-            "working": [33, 34, 35],
-            "longterm": [36, 37, 38],
-            "design": [39, 40, 41],
-            "設計": [39, 40, 41],
-            "test": [42, 43, 44],
-            "テスト": [42, 43, 44],
-        }
-
-        # Apply feature adjustments
-        for keyword, indices in feature_map.items():
-            if keyword in text_lower:
-                for idx in indices:
-                    if idx < len(embedding):
-                        embedding[idx] += 0.5
-
-    async def generate_embedding(self, text: str) -> List[float]:
-        """
-        Generate embedding for text.
-
-        Args:
-            text: Text to embed
-
-        Returns:
-            List[float]: Embedding vector
-
-        Raises:
-            EmbeddingError: If embedding generation fails
-        """
-        if not text:
-            raise EmbeddingError("Text cannot be empty")
+    def _text_to_embedding(self, text: str) -> List[float]:
+        """Generate deterministic embedding from text"""
+        return mock_embeddings([text], self.dimensions)[0].tolist()
 
-        # Simulate latency if enabled
+    async def _embed_uncached(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings in one simulated API round trip"""
         if self.simulate_latency:
             await asyncio.sleep(self.latency_ms / 1000)
 
-        # Check cache
-        if self.cache_enabled:
-            cache_key = self._generate_cache_key(text)
-            if cache_key in self._cache:
-                return self._cache[cache_key]
-
-        # Generate embedding
-        self._call_count += 1
-        embedding = self._text_to_embedding(text)
-
-        # Store in cache
-        if self.cache_enabled:
-            self._cache[cache_key] = embedding
-
-        return embedding
+        self._call_count += len(texts)
+        return mock_embeddings(texts, self.dimensions).tolist()
 
     def get_dimensions(self) -> int:
         """Get embedding dimensions"""
@@ -181,28 +332,41 @@ class MockEmbeddingService(EmbeddingService):
         """Get number of API calls (for testing)"""
         return self._call_count
 
-    def clear_cache(self) -> None:
-        """Clear the embedding cache"""
-        self._cache.clear()
-
     def get_cache_size(self) -> int:
         """Get current cache size"""
         return len(self._cache)
 
 
-class OpenAIEmbeddingService(EmbeddingService):
+class OpenAIEmbeddingService(_CachedEmbeddingService):
     """
     OpenAI Embedding Service for production use.
 
     Requires openai package and valid API key.
     """
 
+    # OpenAI embeddings endpoint limits
+    MAX_BATCH_ITEMS = 2048
+    MAX_BATCH_TOKENS = 300_000
+    # Client errors worth retrying; other 4xx fail immediately
+    RETRYABLE_STATUS = frozenset({408, 409, 429})
+
     def __init__(
         self,
         api_key: str,
         model: str = "text-embedding-3-small",
         cache_enabled: bool = True,
         retry_count: int = 3,
+        max_batch_items: int = MAX_BATCH_ITEMS,
+        max_batch_tokens: int = MAX_BATCH_TOKENS,
+        cache: Optional[EmbeddingCache] = None,
+        max_cache_size: int = 10000,
+        max_concurrency: Optional[int] = 8,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        retry_base_delay: float = 0.5,
+        retry_max_delay: float = 30.0,
+        rate_limiter: Optional[RateLimiter] = None,
+        dimensions: Optional[int] = None,
     ):
         """
         Initialize OpenAI embedding service.
@@ -212,12 +376,33 @@ class OpenAIEmbeddingService(EmbeddingService):
             model: Model name
             cache_enabled: Whether to cache embeddings
             retry_count: Number of retries on failure
+            max_batch_items: Maximum inputs per batch request
+            max_batch_tokens: Maximum estimated tokens per batch request
+            cache: Embedding cache (default: LRU bounded by max_cache_size)
+            max_cache_size: Entry limit for the default cache
+            max_concurrency: Maximum in-flight requests (None = unlimited)
+            requests_per_minute: Account RPM limit (None = unlimited)
+            tokens_per_minute: Account TPM limit (None = unlimited)
+            retry_base_delay: First backoff step in seconds (full jitter)
+            retry_max_delay: Backoff cap in seconds
+            rate_limiter: Shared limiter (overrides the three limits above),
+                e.g. one per API key across services
+            dimensions: Shortened output size for models trained with
+                Matryoshka representation (text-embedding-3-*); None = full
         """
+        super().__init__(cache_enabled, cache, max_cache_size)
         self.api_key = api_key
         self.model = model
-        self.cache_enabled = cache_enabled
         self.retry_count = retry_count
-        self._cache: Dict[str, List[float]] = {}
+        self.max_batch_items = min(max_batch_items, self.MAX_BATCH_ITEMS)
+        self.max_batch_tokens = min(max_batch_tokens, self.MAX_BATCH_TOKENS)
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.dimensions = dimensions
+        self._limiter = rate_limiter or RateLimiter(
+            max_concurrency, requests_per_minute, tokens_per_minute
+        )
+        self._retries = 0
         self._client: Any = None
 
     def _get_client(self) -> Any:
@@ -232,64 +417,120 @@ class OpenAIEmbeddingService(EmbeddingService):
 
     def _generate_cache_key(self, text: str) -> str:
         """Generate cache key"""
-        return hashlib.md5(f"{self.model}:{text}".encode()).hexdigest()
+        model = f"{self.model}@{self.dimensions}" if self.dimensions else self.model
+        return hashlib.md5(f"{model}:{text}".encode()).hexdigest()
 
-    async def generate_embedding(self, text: str) -> List[float]:
+    async def _embed_uncached(self, texts: List[str]) -> List[List[float]]:
         """
-        Generate embedding using OpenAI API.
-
-        Args:
-            text: Text to embed
+        Embed texts with multi-input OpenAI requests.
 
-        Returns:
-            List[float]: 1536-dimensional embedding vector
-
-        Raises:
-            EmbeddingError: If embedding generation fails after retries
+        Texts are split into requests that respect the endpoint's item and
+        token limits; the requests run concurrently within the rate limiter.
         """
-        if not text:
-            raise EmbeddingError("Text cannot be empty")
-
-        # Check cache
-        if self.cache_enabled:
-            cache_key = self._generate_cache_key(text)
-            if cache_key in self._cache:
-                return self._cache[cache_key]
+        if len(texts) == 1:
+            return await self._create_embeddings(texts[0])
+
+        results = await asyncio.gather(*(
+            self._create_embeddings([texts[i] for i in batch])
+            for batch in self._plan_batches(texts)
+        ))
+        return [embedding for batch in results for embedding in batch]
+
+    def _plan_batches(self, texts: List[str]) -> List[List[int]]:
+        """Group text positions into requests under the item/token limits"""
+        batches: List[List[int]] = []
+        current: List[int] = []
+        current_tokens = 0
+
+        for i, text in enumerate(texts):
+            tokens = estimate_tokens(text)
+            if current and (
+                len(current) >= self.max_batch_items
+                or current_tokens + tokens > self.max_batch_tokens
+            ):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(i)
+            current_tokens += tokens
+
+        if current:
+            batches.append(current)
+        return batches
+
+    async def _create_embeddings(self, inputs: Union[str, List[str]]) -> List[List[float]]:
+        """
+        Call the embeddings endpoint with retries, returning vectors in input order.
 
-        # Retry logic
-        last_error = None
+        Each attempt waits for the rate limiter. A 429 or Retry-After pauses
+        every request for the provider's delay (plus jitter, so waiters do
+        not return in lockstep); other failures back off with full jitter.
+        Non-retryable client errors (4xx other than RETRYABLE_STATUS) fail
+        immediately.
+        """
+        last_error: Optional[Exception] = None
         client = self._get_client()
+        tokens = sum(estimate_tokens(text) for text in ([inputs] if isinstance(inputs, str) else inputs))
+        options = {"dimensions": self.dimensions} if self.dimensions else {}
 
         for attempt in range(self.retry_count):
-            try:
-                response = await client.embeddings.create(
-                    model=self.model,
-                    input=text
-                )
-                embedding = response.data[0].embedding
-
-                # Cache the result
-                if self.cache_enabled:
-                    self._cache[cache_key] = embedding
-
-                return embedding
-
-            except Exception as e:
-                last_error = e
-                if attempt < self.retry_count - 1:
-                    # Exponential backoff
-                    await asyncio.sleep(2 ** attempt)
-                continue
+            async with self._limiter.acquire(tokens):
+                try:
+                    response = await client.embeddings.create(
+                        model=self.model,
+                        input=inputs,
+                        **options,
+                    )
+                    data = sorted(response.data, key=lambda item: item.index)
+                    return [item.embedding for item in data]
+                except Exception as e:
+                    last_error = e
+
+            status = _status_code(last_error)
+            if attempt == self.retry_count - 1 or (
+                status is not None and 400 <= status < 500 and status not in self.RETRYABLE_STATUS
+            ):
+                break
+
+            self._retries += 1
+            retry_after = retry_after_seconds(last_error)
+            if status == 429 or retry_after is not None:
+                if retry_after is None:
+                    retry_after = backoff_delay(attempt, self.retry_base_delay, self.retry_max_delay)
+                # The next acquire() waits out the pause
+                self._limiter.pause(retry_after + random.uniform(0, self.retry_base_delay))
+            else:
+                await asyncio.sleep(backoff_delay(attempt, self.retry_base_delay, self.retry_max_delay))
 
         raise EmbeddingError(f"Embedding generation failed: {last_error}")
 
+    def get_rate_limit_stats(self) -> Dict[str, Any]:
+        """Concurrency / queue-wait / throttling statistics"""
+        return {**self._limiter.get_stats(), "retries": self._retries}
+
     def get_dimensions(self) -> int:
         """Get embedding dimensions (1536 for text-embedding-3-small)"""
-        return 1536
+        return self.dimensions or 1536
 
-    def clear_cache(self) -> None:
-        """Clear the embedding cache"""
-        self._cache.clear()
+
+def _status_code(error: Optional[BaseException]) -> Optional[int]:
+    """HTTP status of a provider error (openai APIStatusError / httpx), if any"""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Conservatively estimate the token count of text.
+
+    Uses the same heuristic as context_assembler's TokenEstimator
+    (CJK ≈ 2 tokens/char, other ≈ 0.5 tokens/char).
+    """
+    cjk_chars = sum(
+        1 for c in text if 0x3000 <= ord(c) <= 0x9FFF or 0xFF00 <= ord(c) <= 0xFFEF
+    )
+    return int(cjk_chars * 2 + (len(text) - cjk_chars) * 0.5) + 1
 
 
 def cosine_similarity(vec1: List[float], vec2: List[float]) -> float:
@@ -0,0 +1,437 @@
+"""
+Embedding Cache - Bounded LRU/TTL Cache with Optional Disk Tier
+
+Caches embedding vectors by key (the embedding service's model+text hash).
+The in-memory tier is bounded by entry count and bytes; an optional SQLite
+tier keeps vectors across restarts so cold starts do not re-pay embedding
+cost for hot queries. The embedding services use the async get_many() /
+set_many(), which reach the disk tier through a worker thread with one
+commit per batch; the disk tier is bounded by max_rows and ttl_seconds.
+"""
+
+import asyncio
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+# Bytes per float held in a Python list (8-byte pointer + 24-byte float object)
+_LIST_FLOAT_BYTES = 32
+_LIST_OVERHEAD_BYTES = 56
+# Keys bound per SELECT ... IN (...): older SQLite builds cap a statement
+# at 999 parameters (SQLITE_MAX_VARIABLE_NUMBER)
+_SQLITE_IN_CHUNK = 500
+
+
+def _embedding_bytes(embedding: List[float]) -> int:
+    """Approximate in-memory size of a cached embedding list"""
+    return _LIST_OVERHEAD_BYTES + _LIST_FLOAT_BYTES * len(embedding)
+
+
+class EmbeddingCache(ABC):
+    """Abstract base class for embedding caches"""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[List[float]]:
+        """Get a cached embedding (None on miss)"""
+        pass
+
+    @abstractmethod
+    def set(self, key: str, embedding: List[float]) -> None:
+        """Store an embedding"""
+        pass
+
+    async def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Get cached embeddings for keys (misses are omitted)"""
+        found = {}
+        for key in keys:
+            embedding = self.get(key)
+            if embedding is not None:
+                found[key] = embedding
+        return found
+
+    async def set_many(self, embeddings: Dict[str, List[float]]) -> None:
+        """Store several embeddings"""
+        for key, embedding in embeddings.items():
+            self.set(key, embedding)
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Remove all cached embeddings"""
+        pass
+
+    async def clear_async(self) -> None:
+        """Remove all cached embeddings without blocking the event loop"""
+        self.clear()
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Number of embeddings held in memory"""
+        pass
+
+    @abstractmethod
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss/eviction statistics"""
+        pass
+
+
+class SQLiteEmbeddingStore:
+    """
+    On-disk embedding tier backed by SQLite.
+
+    Vectors are stored as float64 blobs so they round-trip exactly. Rows
+    older than ttl_seconds and the oldest rows beyond max_rows are deleted
+    by prune(), which writes run automatically every prune_every rows.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        max_rows: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        prune_every: int = 1000,
+    ) -> None:
+        """
+        Open (or create) the store.
+
+        Args:
+            path: SQLite database file
+            max_rows: Maximum stored embeddings (None = unbounded)
+            ttl_seconds: Row lifetime in seconds (None = no expiry)
+            prune_every: Rows written between automatic prune() calls
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_rows = max_rows
+        self.ttl_seconds = ttl_seconds
+        self.prune_every = prune_every
+        self._writes_since_prune = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                vector BLOB NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_created_at ON embeddings(created_at)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Tuple[List[float], float]]:
+        """Get (embedding, created_at) for key"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT vector, created_at FROM embeddings WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        vector = array("d")
+        vector.frombytes(row[0])
+        return vector.tolist(), row[1]
+
+    def get_many(self, keys: List[str]) -> Dict[str, Tuple[List[float], float]]:
+        """Get {key: (embedding, created_at)} for the stored keys"""
+        if not keys:
+            return {}
+        rows = []
+        with self._lock:
+            for start in range(0, len(keys), _SQLITE_IN_CHUNK):
+                chunk = keys[start:start + _SQLITE_IN_CHUNK]
+                rows.extend(self._conn.execute(
+                    f"SELECT key, vector, created_at FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall())
+        found = {}
+        for key, blob, created_at in rows:
+            vector = array("d")
+            vector.frombytes(blob)
+            found[key] = (vector.tolist(), created_at)
+        return found
+
+    def set(self, key: str, embedding: List[float], created_at: float) -> None:
+        """Insert or replace an embedding"""
+        self.set_many({key: embedding}, created_at)
+
+    def set_many(self, embeddings: Dict[str, List[float]], created_at: float) -> None:
+        """Insert or replace embeddings in one transaction"""
+        rows = [(key, array("d", embedding).tobytes(), created_at) for key, embedding in embeddings.items()]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, created_at) VALUES (?, ?, ?)", rows
+            )
+            self._conn.commit()
+            self._writes_since_prune += len(rows)
+            if self._writes_since_prune >= self.prune_every:
+                self._prune(created_at)
+
+    def delete(self, key: str) -> None:
+        """Delete an embedding"""
+        self.delete_many([key])
+
+    def delete_many(self, keys: List[str]) -> None:
+        """Delete embeddings"""
+        with self._lock:
+            self._conn.executemany("DELETE FROM embeddings WHERE key = ?", [(key,) for key in keys])
+            self._conn.commit()
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """
+        Delete expired rows and the oldest rows beyond max_rows.
+
+        Returns:
+            Number of deleted rows
+        """
+        with self._lock:
+            return self._prune(time.time() if now is None else now)
+
+    def _prune(self, now: float) -> int:
+        deleted = 0
+        if self.ttl_seconds is not None:
+            deleted += self._conn.execute(
+                "DELETE FROM embeddings WHERE created_at < ?", (now - self.ttl_seconds,)
+            ).rowcount
+        if self.max_rows is not None:
+            deleted += self._conn.execute(
+                """
+                DELETE FROM embeddings WHERE key IN (
+                    SELECT key FROM embeddings ORDER BY created_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_rows,),
+            ).rowcount
+        self._conn.commit()
+        self._writes_since_prune = 0
+        return deleted
+
+    def clear(self) -> None:
+        """Delete all embeddings"""
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+
+    def count(self) -> int:
+        """Number of stored embeddings"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def close(self) -> None:
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+
+
+class LRUEmbeddingCache(EmbeddingCache):
+    """
+    Size- and byte-bounded LRU embedding cache with optional TTL.
+
+    When a disk store is attached, misses fall through to disk and every
+    new embedding is written through, so the disk tier survives restarts
+    while the memory tier stays bounded.
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = 10000,
+        max_bytes: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        disk_store: Optional[SQLiteEmbeddingStore] = None,
+    ) -> None:
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum embeddings kept in memory (None = unbounded)
+            max_bytes: Maximum approximate bytes kept in memory (None = unbounded)
+            ttl_seconds: Entry lifetime in seconds (None = no expiry)
+            disk_store: Optional persistent tier
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.disk_store = disk_store
+        # key -> (embedding, created_at)
+        self._entries: "OrderedDict[str, Tuple[List[float], float]]" = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def _is_expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+    def _remove(self, key: str) -> None:
+        embedding, _ = self._entries.pop(key)
+        self._bytes -= _embedding_bytes(embedding)
+
+    def _store(self, key: str, embedding: List[float], created_at: float) -> None:
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (embedding, created_at)
+        self._bytes += _embedding_bytes(embedding)
+        self._evict()
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until within bounds"""
+        while self._entries and (
+            (self.max_entries is not None and len(self._entries) > self.max_entries)
+            or (self.max_bytes is not None and self._bytes > self.max_bytes)
+        ):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self._evictions += 1
+
+    def get(self, key: str) -> Optional[List[float]]:
+        """Get a cached embedding, promoting it to most recently used"""
+        now = time.time()
+        embedding = self._get_memory(key, now)
+        if embedding is not None:
+            return embedding
+
+        if self.disk_store is not None:
+            stored = self.disk_store.get(key)
+            if stored is not None:
+                embedding, created_at = stored
+                if not self._is_expired(created_at, now):
+                    self._store(key, embedding, created_at)
+                    self._disk_hits += 1
+                    return embedding
+                self.disk_store.delete(key)
+                self._expirations += 1
+
+        self._misses += 1
+        return None
+
+    def set(self, key: str, embedding: List[float]) -> None:
+        """Store an embedding in memory (and on disk when configured)"""
+        created_at = time.time()
+        self._store(key, embedding, created_at)
+        if self.disk_store is not None:
+            self.disk_store.set(key, embedding, created_at)
+
+    def _get_memory(self, key: str, now: float) -> Optional[List[float]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        embedding, created_at = entry
+        if self._is_expired(created_at, now):
+            self._remove(key)
+            self._expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        self._hits += 1
+        return embedding
+
+    async def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Get cached embeddings; disk lookups for memory misses run in a worker thread"""
+        now = time.time()
+        found: Dict[str, List[float]] = {}
+        missing: List[str] = []
+        for key in keys:
+            embedding = self._get_memory(key, now)
+            if embedding is not None:
+                found[key] = embedding
+            else:
+                missing.append(key)
+
+        if missing and self.disk_store is not None:
+            stored = await asyncio.to_thread(self.disk_store.get_many, missing)
+            expired = []
+            for key, (embedding, created_at) in stored.items():
+                if self._is_expired(created_at, now):
+                    expired.append(key)
+                    continue
+                self._store(key, embedding, created_at)
+                self._disk_hits += 1
+                found[key] = embedding
+            if expired:
+                self._expirations += len(expired)
+                await asyncio.to_thread(self.disk_store.delete_many, expired)
+
+        self._misses += len(keys) - len(found)
+        return found
+
+    async def set_many(self, embeddings: Dict[str, List[float]]) -> None:
+        """Store embeddings; the disk write (one commit) runs in a worker thread"""
+        created_at = time.time()
+        for key, embedding in embeddings.items():
+            self._store(key, embedding, created_at)
+        if self.disk_store is not None and embeddings:
+            await asyncio.to_thread(self.disk_store.set_many, dict(embeddings), created_at)
+
+    def clear(self) -> None:
+        """Remove all cached embeddings from every tier"""
+        self._entries.clear()
+        self._bytes = 0
+        if self.disk_store is not None:
+            self.disk_store.clear()
+
+    async def clear_async(self) -> None:
+        """Remove all cached embeddings; the disk delete runs in a worker thread"""
+        self._entries.clear()
+        self._bytes = 0
+        if self.disk_store is not None:
+            await asyncio.to_thread(self.disk_store.clear)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss/eviction statistics"""
+        lookups = self._hits + self._disk_hits + self._misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self._hits,
+            "disk_hits": self._disk_hits,
+            "misses": self._misses,
+            "evictions": self._evictions,
+            "expirations": self._expirations,
+            "hit_rate": round((self._hits + self._disk_hits) / lookups, 4) if lookups else 0.0,
+        }
+
+
+def create_embedding_cache(
+    max_entries: Optional[int] = 10000,
+    max_bytes: Optional[int] = None,
+    ttl_seconds: Optional[float] = None,
+    disk_path: Optional[Union[str, Path]] = None,
+    disk_max_rows: Optional[int] = 1_000_000,
+) -> LRUEmbeddingCache:
+    """
+    Build an LRU embedding cache, attaching a SQLite tier when disk_path is set.
+
+    Args:
+        max_entries: Maximum embeddings kept in memory
+        max_bytes: Maximum approximate bytes kept in memory
+        ttl_seconds: Entry lifetime in seconds
+        disk_path: SQLite file for the persistent tier
+        disk_max_rows: Maximum embeddings kept on disk (None = unbounded)
+
+    Returns:
+        LRUEmbeddingCache
+    """
+    disk_store = (
+        SQLiteEmbeddingStore(disk_path, max_rows=disk_max_rows, ttl_seconds=ttl_seconds)
+        if disk_path else None
+    )
+    return LRUEmbeddingCache(
+        max_entries=max_entries,
+        max_bytes=max_bytes,
+        ttl_seconds=ttl_seconds,
+        disk_store=disk_store,
+    )
@@ -0,0 +1,488 @@
+"""
+Ingestion Queue - Write-behind Memory Persistence
+
+Memories enqueued on the request path are appended to a local spool file
+and saved later in micro-batches through MemoryStoreService.save_memories_bulk
+(one batch embedding call + one bulk insert per batch). A batch is flushed
+when batch_size items are pending or flush_interval seconds have passed.
+
+Spool format (JSON lines):
+
+    {"seq": 12, "ts": 1700000000.0, "item": {...MemoryCreate...}}
+    {"ack": 12}
+
+On start-up every item after the last ack is re-queued, so a restart loses
+nothing that enqueue() accepted. A torn last line (crash mid-write) is
+ignored. The spool is truncated whenever the queue drains; the rewrite and
+its fsync run in a worker thread.
+
+A batch that keeps failing is retried max_attempts times, then its items
+are saved one by one. Items that still fail are moved to the dead-letter
+file (spool lines plus an "error" field) and acknowledged, so one poison
+item cannot block the queue. If every item of a multi-item batch fails the
+cause is taken to be an outage and the batch stays queued.
+replay_dead_letters() re-queues dead-lettered items.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from .instrumentation import elapsed_ms
+from .models import DedupMode, MemoryCreate
+from .service import MemoryInput, MemoryStoreService
+
+logger = logging.getLogger(__name__)
+
+# Rewrite the spool once acked lines make it larger than this
+_SPOOL_COMPACT_BYTES = 8 * 1024 * 1024
+
+
+class IngestionQueueFull(Exception):
+    """Raised by enqueue() when max_pending items are already waiting"""
+    pass
+
+
+class IngestionQueue:
+    """
+    記憶保存のライトビハインドキュー
+
+    enqueue() はスプールファイルへの追記のみで即座に戻り、
+    バックグラウンドタスクがバッチ単位で Embedding 生成とバルク INSERT を行う。
+    保存に失敗したバッチはキューに残り、指数バックオフで再試行される。
+    max_attempts 回失敗したバッチは1件ずつ保存し、失敗したアイテムは
+    デッドレターファイルに移す。
+    """
+
+    def __init__(
+        self,
+        service: MemoryStoreService,
+        batch_size: int = 64,
+        flush_interval: float = 1.0,
+        spool_path: Optional[str] = None,
+        max_pending: int = 10000,
+        max_retry_delay: float = 30.0,
+        fsync: bool = False,
+        dedup: DedupMode = DedupMode.NONE,
+        max_attempts: int = 10,
+        dead_letter_path: Optional[str] = None,
+    ) -> None:
+        """
+        Args:
+            service: 保存先の MemoryStoreService
+            batch_size: 1バッチの最大件数（この件数に達したら即フラッシュ）
+            flush_interval: 最初の未保存アイテムから次のフラッシュまでの秒数
+            spool_path: スプールファイル（None = 永続化しない）
+            max_pending: 未保存アイテムの上限（超過時は IngestionQueueFull）
+            max_retry_delay: 保存失敗時のバックオフ上限（秒）
+            fsync: 追記ごとに fsync する（電源断にも耐えるが遅い）
+            dedup: 重複内容の扱い（save_memories_bulk に渡す）
+            max_attempts: 先頭バッチの保存をこの回数失敗したら1件ずつに分けて保存
+            dead_letter_path: 保存できなかったアイテムの退避先
+                （None = spool_path + ".dead"、スプールなしの場合はログのみ）
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+        self.service = service
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spool_path = spool_path
+        self.max_pending = max_pending
+        self.max_retry_delay = max_retry_delay
+        self.fsync = fsync
+        self.dedup = dedup
+        self.max_attempts = max_attempts
+        self.dead_letter_path = dead_letter_path or (f"{spool_path}.dead" if spool_path else None)
+
+        # (seq, item, enqueued_at wall-clock timestamp)
+        self._pending: Deque[Tuple[int, MemoryCreate, float]] = deque()
+        self._next_seq = 1
+        self._spool: Optional[Any] = None
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        # Consecutive failed flushes of the batch starting at _failing_seq
+        self._failing_seq: Optional[int] = None
+        self._failing_attempts = 0
+
+        self._enqueued = 0
+        self._saved = 0
+        self._batches = 0
+        self._failed_flushes = 0
+        self._recovered = 0
+        self._dead_lettered = 0
+        self._last_flush_ms: Optional[float] = None
+
+        if spool_path:
+            self._recover()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    # ------------------------------------------------------------------
+    # Spool
+
+    def _recover(self) -> None:
+        """Re-queue unacknowledged items and rewrite the spool with only them"""
+        items: Dict[int, Tuple[MemoryCreate, float]] = {}
+        acked = 0
+        last_seq = 0
+        if os.path.exists(self.spool_path):
+            with open(self.spool_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        logger.warning(f"Ignoring torn spool line in {self.spool_path}")
+                        continue
+                    try:
+                        if "ack" in entry:
+                            acked = max(acked, entry["ack"])
+                            continue
+                        last_seq = max(last_seq, entry["seq"])
+                        items[entry["seq"]] = (
+                            MemoryCreate.model_validate(entry["item"]),
+                            entry.get("ts", time.time()),
+                        )
+                    except (KeyError, TypeError, ValidationError) as e:
+                        logger.warning(f"Dead-lettering invalid spool entry in {self.spool_path}: {e}")
+                        self._write_dead_letters([self._dead_letter_line(entry, e)])
+
+        for seq in sorted(items):
+            if seq > acked:
+                item, enqueued_at = items[seq]
+                self._pending.append((seq, item, enqueued_at))
+        self._next_seq = max(last_seq, acked) + 1
+        self._recovered = len(self._pending)
+        if self._recovered:
+            logger.info(f"Recovered {self._recovered} pending memories from {self.spool_path}")
+        self._rewrite_spool()
+
+    def _rewrite_spool(self) -> None:
+        """Atomically replace the spool with the pending items"""
+        self._swap_spool(self._write_spool_file(list(self._pending)), [])
+
+    async def _compact_spool(self) -> None:
+        """
+        _rewrite_spool() with the write and fsync in a worker thread.
+
+        Called with the flush lock held, so items are only appended to
+        _pending meanwhile; those went to the old spool and are carried over.
+        """
+        snapshot = list(self._pending)
+        last_seq = snapshot[-1][0] if snapshot else 0
+        tmp_path = await asyncio.to_thread(self._write_spool_file, snapshot)
+        self._swap_spool(tmp_path, [entry for entry in self._pending if entry[0] > last_seq])
+
+    def _write_spool_file(self, entries: List[Tuple[int, MemoryCreate, float]]) -> str:
+        """Write entries to a temporary spool file (fsynced); returns its path"""
+        directory = os.path.dirname(os.path.abspath(self.spool_path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.spool_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for seq, item, enqueued_at in entries:
+                f.write(self._item_line(seq, item, enqueued_at))
+            f.flush()
+            os.fsync(f.fileno())
+        return tmp_path
+
+    def _swap_spool(self, tmp_path: str, late: List[Tuple[int, MemoryCreate, float]]) -> None:
+        """Append late entries to tmp_path and make it the spool"""
+        if late:
+            with open(tmp_path, "a", encoding="utf-8") as f:
+                for seq, item, enqueued_at in late:
+                    f.write(self._item_line(seq, item, enqueued_at))
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+        if self._spool is not None:
+            self._spool.close()
+        os.replace(tmp_path, self.spool_path)
+        self._spool = open(self.spool_path, "a", encoding="utf-8")
+
+    @staticmethod
+    def _item_entry(seq: int, item: MemoryCreate, enqueued_at: float) -> Dict[str, Any]:
+        return {"seq": seq, "ts": enqueued_at, "item": item.model_dump(mode="json")}
+
+    @classmethod
+    def _item_line(cls, seq: int, item: MemoryCreate, enqueued_at: float) -> str:
+        return json.dumps(cls._item_entry(seq, item, enqueued_at), ensure_ascii=False) + "\n"
+
+    def _append(self, line: str) -> None:
+        if self._spool is None:
+            return
+        self._spool.write(line)
+        self._spool.flush()
+        if self.fsync:
+            os.fsync(self._spool.fileno())
+
+    def _spool_bytes(self) -> int:
+        return self._spool.tell() if self._spool is not None else 0
+
+    @staticmethod
+    def _dead_letter_line(entry: Any, error: BaseException) -> str:
+        if not isinstance(entry, dict):
+            entry = {"item": entry}
+        return json.dumps({**entry, "error": f"{type(error).__name__}: {error}"}, ensure_ascii=False) + "\n"
+
+    def _write_dead_letters(self, lines: List[str]) -> None:
+        if self.dead_letter_path is None:
+            for line in lines:
+                logger.error(f"Dropping memory that could not be saved: {line.rstrip()}")
+            return
+        with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+            f.writelines(lines)
+            f.flush()
+            os.fsync(f.fileno())
+        self._dead_lettered += len(lines)
+
+    # ------------------------------------------------------------------
+    # Queue
+
+    def enqueue(self, item: MemoryInput) -> int:
+        """
+        記憶を保存キューに追加（スプール追記後に戻る）
+
+        Returns:
+            キュー内のシーケンス番号
+
+        Raises:
+            IngestionQueueFull: 未保存アイテムが max_pending 件に達している
+        """
+        if len(self._pending) >= self.max_pending:
+            raise IngestionQueueFull(f"{len(self._pending)} memories pending")
+        if not isinstance(item, MemoryCreate):
+            item = MemoryCreate.model_validate(item)
+
+        seq = self._next_seq
+        self._next_seq += 1
+        enqueued_at = time.time()
+        self._append(self._item_line(seq, item, enqueued_at))
+        self._pending.append((seq, item, enqueued_at))
+        self._enqueued += 1
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+        return seq
+
+    async def flush(self) -> int:
+        """
+        先頭の最大 batch_size 件を保存
+
+        保存に失敗した場合アイテムはキューに残り、例外がそのまま送出される。
+        同じバッチが max_attempts 回失敗すると1件ずつ保存し、
+        失敗したアイテムをデッドレターファイルに移す。
+
+        Returns:
+            保存された件数
+        """
+        async with self._flush_lock:
+            batch = [entry for _, entry in zip(range(self.batch_size), self._pending)]
+            if not batch:
+                return 0
+
+            start_time = time.perf_counter()
+            dead_lettered = 0
+            try:
+                await self._save(batch)
+            except Exception:
+                self._failed_flushes += 1
+                if self._failing_seq != batch[0][0]:
+                    self._failing_seq, self._failing_attempts = batch[0][0], 0
+                self._failing_attempts += 1
+                if self._failing_attempts < self.max_attempts:
+                    raise
+                dead_lettered = await self._isolate(batch)
+            self._failing_seq, self._failing_attempts = None, 0
+
+            self._ack(batch)
+            if self._spool is not None and (
+                not self._pending or self._spool_bytes() > _SPOOL_COMPACT_BYTES
+            ):
+                await self._compact_spool()
+
+            saved = len(batch) - dead_lettered
+            self._saved += saved
+            self._batches += 1
+            self._last_flush_ms = elapsed_ms(start_time)
+            self.service.instrumentation.record(
+                "ingest_flush",
+                self._last_flush_ms,
+                saved,
+                depth=len(self._pending),
+                lag_seconds=round(time.time() - batch[0][2], 3),
+                dead_lettered=dead_lettered,
+            )
+            return saved
+
+    def _ack(self, entries: List[Tuple[int, MemoryCreate, float]]) -> None:
+        """Drop entries from the head of the queue and ack them in the spool"""
+        for _ in entries:
+            self._pending.popleft()
+        self._append(json.dumps({"ack": entries[-1][0]}) + "\n")
+
+    async def _save(self, batch: List[Tuple[int, MemoryCreate, float]]) -> None:
+        await self.service.save_memories_bulk(
+            [item for _, item, _ in batch], batch_size=len(batch), dedup=self.dedup
+        )
+
+    async def _isolate(self, batch: List[Tuple[int, MemoryCreate, float]]) -> int:
+        """
+        Save a repeatedly failing batch item by item, dead-lettering failures.
+
+        Raises the first error when the failures are a trailing run of at
+        least two items (the store went down, possibly mid-isolation): that
+        is an outage, not a poison item. Items saved before the run are
+        acked first and only the failed ones stay queued, so a retry does
+        not insert the saved ones twice.
+
+        Returns:
+            Number of dead-lettered items
+        """
+        failed: List[Tuple[Tuple[int, MemoryCreate, float], Exception]] = []
+        for entry in batch:
+            try:
+                await self._save([entry])
+            except Exception as e:
+                failed.append((entry, e))
+        saved = len(batch) - len(failed)
+        if len(failed) > 1 and all(entry is batch[saved + i] for i, (entry, _) in enumerate(failed)):
+            if saved:
+                self._ack(batch[:saved])
+                self._saved += saved
+            raise failed[0][1]
+
+        if failed:
+            logger.error(f"Dead-lettering {len(failed)} memories that failed {self.max_attempts} times")
+            self._write_dead_letters([
+                self._dead_letter_line(self._item_entry(*entry), e) for entry, e in failed
+            ])
+        return len(failed)
+
+    def replay_dead_letters(self) -> int:
+        """
+        デッドレターファイルのアイテムをキューに戻す
+
+        検証に失敗する行はファイルに残る。
+
+        Returns:
+            キューに戻した件数
+
+        Raises:
+            IngestionQueueFull: 戻すと max_pending を超える
+        """
+        if self.dead_letter_path is None or not os.path.exists(self.dead_letter_path):
+            return 0
+        items: List[MemoryCreate] = []
+        invalid: List[str] = []
+        with open(self.dead_letter_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    items.append(MemoryCreate.model_validate(json.loads(line)["item"]))
+                except (ValueError, KeyError, TypeError):
+                    invalid.append(line)
+        if len(self._pending) + len(items) > self.max_pending:
+            raise IngestionQueueFull(f"{len(self._pending)} memories pending")
+
+        for item in items:
+            self.enqueue(item)
+        tmp_path = f"{self.dead_letter_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.writelines(invalid)
+        os.replace(tmp_path, self.dead_letter_path)
+        return len(items)
+
+    async def drain(self) -> int:
+        """キューが空になるまで保存（失敗時は例外）"""
+        total = 0
+        while self._pending:
+            total += await self.flush()
+        return total
+
+    # ------------------------------------------------------------------
+    # Background task
+
+    def start(self) -> asyncio.Task:
+        """バックグラウンドのフラッシュタスクを開始"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return self._task
+
+    async def stop(self, drain: bool = True) -> None:
+        """
+        バックグラウンドタスクを停止
+
+        Args:
+            drain: 停止前に残りを保存する（失敗分はスプールに残り、次回起動時に再送）
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        if drain:
+            try:
+                await self.drain()
+            except Exception as e:
+                logger.warning(f"Memory ingestion drain failed, {len(self._pending)} left in spool: {e}")
+
+        if self._spool is not None:
+            self._spool.close()
+            self._spool = None
+
+    async def _run(self) -> None:
+        retry_delay = self.flush_interval
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+                interval_elapsed = False
+            except asyncio.TimeoutError:
+                interval_elapsed = True
+            self._wakeup.clear()
+
+            try:
+                # Size trigger flushes full batches; the interval flushes the rest
+                while self._pending and (interval_elapsed or len(self._pending) >= self.batch_size):
+                    await self.flush()
+                retry_delay = self.flush_interval
+            except Exception as e:
+                logger.warning(
+                    f"Memory ingestion flush failed ({len(self._pending)} pending), "
+                    f"retrying in {retry_delay:.1f}s: {e}"
+                )
+                await asyncio.sleep(retry_delay)
+                retry_delay = min(max(retry_delay, 0.1) * 2, self.max_retry_delay)
+
+    # ------------------------------------------------------------------
+    # Metrics
+
+    def get_stats(self) -> Dict[str, Any]:
+        """キュー深さ・遅延などのメトリクス"""
+        oldest = self._pending[0][2] if self._pending else None
+        return {
+            "depth": len(self._pending),
+            "lag_seconds": round(time.time() - oldest, 3) if oldest is not None else 0.0,
+            "enqueued": self._enqueued,
+            "saved": self._saved,
+            "batches": self._batches,
+            "failed_flushes": self._failed_flushes,
+            "recovered": self._recovered,
+            "dead_lettered": self._dead_lettered,
+            "last_flush_ms": round(self._last_flush_ms, 2) if self._last_flush_ms is not None else None,
+            "spool_bytes": self._spool_bytes(),
+            "running": self._task is not None and not self._task.done(),
+        }
+
+    def pending_items(self) -> List[MemoryCreate]:
+        """未保存アイテムのコピー（先頭から）"""
+        return [item for _, item, _ in self._pending]
@@ -0,0 +1,271 @@
+"""
+Instrumentation - Typed Operation Events with Pluggable Sinks
+
+Replaces print() logging in the memory store and retrieval hot paths.
+Each operation emits one InstrumentationEvent (latency, result count and
+the embedding / database split) to the configured sinks: a logging
+adapter, Prometheus histograms or an in-memory ring buffer.
+
+When no sink is active (e.g. only a LoggingSink whose logger is disabled)
+record() returns before building the event, and sample_rate < 1.0 keeps
+only a random fraction of events.
+"""
+
+import logging
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class InstrumentationEvent:
+    """One instrumented operation"""
+
+    operation: str
+    latency_ms: float
+    result_count: int = 0
+    embedding_ms: Optional[float] = None
+    db_ms: Optional[float] = None
+    phases: Dict[str, float] = field(default_factory=dict)
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    timestamp: float = field(default_factory=time.time)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "operation": self.operation,
+            "latency_ms": self.latency_ms,
+            "result_count": self.result_count,
+            "embedding_ms": self.embedding_ms,
+            "db_ms": self.db_ms,
+            "phases": self.phases,
+            "attributes": self.attributes,
+            "timestamp": self.timestamp,
+        }
+
+
+class InstrumentationSink(ABC):
+    """Abstract base class for event sinks"""
+
+    @property
+    def active(self) -> bool:
+        """False when the sink would discard every event"""
+        return True
+
+    @abstractmethod
+    def emit(self, event: InstrumentationEvent) -> None:
+        """Handle one event (must not block on I/O)"""
+        pass
+
+
+class LoggingSink(InstrumentationSink):
+    """
+    Emits events as single-line log records.
+
+    The event dict is attached as record.instrumentation for structured
+    (JSON) formatters. Inactive unless the logger is enabled for level.
+    """
+
+    def __init__(self, logger_: Optional[logging.Logger] = None, level: int = logging.INFO) -> None:
+        self._logger = logger_ or logging.getLogger("memory_store.instrumentation")
+        self._level = level
+
+    @property
+    def active(self) -> bool:
+        return self._logger.isEnabledFor(self._level)
+
+    def emit(self, event: InstrumentationEvent) -> None:
+        self._logger.log(
+            self._level,
+            "%s latency=%.2fms results=%d embedding=%s db=%s %s",
+            event.operation,
+            event.latency_ms,
+            event.result_count,
+            _format_ms(event.embedding_ms),
+            _format_ms(event.db_ms),
+            event.attributes,
+            extra={"instrumentation": event.to_dict()},
+        )
+
+
+def _format_ms(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value:.2f}ms"
+
+
+class RingBufferSink(InstrumentationSink):
+    """Keeps the most recent events in memory (tests, debug endpoints)"""
+
+    def __init__(self, capacity: int = 1000) -> None:
+        self._events: Deque[InstrumentationEvent] = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def emit(self, event: InstrumentationEvent) -> None:
+        with self._lock:
+            self._events.append(event)
+
+    def events(self, operation: Optional[str] = None) -> List[InstrumentationEvent]:
+        """Buffered events, oldest first (optionally one operation only)"""
+        with self._lock:
+            events = list(self._events)
+        if operation is not None:
+            events = [e for e in events if e.operation == operation]
+        return events
+
+    def clear(self) -> None:
+        with self._lock:
+            self._events.clear()
+
+
+class PrometheusSink(InstrumentationSink):
+    """
+    Records latencies and result counts as Prometheus histograms.
+
+    Latency is labelled by operation and phase (total / embedding / db and
+    the finer phases from memory_store.timing).
+    Requires the prometheus_client package.
+    """
+
+    def __init__(self, registry: Any = None, namespace: str = "memory_store") -> None:
+        try:
+            from prometheus_client import CollectorRegistry, Histogram
+        except ImportError:
+            raise ImportError("prometheus_client package not installed")
+
+        self.registry = registry or CollectorRegistry()
+        self._latency = Histogram(
+            f"{namespace}_operation_latency_seconds",
+            "Memory store operation latency in seconds",
+            labelnames=("operation", "phase"),
+            registry=self.registry,
+        )
+        self._results = Histogram(
+            f"{namespace}_operation_results",
+            "Results returned per memory store operation",
+            labelnames=("operation",),
+            buckets=(0, 1, 5, 10, 20, 50, 100, 500, 1000),
+            registry=self.registry,
+        )
+
+    def emit(self, event: InstrumentationEvent) -> None:
+        self._latency.labels(event.operation, "total").observe(event.latency_ms / 1000)
+        if event.embedding_ms is not None:
+            self._latency.labels(event.operation, "embedding").observe(event.embedding_ms / 1000)
+        if event.db_ms is not None:
+            self._latency.labels(event.operation, "db").observe(event.db_ms / 1000)
+        for name, elapsed in event.phases.items():
+            if name not in ("embedding", "db"):
+                self._latency.labels(event.operation, name).observe(elapsed / 1000)
+        self._results.labels(event.operation).observe(event.result_count)
+
+
+class Instrumentation:
+    """
+    Fans sampled events out to sinks.
+
+    A sink that raises is logged and skipped; instrumentation never fails
+    the operation being measured.
+    """
+
+    def __init__(
+        self,
+        sinks: Optional[Iterable[InstrumentationSink]] = None,
+        sample_rate: float = 1.0,
+        seed: Optional[int] = None,
+    ) -> None:
+        """
+        Args:
+            sinks: Event sinks (none = disabled)
+            sample_rate: Fraction of events emitted (0.0-1.0)
+            seed: Random seed for sampling (tests)
+        """
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError("sample_rate must be between 0.0 and 1.0")
+        self._sinks: List[InstrumentationSink] = list(sinks or [])
+        self.sample_rate = sample_rate
+        self._random = random.Random(seed)
+        self._dropped = 0
+
+    @property
+    def sinks(self) -> List[InstrumentationSink]:
+        return list(self._sinks)
+
+    @property
+    def enabled(self) -> bool:
+        """True if some sink would receive a sampled event"""
+        return self.sample_rate > 0.0 and any(sink.active for sink in self._sinks)
+
+    def add_sink(self, sink: InstrumentationSink) -> None:
+        self._sinks.append(sink)
+
+    def remove_sink(self, sink: InstrumentationSink) -> None:
+        self._sinks.remove(sink)
+
+    def record(
+        self,
+        operation: str,
+        latency_ms: float,
+        result_count: int = 0,
+        embedding_ms: Optional[float] = None,
+        db_ms: Optional[float] = None,
+        phases: Optional[Dict[str, float]] = None,
+        **attributes: Any,
+    ) -> None:
+        """Build and emit an event if enabled and sampled"""
+        if not self.enabled:
+            return
+        if self.sample_rate < 1.0 and self._random.random() >= self.sample_rate:
+            self._dropped += 1
+            return
+        self.emit(InstrumentationEvent(
+            operation=operation,
+            latency_ms=latency_ms,
+            result_count=result_count,
+            embedding_ms=embedding_ms,
+            db_ms=db_ms,
+            phases=phases or {},
+            attributes=attributes,
+        ))
+
+    def emit(self, event: InstrumentationEvent) -> None:
+        """Send an already-built event to every active sink (no sampling)"""
+        for sink in self._sinks:
+            if not sink.active:
+                continue
+            try:
+                sink.emit(event)
+            except Exception as e:
+                logger.warning(f"Instrumentation sink {type(sink).__name__} failed: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "sinks": [type(sink).__name__ for sink in self._sinks],
+            "sample_rate": self.sample_rate,
+            "dropped_by_sampling": self._dropped,
+        }
+
+
+_default = Instrumentation([LoggingSink()])
+
+
+def get_default_instrumentation() -> Instrumentation:
+    """Process-wide instrumentation used when none is injected"""
+    return _default
+
+
+def set_default_instrumentation(instrumentation: Instrumentation) -> None:
+    """Replace the process-wide default (affects objects created afterwards)"""
+    global _default
+    _default = instrumentation
+
+
+def elapsed_ms(start: float) -> float:
+    """Milliseconds since a time.perf_counter() reading"""
+    return (time.perf_counter() - start) * 1000
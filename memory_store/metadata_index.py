@@ -0,0 +1,239 @@
+"""
+Metadata Index - Secondary Indexes for Hybrid Search Filters
+
+Maintains inverted sets per tag / memory_type / source_type and sorted
+arrays for created_at and importance, so search_hybrid can shrink the
+candidate set before computing any similarity.
+"""
+
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple
+
+from .models import MemoryRecord
+
+_EMPTY: FrozenSet[int] = frozenset()
+
+
+# Pending adds merged one by one (bisect + list.insert); larger batches are
+# appended and re-sorted, which timsort does in one pass over the two runs
+_MERGE_BY_INSERT = 32
+
+
+class _SortedColumn:
+    """
+    Parallel sorted key / id lists supporting range lookups.
+
+    Adds go to an id -> key buffer and are merged on the next lookup, so a
+    bulk load costs one sort instead of a list.insert per record. Each id
+    is held at most once.
+    """
+
+    def __init__(self) -> None:
+        self._keys: List[float] = []
+        self._ids: List[int] = []
+        self._pending: Dict[int, float] = {}
+
+    def add(self, key: float, memory_id: int) -> None:
+        self._pending[memory_id] = key
+
+    def remove(self, key: float, memory_id: int) -> None:
+        if self._pending.pop(memory_id, None) is not None:
+            return
+        position = bisect_left(self._keys, key)
+        while position < len(self._keys) and self._keys[position] == key:
+            if self._ids[position] == memory_id:
+                del self._keys[position]
+                del self._ids[position]
+                return
+            position += 1
+
+    def _merge(self) -> None:
+        pending = sorted((key, memory_id) for memory_id, key in self._pending.items())
+        self._pending = {}
+        if len(pending) <= _MERGE_BY_INSERT:
+            for key, memory_id in pending:
+                position = bisect_right(self._keys, key)
+                self._keys.insert(position, key)
+                self._ids.insert(position, memory_id)
+            return
+        rows = list(zip(self._keys, self._ids))
+        rows.extend(pending)
+        rows.sort()
+        self._keys = [key for key, _ in rows]
+        self._ids = [memory_id for _, memory_id in rows]
+
+    def bounds(self, low: Optional[float], high: Optional[float]) -> Tuple[int, int]:
+        """Slice of rows with low <= key <= high"""
+        if self._pending:
+            self._merge()
+        start = 0 if low is None else bisect_left(self._keys, low)
+        end = len(self._keys) if high is None else bisect_right(self._keys, high)
+        return start, max(start, end)
+
+    def ids(self, start: int, end: int) -> Set[int]:
+        """Ids of a bounds() slice"""
+        return set(self._ids[start:end])
+
+
+def _is_hashable(value: Any) -> bool:
+    try:
+        hash(value)
+    except TypeError:
+        return False
+    return True
+
+
+def _importance_key(record: MemoryRecord) -> Optional[float]:
+    value = record.metadata.get("importance", 0.0)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class MetadataIndex:
+    """
+    Secondary indexes over non-archived records.
+
+    candidates() returns a superset of the matching ids (range filters that
+    would not shrink the set are left to the caller's exact check), or None
+    when no filter is indexable.
+    """
+
+    def __init__(self) -> None:
+        self._by_tag: Dict[Any, Set[int]] = {}
+        self._by_memory_type: Dict[str, Set[int]] = {}
+        self._by_source_type: Dict[str, Set[int]] = {}
+        self._created_at = _SortedColumn()
+        self._importance = _SortedColumn()
+        # Records whose importance is not numeric always pass importance ranges
+        self._importance_unsorted: Set[int] = set()
+        # Records whose tags are not a list of hashable values always pass tag
+        # filters; the caller's exact check applies `tag in tags` to them
+        self._tags_unindexed: Set[int] = set()
+        self._entries: Dict[int, Tuple[List[Any], str, Optional[str], float, Optional[float]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, memory_id: int) -> bool:
+        return memory_id in self._entries
+
+    def add(self, record: MemoryRecord) -> None:
+        """Index a record (re-indexes if already present)"""
+        if record.id in self._entries:
+            self.remove(record.id)
+
+        tags = record.metadata.get("tags") or []
+        if isinstance(tags, (list, tuple, set, frozenset)) and all(map(_is_hashable, tags)):
+            tags = list(tags)
+        else:
+            # e.g. a string (substring match) or nested lists: not indexable
+            self._tags_unindexed.add(record.id)
+            tags = []
+        memory_type = record.memory_type.value
+        source_type = record.source_type.value if record.source_type else None
+        created = record.created_at.timestamp()
+        importance = _importance_key(record)
+
+        for tag in tags:
+            self._by_tag.setdefault(tag, set()).add(record.id)
+        self._by_memory_type.setdefault(memory_type, set()).add(record.id)
+        if source_type:
+            self._by_source_type.setdefault(source_type, set()).add(record.id)
+        self._created_at.add(created, record.id)
+        if importance is None:
+            self._importance_unsorted.add(record.id)
+        else:
+            self._importance.add(importance, record.id)
+
+        self._entries[record.id] = (tags, memory_type, source_type, created, importance)
+
+    def remove(self, memory_id: int) -> None:
+        """Drop a record from every index (no-op if absent)"""
+        entry = self._entries.pop(memory_id, None)
+        if entry is None:
+            return
+        tags, memory_type, source_type, created, importance = entry
+
+        for tag in tags:
+            self._discard(self._by_tag, tag, memory_id)
+        self._tags_unindexed.discard(memory_id)
+        self._discard(self._by_memory_type, memory_type, memory_id)
+        if source_type:
+            self._discard(self._by_source_type, source_type, memory_id)
+        self._created_at.remove(created, memory_id)
+        if importance is None:
+            self._importance_unsorted.discard(memory_id)
+        else:
+            self._importance.remove(importance, memory_id)
+
+    @staticmethod
+    def _discard(index: Dict[Any, Set[int]], key: Any, memory_id: int) -> None:
+        ids = index.get(key)
+        if ids is not None:
+            ids.discard(memory_id)
+            if not ids:
+                del index[key]
+
+    def candidates(self, filters: Dict[str, Any]) -> Optional[Set[int]]:
+        """
+        Candidate ids for search_hybrid filters.
+
+        Equality filters are intersected smallest first; a range filter is
+        only materialized when its slice is smaller than the running set.
+        """
+        sets: List[Set[int]] = []
+        if "source_type" in filters:
+            sets.append(self._by_source_type.get(filters["source_type"], _EMPTY))
+        if "memory_type" in filters:
+            sets.append(self._by_memory_type.get(filters["memory_type"], _EMPTY))
+        if "tags" in filters:
+            tag_sets = [
+                self._by_tag.get(tag, _EMPTY) for tag in filters["tags"] if _is_hashable(tag)
+            ]
+            if self._tags_unindexed:
+                tag_sets.append(self._tags_unindexed)
+            sets.append(set().union(*tag_sets) if len(tag_sets) != 1 else tag_sets[0])
+
+        ranges: List[Tuple[int, _SortedColumn, int, int, Set[int]]] = []
+        if "created_after" in filters or "created_before" in filters:
+            after = filters.get("created_after")
+            before = filters.get("created_before")
+            start, end = self._created_at.bounds(
+                after.timestamp() if after else None,
+                before.timestamp() if before else None,
+            )
+            ranges.append((end - start, self._created_at, start, end, _EMPTY))
+        if "importance_min" in filters or "importance_max" in filters:
+            start, end = self._importance.bounds(
+                filters.get("importance_min"), filters.get("importance_max")
+            )
+            extra = self._importance_unsorted
+            ranges.append((end - start + len(extra), self._importance, start, end, extra))
+
+        if not sets and not ranges:
+            return None
+
+        result: Optional[Set[int]] = None
+        for ids in sorted(sets, key=len):
+            result = set(ids) if result is None else result & ids
+            if not result:
+                return set()
+
+        for size, column, start, end, extra in sorted(ranges, key=lambda r: r[0]):
+            if result is not None and size >= len(result):
+                break
+            ids = column.ids(start, end) | extra
+            result = ids if result is None else result & ids
+
+        return result
+
+    def get_stats(self) -> Dict[str, int]:
+        """Index sizes"""
+        return {
+            "records": len(self._entries),
+            "tags": len(self._by_tag),
+            "memory_types": len(self._by_memory_type),
+            "source_types": len(self._by_source_type),
+        }
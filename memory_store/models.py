@@ -6,7 +6,7 @@ Pydantic models for memory storage and retrieval.
 
 from datetime import datetime, timezone
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Literal, Optional
 from uuid import UUID
 
 from pydantic import BaseModel, Field, ConfigDict
@@ -26,6 +26,13 @@ class SourceType(str, Enum):
     DECISION = "decision"
 
 
+class DedupMode(str, Enum):
+    """保存時の重複（同一ユーザー・同一タイプ・同一正規化内容）の扱い"""
+    NONE = "none"  # 常に新しい行を保存
+    REUSE_EMBEDDING = "reuse_embedding"  # 既存のEmbeddingを再利用して新しい行を保存
+    COUNT = "count"  # 保存せず既存の行の duplicate_count を加算
+
+
 class MemoryCreate(BaseModel):
     """記憶作成リクエスト"""
     content: str = Field(..., min_length=1, max_length=100000)
@@ -33,6 +40,7 @@ class MemoryCreate(BaseModel):
     source_type: Optional[SourceType] = None
     metadata: Dict[str, Any] = Field(default_factory=dict)
     expires_at: Optional[datetime] = None
+    user_id: Optional[str] = None
 
     model_config = ConfigDict(use_enum_values=False)
 
@@ -49,6 +57,8 @@ class MemoryRecord(BaseModel):
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     expires_at: Optional[datetime] = None
     is_archived: bool = False
+    user_id: Optional[str] = None
+    duplicate_count: int = 0  # DedupMode.COUNT で加算された重複保存の回数
 
     model_config = ConfigDict(use_enum_values=False)
 
@@ -97,6 +107,16 @@ class MemoryStoreConfig(BaseModel):
     max_cache_size: int = 10000
 
 
+class VectorSearchTuning(BaseModel):
+    """pgvector検索チューニング（トランザクション単位で適用）"""
+    ef_search: Optional[int] = Field(default=None, ge=1, le=1000)  # hnsw.ef_search
+    probes: Optional[int] = Field(default=None, ge=1)  # ivfflat.probes
+    # pgvector 0.8+: continue scanning the index until enough rows pass filters
+    iterative_scan: Optional[Literal["strict_order", "relaxed_order"]] = None
+    # Fetch limit * overfetch_factor ANN candidates before threshold filtering
+    overfetch_factor: int = Field(default=1, ge=1, le=100)
+
+
 # Sprint 7: Session Summary Models
 
 class SessionSummaryResponse(BaseModel):
@@ -123,3 +143,31 @@ class SessionStats(BaseModel):
     duration_seconds: Optional[int] = None
     has_summary: bool = False
     last_summary_time: Optional[datetime] = None
+
+
+# Summary Tree Models
+
+class SummaryLevel(str, Enum):
+    """要約ツリーの階層（session → week → month）"""
+    SESSION = "session"
+    WEEK = "week"
+    MONTH = "month"
+
+
+class SummaryNode(BaseModel):
+    """要約ツリーのノード（親ノードは子ノードの要約）"""
+    id: int
+    user_id: str
+    level: SummaryLevel
+    period_start: datetime
+    period_end: datetime
+    summary: str
+    embedding: List[float] = Field(default_factory=list)
+    parent_id: Optional[int] = None  # None = まだ上位階層に集約されていない
+    session_id: Optional[UUID] = None  # SESSION ノードのみ
+    source_count: int = Field(default=0, ge=0, description="集約した子ノード数")
+    message_count: int = Field(default=0, ge=0, description="配下のメッセージ数")
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,303 @@
+"""
+pgvector Index Management
+
+Creates, rebuilds and inspects HNSW / IVFFlat indexes on memories.embedding
+and applies per-transaction search tuning (hnsw.ef_search, ivfflat.probes,
+hnsw.iterative_scan).
+
+Hot tenants get their own partial HNSW index (WHERE user_id = '<user>'),
+so a user-scoped search walks a graph of that user's rows only instead of
+filtering the shared graph.
+"""
+
+import hashlib
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+import asyncpg
+
+from .models import VectorSearchTuning
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+_INDEX_SCAN_NODES = {"Index Scan", "Index Only Scan", "Bitmap Index Scan"}
+
+
+def _identifier(name: str) -> str:
+    """Validate and quote a SQL identifier"""
+    if not _IDENTIFIER.match(name):
+        raise ValueError(f"Invalid identifier: {name}")
+    return f'"{name}"'
+
+
+def _literal(value: str) -> str:
+    """Quote a string literal (standard_conforming_strings)"""
+    if "\x00" in value:
+        raise ValueError("String literal must not contain NUL")
+    return "'" + value.replace("'", "''") + "'"
+
+
+async def apply_search_tuning(conn: Any, tuning: Optional[VectorSearchTuning]) -> None:
+    """
+    Apply search tuning for the current transaction.
+
+    Uses set_config(..., is_local => true), so the caller must be inside a
+    transaction and the settings never leak to other pool users.
+    """
+    if tuning is None:
+        return
+
+    settings = {
+        "hnsw.ef_search": tuning.ef_search,
+        "ivfflat.probes": tuning.probes,
+        "hnsw.iterative_scan": tuning.iterative_scan,
+        "ivfflat.iterative_scan": "relaxed_order" if tuning.iterative_scan else None,
+    }
+    for name, value in settings.items():
+        if value is not None:
+            await conn.execute("SELECT set_config($1, $2, true)", name, str(value))
+
+
+def plan_uses_index(plan: Any, index_name: Optional[str] = None) -> bool:
+    """
+    Check whether an EXPLAIN (FORMAT JSON) plan scans an index.
+
+    Args:
+        plan: Parsed EXPLAIN output (list, {"Plan": ...} or a plan node)
+        index_name: Require this specific index (any index if None)
+    """
+    if isinstance(plan, list):
+        return any(plan_uses_index(p, index_name) for p in plan)
+    if "Plan" in plan:
+        return plan_uses_index(plan["Plan"], index_name)
+
+    if plan.get("Node Type") in _INDEX_SCAN_NODES:
+        if index_name is None or plan.get("Index Name") == index_name:
+            return True
+
+    return any(plan_uses_index(child, index_name) for child in plan.get("Plans", []))
+
+
+class PgVectorIndexManager:
+    """ANN index management for a pgvector column"""
+
+    def __init__(
+        self,
+        pool: asyncpg.Pool,
+        table: str = "memories",
+        column: str = "embedding",
+    ) -> None:
+        """
+        Args:
+            pool: asyncpg connection pool
+            table: Table holding the vector column
+            column: Vector column name
+        """
+        self._pool = pool
+        self.table = table
+        self.column = column
+        _identifier(table)
+        _identifier(column)
+
+    def default_index_name(self, method: str) -> str:
+        """Index name used when none is given (e.g. idx_memories_embedding_hnsw)"""
+        return f"idx_{self.table}_{self.column}_{method}"
+
+    def tenant_index_name(self, user_id: str) -> str:
+        """Partial index name for one user (hashed, so any user_id is a valid identifier)"""
+        digest = hashlib.sha1(user_id.encode("utf-8")).hexdigest()[:16]
+        return f"idx_{self.table}_{self.column}_hnsw_u{digest}"
+
+    async def list_indexes(self) -> List[Dict[str, str]]:
+        """List HNSW / IVFFlat indexes on the table"""
+        async with self._pool.acquire() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT indexname, indexdef
+                FROM pg_indexes
+                WHERE tablename = $1
+                    AND (indexdef ILIKE '%USING hnsw%' OR indexdef ILIKE '%USING ivfflat%')
+                ORDER BY indexname
+                """,
+                self.table,
+            )
+        return [{"name": row["indexname"], "definition": row["indexdef"]} for row in rows]
+
+    async def _create_index(
+        self,
+        method: str,
+        options: Dict[str, int],
+        name: Optional[str],
+        concurrently: bool,
+        where: Optional[str],
+    ) -> str:
+        name = name or self.default_index_name(method)
+        with_clause = ", ".join(f"{key} = {int(value)}" for key, value in options.items())
+        sql = (
+            f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS "
+            f"{_identifier(name)} ON {_identifier(self.table)} "
+            f"USING {method} ({_identifier(self.column)} vector_cosine_ops) "
+            f"WITH ({with_clause})"
+        )
+        if where:
+            sql += f" WHERE {where}"
+
+        async with self._pool.acquire() as conn:
+            await conn.execute(sql)
+        return name
+
+    async def create_hnsw_index(
+        self,
+        m: int = 16,
+        ef_construction: int = 64,
+        name: Optional[str] = None,
+        concurrently: bool = True,
+        where: Optional[str] = None,
+    ) -> str:
+        """
+        Create an HNSW cosine index.
+
+        Args:
+            m: Max connections per layer
+            ef_construction: Candidate list size while building
+            name: Index name (default: idx_<table>_<column>_hnsw)
+            concurrently: Build without blocking writes
+            where: Optional partial-index predicate (trusted SQL)
+
+        Returns:
+            Index name
+        """
+        return await self._create_index(
+            "hnsw", {"m": m, "ef_construction": ef_construction}, name, concurrently, where
+        )
+
+    async def create_ivfflat_index(
+        self,
+        lists: int = 100,
+        name: Optional[str] = None,
+        concurrently: bool = True,
+        where: Optional[str] = None,
+    ) -> str:
+        """
+        Create an IVFFlat cosine index.
+
+        Build it after the table has data; lists ≈ rows / 1000 is a good start.
+
+        Returns:
+            Index name
+        """
+        return await self._create_index("ivfflat", {"lists": lists}, name, concurrently, where)
+
+    async def create_tenant_index(
+        self,
+        user_id: str,
+        m: int = 16,
+        ef_construction: int = 64,
+        concurrently: bool = True,
+    ) -> str:
+        """
+        Create a partial HNSW index over one user's memories.
+
+        The planner only matches it when user_id is known at plan time;
+        PostgresMemoryRepository forces custom plans for user-scoped
+        searches.
+
+        Returns:
+            Index name
+        """
+        return await self.create_hnsw_index(
+            m=m,
+            ef_construction=ef_construction,
+            name=self.tenant_index_name(user_id),
+            concurrently=concurrently,
+            where=f"user_id = {_literal(user_id)}",
+        )
+
+    async def hot_tenants(self, min_rows: int = 10000) -> List[Dict[str, Any]]:
+        """
+        Users with at least min_rows active memories, largest first.
+
+        Reads the maintained memory_counters table, not memories.
+        """
+        async with self._pool.acquire() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT user_id, SUM(memory_count) AS memory_count
+                FROM memory_counters
+                WHERE archived = false AND user_id <> ''
+                GROUP BY user_id
+                HAVING SUM(memory_count) >= $1
+                ORDER BY memory_count DESC
+                """,
+                min_rows,
+            )
+        return [{"user_id": row["user_id"], "memory_count": int(row["memory_count"])} for row in rows]
+
+    async def ensure_tenant_indexes(
+        self,
+        min_rows: int = 10000,
+        m: int = 16,
+        ef_construction: int = 64,
+    ) -> List[str]:
+        """
+        Create partial indexes for hot tenants that do not have one yet.
+
+        Smaller tenants are served by idx_memories_user plus an exact sort
+        of their rows, which is already cheap.
+
+        Returns:
+            Names of the indexes created
+        """
+        existing = {index["name"] for index in await self.list_indexes()}
+        created = []
+        for tenant in await self.hot_tenants(min_rows):
+            name = self.tenant_index_name(tenant["user_id"])
+            if name not in existing:
+                created.append(await self.create_tenant_index(tenant["user_id"], m, ef_construction))
+        return created
+
+    async def rebuild_index(self, name: str, concurrently: bool = True) -> None:
+        """Rebuild an index (e.g. after bulk loads skewed IVFFlat lists)"""
+        async with self._pool.acquire() as conn:
+            await conn.execute(
+                f"REINDEX INDEX {'CONCURRENTLY ' if concurrently else ''}{_identifier(name)}"
+            )
+
+    async def drop_index(self, name: str, concurrently: bool = True) -> None:
+        """Drop an index if it exists"""
+        async with self._pool.acquire() as conn:
+            await conn.execute(
+                f"DROP INDEX {'CONCURRENTLY ' if concurrently else ''}IF EXISTS {_identifier(name)}"
+            )
+
+    async def explain(
+        self,
+        sql: str,
+        params: List[Any],
+        tuning: Optional[VectorSearchTuning] = None,
+        disable_seqscan: bool = False,
+        analyze: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """
+        EXPLAIN a query under the given tuning.
+
+        Args:
+            sql: Query to explain
+            params: Query parameters
+            tuning: Search tuning to apply first
+            disable_seqscan: Set enable_seqscan=off to check index eligibility
+                on tables too small for the planner to prefer the index
+            analyze: Run EXPLAIN ANALYZE
+
+        Returns:
+            Parsed EXPLAIN (FORMAT JSON) output
+        """
+        options = "ANALYZE, FORMAT JSON" if analyze else "FORMAT JSON"
+        async with self._pool.acquire() as conn:
+            async with conn.transaction():
+                await apply_search_tuning(conn, tuning)
+                if disable_seqscan:
+                    await conn.execute("SELECT set_config('enable_seqscan', 'off', true)")
+                plan = await conn.fetchval(f"EXPLAIN ({options}) {sql}", *params)
+        return json.loads(plan) if isinstance(plan, str) else plan
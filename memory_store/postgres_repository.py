@@ -2,27 +2,57 @@
 PostgreSQL Memory Repository - Database Access Layer for pgvector
 
 Implements memory storage with PostgreSQL and pgvector extension.
+The pool must register the binary vector codec (see vector_codec.py).
 """
 
 import asyncpg
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
-from .models import MemoryRecord, MemoryType, SourceType
-from .repository import MemoryRepository
+import numpy as np
 
+from .dedup import DuplicateKey, content_hash
+from .models import MemoryRecord, MemoryType, SourceType, VectorSearchTuning
+from .pgvector_index import apply_search_tuning
+from .repository import (
+    STREAM_CHUNK_SIZE,
+    ReembeddableRepository,
+    RestorableRepository,
+    snapshot_row,
+)
+from .timing import phase
 
-class PostgresMemoryRepository(MemoryRepository):
+
+class PostgresMemoryRepository(ReembeddableRepository, RestorableRepository):
     """PostgreSQL implementation with pgvector support"""
 
-    def __init__(self, pool: asyncpg.Pool) -> None:
+    ARCHIVE_BATCH_SIZE = 1000
+
+    def __init__(
+        self,
+        pool: asyncpg.Pool,
+        search_tuning: Optional[VectorSearchTuning] = None,
+    ) -> None:
         """
         Initialize with connection pool.
         
         Args:
-            pool: asyncpg connection pool
+            pool: asyncpg connection pool created with init=init_vector_codec
+            search_tuning: ANN tuning (ef_search / probes / over-fetch)
         """
         self._pool = pool
+        self._search_tuning = search_tuning
+
+    @asynccontextmanager
+    async def _connection(self) -> AsyncIterator[asyncpg.Connection]:
+        """Acquire a pooled connection, timing the wait as the 'acquire' phase"""
+        with phase("acquire"):
+            conn = await self._pool.acquire()
+        try:
+            yield conn
+        finally:
+            await self._pool.release(conn)
 
     async def insert_memory(
         self,
@@ -37,24 +67,81 @@ class PostgresMemoryRepository(MemoryRepository):
         """Insert a new memory record"""
         import json
         
-        async with self._pool.acquire() as conn:
-            row = await conn.fetchrow(
-                """
-                INSERT INTO memories (content, embedding, memory_type, source_type, metadata, expires_at, user_id)
-                VALUES ($1, $2, $3, $4, $5, $6, $7)
-                RETURNING id
-                """,
-                content,
-                str(embedding),  # pgvector accepts string representation
-                memory_type,
-                source_type,
-                json.dumps(metadata),
-                expires_at,
-                user_id,
-            )
+        async with self._connection() as conn:
+            with phase("query"):
+                row = await conn.fetchrow(
+                    """
+                    INSERT INTO memories (
+                        content, embedding, memory_type, source_type, metadata, expires_at, user_id,
+                        content_hash
+                    )
+                    VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
+                    RETURNING id
+                    """,
+                    content,
+                    embedding,
+                    memory_type,
+                    source_type,
+                    json.dumps(metadata),
+                    expires_at,
+                    user_id,
+                    content_hash(content),
+                )
             return row["id"]
 
-    async def search_similar(
+    async def insert_memories_bulk(self, rows: List[Dict[str, Any]]) -> List[int]:
+        """
+        Insert many memory records with binary COPY.
+
+        Ids are reserved from the memories sequence up front so they can be
+        returned in input order, then every row is streamed into memories
+        with a single COPY inside one transaction.
+        """
+        import json
+
+        if not rows:
+            return []
+
+        async with self._connection() as conn:
+            with phase("query"):
+                async with conn.transaction():
+                    id_rows = await conn.fetch(
+                        """
+                        SELECT nextval(pg_get_serial_sequence('memories', 'id')) AS id
+                        FROM generate_series(1, $1)
+                        """,
+                        len(rows),
+                    )
+                    ids = [r["id"] for r in id_rows]
+
+                    await conn.copy_records_to_table(
+                        "memories",
+                        columns=[
+                            "id", "content", "embedding", "memory_type", "source_type",
+                            "metadata", "expires_at", "user_id", "content_hash",
+                        ],
+                        records=[
+                            (
+                                memory_id,
+                                row["content"],
+                                row["embedding"],
+                                row["memory_type"],
+                                row.get("source_type"),
+                                json.dumps(row.get("metadata") or {}),
+                                row.get("expires_at"),
+                                row.get("user_id"),
+                                content_hash(row["content"]),
+                            )
+                            for memory_id, row in zip(ids, rows)
+                        ],
+                    )
+        return ids
+
+    def set_search_tuning(self, tuning: Optional[VectorSearchTuning]) -> None:
+        """Set ANN tuning applied to every subsequent search"""
+        self._search_tuning = tuning
+
+    def build_search_similar_query(
         self,
         query_embedding: List[float],
         memory_type: Optional[str],
@@ -62,53 +149,211 @@ class PostgresMemoryRepository(MemoryRepository):
         similarity_threshold: float,
         include_archived: bool,
         user_id: Optional[str] = None,
-    ) -> List[Dict[str, Any]]:
-        """Search for similar memories using pgvector cosine similarity"""
-        import json
-        
-        # Build query with optional filters
-        conditions = ["archived = false OR $5 = true"]
-        params = [str(query_embedding), limit, similarity_threshold, memory_type, include_archived]
-        
+    ) -> Tuple[str, List[Any]]:
+        """
+        Build the ANN-friendly similarity query.
+
+        The inner query orders by the raw distance operator with a LIMIT so
+        pgvector can serve it from an HNSW/IVFFlat index; the similarity
+        threshold is applied to the candidates afterwards.
+        """
+        overfetch = self._search_tuning.overfetch_factor if self._search_tuning else 1
+        params: List[Any] = [query_embedding, limit * overfetch, similarity_threshold, limit]
+        conditions = []
+
+        if not include_archived:
+            conditions.append("archived = false")
+
         if memory_type:
-            conditions.append("memory_type = $4")
-        
+            params.append(memory_type)
+            conditions.append(f"memory_type = ${len(params)}")
+
         if user_id:
-            conditions.append(f"user_id = ${len(params) + 1}")
             params.append(user_id)
-        
-        where_clause = " AND ".join(conditions)
-        
-        async with self._pool.acquire() as conn:
-            rows = await conn.fetch(
-                f"""
-                SELECT 
+            conditions.append(f"user_id = ${len(params)}")
+
+        where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        sql = f"""
+            SELECT
+                id, content, memory_type, source_type, metadata, created_at,
+                1 - distance AS similarity
+            FROM (
+                SELECT
                     id, content, memory_type, source_type, metadata, created_at,
-                    1 - (embedding <=> $1::vector) AS similarity
+                    embedding <=> $1::vector AS distance
                 FROM memories
-                WHERE {where_clause}
-                    AND 1 - (embedding <=> $1::vector) >= $3
-                ORDER BY similarity DESC
+                {where_clause}
+                ORDER BY embedding <=> $1::vector
                 LIMIT $2
-                """,
-                *params
-            )
-            
-            results = []
-            for row in rows:
-                metadata = row["metadata"]
-                if isinstance(metadata, str):
-                    metadata = json.loads(metadata)
-                results.append({
-                    "id": row["id"],
-                    "content": row["content"],
-                    "memory_type": row["memory_type"],
-                    "source_type": row["source_type"],
-                    "metadata": metadata,
-                    "created_at": row["created_at"],
-                    "similarity": float(row["similarity"]),
-                })
-            return results
+            ) candidates
+            WHERE 1 - distance >= $3
+            ORDER BY distance
+            LIMIT $4
+        """
+        return sql, params
+
+    def build_stream_similar_query(
+        self,
+        query_embedding: List[float],
+        memory_type: Optional[str],
+        similarity_threshold: float,
+        include_archived: bool,
+        limit: Optional[int] = None,
+        user_id: Optional[str] = None,
+    ) -> Tuple[str, List[Any]]:
+        """
+        Build the exact, uncapped similarity query used by stream_similar.
+
+        The threshold is a plain predicate and the order is (distance, id),
+        so every qualifying row is returned deterministically.
+        """
+        params: List[Any] = [query_embedding, similarity_threshold]
+        conditions = ["1 - (embedding <=> $1::vector) >= $2"]
+
+        if not include_archived:
+            conditions.append("archived = false")
+
+        if memory_type:
+            params.append(memory_type)
+            conditions.append(f"memory_type = ${len(params)}")
+
+        if user_id:
+            params.append(user_id)
+            conditions.append(f"user_id = ${len(params)}")
+
+        limit_clause = ""
+        if limit is not None:
+            params.append(limit)
+            limit_clause = f"LIMIT ${len(params)}"
+
+        sql = f"""
+            SELECT
+                id, content, memory_type, source_type, metadata, created_at,
+                1 - (embedding <=> $1::vector) AS similarity
+            FROM memories
+            WHERE {' AND '.join(conditions)}
+            ORDER BY embedding <=> $1::vector, id
+            {limit_clause}
+        """
+        return sql, params
+
+    def build_search_hybrid_query(
+        self,
+        query_embedding: List[float],
+        filters: Dict[str, Any],
+        limit: int,
+    ) -> Tuple[str, List[Any]]:
+        """Build the ANN-friendly filtered query"""
+        conditions = ["archived = false"]
+        params: List[Any] = [query_embedding, limit]
+
+        for key in ("source_type", "memory_type", "user_id"):
+            if filters.get(key):
+                params.append(filters[key])
+                conditions.append(f"{key} = ${len(params)}")
+
+        where_clause = " AND ".join(conditions)
+
+        sql = f"""
+            SELECT
+                id, content, memory_type, source_type, metadata, created_at,
+                1 - (embedding <=> $1::vector) AS similarity
+            FROM memories
+            WHERE {where_clause}
+            ORDER BY embedding <=> $1::vector
+            LIMIT $2
+        """
+        return sql, params
+
+    async def _fetch_search(
+        self,
+        sql: str,
+        params: List[Any],
+        user_scoped: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """
+        Run a search query under the configured tuning.
+
+        User-scoped queries are planned with the actual user_id
+        (plan_cache_mode=force_custom_plan): a generic plan for the
+        prepared statement cannot use per-tenant partial indexes.
+        """
+        async with self._connection() as conn:
+            with phase("query"):
+                if self._search_tuning is None and not user_scoped:
+                    rows = await conn.fetch(sql, *params)
+                else:
+                    async with conn.transaction():
+                        await apply_search_tuning(conn, self._search_tuning)
+                        if user_scoped:
+                            await conn.execute(
+                                "SELECT set_config('plan_cache_mode', 'force_custom_plan', true)"
+                            )
+                        rows = await conn.fetch(sql, *params)
+
+        with phase("decode"):
+            return [self._row_to_dict(row) for row in rows]
+
+    @staticmethod
+    def _row_to_dict(row: Any) -> Dict[str, Any]:
+        import json
+
+        metadata = row["metadata"]
+        if isinstance(metadata, str):
+            metadata = json.loads(metadata)
+        return {
+            "id": row["id"],
+            "content": row["content"],
+            "memory_type": row["memory_type"],
+            "source_type": row["source_type"],
+            "metadata": metadata,
+            "created_at": row["created_at"],
+            "similarity": float(row["similarity"]),
+        }
+
+    async def search_similar(
+        self,
+        query_embedding: List[float],
+        memory_type: Optional[str],
+        limit: int,
+        similarity_threshold: float,
+        include_archived: bool,
+        user_id: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Search for similar memories using pgvector cosine similarity"""
+        sql, params = self.build_search_similar_query(
+            query_embedding, memory_type, limit, similarity_threshold, include_archived, user_id
+        )
+        return await self._fetch_search(sql, params, user_scoped=bool(user_id))
+
+    async def stream_similar(
+        self,
+        query_embedding: List[float],
+        memory_type: Optional[str],
+        similarity_threshold: float,
+        include_archived: bool,
+        limit: Optional[int] = None,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+        user_id: Optional[str] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream similar memories through a server-side cursor.
+
+        The cursor fetches chunk_size rows per round trip, so a slow consumer
+        holds one connection and one chunk in memory, never the whole
+        result. Index scans are disabled for the stream's transaction: an
+        HNSW scan would stop after ef_search rows, while exports need every
+        qualifying row in exact order.
+        """
+        sql, params = self.build_stream_similar_query(
+            query_embedding, memory_type, similarity_threshold, include_archived, limit, user_id
+        )
+        async with self._connection() as conn:
+            async with conn.transaction():
+                await conn.execute("SELECT set_config('enable_indexscan', 'off', true)")
+                async for row in conn.cursor(sql, *params, prefetch=chunk_size):
+                    yield self._row_to_dict(row)
 
     async def search_hybrid(
         self,
@@ -117,63 +362,11 @@ class PostgresMemoryRepository(MemoryRepository):
         limit: int,
     ) -> List[Dict[str, Any]]:
         """Search with vector similarity and metadata filters"""
-        import json
-        
-        conditions = ["archived = false"]
-        params = [str(query_embedding), limit]
-        param_idx = 3
-        
-        if filters.get("source_type"):
-            conditions.append(f"source_type = ${param_idx}")
-            params.append(filters["source_type"])
-            param_idx += 1
-        
-        if filters.get("memory_type"):
-            conditions.append(f"memory_type = ${param_idx}")
-            params.append(filters["memory_type"])
-            param_idx += 1
-            
-        if filters.get("user_id"):
-            conditions.append(f"user_id = ${param_idx}")
-            params.append(filters["user_id"])
-            param_idx += 1
-        
-        where_clause = " AND ".join(conditions)
-        
-        async with self._pool.acquire() as conn:
-            rows = await conn.fetch(
-                f"""
-                SELECT 
-                    id, content, memory_type, source_type, metadata, created_at,
-                    1 - (embedding <=> $1::vector) AS similarity
-                FROM memories
-                WHERE {where_clause}
-                ORDER BY similarity DESC
-                LIMIT $2
-                """,
-                *params
-            )
-            
-            results = []
-            for row in rows:
-                metadata = row["metadata"]
-                if isinstance(metadata, str):
-                    metadata = json.loads(metadata)
-                results.append({
-                    "id": row["id"],
-                    "content": row["content"],
-                    "memory_type": row["memory_type"],
-                    "source_type": row["source_type"],
-                    "metadata": metadata,
-                    "created_at": row["created_at"],
-                    "similarity": float(row["similarity"]),
-                })
-            return results
+        sql, params = self.build_search_hybrid_query(query_embedding, filters, limit)
+        return await self._fetch_search(sql, params, user_scoped=bool(filters.get("user_id")))
 
     async def get_by_id(self, memory_id: int) -> Optional[MemoryRecord]:
         """Get memory by ID"""
-        import json
-        
         async with self._pool.acquire() as conn:
             row = await conn.fetchrow(
                 "SELECT * FROM memories WHERE id = $1",
@@ -183,69 +376,703 @@ class PostgresMemoryRepository(MemoryRepository):
             if not row:
                 return None
             
-            metadata = row["metadata"]
-            if isinstance(metadata, str):
-                metadata = json.loads(metadata)
-            
-            return MemoryRecord(
-                id=row["id"],
-                content=row["content"],
-                embedding=[],  # Don't load full embedding for simple fetch
-                memory_type=MemoryType(row["memory_type"]),
-                source_type=SourceType(row["source_type"]) if row["source_type"] else None,
-                metadata=metadata,
-                created_at=row["created_at"],
-                updated_at=row.get("updated_at", row["created_at"]),
-                expires_at=row["expires_at"],
-                is_archived=row["archived"],
-            )
+            # Don't load full embedding for simple fetch
+            return self._row_to_record(row, with_embedding=False)
+
+    @staticmethod
+    def _row_to_record(row: Any, with_embedding: bool) -> MemoryRecord:
+        import json
 
-    async def archive_expired(self) -> int:
-        """Archive expired working memories"""
+        metadata = row["metadata"]
+        if isinstance(metadata, str):
+            metadata = json.loads(metadata)
+
+        return MemoryRecord(
+            id=row["id"],
+            content=row["content"],
+            embedding=list(row["embedding"]) if with_embedding else [],
+            memory_type=MemoryType(row["memory_type"]),
+            source_type=SourceType(row["source_type"]) if row["source_type"] else None,
+            metadata=metadata,
+            created_at=row["created_at"],
+            updated_at=row.get("updated_at") or row["created_at"],
+            expires_at=row["expires_at"],
+            is_archived=row["archived"],
+            user_id=row.get("user_id"),
+            duplicate_count=row.get("duplicate_count", 0),
+        )
+
+    async def find_duplicates(
+        self, keys: List[DuplicateKey]
+    ) -> Dict[DuplicateKey, Tuple[int, List[float]]]:
+        """
+        Look up unarchived memories by content hash.
+
+        One query for the whole batch through idx_memories_content_hash;
+        the (type, user) part of each key is matched on the returned rows.
+        """
+        if not keys:
+            return {}
+        async with self._connection() as conn:
+            with phase("query"):
+                rows = await conn.fetch(
+                    """
+                    SELECT DISTINCT ON (content_hash, memory_type, user_id)
+                           id, content_hash, memory_type, user_id, embedding
+                    FROM memories
+                    WHERE archived = false AND content_hash = ANY($1::text[])
+                    ORDER BY content_hash, memory_type, user_id, id DESC
+                    """,
+                    list({key[0] for key in keys}),
+                )
+        wanted = set(keys)
+        found: Dict[DuplicateKey, Tuple[int, List[float]]] = {}
+        for row in rows:
+            key = (row["content_hash"], row["memory_type"], row["user_id"])
+            if key in wanted:
+                found[key] = (row["id"], list(row["embedding"]))
+        return found
+
+    async def increment_duplicate_count(self, memory_id: int, count: int = 1) -> None:
+        """Add count to a memory's duplicate_count"""
+        async with self._connection() as conn:
+            with phase("query"):
+                await conn.execute(
+                    "UPDATE memories SET duplicate_count = duplicate_count + $2, updated_at = NOW() WHERE id = $1",
+                    memory_id,
+                    count,
+                )
+
+    async def archive_expired(self, limit: Optional[int] = None) -> int:
+        """
+        Archive expired working memories.
+
+        Rows are archived in batches of ARCHIVE_BATCH_SIZE, each its own
+        short statement, so cleanup never holds locks on the whole backlog.
+        The literal predicates match idx_memories_working_expiry.
+
+        Args:
+            limit: Archive at most this many (None = all expired)
+        """
+        total = 0
         async with self._pool.acquire() as conn:
-            result = await conn.execute(
-                """
-                UPDATE memories 
-                SET archived = true 
-                WHERE memory_type = 'WORKING' 
-                    AND expires_at IS NOT NULL 
-                    AND expires_at <= NOW()
-                    AND archived = false
-                """
-            )
-            # Extract count from "UPDATE N" string
-            count = int(result.split()[-1]) if result else 0
-            return count
+            while limit is None or total < limit:
+                batch = self.ARCHIVE_BATCH_SIZE if limit is None else min(
+                    self.ARCHIVE_BATCH_SIZE, limit - total
+                )
+                result = await conn.execute(
+                    """
+                    WITH due AS (
+                        SELECT id
+                        FROM memories
+                        WHERE memory_type = 'working'
+                            AND archived = false
+                            AND expires_at IS NOT NULL
+                            AND expires_at <= NOW()
+                        ORDER BY expires_at
+                        LIMIT $1
+                        FOR UPDATE SKIP LOCKED
+                    )
+                    UPDATE memories m
+                    SET archived = true, updated_at = NOW()
+                    FROM due
+                    WHERE m.id = due.id
+                    """,
+                    batch,
+                )
+                # Extract count from "UPDATE N" string
+                count = int(result.split()[-1]) if result else 0
+                total += count
+                if count < batch:
+                    break
+        return total
 
     async def count_by_type(self, memory_type: str) -> int:
-        """Count memories by type"""
+        """Count memories by type (reads the trigger-maintained memory_counters)"""
         async with self._pool.acquire() as conn:
-            row = await conn.fetchrow(
-                "SELECT COUNT(*) as count FROM memories WHERE memory_type = $1 AND archived = false",
+            count = await conn.fetchval(
+                """
+                SELECT COALESCE(SUM(memory_count), 0)
+                FROM memory_counters
+                WHERE memory_type = $1 AND archived = false
+                """,
                 memory_type
             )
-            return row["count"] if row else 0
+            return int(count or 0)
+
+    async def get_type_counts(self, user_id: Optional[str] = None) -> Dict[str, int]:
+        """Non-archived memory counts per type in one counters lookup"""
+        counts = {t.value: 0 for t in MemoryType}
+        async with self._pool.acquire() as conn:
+            if user_id is None:
+                rows = await conn.fetch(
+                    """
+                    SELECT memory_type, SUM(memory_count) AS count
+                    FROM memory_counters
+                    WHERE archived = false
+                    GROUP BY memory_type
+                    """
+                )
+            else:
+                rows = await conn.fetch(
+                    """
+                    SELECT memory_type, SUM(memory_count) AS count
+                    FROM memory_counters
+                    WHERE archived = false AND user_id IN ($1, '')
+                    GROUP BY memory_type
+                    """,
+                    user_id
+                )
+        for row in rows:
+            counts[row["memory_type"]] = int(row["count"])
+        return counts
 
     async def get_user_memory_stats(self, user_id: str) -> Dict[str, Any]:
-        """Get memory statistics for a user"""
+        """Get memory statistics for a user (own and shared memories)"""
         async with self._pool.acquire() as conn:
             row = await conn.fetchrow(
                 """
                 SELECT 
-                    COUNT(*) as total_count,
-                    COUNT(*) FILTER (WHERE archived = false) as active_count,
-                    COUNT(*) FILTER (WHERE archived = true) as archive_count,
-                    COUNT(*) FILTER (WHERE memory_type = 'WORKING') as working_count,
-                    COUNT(*) FILTER (WHERE memory_type = 'LONGTERM') as longterm_count
-                FROM memories
-                WHERE user_id = $1 OR user_id IS NULL
+                    COALESCE(SUM(memory_count), 0) as total_count,
+                    COALESCE(SUM(memory_count) FILTER (WHERE archived = false), 0) as active_count,
+                    COALESCE(SUM(memory_count) FILTER (WHERE archived = true), 0) as archive_count,
+                    COALESCE(SUM(memory_count) FILTER (WHERE memory_type = 'working'), 0) as working_count,
+                    COALESCE(SUM(memory_count) FILTER (WHERE memory_type = 'longterm'), 0) as longterm_count,
+                    COALESCE(SUM(content_length), 0) as total_size_bytes
+                FROM memory_counters
+                WHERE user_id IN ($1, '')
                 """,
                 user_id
             )
             return {
-                "total_count": row["total_count"],
-                "active_count": row["active_count"],
-                "archive_count": row["archive_count"],
-                "working_count": row["working_count"],
-                "longterm_count": row["longterm_count"],
+                "total_count": int(row["total_count"]),
+                "active_count": int(row["active_count"]),
+                "archive_count": int(row["archive_count"]),
+                "working_count": int(row["working_count"]),
+                "longterm_count": int(row["longterm_count"]),
+                "total_size_bytes": int(row["total_size_bytes"]),
             }
+
+    async def reconcile_counters(self) -> int:
+        """
+        Rebuild memory_counters from memories (briefly blocks writers).
+
+        Returns:
+            Number of counter groups that had drifted
+        """
+        async with self._pool.acquire() as conn:
+            async with conn.transaction():
+                drifted = await conn.fetchval("SELECT reconcile_memory_counters()")
+        return int(drifted or 0)
+
+    # ------------------------------------------------------------------
+    # Re-embedding
+    #
+    # Shadow embeddings go to a nullable embedding_next column with its own
+    # HNSW index; cutover swaps the columns in one short transaction.
+    # Per-tenant partial indexes live on the old column and are dropped with
+    # it: re-run PgVectorIndexManager.ensure_tenant_indexes() afterwards.
+    # The single embedding_state row tells every worker whether a migration
+    # runs and how many cutovers have completed.
+
+    SHADOW_INDEX = "idx_memories_embedding_next"
+    UNMIGRATED_INDEX = "idx_memories_embedding_next_pending"
+    CUTOVER_LOCK_TIMEOUT = "5s"
+
+    async def begin_reembedding(self, dimensions: int) -> None:
+        """
+        Add embedding_next and its indexes (idempotent).
+
+        Indexes are built CONCURRENTLY so the backfill never blocks writers;
+        the partial index keeps the unmigrated scan cheap as it shrinks.
+        """
+        async with self._pool.acquire() as conn:
+            await conn.execute(
+                "ALTER TABLE memories ADD COLUMN IF NOT EXISTS "
+                f"embedding_next vector({int(dimensions)})"
+            )
+            await conn.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {self.UNMIGRATED_INDEX} "
+                "ON memories (id) WHERE embedding_next IS NULL"
+            )
+            await conn.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {self.SHADOW_INDEX} "
+                "ON memories USING hnsw (embedding_next vector_cosine_ops) "
+                "WITH (m = 16, ef_construction = 64)"
+            )
+            await conn.execute(
+                "UPDATE embedding_state SET migrating = true, updated_at = NOW()"
+            )
+
+    async def unmigrated_batch(self, after_id: int, limit: int) -> List[Tuple[int, str]]:
+        """(id, content) of rows with embedding_next still NULL, by id"""
+        async with self._connection() as conn:
+            with phase("query"):
+                rows = await conn.fetch(
+                    """
+                    SELECT id, content FROM memories
+                    WHERE id > $1 AND embedding_next IS NULL
+                    ORDER BY id
+                    LIMIT $2
+                    """,
+                    after_id,
+                    limit,
+                )
+        return [(row["id"], row["content"]) for row in rows]
+
+    async def write_shadow_embeddings(self, rows: List[Tuple[int, List[float]]]) -> None:
+        """Fill embedding_next for a batch of rows"""
+        if not rows:
+            return
+        async with self._connection() as conn:
+            with phase("query"):
+                await conn.executemany(
+                    "UPDATE memories SET embedding_next = $2::vector WHERE id = $1",
+                    rows,
+                )
+
+    async def reembedding_progress(self) -> Dict[str, int]:
+        """Migrated and total row counts"""
+        async with self._connection() as conn:
+            with phase("query"):
+                row = await conn.fetchrow(
+                    """
+                    SELECT count(embedding_next) AS migrated, count(*) AS total
+                    FROM memories
+                    """
+                )
+        return {"migrated": int(row["migrated"]), "total": int(row["total"])}
+
+    def build_search_similar_dual_query(
+        self,
+        query_embedding: List[float],
+        shadow_query_embedding: List[float],
+        memory_type: Optional[str],
+        limit: int,
+        similarity_threshold: float,
+        include_archived: bool,
+        user_id: Optional[str] = None,
+    ) -> Tuple[str, List[Any]]:
+        """
+        Build the dual-read similarity query.
+
+        Migrated and unmigrated rows are two index-ordered subqueries (one
+        per column) merged by distance, so both stay ANN-friendly.
+        """
+        overfetch = self._search_tuning.overfetch_factor if self._search_tuning else 1
+        params: List[Any] = [
+            query_embedding, shadow_query_embedding, limit * overfetch, similarity_threshold, limit
+        ]
+        conditions = []
+
+        if not include_archived:
+            conditions.append("archived = false")
+
+        if memory_type:
+            params.append(memory_type)
+            conditions.append(f"memory_type = ${len(params)}")
+
+        if user_id:
+            params.append(user_id)
+            conditions.append(f"user_id = ${len(params)}")
+
+        filters = "".join(f" AND {condition}" for condition in conditions)
+        columns = "id, content, memory_type, source_type, metadata, created_at"
+
+        sql = f"""
+            SELECT {columns}, 1 - distance AS similarity
+            FROM (
+                (
+                    SELECT {columns}, embedding_next <=> $2::vector AS distance
+                    FROM memories
+                    WHERE embedding_next IS NOT NULL{filters}
+                    ORDER BY embedding_next <=> $2::vector
+                    LIMIT $3
+                )
+                UNION ALL
+                (
+                    SELECT {columns}, embedding <=> $1::vector AS distance
+                    FROM memories
+                    WHERE embedding_next IS NULL{filters}
+                    ORDER BY embedding <=> $1::vector
+                    LIMIT $3
+                )
+            ) candidates
+            WHERE 1 - distance >= $4
+            ORDER BY distance
+            LIMIT $5
+        """
+        return sql, params
+
+    async def search_similar_dual(
+        self,
+        query_embedding: List[float],
+        shadow_query_embedding: List[float],
+        memory_type: Optional[str],
+        limit: int,
+        similarity_threshold: float,
+        include_archived: bool,
+        user_id: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Search embedding_next for migrated rows and embedding for the rest"""
+        sql, params = self.build_search_similar_dual_query(
+            query_embedding, shadow_query_embedding, memory_type, limit,
+            similarity_threshold, include_archived, user_id,
+        )
+        return await self._fetch_search(sql, params, user_scoped=bool(user_id))
+
+    def build_stream_similar_dual_query(
+        self,
+        query_embedding: List[float],
+        shadow_query_embedding: List[float],
+        memory_type: Optional[str],
+        similarity_threshold: float,
+        include_archived: bool,
+        limit: Optional[int] = None,
+        user_id: Optional[str] = None,
+    ) -> Tuple[str, List[Any]]:
+        """
+        Build the exact dual-read stream query.
+
+        Each row's distance comes from embedding_next when it is migrated
+        and from embedding otherwise; order is (distance, id) as in
+        build_stream_similar_query.
+        """
+        params: List[Any] = [query_embedding, shadow_query_embedding, similarity_threshold]
+        distance = (
+            "CASE WHEN embedding_next IS NULL THEN embedding <=> $1::vector "
+            "ELSE embedding_next <=> $2::vector END"
+        )
+        conditions = [f"1 - ({distance}) >= $3"]
+
+        if not include_archived:
+            conditions.append("archived = false")
+
+        if memory_type:
+            params.append(memory_type)
+            conditions.append(f"memory_type = ${len(params)}")
+
+        if user_id:
+            params.append(user_id)
+            conditions.append(f"user_id = ${len(params)}")
+
+        limit_clause = ""
+        if limit is not None:
+            params.append(limit)
+            limit_clause = f"LIMIT ${len(params)}"
+
+        sql = f"""
+            SELECT
+                id, content, memory_type, source_type, metadata, created_at,
+                1 - ({distance}) AS similarity
+            FROM memories
+            WHERE {' AND '.join(conditions)}
+            ORDER BY {distance}, id
+            {limit_clause}
+        """
+        return sql, params
+
+    async def stream_similar_dual(
+        self,
+        query_embedding: List[float],
+        shadow_query_embedding: List[float],
+        memory_type: Optional[str],
+        similarity_threshold: float,
+        include_archived: bool,
+        limit: Optional[int] = None,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+        user_id: Optional[str] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream scoring embedding_next for migrated rows and embedding for the rest"""
+        sql, params = self.build_stream_similar_dual_query(
+            query_embedding, shadow_query_embedding, memory_type,
+            similarity_threshold, include_archived, limit, user_id,
+        )
+        async with self._connection() as conn:
+            async with conn.transaction():
+                await conn.execute("SELECT set_config('enable_indexscan', 'off', true)")
+                async for row in conn.cursor(sql, *params, prefetch=chunk_size):
+                    yield self._row_to_dict(row)
+
+    def build_search_hybrid_dual_query(
+        self,
+        query_embedding: List[float],
+        shadow_query_embedding: List[float],
+        filters: Dict[str, Any],
+        limit: int,
+    ) -> Tuple[str, List[Any]]:
+        """Build the dual-read filtered query (one index-ordered subquery per column)"""
+        conditions = ["archived = false"]
+        params: List[Any] = [query_embedding, shadow_query_embedding, limit]
+
+        for key in ("source_type", "memory_type", "user_id"):
+            if filters.get(key):
+                params.append(filters[key])
+                conditions.append(f"{key} = ${len(params)}")
+
+        filter_clause = "".join(f" AND {condition}" for condition in conditions)
+        columns = "id, content, memory_type, source_type, metadata, created_at"
+
+        sql = f"""
+            SELECT {columns}, 1 - distance AS similarity
+            FROM (
+                (
+                    SELECT {columns}, embedding_next <=> $2::vector AS distance
+                    FROM memories
+                    WHERE embedding_next IS NOT NULL{filter_clause}
+                    ORDER BY embedding_next <=> $2::vector
+                    LIMIT $3
+                )
+                UNION ALL
+                (
+                    SELECT {columns}, embedding <=> $1::vector AS distance
+                    FROM memories
+                    WHERE embedding_next IS NULL{filter_clause}
+                    ORDER BY embedding <=> $1::vector
+                    LIMIT $3
+                )
+            ) candidates
+            ORDER BY distance
+            LIMIT $3
+        """
+        return sql, params
+
+    async def search_hybrid_dual(
+        self,
+        query_embedding: List[float],
+        shadow_query_embedding: List[float],
+        filters: Dict[str, Any],
+        limit: int,
+    ) -> List[Dict[str, Any]]:
+        """Filtered search scoring embedding_next for migrated rows and embedding for the rest"""
+        sql, params = self.build_search_hybrid_dual_query(
+            query_embedding, shadow_query_embedding, filters, limit
+        )
+        return await self._fetch_search(sql, params, user_scoped=bool(filters.get("user_id")))
+
+    async def cutover_embeddings(self) -> bool:
+        """
+        Swap embedding_next in as embedding.
+
+        Runs in one transaction under lock_timeout: if writers hold the
+        table too long, or rows are still unmigrated, nothing changes and
+        False is returned so the caller can retry.
+        """
+        async with self._pool.acquire() as conn:
+            try:
+                async with conn.transaction():
+                    await conn.execute(
+                        f"SET LOCAL lock_timeout = '{self.CUTOVER_LOCK_TIMEOUT}'"
+                    )
+                    await conn.execute("LOCK TABLE memories IN SHARE ROW EXCLUSIVE MODE")
+                    pending = await conn.fetchval(
+                        "SELECT EXISTS (SELECT 1 FROM memories WHERE embedding_next IS NULL)"
+                    )
+                    if pending:
+                        return False
+                    await conn.execute("ALTER TABLE memories DROP COLUMN embedding")
+                    await conn.execute(
+                        "ALTER TABLE memories RENAME COLUMN embedding_next TO embedding"
+                    )
+                    await conn.execute(
+                        f"ALTER INDEX {self.SHADOW_INDEX} RENAME TO idx_memories_embedding"
+                    )
+                    await conn.execute(f"DROP INDEX IF EXISTS {self.UNMIGRATED_INDEX}")
+                    await conn.execute(
+                        "UPDATE embedding_state "
+                        "SET generation = generation + 1, migrating = false, updated_at = NOW()"
+                    )
+            except asyncpg.exceptions.LockNotAvailableError:
+                return False
+        return True
+
+    async def abort_reembedding(self) -> None:
+        """Drop embedding_next and its indexes"""
+        async with self._pool.acquire() as conn:
+            await conn.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {self.SHADOW_INDEX}")
+            await conn.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {self.UNMIGRATED_INDEX}")
+            await conn.execute("ALTER TABLE memories DROP COLUMN IF EXISTS embedding_next")
+            await conn.execute(
+                "UPDATE embedding_state SET migrating = false, updated_at = NOW()"
+            )
+
+    async def reembedding_state(self) -> Dict[str, Any]:
+        """Read the embedding_state row"""
+        async with self._connection() as conn:
+            with phase("query"):
+                row = await conn.fetchrow("SELECT generation, migrating FROM embedding_state")
+        if row is None:
+            return {"generation": 0, "migrating": False}
+        return {"generation": int(row["generation"]), "migrating": bool(row["migrating"])}
+
+    # ------------------------------------------------------------------
+    # Consolidation
+
+    async def list_memory_users(self) -> List[Optional[str]]:
+        """Users with unarchived memories, read from memory_counters"""
+        async with self._connection() as conn:
+            with phase("query"):
+                rows = await conn.fetch(
+                    """
+                    SELECT DISTINCT NULLIF(user_id, '') AS user_id
+                    FROM memory_counters
+                    WHERE archived = false AND memory_count > 0
+                    ORDER BY 1 NULLS FIRST
+                    """
+                )
+        return [row["user_id"] for row in rows]
+
+    async def scan_user_memories(
+        self, user_id: Optional[str], after_id: int, limit: int
+    ) -> List[MemoryRecord]:
+        """One keyset page of a user's unarchived memories with embeddings"""
+        user_condition = "user_id IS NULL" if user_id is None else "user_id = $3"
+        params: List[Any] = [after_id, limit]
+        if user_id is not None:
+            params.append(user_id)
+        async with self._connection() as conn:
+            with phase("query"):
+                rows = await conn.fetch(
+                    f"""
+                    SELECT * FROM memories
+                    WHERE {user_condition} AND archived = false AND id > $1
+                    ORDER BY id
+                    LIMIT $2
+                    """,
+                    *params,
+                )
+        return [self._row_to_record(row, with_embedding=True) for row in rows]
+
+    async def merge_memories(
+        self,
+        canonical_id: int,
+        duplicate_ids: List[int],
+        metadata: Dict[str, Any],
+        duplicate_count: int,
+    ) -> int:
+        """Update the canonical row and archive the duplicates in one transaction"""
+        import json
+
+        async with self._connection() as conn:
+            with phase("query"):
+                async with conn.transaction():
+                    updated = await conn.fetchval(
+                        """
+                        UPDATE memories SET metadata = $2::jsonb, duplicate_count = $3, updated_at = NOW()
+                        WHERE id = $1 AND archived = false
+                        RETURNING id
+                        """,
+                        canonical_id,
+                        json.dumps(metadata),
+                        duplicate_count,
+                    )
+                    if updated is None:
+                        return 0
+                    status = await conn.execute(
+                        """
+                        UPDATE memories
+                        SET archived = true,
+                            updated_at = NOW(),
+                            metadata = metadata || jsonb_build_object('consolidated_into', $1::int)
+                        WHERE id = ANY($2::int[]) AND id <> $1 AND archived = false
+                        """,
+                        canonical_id,
+                        duplicate_ids,
+                    )
+        # "UPDATE <count>"
+        return int(status.split()[-1])
+
+    async def export_memory_batch(
+        self, after_id: int, limit: int, user_id: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], np.ndarray]:
+        """One keyset page of memories (archived included) with embeddings"""
+        user_condition = "" if user_id is None else "AND user_id = $3"
+        params: List[Any] = [after_id, limit]
+        if user_id is not None:
+            params.append(user_id)
+        async with self._connection() as conn:
+            with phase("query"):
+                rows = await conn.fetch(
+                    f"""
+                    SELECT * FROM memories
+                    WHERE id > $1 {user_condition}
+                    ORDER BY id
+                    LIMIT $2
+                    """,
+                    *params,
+                )
+        if not rows:
+            return [], np.empty((0, 0), dtype=np.float32)
+        records = [self._row_to_record(row, with_embedding=False) for row in rows]
+        embeddings = np.asarray([row["embedding"] for row in rows], dtype=np.float32)
+        return [snapshot_row(r) for r in records], embeddings
+
+    async def restore_memory_batch(
+        self,
+        rows: List[Dict[str, Any]],
+        embeddings: np.ndarray,
+        preserve_ids: bool = True,
+    ) -> List[int]:
+        """
+        COPY restored memories in one transaction.
+
+        With preserve_ids the id sequence is moved past the restored ids
+        (a clash fails the whole batch); otherwise ids are reserved from
+        the sequence as in insert_memories_bulk().
+        """
+        import json
+
+        if not rows:
+            return []
+
+        async with self._connection() as conn:
+            with phase("query"):
+                async with conn.transaction():
+                    if preserve_ids:
+                        ids = [row["id"] for row in rows]
+                    else:
+                        id_rows = await conn.fetch(
+                            """
+                            SELECT nextval(pg_get_serial_sequence('memories', 'id')) AS id
+                            FROM generate_series(1, $1)
+                            """,
+                            len(rows),
+                        )
+                        ids = [r["id"] for r in id_rows]
+
+                    await conn.copy_records_to_table(
+                        "memories",
+                        columns=[
+                            "id", "content", "embedding", "memory_type", "source_type", "metadata",
+                            "created_at", "updated_at", "expires_at", "archived", "user_id",
+                            "content_hash", "duplicate_count",
+                        ],
+                        records=[
+                            (
+                                memory_id,
+                                row["content"],
+                                embedding,
+                                row["memory_type"],
+                                row["source_type"],
+                                json.dumps(row["metadata"]),
+                                row["created_at"],
+                                row["updated_at"],
+                                row["expires_at"],
+                                row["is_archived"],
+                                row["user_id"],
+                                content_hash(row["content"]),
+                                row["duplicate_count"],
+                            )
+                            for memory_id, row, embedding in zip(ids, rows, embeddings)
+                        ],
+                    )
+                    if preserve_ids:
+                        await conn.execute(
+                            """
+                            SELECT setval(
+                                pg_get_serial_sequence('memories', 'id'),
+                                GREATEST((SELECT MAX(id) FROM memories), 1)
+                            )
+                            """
+                        )
+        return ids
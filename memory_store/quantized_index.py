@@ -0,0 +1,441 @@
+"""
+Quantized Vector Index - Compressed Candidates with Exact Re-ranking
+
+Keeps the in-RAM search matrix as int8 (per-vector scale) or float16 codes,
+cutting a 1536-dim float32 working set by 4x / 2x. Candidate rows come from
+the quantized matrix; the best few hundred are re-scored against
+full-precision vectors held in a secondary store (by default a memory-mapped
+file, so only the re-ranked rows are paged in).
+"""
+
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .vector_index import candidate_scores, normalize_rows, top_k
+
+QUANTIZATION_DTYPES = {"int8": np.int8, "float16": np.float16}
+
+_INT8_MAX = 127.0
+# Rows dequantized per step when scoring; small blocks stay cache-resident
+_SCORE_CHUNK = 256
+
+
+class ArrayVectorStore:
+    """Full-precision rows in a growable in-RAM float32 matrix"""
+
+    def __init__(self, dimensions: int, initial_capacity: int = 1024) -> None:
+        self.dimensions = dimensions
+        self._matrix = np.zeros((max(1, initial_capacity), dimensions), dtype=np.float32)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add_batch(self, vectors: np.ndarray) -> None:
+        """Append rows"""
+        end = self._size + vectors.shape[0]
+        if end > self._matrix.shape[0]:
+            capacity = self._matrix.shape[0]
+            while capacity < end:
+                capacity *= 2
+            grown = np.zeros((capacity, self.dimensions), dtype=np.float32)
+            grown[: self._size] = self._matrix[: self._size]
+            self._matrix = grown
+        self._matrix[self._size : end] = vectors
+        self._size = end
+
+    def take(self, rows: np.ndarray) -> np.ndarray:
+        """Get the rows at the given row numbers"""
+        return self._matrix[rows]
+
+    def slice(self, start: int, end: int) -> np.ndarray:
+        """Get a contiguous block of rows"""
+        return self._matrix[start:end]
+
+    def close(self) -> None:
+        """Nothing to release (same interface as FileVectorStore)"""
+        pass
+
+
+class FileVectorStore:
+    """
+    Full-precision rows appended to a raw float32 file and read via mmap.
+
+    Only pages touched by re-ranking are loaded, so the resident cost is a
+    few hundred rows per query rather than the whole matrix.
+
+    A named file is created under a fresh name and renamed over path, so a
+    store still open on the old file (and its mapping) keeps its rows until
+    it is closed.
+    """
+
+    def __init__(self, dimensions: int, path: Optional[str] = None) -> None:
+        """
+        Args:
+            dimensions: Vector dimensions
+            path: Backing file (an anonymous temporary file if None)
+        """
+        self.dimensions = dimensions
+        self.path = path
+        if path:
+            directory, name = os.path.split(os.path.abspath(path))
+            fd, fresh_path = tempfile.mkstemp(prefix=f"{name}.", suffix=".tmp", dir=directory)
+            self._file = os.fdopen(fd, "w+b")
+            os.replace(fresh_path, path)
+        else:
+            self._file = tempfile.TemporaryFile()
+        self._size = 0
+        self._map: Optional[np.memmap] = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add_batch(self, vectors: np.ndarray) -> None:
+        """Append rows"""
+        self._file.seek(0, 2)
+        self._file.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+        self._file.flush()
+        self._size += vectors.shape[0]
+        self._map = None
+
+    def _mapped(self) -> np.ndarray:
+        if self._map is None:
+            self._map = np.memmap(
+                self._file, dtype=np.float32, mode="r", shape=(self._size, self.dimensions)
+            )
+        return self._map
+
+    def take(self, rows: np.ndarray) -> np.ndarray:
+        """Get the rows at the given row numbers"""
+        if self._size == 0:
+            return np.empty((0, self.dimensions), dtype=np.float32)
+        return np.asarray(self._mapped()[rows])
+
+    def slice(self, start: int, end: int) -> np.ndarray:
+        """Get a contiguous block of rows"""
+        return np.asarray(self._mapped()[start:end])
+
+    def close(self) -> None:
+        """Close the backing file"""
+        self._map = None
+        self._file.close()
+
+
+def quantize_rows(vectors: np.ndarray, quantization: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Quantize normalized rows.
+
+    int8 uses a symmetric per-row scale (max |x| / 127); float16 stores the
+    values directly with a scale of 1.
+
+    Returns:
+        (codes, scales)
+    """
+    if quantization == "float16":
+        return vectors.astype(np.float16), np.ones(vectors.shape[0], dtype=np.float32)
+
+    if quantization != "int8":
+        raise ValueError(f"Unsupported quantization: {quantization}")
+
+    peaks = np.abs(vectors).max(axis=1)
+    scales = np.where(peaks > 0, peaks / _INT8_MAX, 1.0).astype(np.float32)
+    codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+    return codes, scales
+
+
+def recall_at_k(approximate: Sequence[int], exact: Sequence[int], k: int) -> float:
+    """Fraction of the exact top-k found in the approximate top-k"""
+    truth = list(exact)[:k]
+    if not truth:
+        return 1.0
+    return len(set(list(approximate)[:k]) & set(truth)) / len(truth)
+
+
+class RerankingVectorIndex(ABC):
+    """
+    Base for compact candidate indexes that re-rank against full precision.
+
+    Subclasses keep a compact search matrix (similarities() scores it) and
+    append the normalized full-precision rows to self._full;
+    search() re-scores the best rerank_candidates rows exactly.
+    """
+
+    dimensions: Optional[int]
+    rerank_candidates: int
+    _size: int
+    _full: Optional[Union[ArrayVectorStore, FileVectorStore]]
+
+    def __len__(self) -> int:
+        return self._size
+
+    def close(self) -> None:
+        """Release the full-precision store (its backing file, if any)"""
+        if self._full is not None:
+            self._full.close()
+            self._full = None
+
+    @abstractmethod
+    def add_batch(self, vectors: np.ndarray) -> range:
+        """Append normalized rows to both matrices; returns their row numbers"""
+        pass
+
+    def add(self, vector: Sequence[float]) -> int:
+        """
+        Append a single vector.
+
+        Returns:
+            Row number of the stored vector
+        """
+        return self.add_batch(np.asarray([vector], dtype=np.float32))[0]
+
+    def get(self, row: int) -> np.ndarray:
+        """Get the full-precision normalized vector stored at row"""
+        if not 0 <= row < self._size:
+            raise IndexError(f"Row out of range: {row}")
+        return self._full.take(np.array([row]))[0].copy()
+
+    def _normalized_query(self, query: Sequence[float]) -> Optional[np.ndarray]:
+        q = np.asarray(query, dtype=np.float32)
+        if q.ndim != 1 or q.shape[0] != self.dimensions:
+            raise ValueError("Vectors must have same length")
+        norm = np.linalg.norm(q)
+        return None if norm == 0 else q / norm
+
+    @abstractmethod
+    def similarities(
+        self,
+        query: Sequence[float],
+        rows: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """Approximate cosine similarity of query against every row (or only rows)"""
+        pass
+
+    def exact_similarities(
+        self,
+        query: Sequence[float],
+        rows: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        Full-precision cosine similarity against every row (or only rows).
+
+        Without rows the full-precision store is read sequentially in chunks.
+        """
+        if rows is not None:
+            rows = np.asarray(rows, dtype=np.int64)
+            q = self._normalized_query(query) if rows.size else None
+            return self._exact_scores(rows, q)
+
+        sims = np.zeros(self._size, dtype=np.float32)
+        q = self._normalized_query(query) if self._size else None
+        if q is not None:
+            for start in range(0, self._size, _SCORE_CHUNK):
+                end = min(start + _SCORE_CHUNK, self._size)
+                sims[start:end] = self._full.slice(start, end) @ q
+        return sims
+
+    def _exact_scores(self, rows: np.ndarray, q: Optional[np.ndarray]) -> np.ndarray:
+        if q is None or rows.size == 0:
+            return np.zeros(rows.size, dtype=np.float32)
+        return self._full.take(rows) @ q
+
+    def search(
+        self,
+        query: Sequence[float],
+        limit: int,
+        mask: Optional[np.ndarray] = None,
+        similarity_threshold: Optional[float] = None,
+        rows: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Compact candidate search with exact re-ranking.
+
+        Args:
+            query: Query vector
+            limit: Maximum number of rows to return
+            mask: Boolean array of eligible rows (None = all rows)
+            similarity_threshold: Drop rows below this (exact) similarity
+            rows: Ascending rows to score (see VectorIndex.search)
+
+        Returns:
+            (rows, similarities) sorted by exact similarity descending
+        """
+        candidates, approx = candidate_scores(self, query, mask, rows)
+        candidates, _ = top_k(candidates, approx, max(limit, self.rerank_candidates))
+
+        # Re-read candidates in row order so file pages are touched sequentially
+        candidates = np.sort(candidates)
+        exact = self._exact_scores(candidates, self._normalized_query(query))
+        if similarity_threshold is not None:
+            keep = exact >= similarity_threshold
+            candidates, exact = candidates[keep], exact[keep]
+
+        return top_k(candidates, exact, limit)
+
+    def exact_search(
+        self,
+        query: Sequence[float],
+        limit: int,
+        mask: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Brute-force search over the full-precision store (recall baseline)"""
+        if self._size == 0:
+            return top_k(np.arange(0), np.empty(0, dtype=np.float32), limit)
+
+        sims = self.exact_similarities(query)
+        candidates = np.arange(self._size) if mask is None else np.flatnonzero(mask[: self._size])
+        return top_k(candidates, sims[candidates], limit)
+
+    def measure_recall(
+        self,
+        queries: Iterable[Sequence[float]],
+        k: int = 10,
+        mask: Optional[np.ndarray] = None,
+    ) -> Dict[str, float]:
+        """
+        Compare search() against exact_search().
+
+        Returns:
+            {"k", "queries", "recall_at_k", "min_recall_at_k"}
+        """
+        recalls: List[float] = []
+        for query in queries:
+            approx_rows, _ = self.search(query, k, mask=mask)
+            exact_rows, _ = self.exact_search(query, k, mask=mask)
+            recalls.append(recall_at_k(approx_rows.tolist(), exact_rows.tolist(), k))
+
+        return {
+            "k": k,
+            "queries": len(recalls),
+            "recall_at_k": float(np.mean(recalls)) if recalls else 1.0,
+            "min_recall_at_k": float(np.min(recalls)) if recalls else 1.0,
+        }
+
+
+class QuantizedVectorIndex(RerankingVectorIndex):
+    """
+    Drop-in alternative to VectorIndex with quantized candidate scoring.
+
+    search() returns exact cosine similarities: approximate scores only
+    decide which rows are re-ranked.
+    """
+
+    def __init__(
+        self,
+        dimensions: Optional[int] = None,
+        initial_capacity: int = 1024,
+        quantization: str = "int8",
+        rerank_candidates: int = 200,
+        full_precision_path: Optional[str] = None,
+        full_precision_in_memory: bool = False,
+    ) -> None:
+        """
+        Initialize an empty index.
+
+        Args:
+            dimensions: Vector dimensions (inferred from the first add if None)
+            initial_capacity: Number of rows to pre-allocate
+            quantization: "int8" or "float16"
+            rerank_candidates: Candidates re-scored at full precision per query
+            full_precision_path: File for full-precision rows (temporary if None)
+            full_precision_in_memory: Keep full-precision rows in RAM instead
+        """
+        if quantization not in QUANTIZATION_DTYPES:
+            raise ValueError(f"Unsupported quantization: {quantization}")
+
+        self.dimensions = dimensions
+        self.quantization = quantization
+        self.rerank_candidates = rerank_candidates
+        self._capacity = max(1, initial_capacity)
+        self._size = 0
+        self._codes: Optional[np.ndarray] = None
+        self._scales = np.ones(self._capacity, dtype=np.float32)
+        self._full_precision_path = full_precision_path
+        self._full_precision_in_memory = full_precision_in_memory
+        self._full: Optional[Union[ArrayVectorStore, FileVectorStore]] = None
+
+    def _ensure_capacity(self, required: int) -> None:
+        dtype = QUANTIZATION_DTYPES[self.quantization]
+        if self._codes is None:
+            self._capacity = max(self._capacity, required)
+            self._codes = np.zeros((self._capacity, self.dimensions), dtype=dtype)
+            self._scales = np.ones(self._capacity, dtype=np.float32)
+            if self._full_precision_in_memory:
+                self._full = ArrayVectorStore(self.dimensions, self._capacity)
+            else:
+                self._full = FileVectorStore(self.dimensions, self._full_precision_path)
+            return
+
+        if required <= self._capacity:
+            return
+
+        while self._capacity < required:
+            self._capacity *= 2
+        codes = np.zeros((self._capacity, self.dimensions), dtype=dtype)
+        codes[: self._size] = self._codes[: self._size]
+        scales = np.ones(self._capacity, dtype=np.float32)
+        scales[: self._size] = self._scales[: self._size]
+        self._codes, self._scales = codes, scales
+
+    def add_batch(self, vectors: np.ndarray) -> range:
+        """
+        Append a 2-D array of vectors.
+
+        Returns:
+            Row numbers of the stored vectors
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2:
+            raise ValueError("vectors must be a 2-D array")
+        if self.dimensions is None:
+            self.dimensions = vectors.shape[1]
+        elif vectors.shape[1] != self.dimensions:
+            raise ValueError("Vectors must have same length")
+
+        normalized = normalize_rows(vectors)
+        start = self._size
+        end = start + vectors.shape[0]
+        self._ensure_capacity(end)
+        self._codes[start:end], self._scales[start:end] = quantize_rows(
+            normalized, self.quantization
+        )
+        self._full.add_batch(normalized)
+        self._size = end
+        return range(start, end)
+
+    def memory_bytes(self) -> int:
+        """Resident bytes of the quantized matrix and scales"""
+        if self._codes is None:
+            return 0
+        return int(self._codes[: self._size].nbytes + self._scales[: self._size].nbytes)
+
+    def similarities(
+        self,
+        query: Sequence[float],
+        rows: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        Approximate cosine similarity of query against every row (or only rows).
+
+        Returns:
+            float32 array of length len(self) (or len(rows))
+        """
+        count = self._size if rows is None else len(rows)
+        if self._size == 0 or count == 0:
+            return np.empty(0, dtype=np.float32)
+
+        q = self._normalized_query(query)
+        if q is None:
+            return np.zeros(count, dtype=np.float32)
+
+        sims = np.empty(count, dtype=np.float32)
+        for start in range(0, count, _SCORE_CHUNK):
+            end = min(start + _SCORE_CHUNK, count)
+            chunk = slice(start, end) if rows is None else rows[start:end]
+            block = self._codes[chunk].astype(np.float32)
+            sims[start:end] = (block @ q) * self._scales[chunk]
+        return sims
+
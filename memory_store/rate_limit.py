@@ -0,0 +1,233 @@
+"""
+Rate Limiting - Concurrency and Token-Bucket Control for Provider Calls
+
+RateLimiter bounds in-flight requests with a semaphore and paces them with
+requests-per-minute / tokens-per-minute token buckets, so bursts queue
+locally instead of turning into 429 storms. A 429 pauses every caller
+until the provider's Retry-After has passed.
+
+    limiter = RateLimiter(max_concurrency=8, requests_per_minute=3000,
+                          tokens_per_minute=1_000_000)
+    async with limiter.acquire(tokens=estimate):
+        response = await client.embeddings.create(...)
+
+Time spent waiting in acquire() is recorded as the "embed_queue" phase and
+summarized by get_stats().
+"""
+
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+from .timing import LatencySummary, phase
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at per_minute / 60 tokens per second.
+
+    reserve() takes tokens immediately, letting the balance go negative,
+    and returns how long the caller must wait before using them. Waiters
+    are therefore served in arrival order and never poll.
+    """
+
+    def __init__(
+        self,
+        per_minute: float,
+        capacity: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Args:
+            per_minute: Sustained rate
+            capacity: Burst size (default: one second's worth)
+            clock: Monotonic clock in seconds
+        """
+        if per_minute <= 0:
+            raise ValueError("per_minute must be positive")
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else self.rate
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float = 1.0) -> float:
+        """
+        Take amount tokens, returning seconds until they are covered.
+
+        A request larger than the bucket waits until the deficit has been
+        refilled, so large batches are paced at the sustained rate.
+        """
+        self._refill()
+        self._tokens -= amount
+        return max(0.0, -self._tokens / self.rate)
+
+    @property
+    def available(self) -> float:
+        """Current balance (negative while callers are waiting)"""
+        self._refill()
+        return self._tokens
+
+
+class RateLimiter:
+    """
+    Semaphore + RPM/TPM token buckets + shared 429 cool-down.
+
+    Every limit is optional; RateLimiter() with no arguments only records
+    queue-wait metrics.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        burst_seconds: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Args:
+            max_concurrency: Maximum in-flight requests (None = unlimited)
+            requests_per_minute: Request budget (None = unlimited)
+            tokens_per_minute: Token budget (None = unlimited)
+            burst_seconds: Seconds of budget that may be spent at once
+            clock: Monotonic clock in seconds
+        """
+        if max_concurrency is not None and max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+        self._requests = self._bucket(requests_per_minute, burst_seconds, clock)
+        self._tokens = self._bucket(tokens_per_minute, burst_seconds, clock)
+        self._clock = clock
+        self._paused_until = 0.0
+
+        self._waits = LatencySummary()
+        self._waiting = 0
+        self._in_flight = 0
+        self._acquired = 0
+        self._throttled = 0
+        self._total_wait_ms = 0.0
+
+    @staticmethod
+    def _bucket(
+        per_minute: Optional[float], burst_seconds: float, clock: Callable[[], float]
+    ) -> Optional[TokenBucket]:
+        if not per_minute:
+            return None
+        return TokenBucket(per_minute, capacity=per_minute / 60.0 * burst_seconds, clock=clock)
+
+    @asynccontextmanager
+    async def acquire(self, tokens: float = 1.0) -> AsyncIterator[float]:
+        """
+        Wait for a concurrency slot and rate budget, then hold the slot.
+
+        Args:
+            tokens: Tokens the request will consume (tokens_per_minute)
+
+        Yields:
+            Milliseconds spent waiting
+        """
+        start = time.perf_counter()
+        self._waiting += 1
+        try:
+            with phase("embed_queue"):
+                if self._semaphore is not None:
+                    await self._semaphore.acquire()
+                try:
+                    delay = 0.0
+                    if self._requests is not None:
+                        delay = self._requests.reserve(1)
+                    if self._tokens is not None:
+                        delay = max(delay, self._tokens.reserve(tokens))
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    # A 429 seen while waiting extends the pause for everyone
+                    while (remaining := self._paused_until - self._clock()) > 0:
+                        await asyncio.sleep(remaining)
+                except BaseException:
+                    if self._semaphore is not None:
+                        self._semaphore.release()
+                    raise
+        finally:
+            self._waiting -= 1
+
+        wait_ms = (time.perf_counter() - start) * 1000
+        self._waits.record("queue_wait", wait_ms)
+        self._total_wait_ms += wait_ms
+        self._acquired += 1
+        self._in_flight += 1
+        try:
+            yield wait_ms
+        finally:
+            self._in_flight -= 1
+            if self._semaphore is not None:
+                self._semaphore.release()
+
+    def pause(self, seconds: float) -> None:
+        """Hold every new request for seconds (e.g. after a 429 Retry-After)"""
+        self._throttled += 1
+        self._paused_until = max(self._paused_until, self._clock() + seconds)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue depth, in-flight count and queue-wait percentiles"""
+        waits = self._waits.summary().get("queue_wait", {}).get("total", {})
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self._in_flight,
+            "waiting": self._waiting,
+            "acquired": self._acquired,
+            "throttled": self._throttled,
+            "paused_seconds": round(max(0.0, self._paused_until - self._clock()), 3),
+            "queue_wait_ms_total": round(self._total_wait_ms, 2),
+            "queue_wait_ms": waits,
+        }
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """
+    Retry delay requested by the provider on an HTTP error, if any.
+
+    Reads retry-after-ms, then Retry-After (seconds or an HTTP date) from
+    error.response.headers, as raised by the openai / httpx clients.
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    value = headers.get("retry-after-ms")
+    if value is not None:
+        try:
+            return max(0.0, float(value) / 1000)
+        except ValueError:
+            pass
+
+    value = headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Full-jitter exponential backoff: uniform(0, min(cap, base * 2 ** attempt))"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
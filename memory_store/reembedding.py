@@ -0,0 +1,290 @@
+"""
+Re-embedding Migration - Online Embedding Model Changes
+
+Moves every memory to a new embedding model (or dimension count) without
+downtime:
+
+    migration = ReembeddingMigration(service, OpenAIEmbeddingService(model=...),
+                                     checkpoint_path="reembed.json")
+    migration.start()            # background backfill
+    ...
+    if await migration.cutover():
+        ...                      # service now embeds with the new model
+
+The backfill writes shadow embeddings (repository.write_shadow_embeddings)
+in batches ordered by id, pausing between batches and checkpointing the
+last id, so a restarted process resumes where it stopped. While it runs,
+MemoryStoreService.search_similar() dual-reads: migrated memories are
+scored with the new model's query embedding, the rest with the old one.
+Hybrid and streaming searches keep using the current embeddings until
+cutover. cutover() swaps the repository's embeddings atomically and then
+switches the service to the new embedding service.
+
+The migration state lives in the repository (repository.reembedding_state),
+so other workers sharing it follow along: services created with
+next_embedding_service=<the new model> dual-write shadow embeddings for
+memories they save while the migration runs, and switch models within
+embedding_state_ttl seconds of the cutover.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, Optional
+
+from .embedding import EmbeddingService
+from .instrumentation import elapsed_ms
+from .repository import ReembeddableRepository
+from .service import MemoryStoreService
+from .timing import phase
+
+logger = logging.getLogger(__name__)
+
+
+class ReembeddingMigration:
+    """
+    Embedding モデル移行ジョブ
+
+    シャドウ埋め込みをバッチ単位で書き込み、進捗をチェックポイントに保存する。
+    移行中の類似検索は新旧両方の埋め込みを参照し、cutover() で一括切り替えする。
+    """
+
+    def __init__(
+        self,
+        service: MemoryStoreService,
+        embedding_service: EmbeddingService,
+        batch_size: int = 256,
+        pause_seconds: float = 0.0,
+        checkpoint_path: Optional[str] = None,
+        max_retry_delay: float = 30.0,
+    ) -> None:
+        """
+        Args:
+            service: 移行対象の MemoryStoreService
+            embedding_service: 移行先の Embedding サービス
+            batch_size: 1バッチで再埋め込みする件数
+            pause_seconds: バッチ間の待機秒数（API / DB 負荷の抑制）
+            checkpoint_path: 進捗ファイル（None = 永続化しない）
+            max_retry_delay: バッチ失敗時のバックオフ上限（秒）
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        if not isinstance(service.repository, ReembeddableRepository):
+            raise TypeError(f"{type(service.repository).__name__} is not a ReembeddableRepository")
+        self.service = service
+        self.embedding_service = embedding_service
+        self.batch_size = batch_size
+        self.pause_seconds = pause_seconds
+        self.checkpoint_path = checkpoint_path
+        self.max_retry_delay = max_retry_delay
+
+        self._after_id = 0
+        self._started = False
+        self._task: Optional[asyncio.Task] = None
+
+        self._migrated = 0
+        self._batches = 0
+        self._failed_batches = 0
+        self._last_batch_ms: Optional[float] = None
+        self._completed = False
+
+        if checkpoint_path:
+            self._load_checkpoint()
+
+    # ------------------------------------------------------------------
+    # Checkpoint
+
+    def _load_checkpoint(self) -> None:
+        if not os.path.exists(self.checkpoint_path):
+            return
+        with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+            checkpoint = json.load(f)
+        dimensions = self.embedding_service.get_dimensions()
+        if checkpoint.get("dimensions") != dimensions:
+            raise ValueError(
+                f"Checkpoint {self.checkpoint_path} is for {checkpoint.get('dimensions')} "
+                f"dimensions, not {dimensions}"
+            )
+        self._after_id = checkpoint["after_id"]
+        self._migrated = checkpoint.get("migrated", 0)
+        logger.info(f"Resuming re-embedding after memory {self._after_id}")
+
+    def _save_checkpoint(self) -> None:
+        """Atomically replace the checkpoint file"""
+        if not self.checkpoint_path:
+            return
+        directory = os.path.dirname(os.path.abspath(self.checkpoint_path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "after_id": self._after_id,
+                "migrated": self._migrated,
+                "dimensions": self.embedding_service.get_dimensions(),
+                "updated_at": time.time(),
+            }, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _remove_checkpoint(self) -> None:
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+
+    # ------------------------------------------------------------------
+    # Backfill
+
+    async def begin(self) -> None:
+        """シャドウ領域を用意し、類似検索のデュアルリードを開始"""
+        if self._started:
+            return
+        await self.service.repository.begin_reembedding(self.embedding_service.get_dimensions())
+        self.service.next_embedding_service = self.embedding_service
+        await self.service.sync_embedding_state()
+        self._started = True
+
+    async def step(self) -> int:
+        """
+        次の未移行バッチを再埋め込み
+
+        Returns:
+            再埋め込みした件数（0 = チェックポイント以降に未移行なし）
+        """
+        await self.begin()
+        repository = self.service.repository
+        start_time = time.perf_counter()
+
+        with phase("db"):
+            batch = await repository.unmigrated_batch(self._after_id, self.batch_size)
+        if not batch:
+            return 0
+
+        with phase("embedding"):
+            embeddings = await self.embedding_service.generate_embeddings(
+                [content for _, content in batch]
+            )
+        with phase("db"):
+            await repository.write_shadow_embeddings(
+                [(memory_id, embedding) for (memory_id, _), embedding in zip(batch, embeddings)]
+            )
+
+        self._after_id = batch[-1][0]
+        self._migrated += len(batch)
+        self._batches += 1
+        self._save_checkpoint()
+        self._last_batch_ms = elapsed_ms(start_time)
+        self.service.instrumentation.record(
+            "reembed_batch", self._last_batch_ms, len(batch), after_id=self._after_id
+        )
+        return len(batch)
+
+    async def run(self) -> int:
+        """
+        未移行がなくなるまで再埋め込み（失敗時は例外）
+
+        Returns:
+            今回再埋め込みした件数
+        """
+        total = 0
+        while count := await self.step():
+            total += count
+            if self.pause_seconds > 0:
+                await asyncio.sleep(self.pause_seconds)
+        self._completed = True
+        return total
+
+    def start(self) -> asyncio.Task:
+        """バックグラウンドの再埋め込みタスクを開始"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return self._task
+
+    async def stop(self) -> None:
+        """バックグラウンドタスクを停止（進捗はチェックポイントに残る）"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        retry_delay = max(self.pause_seconds, 0.1)
+        while True:
+            try:
+                await self.run()
+                return
+            except Exception as e:
+                self._failed_batches += 1
+                logger.warning(
+                    f"Re-embedding batch after memory {self._after_id} failed, "
+                    f"retrying in {retry_delay:.1f}s: {e}"
+                )
+                await asyncio.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, self.max_retry_delay)
+
+    # ------------------------------------------------------------------
+    # Cutover
+
+    async def cutover(self) -> bool:
+        """
+        新しい埋め込みへ一括切り替え
+
+        移行開始後に保存された記憶も先頭から再走査して埋め込んでから
+        切り替える。その間に新たな保存があった場合などは何も変更せず
+        False を返すので、再度呼び出す。
+
+        Returns:
+            切り替えが完了したか
+        """
+        await self.stop()
+        await self.begin()
+        self._after_id = 0
+        await self.run()
+
+        if not await self.service.repository.cutover_embeddings():
+            logger.info("Re-embedding cutover deferred: memories still unmigrated")
+            return False
+
+        # Adopts the new generation, as other workers will on their next sync
+        await self.service.sync_embedding_state()
+        self._started = False
+        self._remove_checkpoint()
+        logger.info(f"Re-embedding cutover complete ({self._migrated} memories)")
+        return True
+
+    async def abort(self) -> None:
+        """移行を中止し、シャドウ埋め込みを破棄"""
+        await self.stop()
+        await self.service.repository.abort_reembedding()
+        self.service.next_embedding_service = None
+        await self.service.sync_embedding_state()
+        self._started = False
+        self._after_id = 0
+        self._migrated = 0
+        self._completed = False
+        self._remove_checkpoint()
+
+    # ------------------------------------------------------------------
+    # Metrics
+
+    async def progress(self) -> Dict[str, int]:
+        """リポジトリ全体の移行済み件数 / 総件数"""
+        await self.begin()
+        return await self.service.repository.reembedding_progress()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """バッチ数・チェックポイント位置などのメトリクス"""
+        return {
+            "after_id": self._after_id,
+            "migrated": self._migrated,
+            "batches": self._batches,
+            "failed_batches": self._failed_batches,
+            "last_batch_ms": round(self._last_batch_ms, 2) if self._last_batch_ms is not None else None,
+            "completed": self._completed,
+            "dual_read": self.service.shadow_embedding_service is self.embedding_service,
+            "running": self._task is not None and not self._task.done(),
+        }
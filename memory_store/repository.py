@@ -4,13 +4,31 @@ Memory Repository - Database Access Layer
 Provides abstract interface and in-memory implementation for testing.
 """
 
+import asyncio
+import bisect
+import heapq
+import sys
 from abc import ABC, abstractmethod
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Set, Tuple
 
+import numpy as np
+
+from .counters import MemoryCounters
+from .dedup import DuplicateKey, duplicate_key
 from .embedding import cosine_similarity
+from .metadata_index import MetadataIndex
 from .models import MemoryRecord, MemoryResult, MemoryType, SourceType
 
+# Rows materialized per step of stream_similar()
+STREAM_CHUNK_SIZE = 500
+
+# Fields of each row exported by export_memory_batch() (embeddings travel separately)
+SNAPSHOT_FIELDS = (
+    "id", "content", "memory_type", "source_type", "metadata", "created_at",
+    "updated_at", "expires_at", "is_archived", "user_id", "duplicate_count",
+)
+
 
 class MemoryRepository(ABC):
     """Abstract base class for memory repository"""
@@ -24,10 +42,20 @@ class MemoryRepository(ABC):
         source_type: Optional[str],
         metadata: Dict[str, Any],
         expires_at: Optional[datetime],
+        user_id: Optional[str] = None,
     ) -> int:
         """Insert a new memory record"""
         pass
 
+    async def insert_memories_bulk(self, rows: List[Dict[str, Any]]) -> List[int]:
+        """
+        Insert many memory records, returning ids in input order.
+
+        Each row has the insert_memory() keyword arguments. The default
+        implementation inserts one row at a time.
+        """
+        return [await self.insert_memory(**row) for row in rows]
+
     @abstractmethod
     async def search_similar(
         self,
@@ -36,10 +64,44 @@ class MemoryRepository(ABC):
         limit: int,
         similarity_threshold: float,
         include_archived: bool,
+        user_id: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
-        """Search for similar memories using vector similarity"""
+        """
+        Search for similar memories using vector similarity.
+
+        Args:
+            user_id: Search only this user's memories (None = all users)
+        """
         pass
 
+    async def stream_similar(
+        self,
+        query_embedding: List[float],
+        memory_type: Optional[str],
+        similarity_threshold: float,
+        include_archived: bool,
+        limit: Optional[int] = None,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+        user_id: Optional[str] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield search_similar() rows in similarity order without a result cap.
+
+        Rows are produced chunk_size at a time so memory stays bounded by
+        the consumer's pace. The default implementation runs one
+        search_similar() call and is not bounded.
+        """
+        rows = await self.search_similar(
+            query_embedding,
+            memory_type,
+            limit if limit is not None else sys.maxsize,
+            similarity_threshold,
+            include_archived,
+            user_id,
+        )
+        for row in rows:
+            yield row
+
     @abstractmethod
     async def search_hybrid(
         self,
@@ -47,7 +109,11 @@ class MemoryRepository(ABC):
         filters: Dict[str, Any],
         limit: int,
     ) -> List[Dict[str, Any]]:
-        """Search with vector similarity and metadata filters"""
+        """
+        Search with vector similarity and metadata filters.
+
+        filters["user_id"] restricts the search to that user's memories.
+        """
         pass
 
     @abstractmethod
@@ -56,8 +122,13 @@ class MemoryRepository(ABC):
         pass
 
     @abstractmethod
-    async def archive_expired(self) -> int:
-        """Archive expired working memories"""
+    async def archive_expired(self, limit: Optional[int] = None) -> int:
+        """
+        Archive expired working memories.
+
+        Args:
+            limit: Archive at most this many (None = all expired)
+        """
         pass
 
     @abstractmethod
@@ -65,14 +136,272 @@ class MemoryRepository(ABC):
         """Count memories by type"""
         pass
 
+    async def get_type_counts(self, user_id: Optional[str] = None) -> Dict[str, int]:
+        """
+        Non-archived memory counts per type.
 
-class InMemoryRepository(MemoryRepository):
-    """In-memory implementation for testing"""
+        Args:
+            user_id: Restrict to this user's and shared memories (None = all)
+
+        The default implementation calls count_by_type() once per type and
+        ignores user_id.
+        """
+        return {t.value: await self.count_by_type(t.value) for t in MemoryType}
+
+    async def reconcile_counters(self) -> int:
+        """
+        Rebuild maintained statistics from the stored memories.
+
+        Returns:
+            Number of counter groups that had drifted (0 if not maintained)
+        """
+        return 0
+
+    async def find_duplicates(
+        self, keys: List[DuplicateKey]
+    ) -> Dict[DuplicateKey, Tuple[int, List[float]]]:
+        """
+        Look up unarchived memories with the same content hash, type and user.
+
+        Returns:
+            key -> (id of the newest matching memory, its embedding) for the
+            keys that have a match. The default implementation finds none.
+        """
+        return {}
+
+    async def increment_duplicate_count(self, memory_id: int, count: int = 1) -> None:
+        """Add count to a memory's duplicate_count"""
+        pass
+
+    # ------------------------------------------------------------------
+    # Consolidation: merging near-duplicate memories
+    # (driven by memory_store.consolidation.ConsolidationJob)
+
+    @abstractmethod
+    async def list_memory_users(self) -> List[Optional[str]]:
+        """user_id of every user with unarchived memories (None = shared memories)"""
+        pass
+
+    @abstractmethod
+    async def scan_user_memories(
+        self, user_id: Optional[str], after_id: int, limit: int
+    ) -> List[MemoryRecord]:
+        """
+        Unarchived memories of one user with id > after_id, by id.
+
+        user_id None selects memories without a user. Records carry their
+        embedding.
+        """
+        pass
+
+    @abstractmethod
+    async def merge_memories(
+        self,
+        canonical_id: int,
+        duplicate_ids: List[int],
+        metadata: Dict[str, Any],
+        duplicate_count: int,
+    ) -> int:
+        """
+        Fold duplicates into a canonical memory.
+
+        Sets the canonical memory's metadata and duplicate_count, then
+        archives the duplicates with metadata["consolidated_into"] set.
+        Nothing changes if the canonical memory is gone or archived.
+
+        Returns:
+            Number of duplicates archived
+        """
+        pass
+
+    # ------------------------------------------------------------------
+    # Snapshots: columnar export
+    # (driven by memory_store.snapshot.MemorySnapshot)
+
+    @abstractmethod
+    async def export_memory_batch(
+        self, after_id: int, limit: int, user_id: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], np.ndarray]:
+        """
+        Memories with id > after_id, by id, archived and expired ones included.
+
+        user_id restricts the batch to one user's memories.
+
+        Returns:
+            (rows, embeddings): rows carry SNAPSHOT_FIELDS (enums as their
+            values); embeddings is a float32 matrix, one row per memory
+        """
+        pass
+
+
+class ReembeddableRepository(MemoryRepository):
+    """
+    Repository that can keep shadow embeddings for an embedding model
+    migration (driven by memory_store.reembedding.ReembeddingMigration).
+    """
+
+    @abstractmethod
+    async def begin_reembedding(self, dimensions: int) -> None:
+        """Create (or keep) shadow storage for embeddings of the new model"""
+        pass
+
+    @abstractmethod
+    async def unmigrated_batch(self, after_id: int, limit: int) -> List[Tuple[int, str]]:
+        """(id, content) of memories with id > after_id and no shadow embedding, by id"""
+        pass
+
+    @abstractmethod
+    async def write_shadow_embeddings(self, rows: List[Tuple[int, List[float]]]) -> None:
+        """Store shadow embeddings; ids that no longer exist are ignored"""
+        pass
+
+    @abstractmethod
+    async def reembedding_progress(self) -> Dict[str, int]:
+        """{"migrated": memories with a shadow embedding, "total": all memories}"""
+        pass
+
+    @abstractmethod
+    async def search_similar_dual(
+        self,
+        query_embedding: List[float],
+        shadow_query_embedding: List[float],
+        memory_type: Optional[str],
+        limit: int,
+        similarity_threshold: float,
+        include_archived: bool,
+        user_id: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        search_similar() during a migration.
+
+        Migrated memories are scored by their shadow embedding against
+        shadow_query_embedding, the rest by their current embedding against
+        query_embedding.
+        """
+        pass
+
+    @abstractmethod
+    def stream_similar_dual(
+        self,
+        query_embedding: List[float],
+        shadow_query_embedding: List[float],
+        memory_type: Optional[str],
+        similarity_threshold: float,
+        include_archived: bool,
+        limit: Optional[int] = None,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+        user_id: Optional[str] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """stream_similar() during a migration, scored like search_similar_dual()"""
+        pass
+
+    @abstractmethod
+    async def search_hybrid_dual(
+        self,
+        query_embedding: List[float],
+        shadow_query_embedding: List[float],
+        filters: Dict[str, Any],
+        limit: int,
+    ) -> List[Dict[str, Any]]:
+        """search_hybrid() during a migration, scored like search_similar_dual()"""
+        pass
+
+    @abstractmethod
+    async def cutover_embeddings(self) -> bool:
+        """
+        Atomically replace the embeddings with the shadow embeddings.
+
+        Returns:
+            False (and nothing changes) if some memory has no shadow embedding yet
+        """
+        pass
+
+    @abstractmethod
+    async def abort_reembedding(self) -> None:
+        """Drop the shadow embeddings"""
+        pass
+
+    @abstractmethod
+    async def reembedding_state(self) -> Dict[str, Any]:
+        """
+        Migration state shared by every service using this repository.
+
+        Returns:
+            {"generation": completed cutovers, "migrating": whether shadow
+            storage exists}
+        """
+        pass
+
+
+class RestorableRepository(MemoryRepository):
+    """
+    Repository that can bulk-load a snapshot
+    (driven by memory_store.snapshot.MemorySnapshot.restore).
+    """
+
+    @abstractmethod
+    async def restore_memory_batch(
+        self,
+        rows: List[Dict[str, Any]],
+        embeddings: np.ndarray,
+        preserve_ids: bool = True,
+    ) -> List[int]:
+        """
+        Bulk-load exported memories with their timestamps, archive flag and
+        duplicate_count.
+
+        preserve_ids keeps the exported ids, which must not exist yet;
+        otherwise new ids are assigned in row order.
+
+        Returns:
+            Ids of the restored memories
+        """
+        pass
+
+
+def snapshot_row(record: MemoryRecord) -> Dict[str, Any]:
+    """SNAPSHOT_FIELDS of a record"""
+    return {
+        "id": record.id,
+        "content": record.content,
+        "memory_type": record.memory_type.value,
+        "source_type": record.source_type.value if record.source_type else None,
+        "metadata": record.metadata,
+        "created_at": record.created_at,
+        "updated_at": record.updated_at,
+        "expires_at": record.expires_at,
+        "is_archived": record.is_archived,
+        "user_id": record.user_id,
+        "duplicate_count": record.duplicate_count,
+    }
+
+
+class InMemoryRepositoryBase(MemoryRepository):
+    """
+    In-memory storage and search without re-embedding or snapshot restore.
+
+    Shared by InMemoryRepository and backends that cannot support those
+    operations (SegmentedMemoryRepository).
+    """
 
     def __init__(self) -> None:
         """Initialize empty storage"""
         self._storage: Dict[int, MemoryRecord] = {}
         self._next_id = 1
+        # Built on the first search_hybrid, then maintained incrementally
+        self._metadata_index: Optional[MetadataIndex] = None
+        # (expires_at timestamp, id) min-heap of working memories; stale
+        # entries are skipped when popped
+        self._expiry_heap: List[Tuple[float, int]] = []
+        # Built on the first statistics call, then maintained on insert /
+        # archive / delete
+        self._counters: Optional[MemoryCounters] = None
+        # user_id -> ascending memory ids; built on the first user-scoped
+        # search, then maintained on insert (deleted ids are skipped on read)
+        self._user_shards: Optional[Dict[Optional[str], List[int]]] = None
+        # DuplicateKey -> newest memory id; built on the first dedup lookup,
+        # then maintained on insert (archived / deleted ids are skipped on read)
+        self._hash_index: Optional[Dict[DuplicateKey, int]] = None
 
     async def insert_memory(
         self,
@@ -82,6 +411,7 @@ class InMemoryRepository(MemoryRepository):
         source_type: Optional[str],
         metadata: Dict[str, Any],
         expires_at: Optional[datetime],
+        user_id: Optional[str] = None,
     ) -> int:
         """Insert a new memory record"""
         memory_id = self._next_id
@@ -99,11 +429,75 @@ class InMemoryRepository(MemoryRepository):
             updated_at=now,
             expires_at=expires_at,
             is_archived=False,
+            user_id=user_id,
         )
 
         self._storage[memory_id] = record
+        self._index_metadata(record)
+        self._track_expiry(record)
+        self._count_record(record)
+        self._shard_record(record)
+        self._hash_record(record)
         return memory_id
 
+    def _track_expiry(self, record: MemoryRecord) -> None:
+        if record.memory_type == MemoryType.WORKING and record.expires_at and not record.is_archived:
+            heapq.heappush(self._expiry_heap, (record.expires_at.timestamp(), record.id))
+
+    def _count_record(self, record: MemoryRecord, sign: int = 1) -> None:
+        if self._counters is not None:
+            self._counters.add(record, sign)
+
+    def _get_counters(self) -> MemoryCounters:
+        if self._counters is None:
+            self._counters = MemoryCounters.from_records(self._storage.values())
+        return self._counters
+
+    def _shard_record(self, record: MemoryRecord) -> None:
+        if self._user_shards is not None:
+            self._user_shards.setdefault(record.user_id, []).append(record.id)
+
+    def _user_ids(self, user_id: Optional[str]) -> List[int]:
+        """Ascending ids of one user's memories (may include deleted ids)"""
+        if self._user_shards is None:
+            shards: Dict[Optional[str], List[int]] = {}
+            for record in self._storage.values():
+                shards.setdefault(record.user_id, []).append(record.id)
+            self._user_shards = shards
+        return self._user_shards.get(user_id, [])
+
+    def _hash_record(self, record: MemoryRecord) -> None:
+        if self._hash_index is not None:
+            key = duplicate_key(record.content, record.memory_type.value, record.user_id)
+            self._hash_index[key] = record.id
+
+    def _embedding_of(self, record: MemoryRecord) -> List[float]:
+        return record.embedding
+
+    def _scoped_records(self, user_id: Optional[str]) -> Iterable[MemoryRecord]:
+        """Every record, or only one user's shard"""
+        if not user_id:
+            return self._storage.values()
+        return [self._storage[i] for i in self._user_ids(user_id) if i in self._storage]
+
+    def _index_metadata(self, record: MemoryRecord) -> None:
+        if self._metadata_index is not None:
+            self._metadata_index.add(record)
+
+    def _unindex_metadata(self, memory_id: int) -> None:
+        if self._metadata_index is not None:
+            self._metadata_index.remove(memory_id)
+
+    def _metadata_candidates(self, filters: Dict[str, Any]) -> Optional[Set[int]]:
+        """Candidate ids from the metadata index (None = scan everything)"""
+        if self._metadata_index is None:
+            index = MetadataIndex()
+            for record in self._storage.values():
+                if not record.is_archived:
+                    index.add(record)
+            self._metadata_index = index
+        return self._metadata_index.candidates(filters)
+
     async def search_similar(
         self,
         query_embedding: List[float],
@@ -111,12 +505,27 @@ class InMemoryRepository(MemoryRepository):
         limit: int,
         similarity_threshold: float,
         include_archived: bool,
+        user_id: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
         """Search for similar memories using vector similarity"""
+        return self._search_records(
+            lambda record: cosine_similarity(query_embedding, record.embedding),
+            memory_type, limit, similarity_threshold, include_archived, user_id,
+        )
+
+    def _search_records(
+        self,
+        similarity_of: Callable[[MemoryRecord], float],
+        memory_type: Optional[str],
+        limit: int,
+        similarity_threshold: float,
+        include_archived: bool,
+        user_id: Optional[str],
+    ) -> List[Dict[str, Any]]:
         results = []
         now = datetime.now(timezone.utc)
 
-        for record in self._storage.values():
+        for record in self._scoped_records(user_id):
             # Filter by memory type
             if memory_type and record.memory_type.value != memory_type:
                 continue
@@ -130,7 +539,7 @@ class InMemoryRepository(MemoryRepository):
                 continue
 
             # Calculate similarity
-            similarity = cosine_similarity(query_embedding, record.embedding)
+            similarity = similarity_of(record)
 
             # Filter by threshold
             if similarity < similarity_threshold:
@@ -152,6 +561,74 @@ class InMemoryRepository(MemoryRepository):
         # Return top N
         return results[:limit]
 
+    async def stream_similar(
+        self,
+        query_embedding: List[float],
+        memory_type: Optional[str],
+        similarity_threshold: float,
+        include_archived: bool,
+        limit: Optional[int] = None,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+        user_id: Optional[str] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield similar memories in similarity order.
+
+        Only (similarity, id) pairs are held for the whole result; row dicts
+        are built one chunk at a time, yielding to the event loop between
+        chunks. Memories deleted while streaming are skipped.
+        """
+        async for result in self._stream_records(
+            lambda record: cosine_similarity(query_embedding, record.embedding),
+            memory_type, similarity_threshold, include_archived, limit, chunk_size, user_id,
+        ):
+            yield result
+
+    async def _stream_records(
+        self,
+        similarity_of: Callable[[MemoryRecord], float],
+        memory_type: Optional[str],
+        similarity_threshold: float,
+        include_archived: bool,
+        limit: Optional[int],
+        chunk_size: int,
+        user_id: Optional[str],
+    ) -> AsyncIterator[Dict[str, Any]]:
+        scored: List[Tuple[float, int]] = []
+        now = datetime.now(timezone.utc)
+
+        for record in self._scoped_records(user_id):
+            if memory_type and record.memory_type.value != memory_type:
+                continue
+            if record.expires_at and record.expires_at <= now:
+                continue
+            if not include_archived and record.is_archived:
+                continue
+            similarity = similarity_of(record)
+            if similarity >= similarity_threshold:
+                scored.append((similarity, record.id))
+
+        # Stable sort keeps ties in insertion order, like search_similar()
+        scored.sort(key=lambda x: x[0], reverse=True)
+        if limit is not None:
+            scored = scored[:limit]
+
+        for start in range(0, len(scored), chunk_size):
+            for similarity, memory_id in scored[start:start + chunk_size]:
+                record = self._storage.get(memory_id)
+                if record is None:
+                    continue
+                yield {
+                    "id": record.id,
+                    "content": record.content,
+                    "memory_type": record.memory_type.value,
+                    "source_type": record.source_type.value if record.source_type else None,
+                    "metadata": record.metadata,
+                    "created_at": record.created_at,
+                    "similarity": similarity,
+                }
+            await asyncio.sleep(0)
+
     async def search_hybrid(
         self,
         query_embedding: List[float],
@@ -159,10 +636,30 @@ class InMemoryRepository(MemoryRepository):
         limit: int,
     ) -> List[Dict[str, Any]]:
         """Search with vector similarity and metadata filters"""
+        return self._hybrid_records(
+            lambda record: cosine_similarity(query_embedding, record.embedding), filters, limit
+        )
+
+    def _hybrid_records(
+        self,
+        similarity_of: Callable[[MemoryRecord], float],
+        filters: Dict[str, Any],
+        limit: int,
+    ) -> List[Dict[str, Any]]:
         results = []
         now = datetime.now(timezone.utc)
 
-        for record in self._storage.values():
+        candidate_ids = self._metadata_candidates(filters)
+        user_id = filters.get("user_id")
+        if user_id and candidate_ids is not None:
+            candidate_ids = candidate_ids.intersection(self._user_ids(user_id))
+        if candidate_ids is None:
+            records = self._scoped_records(user_id)
+        else:
+            # Ids ascend with insertion order, keeping tie order stable
+            records = [self._storage[i] for i in sorted(candidate_ids) if i in self._storage]
+
+        for record in records:
             # Filter expired
             if record.expires_at and record.expires_at <= now:
                 continue
@@ -176,7 +673,7 @@ class InMemoryRepository(MemoryRepository):
                 continue
 
             # Calculate similarity
-            similarity = cosine_similarity(query_embedding, record.embedding)
+            similarity = similarity_of(record)
 
             results.append({
                 "id": record.id,
@@ -196,6 +693,10 @@ class InMemoryRepository(MemoryRepository):
 
     def _matches_filters(self, record: MemoryRecord, filters: Dict[str, Any]) -> bool:
         """Check if record matches all filters"""
+        # User filter
+        if filters.get("user_id") and record.user_id != filters["user_id"]:
+            return False
+
         # Source type filter
         if "source_type" in filters:
             if record.source_type is None:
@@ -240,37 +741,353 @@ class InMemoryRepository(MemoryRepository):
         """Get memory by ID"""
         return self._storage.get(memory_id)
 
-    async def archive_expired(self) -> int:
-        """Archive expired working memories"""
+    async def archive_expired(self, limit: Optional[int] = None) -> int:
+        """Archive expired working memories (pops only the due heap entries)"""
         count = 0
         now = datetime.now(timezone.utc)
+        now_ts = now.timestamp()
+        heap = self._expiry_heap
 
-        for record in self._storage.values():
+        while heap and heap[0][0] <= now_ts and (limit is None or count < limit):
+            expires_ts, memory_id = heapq.heappop(heap)
+            record = self._storage.get(memory_id)
             if (
-                record.memory_type == MemoryType.WORKING
-                and record.expires_at
-                and record.expires_at <= now
-                and not record.is_archived
+                record is None
+                or record.is_archived
+                or record.memory_type != MemoryType.WORKING
+                or record.expires_at is None
+                or record.expires_at.timestamp() != expires_ts
             ):
-                record.is_archived = True
-                record.updated_at = now
-                count += 1
+                continue
+
+            self._count_record(record, -1)
+            record.is_archived = True
+            record.updated_at = now
+            self._unindex_metadata(record.id)
+            self._count_record(record)
+            count += 1
 
         return count
 
+    def next_expiry(self) -> Optional[datetime]:
+        """Earliest pending working-memory expiry (may be a stale entry)"""
+        if not self._expiry_heap:
+            return None
+        return datetime.fromtimestamp(self._expiry_heap[0][0], timezone.utc)
+
     async def count_by_type(self, memory_type: str) -> int:
         """Count memories by type"""
-        count = 0
-        for record in self._storage.values():
-            if record.memory_type.value == memory_type and not record.is_archived:
-                count += 1
-        return count
+        return self._get_counters().count(memory_type)
+
+    async def get_type_counts(self, user_id: Optional[str] = None) -> Dict[str, int]:
+        """Non-archived memory counts per type (user's plus shared if user_id)"""
+        return self._get_counters().type_counts(user_id)
+
+    async def get_user_memory_stats(self, user_id: str) -> Dict[str, Any]:
+        """Get memory statistics for a user"""
+        return self._get_counters().user_stats(user_id)
+
+    async def reconcile_counters(self) -> int:
+        """Rebuild counters from storage, returning the number of drifted groups"""
+        rebuilt = MemoryCounters.from_records(self._storage.values())
+        drifted = rebuilt.drift(self._counters) if self._counters is not None else 0
+        self._counters = rebuilt
+        return drifted
+
+    async def find_duplicates(
+        self, keys: List[DuplicateKey]
+    ) -> Dict[DuplicateKey, Tuple[int, List[float]]]:
+        """Look up unarchived memories by content hash (via the hash index)"""
+        if self._hash_index is None:
+            index: Dict[DuplicateKey, int] = {}
+            for record in self._storage.values():
+                key = duplicate_key(record.content, record.memory_type.value, record.user_id)
+                index[key] = max(index.get(key, 0), record.id)
+            self._hash_index = index
+
+        found: Dict[DuplicateKey, Tuple[int, List[float]]] = {}
+        for key in keys:
+            memory_id = self._hash_index.get(key)
+            record = self._storage.get(memory_id) if memory_id is not None else None
+            if record is not None and not record.is_archived:
+                found[key] = (record.id, self._embedding_of(record))
+        return found
+
+    async def increment_duplicate_count(self, memory_id: int, count: int = 1) -> None:
+        """Add count to a memory's duplicate_count"""
+        record = self._storage.get(memory_id)
+        if record is not None:
+            record.duplicate_count += count
+            record.updated_at = datetime.now(timezone.utc)
+
+    async def list_memory_users(self) -> List[Optional[str]]:
+        """Users with unarchived memories (None first)"""
+        users = {record.user_id for record in self._storage.values() if not record.is_archived}
+        return sorted(users, key=lambda user: (user is not None, user or ""))
+
+    async def scan_user_memories(
+        self, user_id: Optional[str], after_id: int, limit: int
+    ) -> List[MemoryRecord]:
+        """One page of a user's unarchived memories from the user shard"""
+        ids = self._user_ids(user_id)
+        records = []
+        for memory_id in ids[bisect.bisect_right(ids, after_id):]:
+            record = self._storage.get(memory_id)
+            if record is None or record.is_archived:
+                continue
+            records.append(MemoryRecord(
+                **record.model_dump(exclude={"embedding"}), embedding=self._embedding_of(record)
+            ))
+            if len(records) >= limit:
+                break
+        return records
+
+    async def merge_memories(
+        self,
+        canonical_id: int,
+        duplicate_ids: List[int],
+        metadata: Dict[str, Any],
+        duplicate_count: int,
+    ) -> int:
+        """Update the canonical memory and archive its duplicates"""
+        canonical = self._storage.get(canonical_id)
+        if canonical is None or canonical.is_archived:
+            return 0
+
+        now = datetime.now(timezone.utc)
+        self._unindex_metadata(canonical_id)
+        canonical.metadata = metadata
+        canonical.duplicate_count = duplicate_count
+        canonical.updated_at = now
+        self._index_metadata(canonical)
+
+        archived = 0
+        for memory_id in duplicate_ids:
+            record = self._storage.get(memory_id)
+            if record is None or record.is_archived or memory_id == canonical_id:
+                continue
+            self._count_record(record, -1)
+            record.metadata = {**record.metadata, "consolidated_into": canonical_id}
+            record.is_archived = True
+            record.updated_at = now
+            self._unindex_metadata(memory_id)
+            self._count_record(record)
+            archived += 1
+        return archived
+
+    async def export_memory_batch(
+        self, after_id: int, limit: int, user_id: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], np.ndarray]:
+        """One page of memories in id order (storage order is id order)"""
+        if user_id is not None:
+            ids: Iterable[int] = self._user_ids(user_id)
+            ids = ids[bisect.bisect_right(ids, after_id):]
+        else:
+            ids = (memory_id for memory_id in self._storage if memory_id > after_id)
+
+        records = []
+        for memory_id in ids:
+            record = self._storage.get(memory_id)
+            if record is None:
+                continue
+            records.append(record)
+            if len(records) >= limit:
+                break
+
+        if not records:
+            return [], np.empty((0, 0), dtype=np.float32)
+        embeddings = np.asarray([self._embedding_of(r) for r in records], dtype=np.float32)
+        return [snapshot_row(r) for r in records], embeddings
 
     def clear(self) -> None:
         """Clear all stored memories"""
         self._storage.clear()
         self._next_id = 1
+        self._metadata_index = None
+        self._expiry_heap = []
+        self._counters = None
+        self._user_shards = None
+        self._hash_index = None
 
     def get_all(self) -> List[MemoryRecord]:
         """Get all stored memories"""
         return list(self._storage.values())
+
+
+class InMemoryRepository(InMemoryRepositoryBase, ReembeddableRepository, RestorableRepository):
+    """In-memory implementation for testing"""
+
+    def __init__(self) -> None:
+        """Initialize empty storage"""
+        super().__init__()
+        # id -> embedding of the next model while a re-embedding runs
+        self._shadow_embeddings: Optional[Dict[int, List[float]]] = None
+        # Completed re-embedding cutovers
+        self._embedding_generation = 0
+
+    async def begin_reembedding(self, dimensions: int) -> None:
+        """Start collecting shadow embeddings (kept if already started)"""
+        if self._shadow_embeddings is None:
+            self._shadow_embeddings = {}
+
+    def _require_shadow(self) -> Dict[int, List[float]]:
+        if self._shadow_embeddings is None:
+            raise RuntimeError("No re-embedding in progress")
+        return self._shadow_embeddings
+
+    async def unmigrated_batch(self, after_id: int, limit: int) -> List[Tuple[int, str]]:
+        """(id, content) of memories still without a shadow embedding"""
+        shadow = self._require_shadow()
+        ids = heapq.nsmallest(
+            limit, (i for i in self._storage if i > after_id and i not in shadow)
+        )
+        return [(i, self._storage[i].content) for i in ids]
+
+    async def write_shadow_embeddings(self, rows: List[Tuple[int, List[float]]]) -> None:
+        """Store shadow embeddings of existing memories"""
+        shadow = self._require_shadow()
+        for memory_id, embedding in rows:
+            if memory_id in self._storage:
+                shadow[memory_id] = embedding
+
+    async def reembedding_progress(self) -> Dict[str, int]:
+        """Migrated and total memory counts"""
+        shadow = self._require_shadow()
+        return {
+            "migrated": sum(1 for i in shadow if i in self._storage),
+            "total": len(self._storage),
+        }
+
+    async def search_similar_dual(
+        self,
+        query_embedding: List[float],
+        shadow_query_embedding: List[float],
+        memory_type: Optional[str],
+        limit: int,
+        similarity_threshold: float,
+        include_archived: bool,
+        user_id: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Search scoring migrated memories by their shadow embedding"""
+        return self._search_records(
+            self._dual_similarity(query_embedding, shadow_query_embedding),
+            memory_type, limit, similarity_threshold, include_archived, user_id,
+        )
+
+    async def stream_similar_dual(
+        self,
+        query_embedding: List[float],
+        shadow_query_embedding: List[float],
+        memory_type: Optional[str],
+        similarity_threshold: float,
+        include_archived: bool,
+        limit: Optional[int] = None,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+        user_id: Optional[str] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream scoring migrated memories by their shadow embedding"""
+        similarity_of = self._dual_similarity(query_embedding, shadow_query_embedding)
+        async for result in self._stream_records(
+            similarity_of, memory_type, similarity_threshold, include_archived,
+            limit, chunk_size, user_id,
+        ):
+            yield result
+
+    async def search_hybrid_dual(
+        self,
+        query_embedding: List[float],
+        shadow_query_embedding: List[float],
+        filters: Dict[str, Any],
+        limit: int,
+    ) -> List[Dict[str, Any]]:
+        """Filtered search scoring migrated memories by their shadow embedding"""
+        return self._hybrid_records(
+            self._dual_similarity(query_embedding, shadow_query_embedding), filters, limit
+        )
+
+    def _dual_similarity(
+        self, query_embedding: List[float], shadow_query_embedding: List[float]
+    ) -> Callable[[MemoryRecord], float]:
+        shadow = self._require_shadow()
+
+        def similarity_of(record: MemoryRecord) -> float:
+            embedding = shadow.get(record.id)
+            if embedding is not None:
+                return cosine_similarity(shadow_query_embedding, embedding)
+            return cosine_similarity(query_embedding, record.embedding)
+
+        return similarity_of
+
+    async def cutover_embeddings(self) -> bool:
+        """Swap in the shadow embeddings if every memory has one"""
+        shadow = self._require_shadow()
+        if any(i not in shadow for i in self._storage):
+            return False
+        for memory_id, record in self._storage.items():
+            record.embedding = shadow[memory_id]
+        self._shadow_embeddings = None
+        self._embedding_generation += 1
+        return True
+
+    async def abort_reembedding(self) -> None:
+        """Drop the shadow embeddings"""
+        self._shadow_embeddings = None
+
+    async def reembedding_state(self) -> Dict[str, Any]:
+        """Cutover count and whether shadow embeddings are being collected"""
+        return {
+            "generation": self._embedding_generation,
+            "migrating": self._shadow_embeddings is not None,
+        }
+
+    async def restore_memory_batch(
+        self,
+        rows: List[Dict[str, Any]],
+        embeddings: np.ndarray,
+        preserve_ids: bool = True,
+    ) -> List[int]:
+        """
+        Insert restored memories through insert_memory(), then apply their
+        saved timestamps, archive flag and duplicate_count.
+
+        Ids must ascend with insertion order here, so preserved ids have to
+        be above every existing id.
+        """
+        if preserve_ids:
+            last_id = self._next_id - 1
+            for row in rows:
+                if row["id"] <= last_id:
+                    raise ValueError(
+                        f"Memory id {row['id']} is not above the last id {last_id}; "
+                        "restore into an empty repository or with preserve_ids=False"
+                    )
+                last_id = row["id"]
+
+        ids = []
+        for row, embedding in zip(rows, embeddings):
+            if preserve_ids:
+                self._next_id = row["id"]
+            memory_id = await self.insert_memory(
+                row["content"], np.asarray(embedding, dtype=np.float32).tolist(),
+                row["memory_type"], row["source_type"], row["metadata"],
+                row["expires_at"], row["user_id"],
+            )
+            record = self._storage[memory_id]
+            # created_at is indexed: re-index under the saved timestamp
+            self._unindex_metadata(memory_id)
+            record.created_at = row["created_at"]
+            record.updated_at = row["updated_at"]
+            record.duplicate_count = row["duplicate_count"]
+            if row["is_archived"]:
+                self._count_record(record, -1)
+                record.is_archived = True
+                self._count_record(record)
+            else:
+                self._index_metadata(record)
+            ids.append(memory_id)
+        return ids
+
+    def clear(self) -> None:
+        """Clear all stored memories"""
+        super().clear()
+        self._shadow_embeddings = None
@@ -0,0 +1,682 @@
+"""
+Segment Store - Memory-mapped Persistent Vector Segments
+
+On-disk layout of a store directory:
+
+    manifest.json        dimensions, code tables, segment list, next id
+    seg-000001.vec       float32 normalized vectors, row-major
+    seg-000001.rows      fixed-width row records (ROW_DTYPE)
+    seg-000001.meta      JSON sidecar per row (content, metadata, timestamps)
+    tombstones.i64       deleted memory ids (append-only)
+    archived.i64         archived memory ids (append-only)
+    updates.jsonl        record field updates, one JSON object per line
+                         ({"id", field: value, ...}; later lines win)
+
+Segments are append-only. The last segment is active; once it reaches
+segment_rows it is sealed and a new one is started. Rows are committed by
+appending to .rows last, so a torn write leaves trailing .vec / .meta bytes
+that are ignored on load.
+
+Readers open the files with mmap, so every worker process on a host shares
+one page-cache copy and opening a store costs milliseconds. Compaction
+merges sealed segments into one, dropping tombstoned rows and folding the
+archived and update logs into the row records and sidecar entries; readers holding the old files keep
+working until they refresh.
+"""
+
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .vector_index import candidate_scores, normalize_rows, top_k
+
+FORMAT_VERSION = 1
+
+ROW_DTYPE = np.dtype([
+    ("id", "<i8"),
+    ("memory_type", "i1"),
+    ("source_type", "i1"),
+    ("archived", "?"),
+    ("expires", "<f8"),
+    ("meta_offset", "<i8"),
+    ("meta_length", "<i4"),
+])
+
+_MANIFEST = "manifest.json"
+_TOMBSTONES = "tombstones.i64"
+_ARCHIVED = "archived.i64"
+_UPDATES = "updates.jsonl"
+_VECTOR_DTYPE = np.dtype("<f4")
+_ID_DTYPE = np.dtype("<i8")
+
+
+class SegmentStoreError(Exception):
+    """Segment store is inconsistent or used incorrectly"""
+    pass
+
+
+class _Segment:
+    """One segment's files and memory maps"""
+
+    def __init__(self, directory: str, name: str, dimensions: int, sealed: bool) -> None:
+        self.name = name
+        self.sealed = sealed
+        self.dimensions = dimensions
+        self.vec_path = os.path.join(directory, f"{name}.vec")
+        self.rows_path = os.path.join(directory, f"{name}.rows")
+        self.meta_path = os.path.join(directory, f"{name}.meta")
+        self.count = 0
+        self._vectors: Optional[np.ndarray] = None
+        self._rows: Optional[np.ndarray] = None
+        self._meta_fd: Optional[int] = None
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Re-read the committed row count from disk"""
+        size = os.path.getsize(self.rows_path) if os.path.exists(self.rows_path) else 0
+        count = size // ROW_DTYPE.itemsize
+        if count != self.count:
+            self.count = count
+            self._vectors = None
+            self._rows = None
+
+    def vectors(self) -> np.ndarray:
+        """Committed vectors (read-only memory map)"""
+        if self._vectors is None:
+            if self.count == 0:
+                self._vectors = np.empty((0, self.dimensions), dtype=_VECTOR_DTYPE)
+            else:
+                self._vectors = np.memmap(
+                    self.vec_path, dtype=_VECTOR_DTYPE, mode="r",
+                    shape=(self.count, self.dimensions),
+                )
+        return self._vectors
+
+    def rows(self) -> np.ndarray:
+        """Committed row records (read-only memory map)"""
+        if self._rows is None:
+            if self.count == 0:
+                self._rows = np.empty(0, dtype=ROW_DTYPE)
+            else:
+                self._rows = np.memmap(self.rows_path, dtype=ROW_DTYPE, mode="r", shape=(self.count,))
+        return self._rows
+
+    def read_meta(self, offset: int, length: int) -> bytes:
+        if self._meta_fd is None:
+            self._meta_fd = os.open(self.meta_path, os.O_RDONLY)
+        return os.pread(self._meta_fd, length, offset)
+
+    def close(self) -> None:
+        self._vectors = None
+        self._rows = None
+        if self._meta_fd is not None:
+            os.close(self._meta_fd)
+            self._meta_fd = None
+
+    def unlink(self) -> None:
+        self.close()
+        for path in (self.vec_path, self.rows_path, self.meta_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def _read_ids(path: str) -> np.ndarray:
+    if not os.path.exists(path):
+        return np.empty(0, dtype=_ID_DTYPE)
+    return np.fromfile(path, dtype=_ID_DTYPE)
+
+
+def _read_lines(path: str) -> List[bytes]:
+    """Complete lines of an append-only log (a torn last line is ignored)"""
+    if not os.path.exists(path):
+        return []
+    with open(path, "rb") as f:
+        data = f.read()
+    return data[: data.rfind(b"\n") + 1].splitlines(keepends=True)
+
+
+def _merge_updates(lines: Sequence[bytes]) -> Dict[int, Dict[str, Any]]:
+    """id -> latest value of every updated field"""
+    updates: Dict[int, Dict[str, Any]] = {}
+    for line in lines:
+        entry = json.loads(line)
+        updates.setdefault(entry.pop("id"), {}).update(entry)
+    return updates
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class SegmentStore:
+    """
+    Append-only segment files for one repository.
+
+    A single process may write; any number may open the same directory
+    read-only and call reload() to pick up new rows and compactions.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        dimensions: Optional[int] = None,
+        segment_rows: int = 65536,
+        read_only: bool = False,
+        memory_types: Sequence[str] = (),
+        source_types: Sequence[str] = (),
+    ) -> None:
+        """
+        Open (or create) a store.
+
+        Args:
+            path: Store directory
+            dimensions: Vector dimensions (inferred from the first append if None)
+            segment_rows: Rows per segment before it is sealed
+            read_only: Open without write access
+            memory_types: Code table for the memory_type column
+            source_types: Code table for the source_type column
+        """
+        self.path = path
+        self.segment_rows = segment_rows
+        self.read_only = read_only
+        self.dimensions = dimensions
+        self.memory_types = list(memory_types)
+        self.source_types = list(source_types)
+        self.next_id = 1
+        self.segments: List[_Segment] = []
+        self._next_segment = 1
+        self._lock = threading.Lock()
+        self._writers: Dict[str, Any] = {}
+        self._pending_vectors = 0
+
+        if not read_only:
+            os.makedirs(path, exist_ok=True)
+        self.reload()
+
+    # ------------------------------------------------------------------
+    # Manifest
+
+    @property
+    def _manifest_path(self) -> str:
+        return os.path.join(self.path, _MANIFEST)
+
+    def reload(self) -> None:
+        """Re-read the manifest and segment sizes"""
+        with self._lock:
+            self._close_writers()
+            for segment in self.segments:
+                segment.close()
+            self.segments = []
+
+            if not os.path.exists(self._manifest_path):
+                if self.read_only:
+                    raise SegmentStoreError(f"No segment store at {self.path}")
+                return
+
+            with open(self._manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("version") != FORMAT_VERSION:
+                raise SegmentStoreError(f"Unsupported segment format: {manifest.get('version')}")
+
+            self.dimensions = manifest["dimensions"]
+            self.memory_types = manifest["memory_types"]
+            self.source_types = manifest["source_types"]
+            self.next_id = manifest["next_id"]
+            self._next_segment = manifest["next_segment"]
+            self.segments = [
+                _Segment(self.path, entry["name"], self.dimensions, entry["sealed"])
+                for entry in manifest["segments"]
+            ]
+            if not self.read_only:
+                self._truncate_torn_tail()
+
+    def _write_manifest(self) -> None:
+        manifest = {
+            "version": FORMAT_VERSION,
+            "dimensions": self.dimensions,
+            "memory_types": self.memory_types,
+            "source_types": self.source_types,
+            "next_id": self.next_id,
+            "next_segment": self._next_segment,
+            "segments": [{"name": s.name, "sealed": s.sealed} for s in self.segments],
+        }
+        _write_atomic(self._manifest_path, json.dumps(manifest, indent=2).encode("utf-8"))
+
+    def _truncate_torn_tail(self) -> None:
+        """Drop uncommitted vector bytes of the active segment"""
+        if not self.segments or self.segments[-1].sealed:
+            return
+        active = self.segments[-1]
+        committed = active.count * self.dimensions * _VECTOR_DTYPE.itemsize
+        if os.path.exists(active.vec_path) and os.path.getsize(active.vec_path) > committed:
+            os.truncate(active.vec_path, committed)
+        if os.path.exists(active.rows_path):
+            os.truncate(active.rows_path, active.count * ROW_DTYPE.itemsize)
+
+    # ------------------------------------------------------------------
+    # Writes
+
+    def _check_writable(self) -> None:
+        if self.read_only:
+            raise SegmentStoreError("Segment store is read-only")
+
+    def _close_writers(self) -> None:
+        for f in self._writers.values():
+            f.close()
+        self._writers = {}
+
+    def _writer(self, kind: str) -> Any:
+        active = self.segments[-1]
+        if kind not in self._writers:
+            self._writers[kind] = open(getattr(active, f"{kind}_path"), "ab")
+        return self._writers[kind]
+
+    def _new_segment_name(self) -> str:
+        name = f"seg-{self._next_segment:06d}"
+        self._next_segment += 1
+        return name
+
+    def _ensure_active_segment(self) -> None:
+        """Seal the active segment when full and start a new one"""
+        if self.segments and not self.segments[-1].sealed:
+            if self.segments[-1].count < self.segment_rows:
+                return
+            self._close_writers()
+            self.segments[-1].sealed = True
+
+        self.segments.append(_Segment(self.path, self._new_segment_name(), self.dimensions, False))
+        self._write_manifest()
+
+    def append_vectors(self, vectors: np.ndarray) -> None:
+        """
+        Append normalized vectors to the active segment.
+
+        Must be followed by append_rows() for the same number of rows.
+        """
+        self._check_writable()
+        vectors = np.ascontiguousarray(vectors, dtype=_VECTOR_DTYPE)
+        with self._lock:
+            if self.dimensions is None:
+                self.dimensions = vectors.shape[1]
+            if self._pending_vectors == 0:
+                self._ensure_active_segment()
+            f = self._writer("vec")
+            f.write(vectors.tobytes())
+            self._pending_vectors += vectors.shape[0]
+
+    def append_rows(self, rows: np.ndarray, metas: Sequence[bytes]) -> Tuple[int, np.ndarray]:
+        """
+        Commit rows for previously appended vectors.
+
+        Args:
+            rows: ROW_DTYPE records (meta_offset / meta_length are filled in)
+            metas: Encoded sidecar entry per row
+
+        Returns:
+            (segment number, meta offsets)
+        """
+        self._check_writable()
+        with self._lock:
+            if rows.shape[0] != self._pending_vectors:
+                raise SegmentStoreError("append_rows must match append_vectors")
+
+            meta_file = self._writer("meta")
+            meta_file.seek(0, os.SEEK_END)
+            offset = meta_file.tell()
+            lengths = np.fromiter((len(m) for m in metas), dtype=np.int64, count=len(metas))
+            offsets = offset + np.concatenate(([0], np.cumsum(lengths)[:-1]))
+            meta_file.write(b"".join(metas))
+            meta_file.flush()
+
+            rows = rows.copy()
+            rows["meta_offset"] = offsets
+            rows["meta_length"] = lengths
+            self._writer("vec").flush()
+            rows_file = self._writer("rows")
+            rows_file.write(rows.tobytes())
+            rows_file.flush()
+
+            self._pending_vectors = 0
+            self.next_id = max(self.next_id, int(rows["id"].max()) + 1)
+            active = self.segments[-1]
+            active.refresh()
+            return len(self.segments) - 1, offsets
+
+    def append_tombstones(self, ids: Sequence[int]) -> None:
+        """Record deleted memory ids"""
+        self._append_ids(_TOMBSTONES, ids)
+
+    def append_archived(self, ids: Sequence[int]) -> None:
+        """Record archived memory ids"""
+        self._append_ids(_ARCHIVED, ids)
+
+    def append_updates(self, updates: Sequence[Dict[str, Any]]) -> None:
+        """
+        Record updated sidecar fields.
+
+        Args:
+            updates: {"id": memory id, field: new value, ...} per record
+        """
+        self._check_writable()
+        data = b"".join(
+            json.dumps(update, ensure_ascii=False).encode("utf-8") + b"\n" for update in updates
+        )
+        with self._lock:
+            with open(os.path.join(self.path, _UPDATES), "ab") as f:
+                f.write(data)
+
+    def _append_ids(self, filename: str, ids: Sequence[int]) -> None:
+        self._check_writable()
+        with self._lock:
+            with open(os.path.join(self.path, filename), "ab") as f:
+                f.write(np.asarray(ids, dtype=_ID_DTYPE).tobytes())
+
+    def flush(self) -> None:
+        """fsync the active segment and persist next_id"""
+        with self._lock:
+            for f in self._writers.values():
+                f.flush()
+                os.fsync(f.fileno())
+            if not self.read_only and self.segments:
+                self._write_manifest()
+
+    def reset(self) -> None:
+        """Delete every segment and log"""
+        self._check_writable()
+        with self._lock:
+            self._close_writers()
+            for segment in self.segments:
+                segment.unlink()
+            for filename in (_TOMBSTONES, _ARCHIVED, _UPDATES, _MANIFEST):
+                path = os.path.join(self.path, filename)
+                if os.path.exists(path):
+                    os.remove(path)
+            self.segments = []
+            self.next_id = 1
+            self._pending_vectors = 0
+
+    def close(self) -> None:
+        """Flush and release files"""
+        if not self.read_only:
+            self.flush()
+        with self._lock:
+            self._close_writers()
+            for segment in self.segments:
+                segment.close()
+
+    # ------------------------------------------------------------------
+    # Reads
+
+    def tombstone_ids(self) -> np.ndarray:
+        """Deleted memory ids"""
+        return _read_ids(os.path.join(self.path, _TOMBSTONES))
+
+    def archived_ids(self) -> np.ndarray:
+        """Archived memory ids not yet folded into row records"""
+        return _read_ids(os.path.join(self.path, _ARCHIVED))
+
+    def record_updates(self) -> Dict[int, Dict[str, Any]]:
+        """Sidecar field updates not yet folded into the segments"""
+        return _merge_updates(_read_lines(os.path.join(self.path, _UPDATES)))
+
+    def refresh_counts(self) -> None:
+        """Pick up rows appended by the writer since the last call"""
+        for segment in self.segments:
+            if not segment.sealed:
+                segment.refresh()
+
+    def vector_blocks(self) -> List[np.ndarray]:
+        """Committed vectors per segment"""
+        return [segment.vectors() for segment in self.segments]
+
+    def load_rows(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Concatenate committed row records.
+
+        Returns:
+            (rows, segment number per row)
+        """
+        blocks = [segment.rows() for segment in self.segments]
+        if not blocks:
+            return np.empty(0, dtype=ROW_DTYPE), np.empty(0, dtype=np.int32)
+        segment_of = np.repeat(
+            np.arange(len(blocks), dtype=np.int32), [block.shape[0] for block in blocks]
+        )
+        return np.concatenate(blocks), segment_of
+
+    def read_meta(self, segment: int, offset: int, length: int) -> Dict[str, Any]:
+        """Decode one sidecar entry"""
+        return json.loads(self.segments[segment].read_meta(offset, length))
+
+    def get_stats(self) -> Dict[str, int]:
+        """Segment statistics"""
+        return {
+            "segments": len(self.segments),
+            "sealed_segments": sum(1 for s in self.segments if s.sealed),
+            "rows": sum(s.count for s in self.segments),
+            "tombstones": int(self.tombstone_ids().size),
+            "archived_log": int(self.archived_ids().size),
+            "update_log": len(_read_lines(os.path.join(self.path, _UPDATES))),
+        }
+
+    # ------------------------------------------------------------------
+    # Compaction
+
+    def compact(self) -> Dict[str, int]:
+        """
+        Merge sealed segments, dropping deleted rows and folding logged
+        archive flags and field updates into them.
+
+        Safe to run in a worker thread while the owner keeps appending to
+        the active segment.
+
+        Returns:
+            {"segments_merged", "rows_written", "rows_dropped"}
+        """
+        self._check_writable()
+        with self._lock:
+            sealed = [s for s in self.segments if s.sealed]
+            tombstones = self.tombstone_ids()
+            archived = self.archived_ids()
+            update_lines = _read_lines(os.path.join(self.path, _UPDATES))
+            name = self._new_segment_name() if sealed else None
+
+        result = {"segments_merged": 0, "rows_written": 0, "rows_dropped": 0}
+        if not sealed:
+            return result
+
+        updates = _merge_updates(update_lines)
+        updated_ids = np.fromiter(updates, dtype=_ID_DTYPE, count=len(updates))
+        sealed_ids = np.concatenate([s.rows()["id"] for s in sealed])
+        if (
+            len(sealed) < 2
+            and not np.isin(sealed_ids, tombstones).any()
+            and not np.isin(sealed_ids, archived).any()
+            and not np.isin(sealed_ids, updated_ids).any()
+        ):
+            return result
+
+        merged = _Segment(self.path, name, self.dimensions, sealed=True)
+        dropped: List[np.ndarray] = []
+        folded: List[np.ndarray] = []
+        rewritten: List[int] = []
+        with open(merged.vec_path, "wb") as vec_file, \
+                open(merged.rows_path, "wb") as rows_file, \
+                open(merged.meta_path, "wb") as meta_file:
+            for segment in sealed:
+                rows = segment.rows()
+                keep = ~np.isin(rows["id"], tombstones)
+                dropped.append(rows["id"][~keep])
+
+                kept = np.array(rows[keep])
+                newly_archived = np.isin(kept["id"], archived) & ~kept["archived"]
+                folded.append(kept["id"][newly_archived])
+                kept["archived"] |= newly_archived
+
+                with open(segment.meta_path, "rb") as f:
+                    meta = f.read()
+                chunks = []
+                for memory_id, offset, length in zip(
+                    kept["id"].tolist(), kept["meta_offset"].tolist(), kept["meta_length"].tolist()
+                ):
+                    chunk = meta[offset:offset + length]
+                    update = updates.get(memory_id)
+                    if update is not None:
+                        chunk = json.dumps(
+                            {**json.loads(chunk), **update}, ensure_ascii=False
+                        ).encode("utf-8")
+                        rewritten.append(memory_id)
+                    chunks.append(chunk)
+                lengths = np.array([len(c) for c in chunks], dtype=np.int64)
+                start = meta_file.tell()
+                kept["meta_offset"] = start + np.concatenate(([0], np.cumsum(lengths)[:-1]))[: len(chunks)]
+                kept["meta_length"] = lengths
+                meta_file.write(b"".join(chunks))
+
+                vec_file.write(np.ascontiguousarray(segment.vectors()[keep]).tobytes())
+                rows_file.write(kept.tobytes())
+                result["rows_written"] += int(kept.shape[0])
+
+            for f in (vec_file, rows_file, meta_file):
+                f.flush()
+                os.fsync(f.fileno())
+        merged.refresh()
+
+        dropped_ids = np.concatenate(dropped)
+        folded_ids = np.concatenate(folded)
+        with self._lock:
+            self.segments = [merged] + [s for s in self.segments if s not in sealed]
+            self._write_manifest()
+            _write_atomic(
+                os.path.join(self.path, _TOMBSTONES),
+                np.setdiff1d(self.tombstone_ids(), dropped_ids).astype(_ID_DTYPE).tobytes(),
+            )
+            _write_atomic(
+                os.path.join(self.path, _ARCHIVED),
+                np.setdiff1d(self.archived_ids(), folded_ids).astype(_ID_DTYPE).tobytes(),
+            )
+            # Lines appended while merging are newer than the folded values
+            folded_updates = set(rewritten) | set(dropped_ids.tolist())
+            lines = _read_lines(os.path.join(self.path, _UPDATES))
+            _write_atomic(
+                os.path.join(self.path, _UPDATES),
+                b"".join(
+                    [line for line in update_lines if json.loads(line)["id"] not in folded_updates]
+                    + lines[len(update_lines):]
+                ),
+            )
+        for segment in sealed:
+            segment.unlink()
+
+        result["segments_merged"] = len(sealed)
+        result["rows_dropped"] = int(dropped_ids.size)
+        return result
+
+
+class SegmentVectorIndex:
+    """
+    VectorIndex-compatible view over a SegmentStore's memory-mapped vectors.
+
+    Vectors are written straight to the active segment; similarity is one
+    matrix-vector product per segment.
+    """
+
+    def __init__(self, store: SegmentStore) -> None:
+        self._store = store
+        self.dimensions = store.dimensions
+        self._size = sum(segment.count for segment in store.segments)
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """All committed vectors (a copy)"""
+        blocks = self._store.vector_blocks()
+        if not blocks:
+            return np.empty((0, self.dimensions or 0), dtype=np.float32)
+        return np.concatenate(blocks)
+
+    def add(self, vector: Sequence[float]) -> int:
+        """Append a single vector; returns its row number"""
+        return self.add_batch(np.asarray([vector], dtype=np.float32))[0]
+
+    def add_batch(self, vectors: np.ndarray) -> range:
+        """Append vectors to the active segment; returns their row numbers"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2:
+            raise ValueError("vectors must be a 2-D array")
+        if self.dimensions is None:
+            self.dimensions = vectors.shape[1]
+        elif vectors.shape[1] != self.dimensions:
+            raise ValueError("Vectors must have same length")
+
+        self._store.append_vectors(normalize_rows(vectors))
+        start = self._size
+        self._size += vectors.shape[0]
+        return range(start, self._size)
+
+    def get(self, row: int) -> np.ndarray:
+        """Get the normalized vector stored at row"""
+        if not 0 <= row < self._size:
+            raise IndexError(f"Row out of range: {row}")
+        for block in self._store.vector_blocks():
+            if row < block.shape[0]:
+                return np.array(block[row])
+            row -= block.shape[0]
+        raise IndexError(f"Row not committed: {row}")
+
+    def similarities(
+        self,
+        query: Sequence[float],
+        rows: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """Cosine similarity of query against every committed row (or only rows)"""
+        count = self._size if rows is None else len(rows)
+        if self._size == 0 or count == 0:
+            return np.empty(0, dtype=np.float32)
+
+        q = np.asarray(query, dtype=np.float32)
+        if q.ndim != 1 or q.shape[0] != self.dimensions:
+            raise ValueError("Vectors must have same length")
+        norm = np.linalg.norm(q)
+        if norm == 0:
+            return np.zeros(count, dtype=np.float32)
+
+        q = q / norm
+        blocks = self._store.vector_blocks()
+        if rows is None:
+            return np.concatenate([block @ q for block in blocks])
+
+        # Score each requested row within its own segment's mapping
+        rows = np.asarray(rows, dtype=np.int64)
+        starts = np.cumsum([0] + [block.shape[0] for block in blocks])
+        owner = np.searchsorted(starts, rows, side="right") - 1
+        sims = np.empty(count, dtype=np.float32)
+        for segment in np.unique(owner).tolist():
+            selected = owner == segment
+            sims[selected] = blocks[segment][rows[selected] - starts[segment]] @ q
+        return sims
+
+    def search(
+        self,
+        query: Sequence[float],
+        limit: int,
+        mask: Optional[np.ndarray] = None,
+        similarity_threshold: Optional[float] = None,
+        rows: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Exact top-k search (see VectorIndex.search)"""
+        candidates, scores = candidate_scores(self, query, mask, rows)
+        if similarity_threshold is not None and candidates.size:
+            keep = scores >= similarity_threshold
+            candidates, scores = candidates[keep], scores[keep]
+        return top_k(candidates, scores, limit)
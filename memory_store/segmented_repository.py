@@ -0,0 +1,475 @@
+"""
+Segmented Memory Repository - Persistent Vectorized Search over mmap Segments
+
+Vectorized repository (VectorizedRepositoryBase) whose embeddings and records live in a
+SegmentStore directory, so API workers start warm: opening an existing
+store maps the vector segments and copies only the fixed-width row arrays.
+Record content and metadata are decoded lazily from the sidecar on access.
+"""
+
+import asyncio
+import heapq
+import json
+import logging
+from collections.abc import MutableMapping
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from .models import MemoryRecord, MemoryType, SourceType
+from .segment_store import ROW_DTYPE, SegmentStore, SegmentStoreError, SegmentVectorIndex
+from .vectorized_repository import (
+    _MEMORY_TYPE_CODES,
+    _NO_SOURCE,
+    _SOURCE_TYPE_CODES,
+    VectorizedRepositoryBase,
+    _expiry_timestamp,
+    _grow,
+    _IndexedMemoryRecord,
+)
+
+logger = logging.getLogger(__name__)
+
+_DELETED_TYPE = -1
+
+
+def _remap_codes(codes: np.ndarray, stored: List[str], current: Dict[str, int]) -> np.ndarray:
+    """Translate codes written with an older enum order to the current one"""
+    if not stored:
+        return codes.astype(np.int8)
+    lookup = np.array([current.get(value, _DELETED_TYPE) for value in stored], dtype=np.int8)
+    remapped = np.full(codes.shape, _NO_SOURCE, dtype=np.int8)
+    valid = codes >= 0
+    remapped[valid] = lookup[codes[valid]]
+    return remapped
+
+
+def _encode_meta(record: MemoryRecord) -> bytes:
+    return json.dumps({
+        "content": record.content,
+        "memory_type": record.memory_type.value,
+        "source_type": record.source_type.value if record.source_type else None,
+        "metadata": record.metadata,
+        "created_at": record.created_at.isoformat(),
+        "updated_at": record.updated_at.isoformat(),
+        "expires_at": record.expires_at.isoformat() if record.expires_at else None,
+        "user_id": record.user_id,
+        "duplicate_count": record.duplicate_count,
+    }, ensure_ascii=False).encode("utf-8")
+
+
+def _encode_update(record: MemoryRecord) -> Dict[str, Any]:
+    """Sidecar fields changed by duplicate counting and consolidation"""
+    return {
+        "id": record.id,
+        "metadata": record.metadata,
+        "duplicate_count": record.duplicate_count,
+        "updated_at": record.updated_at.isoformat(),
+    }
+
+
+class _LazyRecords(MutableMapping):
+    """id -> record mapping that decodes sidecar entries on first access"""
+
+    def __init__(self, repo: "SegmentedMemoryRepository") -> None:
+        self._repo = repo
+        self._cache: Dict[int, MemoryRecord] = {}
+
+    def __getitem__(self, memory_id: int) -> MemoryRecord:
+        record = self._cache.get(memory_id)
+        if record is None:
+            row = self._repo._row_of(memory_id)
+            if row is None:
+                raise KeyError(memory_id)
+            record = self._repo._materialize(row)
+            self._cache[memory_id] = record
+        return record
+
+    def __setitem__(self, memory_id: int, record: MemoryRecord) -> None:
+        self._cache[memory_id] = record
+
+    def __delitem__(self, memory_id: int) -> None:
+        self._cache.pop(memory_id, None)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._repo._live_ids().tolist())
+
+    def __len__(self) -> int:
+        return int(self._repo._live_ids().size)
+
+    def clear(self) -> None:
+        self.detach()
+
+    def detach(self) -> Dict[int, MemoryRecord]:
+        """
+        Drop cached records; stale row numbers must not sync back.
+
+        Returns:
+            The dropped records, for adopt() after a reload
+        """
+        cache = self._cache
+        for record in cache.values():
+            record._owner = None
+        self._cache = {}
+        return cache
+
+    def adopt(self, records: Dict[int, MemoryRecord]) -> None:
+        """Re-attach records cached before a reload (keeps in-memory updates)"""
+        for memory_id, record in records.items():
+            row = self._repo._row_of(memory_id)
+            if row is None:
+                continue
+            record._row = row
+            record._owner = self._repo
+            self._cache[memory_id] = record
+
+
+class SegmentedMemoryRepository(VectorizedRepositoryBase):
+    """
+    Persistent in-process repository backed by memory-mapped segments.
+
+    One process opens the store for writing; other workers open the same
+    directory with read_only=True and call refresh() to pick up new rows.
+    Inserts, deletes, archiving, duplicate counts and consolidation merges
+    are persisted (the last two through the segment update log); other
+    direct record mutations are in-memory only: they survive compaction but
+    not reopening the store. Segments hold unit vectors only, so
+    get_embedding(), export and duplicate lookup return normalized
+    embeddings (cosine similarity is unaffected).
+
+    Vectors live in sealed segment files and segment metadata is written
+    once at insert time, so this backend is neither a ReembeddableRepository
+    nor a RestorableRepository: re-insert into a new store or copy the
+    directory instead.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        dimensions: Optional[int] = None,
+        segment_rows: int = 65536,
+        read_only: bool = False,
+        initial_capacity: int = 1024,
+    ) -> None:
+        """
+        Open (or create) a segmented repository.
+
+        Args:
+            path: Store directory
+            dimensions: Embedding dimensions (inferred from first insert if None)
+            segment_rows: Rows per segment before it is sealed
+            read_only: Open without write access (secondary workers)
+            initial_capacity: Minimum row array capacity
+        """
+        self._store = SegmentStore(
+            path,
+            dimensions=dimensions,
+            segment_rows=segment_rows,
+            read_only=read_only,
+            memory_types=list(_MEMORY_TYPE_CODES),
+            source_types=list(_SOURCE_TYPE_CODES),
+        )
+        self._compaction_task: Optional[asyncio.Task] = None
+        super().__init__(
+            dimensions=dimensions, initial_capacity=initial_capacity, keep_embeddings=False
+        )
+
+    # ------------------------------------------------------------------
+    # Loading
+
+    def _reset_index(self) -> None:
+        self._load()
+
+    def _load(self, keep_cached: bool = False) -> None:
+        """
+        Build row arrays from the store (vectors stay memory-mapped).
+
+        Args:
+            keep_cached: Carry decoded records over to the new row numbers, so
+                mutations that are only held in memory survive (compaction)
+        """
+        cached: Dict[int, MemoryRecord] = {}
+        storage = getattr(self, "_storage", None)
+        if isinstance(storage, _LazyRecords):
+            cached = storage.detach()
+
+        rows, segment_of = self._store.load_rows()
+        self._record_updates = self._store.record_updates()
+        size = rows.shape[0]
+        capacity = max(size, self._initial_capacity)
+
+        def column(values: np.ndarray, fill: Any, dtype: Any) -> np.ndarray:
+            array = np.full(capacity, fill, dtype=dtype)
+            array[:size] = values
+            return array
+
+        self._index = SegmentVectorIndex(self._store)
+        self._row_ids = column(rows["id"], 0, np.int64)
+        self._memory_types = column(
+            _remap_codes(rows["memory_type"], self._store.memory_types, _MEMORY_TYPE_CODES), 0, np.int8
+        )
+        self._source_types = column(
+            _remap_codes(rows["source_type"], self._store.source_types, _SOURCE_TYPE_CODES),
+            _NO_SOURCE, np.int8,
+        )
+        self._expires = column(rows["expires"], np.inf, np.float64)
+        self._archived = column(
+            rows["archived"] | np.isin(rows["id"], self._store.archived_ids()), False, bool
+        )
+        self._norms = np.ones(capacity, dtype=np.float32)
+        self._deleted = np.zeros(capacity, dtype=bool)
+        self._segment_of = column(segment_of, 0, np.int32)
+        self._meta_offsets = column(rows["meta_offset"], 0, np.int64)
+        self._meta_lengths = column(rows["meta_length"], 0, np.int32)
+
+        for row in np.flatnonzero(np.isin(rows["id"], self._store.tombstone_ids())).tolist():
+            self._tombstone_row(row)
+
+        self._storage = _LazyRecords(self)
+        if keep_cached:
+            self._storage.adopt(cached)
+        self._metadata_index = None
+        self._counters = None
+        self._user_shards = None
+        self._hash_index = None
+
+        working = _MEMORY_TYPE_CODES[MemoryType.WORKING.value]
+        due = np.flatnonzero(
+            (self._memory_types[:size] == working)
+            & np.isfinite(self._expires[:size])
+            & ~self._archived[:size]
+        )
+        self._expiry_heap = list(zip(self._expires[due].tolist(), self._row_ids[due].tolist()))
+        heapq.heapify(self._expiry_heap)
+        last_id = int(rows["id"].max()) if size else 0
+        self._next_id = max(self._store.next_id, last_id + 1)
+
+    def refresh(self) -> None:
+        """Reload rows written by another process (read-only workers)"""
+        self._store.reload()
+        self._load()
+
+    def _row_of(self, memory_id: int) -> Optional[int]:
+        size = len(self._index)
+        row = int(np.searchsorted(self._row_ids[:size], memory_id))
+        if row < size and self._row_ids[row] == memory_id and not self._deleted[row]:
+            return row
+        return None
+
+    def _live_ids(self) -> np.ndarray:
+        size = len(self._index)
+        return self._row_ids[:size][~self._deleted[:size]]
+
+    def _live_rows(self, rows: np.ndarray) -> np.ndarray:
+        return ~self._deleted[rows]
+
+    def _materialize(self, row: int) -> MemoryRecord:
+        meta = self._store.read_meta(
+            int(self._segment_of[row]), int(self._meta_offsets[row]), int(self._meta_lengths[row])
+        )
+        meta.update(self._record_updates.get(int(self._row_ids[row]), {}))
+        expires_at = meta["expires_at"]
+        record = _IndexedMemoryRecord(
+            id=int(self._row_ids[row]),
+            content=meta["content"],
+            embedding=[],
+            memory_type=MemoryType(meta["memory_type"]),
+            source_type=SourceType(meta["source_type"]) if meta["source_type"] else None,
+            metadata=meta["metadata"],
+            created_at=datetime.fromisoformat(meta["created_at"]),
+            updated_at=datetime.fromisoformat(meta["updated_at"]),
+            expires_at=datetime.fromisoformat(expires_at) if expires_at else None,
+            is_archived=bool(self._archived[row]),
+            user_id=meta["user_id"],
+            duplicate_count=meta.get("duplicate_count", 0),
+        )
+        record._row = row
+        record._owner = self
+        return record
+
+    def _embedding_of(self, record: MemoryRecord, cached: bool = True) -> List[float]:
+        """The stored unit vector (norms are not persisted)"""
+        return self._index.get(record._row).tolist()
+
+    def _tombstone_row(self, row: int) -> None:
+        """Exclude a row from every mask"""
+        self._deleted[row] = True
+        self._archived[row] = True
+        self._expires[row] = -np.inf
+        self._memory_types[row] = _DELETED_TYPE
+        self._source_types[row] = _NO_SOURCE
+
+    # ------------------------------------------------------------------
+    # Writes
+
+    def _check_writable(self) -> None:
+        if self._store.read_only:
+            raise SegmentStoreError("Repository is read-only")
+
+    def _sync_row(self, row: int, record: MemoryRecord, inserted: bool = False) -> None:
+        newly_archived = record.is_archived and not self._archived[row]
+        super()._sync_row(row, record, inserted)
+        if newly_archived:
+            self._check_writable()
+            self._store.append_archived([record.id])
+
+    async def insert_memory(
+        self,
+        content: str,
+        embedding: List[float],
+        memory_type: str,
+        source_type: Optional[str],
+        metadata: Dict[str, Any],
+        expires_at: Optional[datetime],
+        user_id: Optional[str] = None,
+    ) -> int:
+        """Insert a new memory record and append it to the active segment"""
+        self._check_writable()
+        memory_id = await super().insert_memory(
+            content, embedding, memory_type, source_type, metadata, expires_at, user_id
+        )
+        record = self._storage[memory_id]
+        row = record._row
+        meta = _encode_meta(record)
+
+        entry = np.zeros(1, dtype=ROW_DTYPE)
+        entry["id"] = memory_id
+        entry["memory_type"] = self._memory_types[row]
+        entry["source_type"] = self._source_types[row]
+        entry["expires"] = _expiry_timestamp(expires_at)
+        segment, offsets = self._store.append_rows(entry, [meta])
+
+        required = row + 1
+        self._deleted = _grow(self._deleted, required, False)
+        self._segment_of = _grow(self._segment_of, required, 0)
+        self._meta_offsets = _grow(self._meta_offsets, required, 0)
+        self._meta_lengths = _grow(self._meta_lengths, required, 0)
+        self._segment_of[row] = segment
+        self._meta_offsets[row] = offsets[0]
+        self._meta_lengths[row] = len(meta)
+        return memory_id
+
+    async def delete_memory(self, memory_id: int) -> bool:
+        """
+        Delete a memory (tombstoned until the next compaction).
+
+        Returns:
+            True if the memory existed
+        """
+        self._check_writable()
+        row = self._row_of(memory_id)
+        if row is None:
+            return False
+
+        if self._counters is not None:
+            self._counters.add(self._storage[memory_id], -1)
+        self._store.append_tombstones([memory_id])
+        self._tombstone_row(row)
+        self._unindex_metadata(memory_id)
+        del self._storage[memory_id]
+        return True
+
+    async def archive_expired(self, limit: Optional[int] = None) -> int:
+        """Archive expired working memories (persisted to the archived log)"""
+        self._check_writable()
+        return await super().archive_expired(limit)
+
+    def _persist_updates(self, memory_ids: List[int]) -> None:
+        """Append the current metadata / duplicate_count of records to the update log"""
+        updates = [_encode_update(self._storage[i]) for i in memory_ids if i in self._storage]
+        if not updates:
+            return
+        self._store.append_updates(updates)
+        for update in updates:
+            fields = dict(update)
+            self._record_updates[fields.pop("id")] = fields
+
+    async def increment_duplicate_count(self, memory_id: int, count: int = 1) -> None:
+        """Add count to a memory's duplicate_count (persisted to the update log)"""
+        self._check_writable()
+        await super().increment_duplicate_count(memory_id, count)
+        self._persist_updates([memory_id])
+
+    async def merge_memories(
+        self,
+        canonical_id: int,
+        duplicate_ids: List[int],
+        metadata: Dict[str, Any],
+        duplicate_count: int,
+    ) -> int:
+        """Merge duplicates (archive flags and updated fields are persisted)"""
+        self._check_writable()
+        canonical = self._storage.get(canonical_id)
+        if canonical is None or canonical.is_archived:
+            return 0
+        changed = [canonical_id] + [
+            i for i in duplicate_ids
+            if i != canonical_id and i in self._storage and not self._storage[i].is_archived
+        ]
+        archived = await super().merge_memories(
+            canonical_id, duplicate_ids, metadata, duplicate_count
+        )
+        self._persist_updates(changed)
+        return archived
+
+    def clear(self) -> None:
+        """Delete all stored memories and their segment files"""
+        self._check_writable()
+        self._store.reset()
+        super().clear()
+
+    def flush(self) -> None:
+        """fsync pending writes"""
+        self._store.flush()
+
+    def close(self) -> None:
+        """Flush and release segment files"""
+        self._store.close()
+
+    # ------------------------------------------------------------------
+    # Compaction
+
+    async def compact(self) -> Dict[str, int]:
+        """
+        Merge sealed segments in a worker thread, then reload row numbers.
+
+        Returns:
+            Compaction statistics from SegmentStore.compact()
+        """
+        self._check_writable()
+        stats = await asyncio.to_thread(self._store.compact)
+        if stats["segments_merged"]:
+            self._load(keep_cached=True)
+        return stats
+
+    def start_background_compaction(self, interval_seconds: float = 300.0) -> asyncio.Task:
+        """Compact periodically until stop_background_compaction()"""
+        self._check_writable()
+
+        async def run() -> None:
+            while True:
+                await asyncio.sleep(interval_seconds)
+                try:
+                    await self.compact()
+                except Exception as e:
+                    logger.warning(f"Segment compaction failed: {e}")
+
+        if self._compaction_task is None or self._compaction_task.done():
+            self._compaction_task = asyncio.create_task(run())
+        return self._compaction_task
+
+    async def stop_background_compaction(self) -> None:
+        """Cancel the background compaction task"""
+        task, self._compaction_task = self._compaction_task, None
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    def get_segment_stats(self) -> Dict[str, int]:
+        """Segment statistics plus live row count"""
+        return {**self._store.get_stats(), "live_rows": int(self._live_ids().size)}
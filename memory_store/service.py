@@ -4,13 +4,27 @@ Memory Store Service - Main Orchestration Layer
 Coordinates memory storage, embedding generation, and similarity search.
 """
 
+import asyncio
+import logging
 import time
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterable, List, Optional, Tuple, Union
 
+from .dedup import DuplicateKey, duplicate_key
 from .embedding import EmbeddingService
-from .models import MemoryCreate, MemoryResult, MemoryType, SourceType
-from .repository import MemoryRepository
+from .instrumentation import Instrumentation, elapsed_ms, get_default_instrumentation
+from .models import DedupMode, MemoryCreate, MemoryResult, MemoryType, SourceType
+from .repository import STREAM_CHUNK_SIZE, MemoryRepository, ReembeddableRepository
+from .timing import LatencySummary, PhaseTimings, collect_phases, phase
+
+# save_memories_bulk() input: a MemoryCreate or its dict form (e.g. a JSONL line)
+MemoryInput = Union[MemoryCreate, Dict[str, Any]]
+
+logger = logging.getLogger(__name__)
+
+# Errors of a query embedding searched against embeddings of another size
+# (pgvector / the in-process indexes): the model was cut over meanwhile
+_DIMENSION_MISMATCH_ERRORS = ("different vector dimensions", "Vectors must have same length")
 
 
 class MemoryStoreService:
@@ -27,6 +41,9 @@ class MemoryStoreService:
         embedding_service: EmbeddingService,
         working_memory_ttl_hours: int = 24,
         default_similarity_threshold: float = 0.7,
+        instrumentation: Optional[Instrumentation] = None,
+        next_embedding_service: Optional[EmbeddingService] = None,
+        embedding_state_ttl: float = 5.0,
     ) -> None:
         """
         Initialize Memory Store Service.
@@ -36,11 +53,29 @@ class MemoryStoreService:
             embedding_service: Embedding generation service
             working_memory_ttl_hours: TTL for working memories (default 24h)
             default_similarity_threshold: Default threshold for similarity search
+            instrumentation: Operation event sinks (default: process-wide logging sink)
+            next_embedding_service: Model a ReembeddingMigration (possibly run
+                by another worker) is moving to; used for dual writes and
+                dual reads while it runs and adopted after its cutover
+            embedding_state_ttl: Seconds between reads of the repository's
+                migration state
         """
         self.repository = repository
         self.embedding_service = embedding_service
+        self.next_embedding_service = next_embedding_service
+        # next_embedding_service while the repository reports a migration in
+        # progress: saves dual-write it, search_similar() reads both models
+        self.shadow_embedding_service: Optional[EmbeddingService] = None
+        self.embedding_state_ttl = embedding_state_ttl
+        # Repository embedding generation self.embedding_service matches
+        # (None until the first sync); the state is re-read after the TTL
+        self._embedding_generation: Optional[int] = None
+        self._embedding_state_read_at: Optional[float] = None
         self.working_memory_ttl_hours = working_memory_ttl_hours
         self.default_similarity_threshold = default_similarity_threshold
+        self.instrumentation = instrumentation or get_default_instrumentation()
+        self.latency = LatencySummary()
+        self._expiry_task: Optional[asyncio.Task] = None
 
     async def save_memory(
         self,
@@ -50,6 +85,7 @@ class MemoryStoreService:
         metadata: Optional[Dict[str, Any]] = None,
         expires_at: Optional[datetime] = None,
         user_id: Optional[str] = None,
+        dedup: DedupMode = DedupMode.NONE,
     ) -> int:
         """
         記憶を保存
@@ -61,41 +97,321 @@ class MemoryStoreService:
             metadata: メタデータ（JSONB）
             expires_at: 有効期限（Working Memory用、未指定時は24時間後）
             user_id: ユーザーID
+            dedup: 同一ユーザー・同一タイプ・同一内容の既存記憶がある場合の扱い
+                （REUSE_EMBEDDING: Embedding生成を省略して保存、
+                COUNT: 保存せず既存記憶の duplicate_count を加算してそのIDを返す）
 
         Returns:
-            memory_id: 保存された記憶のID
+            memory_id: 保存された（COUNT で重複した場合は既存の）記憶のID
         """
-        start_time = time.time()
+        start_time = time.perf_counter()
+        shadow_service = await self._refresh_embedding_state()
+
+        with collect_phases() as timings:
+            # Extract user_id from metadata if not provided directly
+            if user_id is None and metadata:
+                user_id = metadata.get("user_id")
+
+            duplicate = None
+            if dedup != DedupMode.NONE:
+                key = duplicate_key(content, memory_type.value, user_id)
+                with phase("dedup"):
+                    duplicate = (await self.repository.find_duplicates([key])).get(key)
+
+            if duplicate is not None and dedup == DedupMode.COUNT:
+                memory_id = duplicate[0]
+                with phase("db"):
+                    await self.repository.increment_duplicate_count(memory_id)
+            else:
+                shadow_embedding = None
+                with phase("embedding"):
+                    if duplicate is not None:
+                        embedding = duplicate[1]
+                        if shadow_service is not None:
+                            shadow_embedding = await shadow_service.generate_embedding(content)
+                    elif shadow_service is None:
+                        embedding = await self.embedding_service.generate_embedding(content)
+                    else:
+                        # Re-embedding in progress: dual-write the new model's embedding
+                        embedding, shadow_embedding = await asyncio.gather(
+                            self.embedding_service.generate_embedding(content),
+                            shadow_service.generate_embedding(content),
+                        )
+
+                # Set expiration for working memory
+                expires_at = self._resolve_expires_at(memory_type, expires_at)
+
+                # Save to repository
+                with phase("db"):
+                    memory_id = await self.repository.insert_memory(
+                        content=content,
+                        embedding=embedding,
+                        memory_type=memory_type.value,
+                        source_type=source_type.value if source_type else None,
+                        metadata=metadata or {},
+                        expires_at=expires_at,
+                        user_id=user_id,
+                    )
+                    if shadow_embedding is not None:
+                        await self._write_shadow_embeddings([(memory_id, shadow_embedding)])
 
-        # Generate embedding
-        embedding = await self.embedding_service.generate_embedding(content)
+        # Log the save operation
+        self._log_save(
+            memory_id, memory_type, source_type, elapsed_ms(start_time), timings,
+            deduplicated=duplicate is not None,
+        )
 
-        # Set expiration for working memory
-        if memory_type == MemoryType.WORKING and expires_at is None:
-            expires_at = datetime.now(timezone.utc) + timedelta(
-                hours=self.working_memory_ttl_hours
-            )
+        return memory_id
+
+    async def save_memories_bulk(
+        self,
+        items: Union[Iterable[MemoryInput], AsyncIterable[MemoryInput]],
+        batch_size: int = 500,
+        dedup: DedupMode = DedupMode.NONE,
+    ) -> List[int]:
+        """
+        記憶を一括保存
 
-        # Extract user_id from metadata if not provided directly
-        if user_id is None and metadata:
-            user_id = metadata.get("user_id")
+        batch_size件ごとにまとめてEmbeddingを生成し、リポジトリの
+        バルクINSERT（PostgreSQLではCOPY）で保存する。
+        非同期イテレータを渡せば、大きなJSONLダンプも一定メモリで取り込める。
 
-        # Save to repository
-        memory_id = await self.repository.insert_memory(
-            content=content,
-            embedding=embedding,
-            memory_type=memory_type.value,
-            source_type=source_type.value if source_type else None,
-            metadata=metadata or {},
-            expires_at=expires_at,
-            user_id=user_id,
+        Args:
+            items: MemoryCreate（またはその辞書）のイテラブル／非同期イテラブル
+            batch_size: 1バッチあたりの件数
+            dedup: 重複の扱い（save_memory と同じ。重複検索はバッチごとに1回、
+                COUNT ではバッチ内の重複も最初の1件にまとめる）
+
+        Returns:
+            保存された記憶IDのリスト（入力順。COUNT で重複した項目は既存のID）
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+
+        start_time = time.perf_counter()
+        memory_ids: List[int] = []
+        deduplicated = 0
+
+        with collect_phases() as timings:
+            async for batch in self._iter_batches(items, batch_size):
+                shadow_service = await self._refresh_embedding_state()
+                user_ids = []
+                for item in batch:
+                    user_id = item.user_id
+                    if user_id is None and item.metadata:
+                        user_id = item.metadata.get("user_id")
+                    user_ids.append(user_id)
+
+                keys: List[Optional[DuplicateKey]] = [None] * len(batch)
+                duplicates: Dict[DuplicateKey, Any] = {}
+                if dedup != DedupMode.NONE:
+                    keys = [
+                        duplicate_key(item.content, item.memory_type.value, user_id)
+                        for item, user_id in zip(batch, user_ids)
+                    ]
+                    with phase("dedup"):
+                        duplicates = await self.repository.find_duplicates(list(set(keys)))
+
+                # Positions that need a new row (COUNT folds repeats into the first)
+                insert_positions: List[int] = []
+                first_position: Dict[DuplicateKey, int] = {}
+                for position, key in enumerate(keys):
+                    if dedup == DedupMode.COUNT and (key in duplicates or key in first_position):
+                        continue
+                    if key is not None:
+                        first_position.setdefault(key, position)
+                    insert_positions.append(position)
+
+                to_embed = [p for p in insert_positions if keys[p] not in duplicates]
+                embeddings: Dict[int, List[float]] = {}
+                if to_embed:
+                    with phase("embedding"):
+                        generated = await self.embedding_service.generate_embeddings(
+                            [batch[p].content for p in to_embed]
+                        )
+                    embeddings = dict(zip(to_embed, generated))
+                shadow_embeddings: List[List[float]] = []
+                if shadow_service is not None and insert_positions:
+                    with phase("embedding"):
+                        shadow_embeddings = await shadow_service.generate_embeddings(
+                            [batch[p].content for p in insert_positions]
+                        )
+
+                rows = []
+                for position in insert_positions:
+                    item = batch[position]
+                    key = keys[position]
+                    rows.append({
+                        "content": item.content,
+                        "embedding": (
+                            embeddings[position] if position in embeddings else duplicates[key][1]
+                        ),
+                        "memory_type": item.memory_type.value,
+                        "source_type": item.source_type.value if item.source_type else None,
+                        "metadata": item.metadata,
+                        "expires_at": self._resolve_expires_at(item.memory_type, item.expires_at),
+                        "user_id": user_ids[position],
+                    })
+
+                with phase("db"):
+                    inserted = dict(
+                        zip(insert_positions, await self.repository.insert_memories_bulk(rows))
+                    )
+                    if shadow_embeddings:
+                        await self._write_shadow_embeddings([
+                            (inserted[p], embedding)
+                            for p, embedding in zip(insert_positions, shadow_embeddings)
+                        ])
+
+                    batch_ids: List[int] = []
+                    increments: Dict[int, int] = {}
+                    for position, key in enumerate(keys):
+                        if position in inserted:
+                            batch_ids.append(inserted[position])
+                            if key in duplicates:
+                                deduplicated += 1
+                            continue
+                        # COUNT: an existing row, or the row inserted for the key's first item
+                        if key in duplicates:
+                            memory_id = duplicates[key][0]
+                        else:
+                            memory_id = inserted[first_position[key]]
+                        increments[memory_id] = increments.get(memory_id, 0) + 1
+                        batch_ids.append(memory_id)
+                        deduplicated += 1
+                    for memory_id, count in increments.items():
+                        await self.repository.increment_duplicate_count(memory_id, count)
+                memory_ids.extend(batch_ids)
+
+        self._log_bulk_save(
+            len(memory_ids), elapsed_ms(start_time), timings, deduplicated=deduplicated
         )
 
-        # Log the save operation
-        processing_time_ms = (time.time() - start_time) * 1000
-        self._log_save(memory_id, memory_type, source_type, processing_time_ms)
+        return memory_ids
+
+    @staticmethod
+    async def _iter_batches(
+        items: Union[Iterable[MemoryInput], AsyncIterable[MemoryInput]],
+        batch_size: int,
+    ) -> AsyncIterator[List[MemoryCreate]]:
+        """Group (async) items into lists of MemoryCreate"""
+        batch: List[MemoryCreate] = []
+
+        async def _aiter() -> AsyncIterator[MemoryInput]:
+            if hasattr(items, "__aiter__"):
+                async for item in items:
+                    yield item
+            else:
+                for item in items:
+                    yield item
+
+        async for item in _aiter():
+            if not isinstance(item, MemoryCreate):
+                item = MemoryCreate.model_validate(item)
+            batch.append(item)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+
+        if batch:
+            yield batch
+
+    async def sync_embedding_state(self) -> None:
+        """
+        リポジトリの移行状態を読み、Embedding サービスを合わせる
 
-        return memory_id
+        移行中は next_embedding_service をシャドウとして使い、別ワーカーの
+        cutover で世代が進んでいれば next_embedding_service に切り替える。
+
+        Raises:
+            RuntimeError: 世代が進んだのに next_embedding_service が未設定
+        """
+        if not isinstance(self.repository, ReembeddableRepository):
+            return
+        state = await self.repository.reembedding_state()
+        generation = state["generation"]
+        if self._embedding_generation is None:
+            self._embedding_generation = generation
+        elif generation > self._embedding_generation:
+            if self.next_embedding_service is None:
+                raise RuntimeError(
+                    f"Embeddings were cut over to generation {generation}; "
+                    "configure next_embedding_service to keep serving"
+                )
+            self.embedding_service = self.next_embedding_service
+            self.next_embedding_service = None
+            self._embedding_generation = generation
+            logger.info(f"Switched to the embedding model of generation {generation}")
+
+        if state["migrating"] and self.next_embedding_service is None:
+            logger.warning(
+                "Re-embedding in progress without next_embedding_service: "
+                "new memories are left to the migration's backfill"
+            )
+        self.shadow_embedding_service = (
+            self.next_embedding_service if state["migrating"] else None
+        )
+        self._embedding_state_read_at = time.monotonic()
+
+    async def _refresh_embedding_state(self) -> Optional[EmbeddingService]:
+        """Re-read the migration state once the TTL has passed; returns the shadow service"""
+        if not isinstance(self.repository, ReembeddableRepository):
+            # A backend without shadow storage keeps single-model search
+            return None
+        read_at = self._embedding_state_read_at
+        if read_at is None or time.monotonic() - read_at >= self.embedding_state_ttl:
+            await self.sync_embedding_state()
+        return self.shadow_embedding_service
+
+    async def _resync_after_mismatch(self, error: Exception) -> bool:
+        """
+        Re-read the migration state at once after a dimension mismatch.
+
+        Returns:
+            True if the state changed, so the search is worth retrying
+        """
+        if not isinstance(self.repository, ReembeddableRepository):
+            return False
+        if not any(message in str(error) for message in _DIMENSION_MISMATCH_ERRORS):
+            return False
+        before = (self._embedding_generation, self.shadow_embedding_service)
+        await self.sync_embedding_state()
+        changed = (self._embedding_generation, self.shadow_embedding_service) != before
+        if changed:
+            logger.info(f"Embedding state changed under a search ({error}); retrying")
+        return changed
+
+    async def _query_embeddings(
+        self, query: str, shadow_service: Optional[EmbeddingService]
+    ) -> Tuple[List[float], Optional[List[float]]]:
+        """Query embedding, plus the shadow model's while a re-embedding runs"""
+        if shadow_service is None:
+            return await self.embedding_service.generate_embedding(query), None
+        query_embedding, shadow_query_embedding = await asyncio.gather(
+            self.embedding_service.generate_embedding(query),
+            shadow_service.generate_embedding(query),
+        )
+        return query_embedding, shadow_query_embedding
+
+    async def _write_shadow_embeddings(self, rows: List[Tuple[int, List[float]]]) -> None:
+        """Dual-write new-model embeddings of memories just saved"""
+        try:
+            await self.repository.write_shadow_embeddings(rows)
+        except Exception as e:
+            # The migration ended meanwhile: its cutover re-scans every memory
+            # before swapping and an abort drops the shadow anyway
+            logger.warning(f"Shadow embedding write skipped for {len(rows)} memories: {e}")
+            self._embedding_state_read_at = None
+
+    def _resolve_expires_at(
+        self,
+        memory_type: MemoryType,
+        expires_at: Optional[datetime],
+    ) -> Optional[datetime]:
+        """Working Memoryの有効期限（未指定時はTTL後）を決定"""
+        if memory_type == MemoryType.WORKING and expires_at is None:
+            return datetime.now(timezone.utc) + timedelta(hours=self.working_memory_ttl_hours)
+        return expires_at
 
     async def search_similar(
         self,
@@ -104,6 +420,7 @@ class MemoryStoreService:
         limit: int = 10,
         similarity_threshold: Optional[float] = None,
         include_archived: bool = False,
+        user_id: Optional[str] = None,
     ) -> List[MemoryResult]:
         """
         類似記憶検索（ベクトル検索）
@@ -114,41 +431,162 @@ class MemoryStoreService:
             limit: 最大返却数
             similarity_threshold: 類似度閾値（0.0-1.0）
             include_archived: アーカイブ済みも含むか
+            user_id: 指定時はそのユーザーの記憶のみを検索（未指定時は全ユーザー）
 
         Returns:
             List[MemoryResult]: 類似度順の記憶リスト
         """
-        start_time = time.time()
+        start_time = time.perf_counter()
 
         if similarity_threshold is None:
             similarity_threshold = self.default_similarity_threshold
 
+        shadow_service = await self._refresh_embedding_state()
+
+        with collect_phases() as timings:
+            try:
+                rows = await self._similar_rows(
+                    query, shadow_service, memory_type, limit,
+                    similarity_threshold, include_archived, user_id,
+                )
+            except Exception as e:
+                if not await self._resync_after_mismatch(e):
+                    raise
+                rows = await self._similar_rows(
+                    query, self.shadow_embedding_service, memory_type, limit,
+                    similarity_threshold, include_archived, user_id,
+                )
+
+            # Convert to MemoryResult
+            with phase("convert"):
+                results = [self._row_to_memory_result(row) for row in rows]
+
+        # Log search operation
+        self._log_search("similar", query, len(results), elapsed_ms(start_time), timings)
+
+        return results
+
+    async def _similar_rows(
+        self,
+        query: str,
+        shadow_service: Optional[EmbeddingService],
+        memory_type: Optional[MemoryType],
+        limit: int,
+        similarity_threshold: float,
+        include_archived: bool,
+        user_id: Optional[str],
+    ) -> List[Dict[str, Any]]:
         # Generate query embedding
-        query_embedding = await self.embedding_service.generate_embedding(query)
+        with phase("embedding"):
+            query_embedding, shadow_query_embedding = await self._query_embeddings(
+                query, shadow_service
+            )
 
         # Search in repository
-        rows = await self.repository.search_similar(
-            query_embedding=query_embedding,
-            memory_type=memory_type.value if memory_type else None,
-            limit=limit,
-            similarity_threshold=similarity_threshold,
-            include_archived=include_archived,
-        )
+        with phase("db"):
+            if shadow_query_embedding is None:
+                return await self.repository.search_similar(
+                    query_embedding=query_embedding,
+                    memory_type=memory_type.value if memory_type else None,
+                    limit=limit,
+                    similarity_threshold=similarity_threshold,
+                    include_archived=include_archived,
+                    user_id=user_id,
+                )
+            # Re-embedding in progress: migrated memories are scored in the
+            # new model's space
+            return await self.repository.search_similar_dual(
+                query_embedding=query_embedding,
+                shadow_query_embedding=shadow_query_embedding,
+                memory_type=memory_type.value if memory_type else None,
+                limit=limit,
+                similarity_threshold=similarity_threshold,
+                include_archived=include_archived,
+                user_id=user_id,
+            )
+
+    async def stream_similar(
+        self,
+        query: str,
+        memory_type: Optional[MemoryType] = None,
+        similarity_threshold: Optional[float] = None,
+        include_archived: bool = False,
+        limit: Optional[int] = None,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+        user_id: Optional[str] = None,
+    ) -> AsyncIterator[MemoryResult]:
+        """
+        類似記憶のストリーミング検索（エクスポート・分析用）
 
-        # Convert to MemoryResult
-        results = [self._row_to_memory_result(row) for row in rows]
+        search_similar と同じ類似度順で、件数上限なしに結果を逐次返す。
+        リポジトリは chunk_size 件ずつ読み出す（PostgreSQL ではサーバー側
+        カーソル）ため、消費側が遅ければ読み出しも待つ。
 
-        # Log search operation
-        processing_time_ms = (time.time() - start_time) * 1000
-        self._log_search("similar", query, len(results), processing_time_ms)
+        Args:
+            query: 検索クエリ
+            memory_type: フィルタ（working/longterm）
+            similarity_threshold: 類似度閾値（未指定時はデフォルト）
+            include_archived: アーカイブ済みも含むか
+            limit: 最大件数（None = 全件）
+            chunk_size: 1回に読み出す件数
+            user_id: 指定時はそのユーザーの記憶のみ
 
-        return results
+        Yields:
+            MemoryResult: 類似度順の記憶
+        """
+        start_time = time.perf_counter()
+
+        if similarity_threshold is None:
+            similarity_threshold = self.default_similarity_threshold
+
+        shadow_service = await self._refresh_embedding_state()
+        embedding_ms = 0.0
+        count = 0
+        try:
+            for attempt in range(2):
+                embedding_start = time.perf_counter()
+                query_embedding, shadow_query_embedding = await self._query_embeddings(
+                    query, shadow_service
+                )
+                embedding_ms += elapsed_ms(embedding_start)
+                search = dict(
+                    query_embedding=query_embedding,
+                    memory_type=memory_type.value if memory_type else None,
+                    similarity_threshold=similarity_threshold,
+                    include_archived=include_archived,
+                    limit=limit,
+                    chunk_size=chunk_size,
+                    user_id=user_id,
+                )
+                if shadow_query_embedding is None:
+                    rows = self.repository.stream_similar(**search)
+                else:
+                    rows = self.repository.stream_similar_dual(
+                        shadow_query_embedding=shadow_query_embedding, **search
+                    )
+                try:
+                    async for row in rows:
+                        count += 1
+                        yield self._row_to_memory_result(row)
+                    break
+                except Exception as e:
+                    # Rows already yielded cannot be taken back
+                    if count or attempt or not await self._resync_after_mismatch(e):
+                        raise
+                    shadow_service = self.shadow_embedding_service
+        finally:
+            latency_ms = elapsed_ms(start_time)
+            self.latency.record("stream_similar", latency_ms)
+            self.instrumentation.record(
+                "stream_similar", latency_ms, count, embedding_ms=embedding_ms
+            )
 
     async def search_hybrid(
         self,
         query: str,
         filters: Dict[str, Any],
         limit: int = 10,
+        user_id: Optional[str] = None,
     ) -> List[MemoryResult]:
         """
         ハイブリッド検索（ベクトル + メタデータフィルタ）
@@ -158,31 +596,65 @@ class MemoryStoreService:
             filters: メタデータフィルタ条件
                 例: {"tags": ["important"], "source_type": "decision"}
             limit: 最大返却数
+            user_id: 指定時はそのユーザーの記憶のみを検索（filters["user_id"] と同じ）
 
         Returns:
             List[MemoryResult]: フィルタ適用後の類似記憶リスト
         """
-        start_time = time.time()
+        start_time = time.perf_counter()
 
-        # Generate query embedding
-        query_embedding = await self.embedding_service.generate_embedding(query)
+        if user_id is not None:
+            filters = {**filters, "user_id": user_id}
 
-        # Search with filters
-        rows = await self.repository.search_hybrid(
-            query_embedding=query_embedding,
-            filters=filters,
-            limit=limit,
-        )
+        shadow_service = await self._refresh_embedding_state()
+
+        with collect_phases() as timings:
+            try:
+                rows = await self._hybrid_rows(query, shadow_service, filters, limit)
+            except Exception as e:
+                if not await self._resync_after_mismatch(e):
+                    raise
+                rows = await self._hybrid_rows(
+                    query, self.shadow_embedding_service, filters, limit
+                )
 
-        # Convert to MemoryResult
-        results = [self._row_to_memory_result(row) for row in rows]
+            # Convert to MemoryResult
+            with phase("convert"):
+                results = [self._row_to_memory_result(row) for row in rows]
 
         # Log search operation
-        processing_time_ms = (time.time() - start_time) * 1000
-        self._log_search("hybrid", query, len(results), processing_time_ms)
+        self._log_search("hybrid", query, len(results), elapsed_ms(start_time), timings)
 
         return results
 
+    async def _hybrid_rows(
+        self,
+        query: str,
+        shadow_service: Optional[EmbeddingService],
+        filters: Dict[str, Any],
+        limit: int,
+    ) -> List[Dict[str, Any]]:
+        # Generate query embedding
+        with phase("embedding"):
+            query_embedding, shadow_query_embedding = await self._query_embeddings(
+                query, shadow_service
+            )
+
+        # Search with filters
+        with phase("db"):
+            if shadow_query_embedding is None:
+                return await self.repository.search_hybrid(
+                    query_embedding=query_embedding,
+                    filters=filters,
+                    limit=limit,
+                )
+            return await self.repository.search_hybrid_dual(
+                query_embedding=query_embedding,
+                shadow_query_embedding=shadow_query_embedding,
+                filters=filters,
+                limit=limit,
+            )
+
     async def get_memory(self, memory_id: int) -> Optional[MemoryResult]:
         """
         IDで記憶を取得
@@ -207,17 +679,72 @@ class MemoryStoreService:
             created_at=record.created_at,
         )
 
-    async def cleanup_expired_working_memory(self) -> int:
+    async def cleanup_expired_working_memory(self, batch_size: Optional[int] = None) -> int:
         """
         有効期限切れのWorking Memoryをアーカイブ
 
+        Args:
+            batch_size: 1回の archive_expired で処理する上限（未指定時は一括）。
+                バッチ間でイベントループに制御を返す
+
         Returns:
             アーカイブされた記憶の数
         """
-        count = await self.repository.archive_expired()
-        print(f"Archived {count} expired working memories")
+        start_time = time.perf_counter()
+        if batch_size is None:
+            count = await self.repository.archive_expired()
+        else:
+            count = 0
+            while True:
+                archived = await self.repository.archive_expired(limit=batch_size)
+                count += archived
+                if archived < batch_size:
+                    break
+                await asyncio.sleep(0)
+
+        latency_ms = elapsed_ms(start_time)
+        self.latency.record("archive_expired", latency_ms)
+        self.instrumentation.record("archive_expired", latency_ms, count, db_ms=latency_ms)
         return count
 
+    def start_expiry_task(
+        self,
+        interval_seconds: float = 60.0,
+        batch_size: int = 500,
+    ) -> asyncio.Task:
+        """
+        期限切れWorking Memoryを定期的にアーカイブするバックグラウンドタスクを開始
+
+        Args:
+            interval_seconds: 実行間隔（秒）
+            batch_size: 1バッチあたりのアーカイブ上限
+
+        Returns:
+            asyncio.Task（stop_expiry_task で停止）
+        """
+        async def run() -> None:
+            while True:
+                try:
+                    await self.cleanup_expired_working_memory(batch_size=batch_size)
+                except Exception as e:
+                    logger.warning(f"Expiry task failed: {e}")
+                await asyncio.sleep(interval_seconds)
+
+        if self._expiry_task is None or self._expiry_task.done():
+            self._expiry_task = asyncio.create_task(run())
+        return self._expiry_task
+
+    async def stop_expiry_task(self) -> None:
+        """バックグラウンドのアーカイブタスクを停止"""
+        task, self._expiry_task = self._expiry_task, None
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
     async def get_memory_stats(self) -> Dict[str, Any]:
         """
         メモリ統計情報を取得
@@ -225,8 +752,9 @@ class MemoryStoreService:
         Returns:
             統計情報の辞書
         """
-        working_count = await self.repository.count_by_type(MemoryType.WORKING.value)
-        longterm_count = await self.repository.count_by_type(MemoryType.LONGTERM.value)
+        counts = await self.repository.get_type_counts()
+        working_count = counts.get(MemoryType.WORKING.value, 0)
+        longterm_count = counts.get(MemoryType.LONGTERM.value, 0)
 
         return {
             "working_memory_count": working_count,
@@ -261,16 +789,45 @@ class MemoryStoreService:
         memory_type: MemoryType,
         source_type: Optional[SourceType],
         processing_time_ms: float,
+        timings: PhaseTimings,
+        deduplicated: bool = False,
     ) -> None:
-        """Log memory save operation"""
-        print(
-            f"""
-        Memory Store Save:
-          Memory ID: {memory_id}
-          Type: {memory_type.value}
-          Source: {source_type.value if source_type else 'None'}
-          Processing Time: {processing_time_ms:.2f}ms
-        """
+        """Record memory save operation"""
+        self.latency.record("save", processing_time_ms, timings)
+        if not self.instrumentation.enabled:
+            return
+        self.instrumentation.record(
+            "save",
+            processing_time_ms,
+            1,
+            embedding_ms=timings.get("embedding"),
+            db_ms=timings.get("db"),
+            phases=timings.as_dict(),
+            memory_id=memory_id,
+            memory_type=memory_type.value,
+            source_type=source_type.value if source_type else None,
+            deduplicated=deduplicated,
+        )
+
+    def _log_bulk_save(
+        self,
+        count: int,
+        processing_time_ms: float,
+        timings: PhaseTimings,
+        deduplicated: int = 0,
+    ) -> None:
+        """Record bulk memory save operation"""
+        self.latency.record("bulk_save", processing_time_ms, timings)
+        if not self.instrumentation.enabled:
+            return
+        self.instrumentation.record(
+            "bulk_save",
+            processing_time_ms,
+            count,
+            embedding_ms=timings.get("embedding"),
+            db_ms=timings.get("db"),
+            phases=timings.as_dict(),
+            deduplicated=deduplicated,
         )
 
     def _log_search(
@@ -279,14 +836,31 @@ class MemoryStoreService:
         query: str,
         result_count: int,
         processing_time_ms: float,
+        timings: PhaseTimings,
     ) -> None:
-        """Log memory search operation"""
+        """Record memory search operation"""
+        operation = f"search_{search_type}"
+        self.latency.record(operation, processing_time_ms, timings)
+        if not self.instrumentation.enabled:
+            return
         query_preview = query[:50] + "..." if len(query) > 50 else query
-        print(
-            f"""
-        Memory Store Search ({search_type}):
-          Query: {query_preview}
-          Results: {result_count}
-          Processing Time: {processing_time_ms:.2f}ms
-        """
+        self.instrumentation.record(
+            operation,
+            processing_time_ms,
+            result_count,
+            embedding_ms=timings.get("embedding"),
+            db_ms=timings.get("db"),
+            phases=timings.as_dict(),
+            query=query_preview,
         )
+
+    def get_latency_summary(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """
+        操作・フェーズ別レイテンシのパーセンタイル
+
+        Returns:
+            {操作: {フェーズ: {count, p50, p90, p95, p99}}}
+            フェーズは total / embedding / embed_cache / embed / db /
+            acquire / query / decode / convert（リポジトリにより異なる）
+        """
+        return self.latency.summary()
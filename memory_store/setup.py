@@ -8,6 +8,7 @@ setup(
         "asyncpg>=0.30.0",
         "pydantic>=2.7.0",
         "pgvector>=0.2.0",
+        "numpy>=1.26.0",
     ],
     python_requires=">=3.11",
 )
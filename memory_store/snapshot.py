@@ -0,0 +1,691 @@
+"""
+Snapshot - Columnar Backup and Restore
+
+Exports memories (and, with a database pool, the semantic_memories and
+session_summaries tables) for one user or the whole system into a single
+compact file, and bulk-loads it back:
+
+    snapshot = MemorySnapshot(service, pool=pool)
+    await snapshot.export("backup.rms", user_id="u1")
+    await snapshot.restore("backup.rms")          # verifies checksums first
+
+File layout (little-endian):
+
+    magic "RMSNAP\\0\\1" | u32 header length | JSON header
+    frame*                kind (1 byte), u32 table, u32 crc32, u64 length, payload
+      T frame             JSON table schema: name, [(column, type)], vector column
+      D frame             zlib( u32 length | JSON {rows, dimensions, columns, vector_nulls}
+                                | byte-shuffled float32 vectors )
+      E frame             JSON {tables: {name: rows}, sha256 of every byte before it}
+
+Each chunk stores its scalar columns as JSON lists and its vectors as one
+raw float32 block; the four byte planes of the floats are stored apart
+(exponent bytes compress far better than mantissa bytes). Every frame is
+CRC-checked on read and the trailer's SHA-256 covers the whole file, so
+truncation and corruption are reported instead of restored.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import struct
+import time
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+import numpy as np
+
+from .instrumentation import elapsed_ms
+from .repository import SNAPSHOT_FIELDS, RestorableRepository
+from .service import MemoryStoreService
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"RMSNAP\x00\x01"
+FORMAT_VERSION = 1
+
+_LENGTH = struct.Struct("<I")
+_FRAME = struct.Struct("<cIIQ")  # kind, table number, crc32 of payload, payload length
+_TABLE_FRAME = b"T"
+_DATA_FRAME = b"D"
+_END_FRAME = b"E"
+_VECTOR_DTYPE = np.dtype("<f4")
+
+# Column types of the snapshot format
+COLUMN_TYPES = ("int", "float", "bool", "text", "json", "timestamp", "uuid", "array")
+
+MEMORY_TABLE = "memories"
+_MEMORY_COLUMN_TYPES = {
+    "id": "int",
+    "metadata": "json",
+    "created_at": "timestamp",
+    "updated_at": "timestamp",
+    "expires_at": "timestamp",
+    "is_archived": "bool",
+    "duplicate_count": "int",
+}
+# Columns of the memories table, in export_memory_batch() field order
+MEMORY_COLUMNS: Dict[str, str] = {
+    name: _MEMORY_COLUMN_TYPES.get(name, "text") for name in SNAPSHOT_FIELDS
+}
+
+# PostgreSQL tables copied as-is when a pool is given: (table, vector column)
+POSTGRES_TABLES: Tuple[Tuple[str, Optional[str]], ...] = (
+    ("semantic_memories", "embedding"),
+    ("session_summaries", None),
+)
+
+
+class SnapshotError(Exception):
+    """Snapshot file is corrupt, truncated or incompatible"""
+    pass
+
+
+@dataclass(frozen=True)
+class SnapshotTable:
+    """Schema of one table in a snapshot"""
+    name: str
+    columns: Tuple[Tuple[str, str], ...]  # (column, type)
+    vector_column: Optional[str] = None
+
+
+# ----------------------------------------------------------------------
+# Column and vector encoding
+
+def _encode_value(kind: str, value: Any) -> Any:
+    if value is None:
+        return None
+    if kind == "timestamp":
+        return value.isoformat()
+    if kind == "uuid":
+        return str(value)
+    if kind == "json" and isinstance(value, str):
+        # asyncpg returns json / jsonb as text
+        return json.loads(value)
+    if kind == "array":
+        return list(value)
+    return value
+
+
+def _decode_value(kind: str, value: Any) -> Any:
+    if value is None:
+        return None
+    if kind == "timestamp":
+        return datetime.fromisoformat(value)
+    if kind == "uuid":
+        return UUID(value)
+    return value
+
+
+def _shuffle(vectors: np.ndarray) -> bytes:
+    """float32 rows as four byte planes (byte 0 of every value, then byte 1, ...)"""
+    raw = np.ascontiguousarray(vectors, dtype=_VECTOR_DTYPE).view(np.uint8)
+    return raw.reshape(-1, _VECTOR_DTYPE.itemsize).T.tobytes()
+
+
+def _unshuffle(data: bytes, rows: int, dimensions: int) -> np.ndarray:
+    planes = np.frombuffer(data, dtype=np.uint8).reshape(_VECTOR_DTYPE.itemsize, -1)
+    return np.ascontiguousarray(planes.T).view(_VECTOR_DTYPE).reshape(rows, dimensions)
+
+
+# ----------------------------------------------------------------------
+# File format
+
+class SnapshotWriter:
+    """
+    Streams tables into a snapshot file.
+
+    The file is written as <path>.tmp and renamed on close(), so an
+    interrupted export never leaves a partial file at path.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        compression_level: int = 6,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """
+        Args:
+            path: Snapshot file to create (replaced if it exists)
+            compression_level: zlib level (0 = store, 1 = fastest, 9 = smallest)
+            metadata: Extra JSON fields for the header
+        """
+        self.path = path
+        self.compression_level = compression_level
+        self._tmp_path = f"{path}.tmp"
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._file: Optional[BinaryIO] = open(self._tmp_path, "wb")
+        self._digest = hashlib.sha256()
+        self._tables: List[SnapshotTable] = []
+        self._rows: List[int] = []
+        self.bytes_written = 0
+
+        header = json.dumps({
+            "format_version": FORMAT_VERSION,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "compression": "zlib",
+            **(metadata or {}),
+        }).encode("utf-8")
+        self._write(MAGIC + _LENGTH.pack(len(header)) + header)
+
+    def _write(self, data: bytes) -> None:
+        self._file.write(data)
+        self._digest.update(data)
+        self.bytes_written += len(data)
+
+    def _write_frame(self, kind: bytes, table: int, payload: bytes) -> None:
+        self._write(_FRAME.pack(kind, table, zlib.crc32(payload), len(payload)) + payload)
+
+    def add_table(
+        self,
+        name: str,
+        columns: Dict[str, str],
+        vector_column: Optional[str] = None,
+    ) -> int:
+        """
+        Declare a table.
+
+        Args:
+            name: Table name
+            columns: Scalar column name -> type (COLUMN_TYPES)
+            vector_column: Name of the float vector column, if any
+
+        Returns:
+            Table number for write_chunk()
+        """
+        unknown = set(columns.values()) - set(COLUMN_TYPES)
+        if unknown:
+            raise SnapshotError(f"Unsupported column types for {name}: {sorted(unknown)}")
+        table = SnapshotTable(name, tuple(columns.items()), vector_column)
+        self._write_frame(_TABLE_FRAME, len(self._tables), json.dumps({
+            "name": table.name,
+            "columns": [list(column) for column in table.columns],
+            "vector_column": table.vector_column,
+        }).encode("utf-8"))
+        self._tables.append(table)
+        self._rows.append(0)
+        return len(self._tables) - 1
+
+    def write_chunk(
+        self,
+        table: int,
+        rows: List[Dict[str, Any]],
+        vectors: Optional[np.ndarray] = None,
+    ) -> None:
+        """
+        Append one chunk of rows.
+
+        Args:
+            table: Number returned by add_table()
+            rows: Row dicts with the table's scalar columns
+            vectors: (rows, dimensions) matrix for the vector column; rows
+                whose vector is missing are listed as nulls (all-NaN rows)
+        """
+        if not rows:
+            return
+        schema = self._tables[table]
+        columns = {
+            name: [_encode_value(kind, row.get(name)) for row in rows]
+            for name, kind in schema.columns
+        }
+
+        dimensions = 0
+        vector_nulls: List[int] = []
+        block = b""
+        if schema.vector_column is not None:
+            vectors = np.asarray(vectors, dtype=_VECTOR_DTYPE).reshape(len(rows), -1)
+            dimensions = vectors.shape[1]
+            vector_nulls = np.flatnonzero(np.isnan(vectors).all(axis=1)).tolist() if dimensions else []
+            block = _shuffle(vectors)
+
+        body = json.dumps({
+            "rows": len(rows),
+            "dimensions": dimensions,
+            "columns": columns,
+            "vector_nulls": vector_nulls,
+        }, ensure_ascii=False).encode("utf-8")
+        payload = zlib.compress(_LENGTH.pack(len(body)) + body + block, self.compression_level)
+        self._write_frame(_DATA_FRAME, table, payload)
+        self._rows[table] += len(rows)
+
+    def close(self) -> Dict[str, int]:
+        """
+        Write the trailer and move the file into place.
+
+        Returns:
+            Rows written per table
+        """
+        counts = {table.name: rows for table, rows in zip(self._tables, self._rows)}
+        trailer = json.dumps({"tables": counts, "sha256": self._digest.hexdigest()}).encode("utf-8")
+        self._write_frame(_END_FRAME, 0, trailer)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        self._file = None
+        os.replace(self._tmp_path, self.path)
+        return counts
+
+    def abort(self) -> None:
+        """Discard the partial file"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+    def __enter__(self) -> "SnapshotWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            self.abort()
+        elif self._file is not None:
+            self.close()
+
+
+class SnapshotReader:
+    """
+    Reads a snapshot file chunk by chunk.
+
+    Each frame's CRC is checked as it is read; the trailer's SHA-256 and
+    row counts are checked when iteration reaches the end, so a chunk is
+    only known-good on its own until then (see verify()).
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Args:
+            path: Snapshot file
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            prefix = f.read(len(MAGIC) + _LENGTH.size)
+            if len(prefix) < len(MAGIC) + _LENGTH.size or prefix[:len(MAGIC)] != MAGIC:
+                raise SnapshotError(f"{path} is not a memory snapshot")
+            (length,) = _LENGTH.unpack_from(prefix, len(MAGIC))
+            raw_header = f.read(length)
+        if len(raw_header) < length:
+            raise SnapshotError(f"{path} is truncated")
+        self.header: Dict[str, Any] = json.loads(raw_header)
+        if self.header.get("format_version") != FORMAT_VERSION:
+            raise SnapshotError(f"Unsupported snapshot format {self.header.get('format_version')}")
+        self._header_bytes = prefix + raw_header
+
+    def _read_exact(self, f: BinaryIO, size: int, digest: Any) -> bytes:
+        data = f.read(size)
+        if len(data) < size:
+            raise SnapshotError(f"{self.path} is truncated")
+        digest.update(data)
+        return data
+
+    def chunks(self) -> Iterator[Tuple[SnapshotTable, List[Dict[str, Any]], Optional[np.ndarray]]]:
+        """
+        Yield (table, rows, vectors) per chunk in file order.
+
+        vectors is None for tables without a vector column; rows listed as
+        vector nulls have all-NaN vectors.
+
+        Raises:
+            SnapshotError: On a checksum mismatch or a truncated file
+        """
+        digest = hashlib.sha256(self._header_bytes)
+        tables: List[SnapshotTable] = []
+        counts: Dict[str, int] = {}
+
+        with open(self.path, "rb") as f:
+            f.seek(len(self._header_bytes))
+            while True:
+                file_digest = digest.hexdigest()
+                kind, table_number, crc, length = _FRAME.unpack(self._read_exact(f, _FRAME.size, digest))
+                payload = self._read_exact(f, length, digest)
+                if zlib.crc32(payload) != crc:
+                    raise SnapshotError(f"{self.path}: checksum mismatch in a {kind.decode()} frame")
+
+                if kind == _TABLE_FRAME:
+                    schema = json.loads(payload)
+                    table = SnapshotTable(
+                        schema["name"],
+                        tuple((name, column_type) for name, column_type in schema["columns"]),
+                        schema["vector_column"],
+                    )
+                    tables.append(table)
+                    counts[table.name] = 0
+                elif kind == _DATA_FRAME:
+                    table = tables[table_number]
+                    rows, vectors = self._decode_chunk(table, zlib.decompress(payload))
+                    counts[table.name] += len(rows)
+                    yield table, rows, vectors
+                elif kind == _END_FRAME:
+                    trailer = json.loads(payload)
+                    if trailer["sha256"] != file_digest:
+                        raise SnapshotError(f"{self.path}: SHA-256 mismatch")
+                    if trailer["tables"] != counts:
+                        raise SnapshotError(f"{self.path}: row counts {counts} != {trailer['tables']}")
+                    if f.read(1):
+                        raise SnapshotError(f"{self.path}: unexpected data after the trailer")
+                    return
+                else:
+                    raise SnapshotError(f"{self.path}: unknown frame {kind!r}")
+
+    @staticmethod
+    def _decode_chunk(
+        table: SnapshotTable, data: bytes
+    ) -> Tuple[List[Dict[str, Any]], Optional[np.ndarray]]:
+        (length,) = _LENGTH.unpack_from(data)
+        body = json.loads(data[_LENGTH.size:_LENGTH.size + length])
+        count = body["rows"]
+        columns = body["columns"]
+        rows = [
+            {name: _decode_value(kind, columns[name][i]) for name, kind in table.columns}
+            for i in range(count)
+        ]
+        if table.vector_column is None:
+            return rows, None
+        vectors = _unshuffle(data[_LENGTH.size + length:], count, body["dimensions"])
+        if body["vector_nulls"]:
+            vectors = vectors.copy()
+            vectors[body["vector_nulls"]] = np.nan
+        return rows, vectors
+
+    def verify(self) -> Dict[str, Any]:
+        """
+        Read the whole file and check every checksum.
+
+        Returns:
+            {"tables": {name: rows}, "bytes": file size, "header": header}
+        """
+        counts: Dict[str, int] = {}
+        for table, rows, _ in self.chunks():
+            counts[table.name] = counts.get(table.name, 0) + len(rows)
+        return {"tables": counts, "bytes": os.path.getsize(self.path), "header": self.header}
+
+
+# ----------------------------------------------------------------------
+# PostgreSQL tables
+
+_POSTGRES_TYPES = {
+    "smallint": "int", "integer": "int", "bigint": "int",
+    "real": "float", "double precision": "float", "numeric": "float",
+    "boolean": "bool",
+    "text": "text", "character varying": "text", "character": "text",
+    "json": "json", "jsonb": "json",
+    "timestamp with time zone": "timestamp", "timestamp without time zone": "timestamp",
+    "date": "timestamp",
+    "uuid": "uuid",
+    "ARRAY": "array",
+}
+
+
+async def _postgres_columns(conn: Any, table: str) -> List[Tuple[str, str]]:
+    """(column, data type) of a table in the current schema; [] if it does not exist"""
+    rows = await conn.fetch(
+        """
+        SELECT column_name, data_type, udt_name
+        FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = $1
+        ORDER BY ordinal_position
+        """,
+        table,
+    )
+    return [
+        (row["column_name"], "vector" if row["udt_name"] == "vector" else row["data_type"])
+        for row in rows
+    ]
+
+
+# ----------------------------------------------------------------------
+# Export / restore
+
+class MemorySnapshot:
+    """
+    記憶ストアのスナップショット（エクスポート / リストア）
+
+    記憶を id 順にバッチで読み出し、列指向・圧縮・チェックサム付きの
+    1ファイルにストリーミングで書き出す。リストアはチャンク単位で
+    リポジトリの一括ロード（PostgreSQL では COPY）を使う。
+    """
+
+    def __init__(
+        self,
+        service: MemoryStoreService,
+        pool: Optional[Any] = None,
+        batch_size: int = 5000,
+        compression_level: int = 6,
+        postgres_tables: Sequence[Tuple[str, Optional[str]]] = POSTGRES_TABLES,
+    ) -> None:
+        """
+        Args:
+            service: 対象の MemoryStoreService
+            pool: asyncpg プール（指定時は postgres_tables も対象にする）
+            batch_size: 1チャンクの行数
+            compression_level: zlib 圧縮レベル（1 = 高速、9 = 最小）
+            postgres_tables: pool 経由でそのまま複製するテーブルと vector 列
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        self.service = service
+        self.pool = pool
+        self.batch_size = batch_size
+        self.compression_level = compression_level
+        self.postgres_tables = tuple(postgres_tables)
+
+    async def export(self, path: str, user_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        スナップショットを書き出す
+
+        Args:
+            path: 出力ファイル（完了時に置き換え）
+            user_id: 指定時はそのユーザーのデータのみ
+
+        Returns:
+            {"path", "tables": {name: rows}, "bytes", "elapsed_ms"}
+        """
+        start_time = time.perf_counter()
+        writer = SnapshotWriter(
+            path, self.compression_level, metadata={"user_id": user_id}
+        )
+        try:
+            await self._export_memories(writer, user_id)
+            if self.pool is not None:
+                for table, vector_column in self.postgres_tables:
+                    await self._export_postgres_table(writer, table, vector_column, user_id)
+            counts = await asyncio.to_thread(writer.close)
+        except BaseException:
+            writer.abort()
+            raise
+
+        latency_ms = elapsed_ms(start_time)
+        self.service.instrumentation.record(
+            "snapshot_export", latency_ms, sum(counts.values()), bytes=writer.bytes_written
+        )
+        logger.info(f"Snapshot {path}: {counts}, {writer.bytes_written} bytes")
+        return {
+            "path": path,
+            "tables": counts,
+            "bytes": writer.bytes_written,
+            "elapsed_ms": round(latency_ms, 2),
+        }
+
+    async def _export_memories(self, writer: SnapshotWriter, user_id: Optional[str]) -> None:
+        repository = self.service.repository
+        table = writer.add_table(MEMORY_TABLE, MEMORY_COLUMNS, vector_column="embedding")
+        after_id = 0
+        while True:
+            rows, embeddings = await repository.export_memory_batch(after_id, self.batch_size, user_id)
+            if not rows:
+                return
+            await asyncio.to_thread(writer.write_chunk, table, rows, embeddings)
+            after_id = rows[-1]["id"]
+
+    async def _export_postgres_table(
+        self,
+        writer: SnapshotWriter,
+        table_name: str,
+        vector_column: Optional[str],
+        user_id: Optional[str],
+    ) -> None:
+        async with self.pool.acquire() as conn:
+            columns = await _postgres_columns(conn, table_name)
+            if not columns:
+                logger.info(f"Snapshot: table {table_name} not found, skipped")
+                return
+            scalar = {}
+            for name, data_type in columns:
+                if name == vector_column:
+                    continue
+                if data_type not in _POSTGRES_TYPES:
+                    raise SnapshotError(f"Unsupported type {data_type} for {table_name}.{name}")
+                scalar[name] = _POSTGRES_TYPES[data_type]
+            table = writer.add_table(table_name, scalar, vector_column)
+
+            # Keyset pages by primary key id
+            conditions = [] if user_id is None else ["user_id = $2"]
+            last_key = None
+            while True:
+                params: List[Any] = [self.batch_size]
+                if user_id is not None:
+                    params.append(user_id)
+                page_conditions = list(conditions)
+                if last_key is not None:
+                    params.append(last_key)
+                    page_conditions.append(f"id > ${len(params)}")
+                where = f"WHERE {' AND '.join(page_conditions)}" if page_conditions else ""
+                rows = await conn.fetch(
+                    f"SELECT * FROM {table_name} {where} ORDER BY id LIMIT $1", *params
+                )
+                if not rows:
+                    return
+                vectors = None
+                if vector_column is not None:
+                    vectors = _vector_matrix([row[vector_column] for row in rows])
+                await asyncio.to_thread(writer.write_chunk, table, [dict(row) for row in rows], vectors)
+                last_key = rows[-1]["id"]
+
+    async def restore(
+        self,
+        path: str,
+        preserve_ids: bool = True,
+        verify: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        スナップショットを一括ロード
+
+        Args:
+            path: スナップショットファイル
+            preserve_ids: 記憶の id を保持する（False = 新しい id を採番）
+            verify: ロード前にファイル全体のチェックサムを検証する
+                （False でもチャンクごとの CRC は検証される）
+
+        Returns:
+            {"path", "tables": {name: restored rows}, "elapsed_ms"}
+        """
+        if not isinstance(self.service.repository, RestorableRepository):
+            raise TypeError(f"{type(self.service.repository).__name__} is not a RestorableRepository")
+        start_time = time.perf_counter()
+        reader = SnapshotReader(path)
+        if verify:
+            await asyncio.to_thread(reader.verify)
+
+        restored: Dict[str, int] = {}
+        target_columns: Dict[str, List[str]] = {}
+        chunks = reader.chunks()
+        while True:
+            chunk = await asyncio.to_thread(next, chunks, None)
+            if chunk is None:
+                break
+            table, rows, vectors = chunk
+            if table.name == MEMORY_TABLE:
+                ids = await self.service.repository.restore_memory_batch(rows, vectors, preserve_ids)
+                count = len(ids)
+            elif self.pool is not None:
+                count = await self._restore_postgres_chunk(table, rows, vectors, target_columns)
+            else:
+                logger.warning(f"Snapshot: no pool to restore {table.name}, skipped")
+                count = 0
+            restored[table.name] = restored.get(table.name, 0) + count
+
+        latency_ms = elapsed_ms(start_time)
+        self.service.instrumentation.record(
+            "snapshot_restore", latency_ms, sum(restored.values())
+        )
+        logger.info(f"Restored snapshot {path}: {restored}")
+        return {"path": path, "tables": restored, "elapsed_ms": round(latency_ms, 2)}
+
+    async def _restore_postgres_chunk(
+        self,
+        table: SnapshotTable,
+        rows: List[Dict[str, Any]],
+        vectors: Optional[np.ndarray],
+        target_columns: Dict[str, List[str]],
+    ) -> int:
+        """COPY a chunk into a staging table, then insert rows whose key is new"""
+        kinds = dict(table.columns)
+        async with self.pool.acquire() as conn:
+            if table.name not in target_columns:
+                existing = {name for name, _ in await _postgres_columns(conn, table.name)}
+                snapshot_columns = [name for name, _ in table.columns]
+                if table.vector_column is not None:
+                    snapshot_columns.append(table.vector_column)
+                target_columns[table.name] = [c for c in snapshot_columns if c in existing]
+            columns = target_columns[table.name]
+            if not columns:
+                return 0
+
+            records = []
+            for i, row in enumerate(rows):
+                record = []
+                for name in columns:
+                    if name == table.vector_column:
+                        vector = vectors[i]
+                        record.append(None if np.isnan(vector).all() else vector)
+                    elif kinds[name] == "json" and row[name] is not None:
+                        record.append(json.dumps(row[name]))
+                    else:
+                        record.append(row[name])
+                records.append(tuple(record))
+
+            staging = f"snapshot_{table.name}"
+            column_list = ", ".join(columns)
+            async with conn.transaction():
+                await conn.execute(
+                    f"CREATE TEMP TABLE {staging} (LIKE {table.name} INCLUDING DEFAULTS) ON COMMIT DROP"
+                )
+                await conn.copy_records_to_table(staging, columns=columns, records=records)
+                status = await conn.execute(
+                    f"INSERT INTO {table.name} ({column_list}) "
+                    f"SELECT {column_list} FROM {staging} ON CONFLICT DO NOTHING"
+                )
+        # "INSERT 0 <count>"
+        return int(status.split()[-1])
+
+
+def _vector_matrix(values: List[Any]) -> np.ndarray:
+    """Stack vectors (None rows become all-NaN)"""
+    dimensions = next((len(v) for v in values if v is not None), 0)
+    matrix = np.full((len(values), dimensions), np.nan, dtype=_VECTOR_DTYPE)
+    for i, value in enumerate(values):
+        if value is not None:
+            matrix[i] = value
+    return matrix
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Verify a snapshot file and print its table row counts"""
+    parser = argparse.ArgumentParser(description="Verify a memory store snapshot")
+    parser.add_argument("path", help="Snapshot file")
+    args = parser.parse_args(argv)
+
+    result = SnapshotReader(args.path).verify()
+    print(json.dumps({"tables": result["tables"], "bytes": result["bytes"], **result["header"]}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""
+Summary Tree - Hierarchical Rollups of Session Summaries
+
+Users with thousands of sessions cannot be served from the latest session
+summary alone, and searching their raw memories gets slower with every
+session. The summary tree rolls session summaries into weekly summaries
+and weekly summaries into monthly ones, each embedded:
+
+    month ── week ── session
+          └─ week ── session
+                  └─ session
+
+SummaryTreeBuilder maintains the tree (add_sessions() then rollup()).
+SummaryTreeRetriever answers a query by descending it: the roots are
+scored first, and only the children of the best beam_width nodes are
+scored at each level below. The work per query is bounded by
+beam_width * fan-out * depth, not by the number of sessions, and the
+returned summaries are bounded by limit.
+
+Weeks start on Monday (UTC); a week belongs to the month it starts in.
+"""
+
+import logging
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .embedding import EmbeddingService
+from .models import SessionSummaryResponse, SummaryLevel, SummaryNode
+from .summary_tree_repository import SummaryTreeRepository
+
+logger = logging.getLogger(__name__)
+
+# (child level, parent level), bottom-up
+ROLLUP_LEVELS: Tuple[Tuple[SummaryLevel, SummaryLevel], ...] = (
+    (SummaryLevel.SESSION, SummaryLevel.WEEK),
+    (SummaryLevel.WEEK, SummaryLevel.MONTH),
+)
+
+
+def period_bounds(level: SummaryLevel, timestamp: datetime) -> Tuple[datetime, datetime]:
+    """
+    Calendar period of a week / month node containing timestamp.
+
+    Naive timestamps are taken as UTC.
+
+    Returns:
+        (start, end) with end exclusive
+    """
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    day = timestamp.astimezone(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    if level == SummaryLevel.WEEK:
+        start = day - timedelta(days=day.weekday())
+        return start, start + timedelta(days=7)
+    if level == SummaryLevel.MONTH:
+        start = day.replace(day=1)
+        end = (start + timedelta(days=32)).replace(day=1)
+        return start, end
+    raise ValueError(f"Sessions have no calendar period: {level}")
+
+
+class Summarizer(ABC):
+    """Summarizes child summaries into the text of their parent node"""
+
+    @abstractmethod
+    async def summarize(self, level: SummaryLevel, texts: List[str]) -> str:
+        """
+        Args:
+            level: Level of the node being written (WEEK / MONTH)
+            texts: Child summaries, oldest first
+
+        Returns:
+            Summary text
+        """
+        pass
+
+
+class ExtractiveSummarizer(Summarizer):
+    """
+    抽出型の要約（LLM 不要）
+
+    子ノードの要約を箇条書きで連結し、max_chars に収まるよう各項目を
+    均等に切り詰める。上位ノードの長さが子ノード数に依存しない。
+    """
+
+    def __init__(self, max_chars: int = 2000) -> None:
+        """
+        Args:
+            max_chars: 要約1件の最大文字数
+        """
+        self.max_chars = max_chars
+
+    async def summarize(self, level: SummaryLevel, texts: List[str]) -> str:
+        """Bullet list of the children, each cut to an equal share of max_chars"""
+        texts = [" ".join(text.split()) for text in texts if text.strip()]
+        if not texts:
+            return ""
+        share = max(self.max_chars // len(texts) - 3, 1)
+        lines = [f"- {text if len(text) <= share else text[:share - 1] + '…'}" for text in texts]
+        return "\n".join(lines)[:self.max_chars]
+
+
+class SummaryTreeBuilder:
+    """
+    要約ツリーの構築
+
+    セッション要約を session ノードとして取り込み、rollup() で
+    未集約ノードを含む週・月のノードを再生成する。
+    """
+
+    def __init__(
+        self,
+        repository: SummaryTreeRepository,
+        embedding_service: EmbeddingService,
+        summarizer: Optional[Summarizer] = None,
+    ) -> None:
+        """
+        Args:
+            repository: 要約ツリーの保存先
+            embedding_service: ノード要約の Embedding 生成
+            summarizer: 子ノードから親ノードの要約を作成（既定: ExtractiveSummarizer）
+        """
+        self.repository = repository
+        self.embedding_service = embedding_service
+        self.summarizer = summarizer or ExtractiveSummarizer()
+
+    async def add_sessions(self, summaries: Iterable[SessionSummaryResponse]) -> int:
+        """
+        セッション要約を session ノードとして取り込む
+
+        要約が変わっていないセッションは Embedding を生成せずスキップする。
+
+        Returns:
+            追加・更新したノード数
+        """
+        by_user: Dict[str, List[SessionSummaryResponse]] = {}
+        for summary in summaries:
+            by_user.setdefault(summary.user_id, []).append(summary)
+
+        written = 0
+        for user_id, items in by_user.items():
+            existing = await self.repository.get_session_nodes(user_id, [s.session_id for s in items])
+            changed = [
+                s for s in items
+                if s.session_id not in existing or existing[s.session_id].summary != s.summary
+            ]
+            if not changed:
+                continue
+            embeddings = await self.embedding_service.generate_embeddings([s.summary for s in changed])
+            for summary, embedding in zip(changed, embeddings):
+                await self.repository.upsert_session(
+                    user_id, summary.session_id, summary.summary, embedding,
+                    summary.start_time, summary.end_time, summary.message_count,
+                )
+            written += len(changed)
+        return written
+
+    async def rollup(
+        self,
+        user_id: str,
+        now: Optional[datetime] = None,
+        include_open_periods: bool = False,
+    ) -> Dict[str, int]:
+        """
+        未集約ノードを含む週・月のノードを（再）生成
+
+        Args:
+            user_id: ユーザーID
+            now: 期間が終了したかの判定時刻（既定: 現在時刻）
+            include_open_periods: 終了していない今週・今月も集約する
+
+        Returns:
+            {"week": 生成した週ノード数, "month": 生成した月ノード数}
+        """
+        now = now or datetime.now(timezone.utc)
+        built: Dict[str, int] = {}
+
+        for child_level, level in ROLLUP_LEVELS:
+            pending = await self.repository.list_nodes(user_id, child_level, pending_only=True)
+            periods = sorted({period_bounds(level, node.period_start) for node in pending})
+            built[level.value] = 0
+
+            for start, end in periods:
+                if end > now and not include_open_periods:
+                    continue
+                children = await self.repository.list_nodes(user_id, child_level, start, end)
+                summary = await self.summarizer.summarize(level, [c.summary for c in children])
+                embedding = await self.embedding_service.generate_embedding(summary)
+                await self.repository.upsert_rollup(
+                    user_id, level, start, end, summary, embedding,
+                    [c.id for c in children], sum(c.message_count for c in children),
+                )
+                built[level.value] += 1
+
+        if any(built.values()):
+            logger.info(f"Summary tree rollup for {user_id}: {built}")
+        return built
+
+
+class SummaryTreeRetriever:
+    """
+    要約ツリーの階層検索
+
+    ルートノードから類似度の高い beam_width 件だけを展開しながら
+    session ノードまで下り、関連するセッション要約を返す。
+    """
+
+    def __init__(
+        self,
+        repository: SummaryTreeRepository,
+        embedding_service: EmbeddingService,
+        beam_width: int = 3,
+        min_similarity: float = 0.0,
+    ) -> None:
+        """
+        Args:
+            repository: 要約ツリーの保存先
+            embedding_service: クエリの Embedding 生成
+            beam_width: 各階層で展開するノード数
+            min_similarity: これ未満のノードは展開・返却しない
+        """
+        if beam_width < 1:
+            raise ValueError("beam_width must be at least 1")
+        self.repository = repository
+        self.embedding_service = embedding_service
+        self.beam_width = beam_width
+        self.min_similarity = min_similarity
+
+    async def retrieve(
+        self,
+        user_id: str,
+        query: str,
+        limit: int = 3,
+        query_embedding: Optional[List[float]] = None,
+    ) -> List[Tuple[SummaryNode, float]]:
+        """
+        クエリに関連するセッション要約を階層検索
+
+        Args:
+            user_id: ユーザーID
+            query: 検索クエリ
+            limit: 返すノード数の上限
+            query_embedding: 生成済みのクエリ Embedding
+
+        Returns:
+            [(session ノード, 類似度)]（類似度の降順）
+        """
+        if query_embedding is None:
+            query_embedding = await self.embedding_service.generate_embedding(query)
+
+        frontier = await self.repository.search_nodes(user_id, query_embedding, self.beam_width)
+        sessions: List[Tuple[SummaryNode, float]] = []
+        while frontier:
+            frontier = [(node, score) for node, score in frontier if score >= self.min_similarity]
+            sessions.extend((node, score) for node, score in frontier if node.level == SummaryLevel.SESSION)
+            expand = [node.id for node, _ in frontier if node.level != SummaryLevel.SESSION]
+            if not expand:
+                break
+            frontier = await self.repository.search_nodes(
+                user_id, query_embedding, self.beam_width, parent_ids=expand
+            )
+
+        sessions.sort(key=lambda hit: (-hit[1], hit[0].id))
+        return sessions[:limit]
@@ -0,0 +1,394 @@
+"""Summary Tree Repository - 階層要約ツリーの永続化層
+
+セッション要約（session）を週次（week）、週次を月次（month）要約に集約した
+ツリーを保存する。親ノードを持たないノード（parent_id = None）は検索時の
+ルートであり、まだ集約されていない期間のノードでもある。
+"""
+
+import asyncpg
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+import numpy as np
+
+from .models import SummaryLevel, SummaryNode
+
+
+class SummaryTreeRepository(ABC):
+    """Abstract storage for summary tree nodes"""
+
+    @abstractmethod
+    async def upsert_session(
+        self,
+        user_id: str,
+        session_id: UUID,
+        summary: str,
+        embedding: List[float],
+        period_start: datetime,
+        period_end: datetime,
+        message_count: int,
+    ) -> int:
+        """
+        Insert or replace a session node.
+
+        A replaced node is detached from its week (parent_id = None) so the
+        next rollup rebuilds that week from the new summary.
+        """
+        pass
+
+    @abstractmethod
+    async def upsert_rollup(
+        self,
+        user_id: str,
+        level: SummaryLevel,
+        period_start: datetime,
+        period_end: datetime,
+        summary: str,
+        embedding: List[float],
+        child_ids: Sequence[int],
+        message_count: int,
+    ) -> int:
+        """
+        Insert or replace the week / month node of a period and attach its children.
+
+        The rebuilt node is detached from its own parent so the level above
+        is rebuilt in turn.
+        """
+        pass
+
+    @abstractmethod
+    async def get_session_nodes(
+        self, user_id: str, session_ids: Sequence[UUID]
+    ) -> Dict[UUID, SummaryNode]:
+        """Session nodes by session id (embeddings omitted)"""
+        pass
+
+    @abstractmethod
+    async def list_nodes(
+        self,
+        user_id: str,
+        level: SummaryLevel,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        pending_only: bool = False,
+    ) -> List[SummaryNode]:
+        """
+        Nodes of one level whose period starts in [start, end), oldest first.
+
+        pending_only restricts the result to nodes without a parent.
+        Embeddings are omitted.
+        """
+        pass
+
+    @abstractmethod
+    async def search_nodes(
+        self,
+        user_id: str,
+        query_embedding: List[float],
+        limit: int,
+        parent_ids: Optional[Sequence[int]] = None,
+    ) -> List[Tuple[SummaryNode, float]]:
+        """
+        Most similar nodes with their cosine similarity, best first.
+
+        parent_ids None searches the roots (nodes without a parent, at any
+        level); otherwise only the children of those nodes.
+        """
+        pass
+
+    @abstractmethod
+    async def list_users(self) -> List[str]:
+        """Users with at least one node"""
+        pass
+
+
+class InMemorySummaryTreeRepository(SummaryTreeRepository):
+    """In-memory summary tree for testing"""
+
+    def __init__(self) -> None:
+        self._nodes: Dict[int, SummaryNode] = {}
+        self._keys: Dict[Tuple[str, str, Any], int] = {}
+        self._next_id = 1
+
+    def _upsert(self, key: Tuple[str, str, Any], **fields: Any) -> SummaryNode:
+        now = datetime.now(timezone.utc)
+        node_id = self._keys.get(key)
+        if node_id is None:
+            node_id = self._next_id
+            self._next_id += 1
+            self._keys[key] = node_id
+            node = SummaryNode(id=node_id, created_at=now, updated_at=now, **fields)
+        else:
+            node = self._nodes[node_id].model_copy(update={**fields, "updated_at": now})
+        self._nodes[node_id] = node
+        return node
+
+    @staticmethod
+    def _public(node: SummaryNode) -> SummaryNode:
+        return node.model_copy(update={"embedding": []})
+
+    async def upsert_session(
+        self,
+        user_id: str,
+        session_id: UUID,
+        summary: str,
+        embedding: List[float],
+        period_start: datetime,
+        period_end: datetime,
+        message_count: int,
+    ) -> int:
+        """Insert or replace a session node"""
+        node = self._upsert(
+            (user_id, SummaryLevel.SESSION.value, session_id),
+            user_id=user_id, level=SummaryLevel.SESSION, session_id=session_id,
+            summary=summary, embedding=list(embedding), parent_id=None,
+            period_start=period_start, period_end=period_end, message_count=message_count,
+        )
+        return node.id
+
+    async def upsert_rollup(
+        self,
+        user_id: str,
+        level: SummaryLevel,
+        period_start: datetime,
+        period_end: datetime,
+        summary: str,
+        embedding: List[float],
+        child_ids: Sequence[int],
+        message_count: int,
+    ) -> int:
+        """Insert or replace a rollup node and attach its children"""
+        node = self._upsert(
+            (user_id, level.value, period_start),
+            user_id=user_id, level=level, summary=summary, embedding=list(embedding),
+            parent_id=None, period_start=period_start, period_end=period_end,
+            source_count=len(child_ids), message_count=message_count,
+        )
+        for child_id in child_ids:
+            self._nodes[child_id] = self._nodes[child_id].model_copy(update={"parent_id": node.id})
+        return node.id
+
+    async def get_session_nodes(
+        self, user_id: str, session_ids: Sequence[UUID]
+    ) -> Dict[UUID, SummaryNode]:
+        """Session nodes by session id"""
+        found = {}
+        for session_id in session_ids:
+            node_id = self._keys.get((user_id, SummaryLevel.SESSION.value, session_id))
+            if node_id is not None:
+                found[session_id] = self._public(self._nodes[node_id])
+        return found
+
+    async def list_nodes(
+        self,
+        user_id: str,
+        level: SummaryLevel,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        pending_only: bool = False,
+    ) -> List[SummaryNode]:
+        """Nodes of one level in a period, oldest first"""
+        nodes = [
+            node for node in self._nodes.values()
+            if node.user_id == user_id
+            and node.level == level
+            and (start is None or node.period_start >= start)
+            and (end is None or node.period_start < end)
+            and not (pending_only and node.parent_id is not None)
+        ]
+        nodes.sort(key=lambda node: (node.period_start, node.id))
+        return [self._public(node) for node in nodes]
+
+    async def search_nodes(
+        self,
+        user_id: str,
+        query_embedding: List[float],
+        limit: int,
+        parent_ids: Optional[Sequence[int]] = None,
+    ) -> List[Tuple[SummaryNode, float]]:
+        """Score roots (or the children of parent_ids) by cosine similarity"""
+        if parent_ids is None:
+            candidates = [
+                node for node in self._nodes.values()
+                if node.user_id == user_id and node.parent_id is None and node.embedding
+            ]
+        else:
+            parents = set(parent_ids)
+            candidates = [
+                node for node in self._nodes.values()
+                if node.user_id == user_id and node.parent_id in parents and node.embedding
+            ]
+        if not candidates or limit <= 0:
+            return []
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        matrix = np.asarray([node.embedding for node in candidates], dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+        scores = np.divide(matrix @ query, norms, out=np.zeros(len(candidates), np.float32), where=norms > 0)
+        order = sorted(range(len(candidates)), key=lambda i: (-scores[i], candidates[i].id))[:limit]
+        return [(self._public(candidates[i]), float(scores[i])) for i in order]
+
+    async def list_users(self) -> List[str]:
+        """Users with at least one node"""
+        return sorted({node.user_id for node in self._nodes.values()})
+
+
+class PostgresSummaryTreeRepository(SummaryTreeRepository):
+    """PostgreSQL summary tree (summary_nodes, 013_summary_tree.sql)"""
+
+    COLUMNS = (
+        "id, user_id, level, period_start, period_end, summary, parent_id, "
+        "session_id, source_count, message_count, created_at, updated_at"
+    )
+
+    def __init__(self, pool: asyncpg.Pool):
+        """
+        Args:
+            pool: asyncpg connection pool created with init=init_vector_codec
+        """
+        self.pool = pool
+
+    @staticmethod
+    def _row_to_node(row: Any) -> SummaryNode:
+        return SummaryNode(**{**dict(row), "level": SummaryLevel(row["level"])})
+
+    async def upsert_session(
+        self,
+        user_id: str,
+        session_id: UUID,
+        summary: str,
+        embedding: List[float],
+        period_start: datetime,
+        period_end: datetime,
+        message_count: int,
+    ) -> int:
+        """Insert or replace a session node"""
+        async with self.pool.acquire() as conn:
+            return await conn.fetchval("""
+                INSERT INTO summary_nodes (
+                    user_id, level, session_id, summary, embedding,
+                    period_start, period_end, message_count
+                )
+                VALUES ($1, 'session', $2, $3, $4::vector, $5, $6, $7)
+                ON CONFLICT (user_id, session_id) WHERE level = 'session'
+                DO UPDATE SET
+                    summary = EXCLUDED.summary,
+                    embedding = EXCLUDED.embedding,
+                    period_start = EXCLUDED.period_start,
+                    period_end = EXCLUDED.period_end,
+                    message_count = EXCLUDED.message_count,
+                    parent_id = NULL,
+                    updated_at = NOW()
+                RETURNING id
+            """, user_id, session_id, summary, embedding, period_start, period_end, message_count)
+
+    async def upsert_rollup(
+        self,
+        user_id: str,
+        level: SummaryLevel,
+        period_start: datetime,
+        period_end: datetime,
+        summary: str,
+        embedding: List[float],
+        child_ids: Sequence[int],
+        message_count: int,
+    ) -> int:
+        """Insert or replace a rollup node and attach its children in one transaction"""
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                node_id = await conn.fetchval("""
+                    INSERT INTO summary_nodes (
+                        user_id, level, summary, embedding, period_start, period_end,
+                        source_count, message_count
+                    )
+                    VALUES ($1, $2, $3, $4::vector, $5, $6, $7, $8)
+                    ON CONFLICT (user_id, level, period_start) WHERE level <> 'session'
+                    DO UPDATE SET
+                        summary = EXCLUDED.summary,
+                        embedding = EXCLUDED.embedding,
+                        period_end = EXCLUDED.period_end,
+                        source_count = EXCLUDED.source_count,
+                        message_count = EXCLUDED.message_count,
+                        parent_id = NULL,
+                        updated_at = NOW()
+                    RETURNING id
+                """, user_id, level.value, summary, embedding, period_start, period_end,
+                    len(child_ids), message_count)
+                await conn.execute(
+                    "UPDATE summary_nodes SET parent_id = $1 WHERE id = ANY($2::bigint[])",
+                    node_id, list(child_ids),
+                )
+        return node_id
+
+    async def get_session_nodes(
+        self, user_id: str, session_ids: Sequence[UUID]
+    ) -> Dict[UUID, SummaryNode]:
+        """Session nodes by session id"""
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(f"""
+                SELECT {self.COLUMNS} FROM summary_nodes
+                WHERE user_id = $1 AND level = 'session' AND session_id = ANY($2::uuid[])
+            """, user_id, list(session_ids))
+        return {row["session_id"]: self._row_to_node(row) for row in rows}
+
+    async def list_nodes(
+        self,
+        user_id: str,
+        level: SummaryLevel,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        pending_only: bool = False,
+    ) -> List[SummaryNode]:
+        """Nodes of one level in a period, oldest first"""
+        conditions = ["user_id = $1", "level = $2"]
+        params: List[Any] = [user_id, level.value]
+        if start is not None:
+            params.append(start)
+            conditions.append(f"period_start >= ${len(params)}")
+        if end is not None:
+            params.append(end)
+            conditions.append(f"period_start < ${len(params)}")
+        if pending_only:
+            conditions.append("parent_id IS NULL")
+
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(f"""
+                SELECT {self.COLUMNS} FROM summary_nodes
+                WHERE {' AND '.join(conditions)}
+                ORDER BY period_start, id
+            """, *params)
+        return [self._row_to_node(row) for row in rows]
+
+    async def search_nodes(
+        self,
+        user_id: str,
+        query_embedding: List[float],
+        limit: int,
+        parent_ids: Optional[Sequence[int]] = None,
+    ) -> List[Tuple[SummaryNode, float]]:
+        """Score roots (or the children of parent_ids) by cosine similarity"""
+        if parent_ids is None:
+            scope, params = "parent_id IS NULL", [user_id, query_embedding, limit]
+        else:
+            scope, params = "parent_id = ANY($4::bigint[])", [user_id, query_embedding, limit, list(parent_ids)]
+
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(f"""
+                SELECT {self.COLUMNS}, 1 - (embedding <=> $2::vector) AS similarity
+                FROM summary_nodes
+                WHERE user_id = $1 AND {scope} AND embedding IS NOT NULL
+                ORDER BY embedding <=> $2::vector, id
+                LIMIT $3
+            """, *params)
+        return [
+            (self._row_to_node({k: v for k, v in dict(row).items() if k != "similarity"}), float(row["similarity"]))
+            for row in rows
+        ]
+
+    async def list_users(self) -> List[str]:
+        """Users with at least one node"""
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch("SELECT DISTINCT user_id FROM summary_nodes ORDER BY user_id")
+        return [row["user_id"] for row in rows]
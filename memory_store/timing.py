@@ -0,0 +1,159 @@
+"""
+Phase Timing - Per-Phase Latency Breakdown
+
+Code on the save / search paths wraps each step in phase("name"); the
+time is added to the PhaseTimings collected by the innermost
+collect_phases() block of the current task (or dropped if none is open).
+Nested collectors also report to the enclosing one, so a caller can wrap
+any service call:
+
+    with collect_phases() as timings:
+        results = await service.search_similar("query")
+    timings.as_dict()  # {"embed_cache": 0.01, "embed": 85.2, "acquire": 0.3, ...}
+
+Phases used by memory_store: embed_cache, embed, embed_queue, acquire,
+query, decode, convert, dedup.
+
+Tasks started with asyncio.gather() inherit the caller's collector, so
+phases of the same name that overlap (e.g. embedding the primary and
+shadow query concurrently) count their wall-clock union, not the sum.
+"""
+
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Iterator, Optional, Tuple
+
+_current: ContextVar[Optional["PhaseTimings"]] = ContextVar("memory_store_phases", default=None)
+
+
+class PhaseTimings:
+    """Accumulated milliseconds per phase"""
+
+    __slots__ = ("_phases", "_open", "_parent")
+
+    def __init__(self, parent: Optional["PhaseTimings"] = None) -> None:
+        self._phases: Dict[str, float] = {}
+        # name -> [open count, start of the outermost open interval]
+        self._open: Dict[str, list] = {}
+        self._parent = parent
+
+    def __iter__(self) -> Iterator[Tuple[str, float]]:
+        return iter(self._phases.items())
+
+    def __len__(self) -> int:
+        return len(self._phases)
+
+    def add(self, name: str, elapsed_ms: float) -> None:
+        self._phases[name] = self._phases.get(name, 0.0) + elapsed_ms
+
+    def start(self, name: str, now: float) -> None:
+        """Open an interval of `name` here and in every enclosing collector"""
+        timings: Optional[PhaseTimings] = self
+        while timings is not None:
+            state = timings._open.get(name)
+            if state is None:
+                timings._open[name] = [1, now]
+            else:
+                state[0] += 1
+            timings = timings._parent
+
+    def stop(self, name: str, now: float) -> None:
+        """Close an interval; time is added once the last overlapping one closes"""
+        timings: Optional[PhaseTimings] = self
+        while timings is not None:
+            state = timings._open[name]
+            state[0] -= 1
+            if state[0] == 0:
+                del timings._open[name]
+                timings.add(name, (now - state[1]) * 1000)
+            timings = timings._parent
+
+    def get(self, name: str) -> float:
+        return self._phases.get(name, 0.0)
+
+    def as_dict(self) -> Dict[str, float]:
+        return {name: round(ms, 3) for name, ms in self._phases.items()}
+
+
+class phase:
+    """Context manager timing one phase into the active collector"""
+
+    __slots__ = ("_name", "_timings")
+
+    def __init__(self, name: str) -> None:
+        self._name = name
+
+    def __enter__(self) -> "phase":
+        self._timings = _current.get()
+        if self._timings is not None:
+            self._timings.start(self._name, time.perf_counter())
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        if self._timings is not None:
+            self._timings.stop(self._name, time.perf_counter())
+
+
+class collect_phases:
+    """Context manager collecting phase() timings for the current task"""
+
+    __slots__ = ("timings", "_token")
+
+    def __init__(self) -> None:
+        self.timings = PhaseTimings()
+
+    def __enter__(self) -> PhaseTimings:
+        self.timings._parent = _current.get()
+        self._token = _current.set(self.timings)
+        return self.timings
+
+    def __exit__(self, *exc_info: Any) -> None:
+        _current.reset(self._token)
+
+
+def _percentile(values: list, p: float) -> float:
+    index = min(int(len(values) * p), len(values) - 1)
+    return values[index]
+
+
+class LatencySummary:
+    """
+    Rolling window of per-operation, per-phase latencies.
+
+    summary() reports p50 / p90 / p95 / p99 like
+    MetricsCollector.get_latency_percentiles().
+    """
+
+    def __init__(self, window: int = 1000) -> None:
+        self._window = window
+        self._samples: Dict[Tuple[str, str], Deque[float]] = {}
+
+    def record(self, operation: str, total_ms: float, timings: Optional[PhaseTimings] = None) -> None:
+        self._sample(operation, "total", total_ms)
+        if timings is not None:
+            for name, elapsed in timings:
+                self._sample(operation, name, elapsed)
+
+    def _sample(self, operation: str, phase_name: str, elapsed: float) -> None:
+        samples = self._samples.get((operation, phase_name))
+        if samples is None:
+            samples = self._samples[(operation, phase_name)] = deque(maxlen=self._window)
+        samples.append(elapsed)
+
+    def summary(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """{operation: {phase: {count, p50, p90, p95, p99}}}"""
+        result: Dict[str, Dict[str, Dict[str, float]]] = {}
+        for (operation, phase_name), samples in self._samples.items():
+            values = sorted(samples)
+            result.setdefault(operation, {})[phase_name] = {
+                "count": len(values),
+                "p50": round(_percentile(values, 0.50), 2),
+                "p90": round(_percentile(values, 0.90), 2),
+                "p95": round(_percentile(values, 0.95), 2),
+                "p99": round(_percentile(values, 0.99), 2),
+            }
+        return result
+
+    def reset(self) -> None:
+        self._samples = {}
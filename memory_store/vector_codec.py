@@ -0,0 +1,101 @@
+"""
+pgvector Binary Codec for asyncpg
+
+Sends and receives `vector` values in pgvector's binary wire format
+(int16 dimensions, int16 unused, float32 big-endian values) instead of the
+decimal text representation, which is ~5x larger and has to be parsed on
+both ends.
+
+Register it on every pooled connection:
+
+    pool = await asyncpg.create_pool(dsn, init=init_vector_codec)
+"""
+
+import logging
+import struct
+from typing import Any, List, Sequence, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_HEADER = struct.Struct(">HH")
+_WIRE_DTYPE = np.dtype(">f4")
+
+VectorLike = Union[Sequence[float], np.ndarray, str]
+
+
+def parse_text_vector(value: str) -> List[float]:
+    """Parse pgvector text form '[1,2,3]' (accepted for backward compatibility)"""
+    body = value.strip().lstrip("[").rstrip("]")
+    return [float(x) for x in body.split(",")] if body else []
+
+
+def encode_vector(value: VectorLike) -> bytes:
+    """
+    Encode a vector in pgvector binary format.
+
+    Args:
+        value: List/tuple of floats, 1-D NumPy array, or pgvector text form
+
+    Returns:
+        bytes: Binary wire representation
+    """
+    if isinstance(value, str):
+        value = parse_text_vector(value)
+
+    array = np.asarray(value, dtype=_WIRE_DTYPE)
+    if array.ndim != 1:
+        raise ValueError("vector must be one-dimensional")
+
+    return _HEADER.pack(array.shape[0], 0) + array.tobytes()
+
+
+def decode_vector(data: bytes) -> List[float]:
+    """
+    Decode a pgvector binary value.
+
+    Returns:
+        List[float]: Vector values
+    """
+    dimensions, _ = _HEADER.unpack_from(data)
+    array = np.frombuffer(data, dtype=_WIRE_DTYPE, count=dimensions, offset=_HEADER.size)
+    return array.astype(np.float32).tolist()
+
+
+async def register_vector_codec(conn: Any) -> bool:
+    """
+    Register the binary `vector` codec on a connection.
+
+    Args:
+        conn: asyncpg connection
+
+    Returns:
+        bool: False if the pgvector extension is not installed
+    """
+    schema = await conn.fetchval(
+        """
+        SELECT n.nspname
+        FROM pg_type t
+        JOIN pg_namespace n ON n.oid = t.typnamespace
+        WHERE t.typname = 'vector'
+        LIMIT 1
+        """
+    )
+    if schema is None:
+        logger.warning("pgvector extension not installed; vector codec not registered")
+        return False
+
+    await conn.set_type_codec(
+        "vector",
+        schema=schema,
+        encoder=encode_vector,
+        decoder=decode_vector,
+        format="binary",
+    )
+    return True
+
+
+async def init_vector_codec(conn: Any) -> None:
+    """asyncpg pool `init` callback that registers the vector codec"""
+    await register_vector_codec(conn)
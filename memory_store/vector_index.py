@@ -0,0 +1,242 @@
+"""
+Vector Index - Contiguous NumPy Similarity Search
+
+Keeps embeddings in a pre-normalized float32 matrix so that cosine
+similarity against every stored vector is a single matrix-vector product.
+"""
+
+from typing import Any, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """
+    Normalize each row to unit length.
+
+    Zero vectors stay zero so that their similarity is 0.0, matching
+    cosine_similarity() in embedding.py.
+    """
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class VectorIndex:
+    """
+    Row-addressed vector store with exact top-k cosine search.
+
+    Rows are appended in insertion order and never move, so callers can
+    keep parallel metadata arrays indexed by the same row number.
+    """
+
+    def __init__(
+        self,
+        dimensions: Optional[int] = None,
+        initial_capacity: int = 1024,
+    ) -> None:
+        """
+        Initialize an empty index.
+
+        Args:
+            dimensions: Vector dimensions (inferred from the first add if None)
+            initial_capacity: Number of rows to pre-allocate
+        """
+        self.dimensions = dimensions
+        self._capacity = max(1, initial_capacity)
+        self._size = 0
+        self._matrix: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """Normalized vectors for all occupied rows (read-only view)"""
+        if self._matrix is None:
+            return np.empty((0, self.dimensions or 0), dtype=np.float32)
+        view = self._matrix[: self._size]
+        view.flags.writeable = False
+        return view
+
+    def _ensure_capacity(self, required: int) -> None:
+        """Grow the backing matrix geometrically"""
+        if self._matrix is None:
+            self._capacity = max(self._capacity, required)
+            self._matrix = np.zeros((self._capacity, self.dimensions), dtype=np.float32)
+            return
+
+        if required <= self._capacity:
+            return
+
+        while self._capacity < required:
+            self._capacity *= 2
+        grown = np.zeros((self._capacity, self.dimensions), dtype=np.float32)
+        grown[: self._size] = self._matrix[: self._size]
+        self._matrix = grown
+
+    def _check_dimensions(self, dimensions: int) -> None:
+        if self.dimensions is None:
+            self.dimensions = dimensions
+        elif dimensions != self.dimensions:
+            raise ValueError("Vectors must have same length")
+
+    def add(self, vector: Sequence[float]) -> int:
+        """
+        Append a single vector.
+
+        Returns:
+            Row number of the stored vector
+        """
+        return self.add_batch(np.asarray([vector], dtype=np.float32))[0]
+
+    def add_batch(self, vectors: np.ndarray) -> range:
+        """
+        Append a 2-D array of vectors.
+
+        Returns:
+            Row numbers of the stored vectors
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2:
+            raise ValueError("vectors must be a 2-D array")
+        self._check_dimensions(vectors.shape[1])
+
+        start = self._size
+        end = start + vectors.shape[0]
+        self._ensure_capacity(end)
+        self._matrix[start:end] = normalize_rows(vectors)
+        self._size = end
+        return range(start, end)
+
+    def set_batch(self, rows: np.ndarray, vectors: np.ndarray) -> None:
+        """
+        Write vectors at the given rows, growing the index to cover them.
+
+        Rows skipped over by the growth stay zero vectors (similarity 0.0).
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or vectors.shape[0] != rows.size:
+            raise ValueError("vectors must be a 2-D array with one row per row number")
+        if rows.size == 0:
+            return
+        self._check_dimensions(vectors.shape[1])
+
+        end = max(self._size, int(rows.max()) + 1)
+        self._ensure_capacity(end)
+        self._matrix[rows] = normalize_rows(vectors)
+        self._size = end
+
+    def get(self, row: int) -> np.ndarray:
+        """Get the normalized vector stored at row"""
+        if not 0 <= row < self._size:
+            raise IndexError(f"Row out of range: {row}")
+        return self._matrix[row].copy()
+
+    def similarities(
+        self,
+        query: Sequence[float],
+        rows: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        Cosine similarity of query against every row (or only rows).
+
+        Returns:
+            float32 array of length len(self) (or len(rows))
+        """
+        count = self._size if rows is None else len(rows)
+        if self._size == 0 or count == 0:
+            return np.empty(0, dtype=np.float32)
+
+        q = np.asarray(query, dtype=np.float32)
+        if q.ndim != 1 or q.shape[0] != self.dimensions:
+            raise ValueError("Vectors must have same length")
+
+        norm = np.linalg.norm(q)
+        if norm == 0:
+            return np.zeros(count, dtype=np.float32)
+
+        if rows is None:
+            return self._matrix[: self._size] @ (q / norm)
+        return self._matrix[rows] @ (q / norm)
+
+    def search(
+        self,
+        query: Sequence[float],
+        limit: int,
+        mask: Optional[np.ndarray] = None,
+        similarity_threshold: Optional[float] = None,
+        rows: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Exact top-k search.
+
+        Args:
+            query: Query vector
+            limit: Maximum number of rows to return
+            mask: Boolean array of eligible rows (None = all rows)
+            similarity_threshold: Drop rows below this similarity
+            rows: Ascending rows to score; no other row is touched (e.g. one
+                user's shard)
+
+        Returns:
+            (rows, similarities) sorted by similarity descending; ties keep
+            insertion order
+        """
+        candidates, scores = candidate_scores(self, query, mask, rows)
+        if similarity_threshold is not None and candidates.size:
+            keep = scores >= similarity_threshold
+            candidates, scores = candidates[keep], scores[keep]
+
+        return top_k(candidates, scores, limit)
+
+
+def candidate_scores(
+    index: Any,
+    query: Sequence[float],
+    mask: Optional[np.ndarray],
+    rows: Optional[np.ndarray],
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Eligible rows of an index and their similarities.
+
+    Without rows every row is scored and mask selects the candidates; with
+    rows only those rows (further narrowed by mask) are scored.
+    """
+    size = len(index)
+    if rows is None:
+        sims = index.similarities(query)
+        candidates = np.arange(size) if mask is None else np.flatnonzero(mask[:size])
+        return candidates, sims[candidates]
+
+    candidates = np.asarray(rows, dtype=np.int64)
+    if mask is not None:
+        candidates = candidates[mask[candidates]]
+    return candidates, index.similarities(query, candidates)
+
+
+def top_k(
+    rows: np.ndarray,
+    scores: np.ndarray,
+    limit: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Select the highest scoring rows with argpartition.
+
+    Ties are broken by row number so the result matches a stable sort over
+    rows in insertion order.
+    """
+    if limit <= 0 or rows.size == 0:
+        return rows[:0], scores[:0]
+
+    if rows.size > limit:
+        # Keep every row tied with the k-th score so the stable tie-break
+        # below sees all of them.
+        kth = scores[np.argpartition(-scores, limit - 1)[limit - 1]]
+        keep = scores >= kth
+        rows = rows[keep]
+        scores = scores[keep]
+
+    order = np.lexsort((rows, -scores))[:limit]
+    return rows[order], scores[order]
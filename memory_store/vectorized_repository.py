@@ -0,0 +1,722 @@
+"""
+Vectorized Memory Repository - NumPy-backed In-Memory Search
+
+Drop-in replacement for InMemoryRepository that scales to large working
+sets by scoring every memory with one matrix-vector product.
+"""
+
+import asyncio
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import numpy as np
+from pydantic import PrivateAttr
+
+from .models import MemoryRecord, MemoryType, SourceType
+from .dimension_reduction import DimensionReducer, ReducedVectorIndex
+from .quantized_index import QuantizedVectorIndex, RerankingVectorIndex
+from .repository import STREAM_CHUNK_SIZE, InMemoryRepository, InMemoryRepositoryBase
+from .vector_index import VectorIndex, top_k
+
+_MEMORY_TYPE_CODES = {t.value: code for code, t in enumerate(MemoryType)}
+_SOURCE_TYPE_CODES = {t.value: code for code, t in enumerate(SourceType)}
+_NO_SOURCE = -1
+_MEMORY_TYPE_NAMES = [t.value for t in MemoryType]
+# A user shard larger than this fraction of all rows is searched through a
+# full-length mask; gathering it would copy most of the matrix
+_DENSE_SCOPE_FRACTION = 0.25
+
+# Record fields mirrored into the repository's row arrays
+_INDEXED_FIELDS = frozenset({"memory_type", "source_type", "expires_at", "is_archived"})
+
+
+class _IndexedMemoryRecord(MemoryRecord):
+    """MemoryRecord that keeps its repository row in sync when mutated"""
+
+    _owner: Any = PrivateAttr(default=None)
+    _row: int = PrivateAttr(default=-1)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        if name in _INDEXED_FIELDS and self._owner is not None:
+            self._owner._sync_row(self._row, self)
+
+
+def _expiry_timestamp(expires_at: Optional[datetime]) -> float:
+    return expires_at.timestamp() if expires_at else np.inf
+
+
+def _grow(array: np.ndarray, required: int, fill: Any) -> np.ndarray:
+    """Return array with at least `required` slots, doubling as needed"""
+    if required <= array.shape[0]:
+        return array
+    capacity = max(array.shape[0], 1)
+    while capacity < required:
+        capacity *= 2
+    grown = np.full(capacity, fill, dtype=array.dtype)
+    grown[: array.shape[0]] = array
+    return grown
+
+
+class VectorizedRepositoryBase(InMemoryRepositoryBase):
+    """
+    In-memory repository with vectorized similarity search.
+
+    Embeddings live in a VectorIndex (pre-normalized float32 matrix) and
+    type / expiry / archive state in parallel NumPy arrays, so filters are
+    boolean masks and top-k selection uses argpartition.
+
+    With quantization="int8" / "float16" the search matrix is stored
+    quantized (QuantizedVectorIndex) and the top rerank_candidates rows are
+    re-scored against full-precision vectors, trading a little recall for a
+    4x / 2x smaller resident matrix. Use measure_recall() to check the
+    trade-off on real queries.
+
+    With a reducer (PCAProjection / PrefixTruncation) the search matrix
+    holds reduced vectors instead (ReducedVectorIndex), re-ranked at full
+    dimension the same way; rerank_candidates=0 skips re-ranking.
+
+    Records keep the embedding they were inserted with, so get_by_id,
+    export and duplicate lookup see the same vectors as InMemoryRepository.
+    With keep_embeddings=False records carry no embedding (like
+    PostgresMemoryRepository) and those paths rebuild it from the index row
+    and the stored vector norm; get_embedding() works in both modes.
+    """
+
+    def __init__(
+        self,
+        dimensions: Optional[int] = None,
+        initial_capacity: int = 1024,
+        quantization: Optional[str] = None,
+        rerank_candidates: int = 200,
+        full_precision_path: Optional[str] = None,
+        reducer: Optional[DimensionReducer] = None,
+        keep_embeddings: bool = True,
+    ) -> None:
+        """
+        Initialize empty storage.
+
+        Args:
+            dimensions: Embedding dimensions (inferred from first insert if None)
+            initial_capacity: Number of rows to pre-allocate
+            quantization: None (float32), "int8" or "float16"
+            rerank_candidates: Rows re-ranked at full precision (quantized only)
+            full_precision_path: File for full-precision vectors (quantized / reduced)
+            reducer: Search reduced vectors (cannot be combined with quantization)
+            keep_embeddings: Keep each record's original embedding list
+                (False = only the index holds vectors, saving the per-record copy)
+        """
+        if quantization and reducer is not None:
+            raise ValueError("quantization and reducer cannot be combined")
+        super().__init__()
+        self._dimensions = dimensions
+        self._initial_capacity = initial_capacity
+        self._quantization = quantization
+        self._rerank_candidates = rerank_candidates
+        self._full_precision_path = full_precision_path
+        self._reducer = reducer
+        self._keep_embeddings = keep_embeddings
+        self._reset_index()
+
+    def _new_index(self, capacity: int) -> Any:
+        if self._reducer is not None:
+            return ReducedVectorIndex(
+                self._reducer,
+                self._dimensions,
+                capacity,
+                rerank_candidates=self._rerank_candidates,
+                full_precision_path=self._full_precision_path,
+            )
+        if self._quantization:
+            return QuantizedVectorIndex(
+                self._dimensions,
+                capacity,
+                quantization=self._quantization,
+                rerank_candidates=self._rerank_candidates,
+                full_precision_path=self._full_precision_path,
+            )
+        return VectorIndex(self._dimensions, capacity)
+
+    def _replace_index(self, index: Any) -> None:
+        """Swap in a new search index, closing the old one's full-precision file"""
+        previous = getattr(self, "_index", None)
+        self._index = index
+        if isinstance(previous, RerankingVectorIndex):
+            previous.close()
+
+    def _reset_index(self) -> None:
+        capacity = self._initial_capacity
+        self._replace_index(self._new_index(capacity))
+        self._row_ids = np.zeros(capacity, dtype=np.int64)
+        self._memory_types = np.zeros(capacity, dtype=np.int8)
+        self._source_types = np.full(capacity, _NO_SOURCE, dtype=np.int8)
+        self._expires = np.full(capacity, np.inf, dtype=np.float64)
+        self._archived = np.zeros(capacity, dtype=bool)
+        # Norm of each inserted embedding: index rows times it give the original
+        self._norms = np.ones(capacity, dtype=np.float32)
+
+    def _count_record(self, record: MemoryRecord, sign: int = 1) -> None:
+        # Counters follow the row arrays in _sync_row
+        pass
+
+    def _sync_row(self, row: int, record: MemoryRecord, inserted: bool = False) -> None:
+        """Copy indexed fields of record into the row arrays"""
+        if self._counters is not None:
+            # Move the record from its previous (type, archived) group
+            if not inserted:
+                self._counters.apply(
+                    record.user_id,
+                    _MEMORY_TYPE_NAMES[self._memory_types[row]],
+                    bool(self._archived[row]),
+                    -1,
+                    -len(record.content),
+                )
+            self._counters.add(record)
+        memory_type = _MEMORY_TYPE_CODES[record.memory_type.value]
+        expires = _expiry_timestamp(record.expires_at)
+        was_archived = bool(self._archived[row])
+        # Only push a heap entry when the expiry schedule changed; every
+        # other field write would otherwise add a duplicate
+        reschedule = (
+            inserted
+            or was_archived
+            or self._expires[row] != expires
+            or self._memory_types[row] != memory_type
+        )
+        self._memory_types[row] = memory_type
+        self._source_types[row] = (
+            _SOURCE_TYPE_CODES[record.source_type.value] if record.source_type else _NO_SOURCE
+        )
+        self._expires[row] = expires
+        self._archived[row] = record.is_archived
+        if record.is_archived:
+            self._unindex_metadata(record.id)
+            return
+        if was_archived and not inserted:
+            self._index_metadata(record)
+        if reschedule:
+            self._track_expiry(record)
+
+    async def insert_memory(
+        self,
+        content: str,
+        embedding: List[float],
+        memory_type: str,
+        source_type: Optional[str],
+        metadata: Dict[str, Any],
+        expires_at: Optional[datetime],
+        user_id: Optional[str] = None,
+    ) -> int:
+        """Insert a new memory record"""
+        # Validate before the vector is appended: a rejected insert must not leave an orphan row
+        memory_id = self._next_id
+        now = datetime.now(timezone.utc)
+        record = _IndexedMemoryRecord(
+            id=memory_id,
+            content=content,
+            embedding=list(embedding) if self._keep_embeddings else [],
+            memory_type=MemoryType(memory_type),
+            source_type=SourceType(source_type) if source_type else None,
+            metadata=metadata,
+            created_at=now,
+            updated_at=now,
+            expires_at=expires_at,
+            is_archived=False,
+            user_id=user_id,
+        )
+
+        row = self._index.add(embedding)
+        required = row + 1
+        self._row_ids = _grow(self._row_ids, required, 0)
+        self._memory_types = _grow(self._memory_types, required, 0)
+        self._source_types = _grow(self._source_types, required, _NO_SOURCE)
+        self._expires = _grow(self._expires, required, np.inf)
+        self._archived = _grow(self._archived, required, False)
+        self._norms = _grow(self._norms, required, 1.0)
+        self._norms[row] = np.linalg.norm(np.asarray(embedding, dtype=np.float32))
+        self._next_id += 1
+
+        record._row = row
+        record._owner = self
+
+        self._row_ids[row] = memory_id
+        self._sync_row(row, record, inserted=True)
+        self._storage[memory_id] = record
+        self._index_metadata(record)
+        self._shard_record(record)
+        self._hash_record(record)
+        return memory_id
+
+    def _rows_of_ids(self, ids: np.ndarray) -> np.ndarray:
+        """Rows of the given ids, in the same order (unknown ids dropped)"""
+        size = len(self._index)
+        # Ids are assigned in row order, so row_ids is sorted
+        rows = np.searchsorted(self._row_ids[:size], ids)
+        found = rows < size
+        rows, ids = rows[found], ids[found]
+        return rows[self._row_ids[rows] == ids]
+
+    def _user_rows(self, user_id: Optional[str]) -> Optional[np.ndarray]:
+        """Ascending rows of one user's shard (None = no user scope)"""
+        if not user_id:
+            return None
+        ids = self._user_ids(user_id)
+        return self._rows_of_ids(np.fromiter(ids, dtype=np.int64, count=len(ids)))
+
+    def _scoped_mask(
+        self,
+        include_archived: bool,
+        user_id: Optional[str],
+    ) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        Active mask and user scope for a search.
+
+        Returns (mask, scope): with a scope the mask is aligned with its
+        rows, otherwise with every row.
+        """
+        scope = self._user_rows(user_id)
+        if scope is not None and scope.size > len(self._index) * _DENSE_SCOPE_FRACTION:
+            mask = self._active_mask(include_archived)
+            in_scope = np.zeros(mask.size, dtype=bool)
+            in_scope[scope] = True
+            return mask & in_scope, None
+        return self._active_mask(include_archived, scope), scope
+
+    def _active_mask(self, include_archived: bool, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Rows that are not expired (and not archived unless requested).
+
+        With rows the mask is aligned with rows instead of every row.
+        """
+        selected = slice(0, len(self._index)) if rows is None else rows
+        now = datetime.now(timezone.utc).timestamp()
+        mask = self._expires[selected] > now
+        if not include_archived:
+            mask &= ~self._archived[selected]
+        return mask
+
+    def _code_mask(
+        self,
+        codes: np.ndarray,
+        table: Dict[str, int],
+        value: Any,
+        rows: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """Rows whose coded column equals value (no rows if value is unknown)"""
+        selected = slice(0, len(self._index)) if rows is None else rows
+        code = table.get(value)
+        if code is None:
+            return np.zeros(len(self._index) if rows is None else len(rows), dtype=bool)
+        return codes[selected] == code
+
+    def _rows_to_results(self, rows: np.ndarray, sims: np.ndarray) -> List[Dict[str, Any]]:
+        results = []
+        for row, similarity in zip(rows.tolist(), sims.tolist()):
+            record = self._storage[int(self._row_ids[row])]
+            results.append({
+                "id": record.id,
+                "content": record.content,
+                "memory_type": record.memory_type.value,
+                "source_type": record.source_type.value if record.source_type else None,
+                "metadata": record.metadata,
+                "created_at": record.created_at,
+                "similarity": similarity,
+            })
+        return results
+
+    async def search_similar(
+        self,
+        query_embedding: List[float],
+        memory_type: Optional[str],
+        limit: int,
+        similarity_threshold: float,
+        include_archived: bool,
+        user_id: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Search for similar memories using vector similarity.
+
+        With user_id only that user's shard of rows is masked and scored.
+        """
+        if len(self._index) == 0:
+            return []
+
+        mask, scope = self._scoped_mask(include_archived, user_id)
+        if memory_type:
+            mask &= self._code_mask(self._memory_types, _MEMORY_TYPE_CODES, memory_type, scope)
+
+        if scope is None:
+            rows, sims = self._index.search(
+                query_embedding, limit, mask=mask, similarity_threshold=similarity_threshold
+            )
+        else:
+            rows, sims = self._index.search(
+                query_embedding, limit, similarity_threshold=similarity_threshold, rows=scope[mask]
+            )
+        return self._rows_to_results(rows, sims)
+
+    async def stream_similar(
+        self,
+        query_embedding: List[float],
+        memory_type: Optional[str],
+        similarity_threshold: float,
+        include_archived: bool,
+        limit: Optional[int] = None,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+        user_id: Optional[str] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield similar memories in similarity order.
+
+        Rows are ranked once (row numbers and scores only) and converted to
+        dicts chunk_size at a time. Quantized and reduced indexes rank by
+        full-precision scores, read sequentially.
+        """
+        if len(self._index) == 0:
+            return
+
+        mask, scope = self._scoped_mask(include_archived, user_id)
+        if memory_type:
+            mask &= self._code_mask(self._memory_types, _MEMORY_TYPE_CODES, memory_type, scope)
+
+        rows, sims = self._ranked_rows(query_embedding, mask, similarity_threshold, scope)
+        async for result in self._stream_rows(rows, sims, limit, chunk_size):
+            yield result
+
+    async def _stream_rows(
+        self,
+        rows: np.ndarray,
+        sims: np.ndarray,
+        limit: Optional[int],
+        chunk_size: int,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Convert ranked rows to dicts chunk_size at a time"""
+        if limit is not None:
+            rows, sims = rows[:limit], sims[:limit]
+
+        for start in range(0, rows.size, chunk_size):
+            end = start + chunk_size
+            live = self._live_rows(rows[start:end])
+            for result in self._rows_to_results(rows[start:end][live], sims[start:end][live]):
+                yield result
+            await asyncio.sleep(0)
+
+    def _live_rows(self, rows: np.ndarray) -> np.ndarray:
+        """Mask of rows still present (rows are never removed here)"""
+        return np.ones(rows.size, dtype=bool)
+
+    def _ranked_rows(
+        self,
+        query_embedding: List[float],
+        mask: np.ndarray,
+        similarity_threshold: float,
+        scope: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Every eligible row by similarity descending (ties in row order)"""
+        if isinstance(self._index, RerankingVectorIndex):
+            score = self._index.exact_similarities
+        else:
+            score = self._index.similarities
+        if scope is None:
+            rows = np.flatnonzero(mask)
+            scores = score(query_embedding)[rows]
+        else:
+            rows = scope[mask]
+            scores = score(query_embedding, rows)
+        keep = scores >= similarity_threshold
+        rows, scores = rows[keep], scores[keep]
+        order = np.lexsort((rows, -scores))
+        return rows[order], scores[order]
+
+    async def search_hybrid(
+        self,
+        query_embedding: List[float],
+        filters: Dict[str, Any],
+        limit: int,
+    ) -> List[Dict[str, Any]]:
+        """
+        Search with vector similarity and metadata filters.
+
+        filters["user_id"] narrows every mask and the scoring to that
+        user's shard of rows.
+        """
+        if len(self._index) == 0:
+            return []
+
+        mask, scope = self._hybrid_mask(filters)
+        if scope is None:
+            rows, scores = self._index.search(query_embedding, limit, mask=mask)
+        else:
+            rows, scores = self._index.search(query_embedding, limit, rows=scope[mask])
+        return self._rows_to_results(rows, scores)
+
+    def _hybrid_mask(self, filters: Dict[str, Any]) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Mask and user scope (as in _scoped_mask) of rows matching every filter"""
+        mask, scope = self._scoped_mask(False, filters.get("user_id"))
+        if "source_type" in filters:
+            mask &= self._code_mask(
+                self._source_types, _SOURCE_TYPE_CODES, filters["source_type"], scope
+            )
+        if "memory_type" in filters:
+            mask &= self._code_mask(
+                self._memory_types, _MEMORY_TYPE_CODES, filters["memory_type"], scope
+            )
+
+        # Metadata / timestamp filters: shrink to indexed candidates, then
+        # check the (few) remaining rows exactly
+        if any(key not in ("source_type", "memory_type", "user_id") for key in filters):
+            candidate_ids = self._metadata_candidates(filters)
+            if candidate_ids is not None:
+                ids = np.fromiter(candidate_ids, dtype=np.int64, count=len(candidate_ids))
+                candidate_rows = self._rows_of_ids(ids)
+                if scope is None:
+                    candidates = np.zeros(len(self._index), dtype=bool)
+                    candidates[candidate_rows] = True
+                else:
+                    candidates = np.isin(scope, candidate_rows)
+                mask &= candidates
+
+            rows = np.flatnonzero(mask) if scope is None else scope[mask]
+            positions = np.flatnonzero(mask)
+            for position, row in zip(positions.tolist(), rows.tolist()):
+                if not self._matches_filters(self._storage[int(self._row_ids[row])], filters):
+                    mask[position] = False
+        return mask, scope
+
+    def _embedding_of(self, record: MemoryRecord, cached: bool = True) -> List[float]:
+        """The record's embedding, rebuilt from its index row if not kept"""
+        if cached and record.embedding:
+            return record.embedding
+        row = record._row
+        return (self._index.get(row) * self._norms[row]).tolist()
+
+    def get_embedding(self, memory_id: int) -> Optional[List[float]]:
+        """Get the embedding stored for a memory (original scale)"""
+        record = self._storage.get(memory_id)
+        if record is None:
+            return None
+        return self._embedding_of(record)
+
+    def measure_recall(
+        self,
+        queries: List[List[float]],
+        k: int = 10,
+    ) -> Dict[str, float]:
+        """
+        Recall@k of search against exact full-precision search.
+
+        Only active, non-archived memories are considered. Repositories
+        without quantization or a reducer search exactly and always report 1.0.
+        """
+        if not isinstance(self._index, RerankingVectorIndex):
+            return {"k": k, "queries": len(queries), "recall_at_k": 1.0, "min_recall_at_k": 1.0}
+        return self._index.measure_recall(queries, k, mask=self._active_mask(False))
+
+    def clear(self) -> None:
+        """Clear all stored memories"""
+        super().clear()
+        self._reset_index()
+
+
+class VectorizedMemoryRepository(VectorizedRepositoryBase, InMemoryRepository):
+    """
+    Vectorized repository with re-embedding and snapshot restore.
+
+    A re-embedding keeps the next model's embeddings in a shadow
+    VectorIndex with the same row numbering as the search index.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        """Same arguments as VectorizedRepositoryBase"""
+        super().__init__(*args, **kwargs)
+        # Embeddings of the next model (same rows) while a re-embedding runs
+        self._shadow: Optional[VectorIndex] = None
+        self._migrated = np.zeros(0, dtype=bool)
+        self._shadow_norms = np.zeros(0, dtype=np.float32)
+
+    async def begin_reembedding(self, dimensions: int) -> None:
+        """Allocate a shadow index with the repository's row numbering"""
+        if getattr(self._reducer, "input_dimensions", dimensions) != dimensions:
+            raise ValueError(f"The reducer does not accept {dimensions}-dimension embeddings")
+        if self._shadow is None:
+            self._shadow = VectorIndex(dimensions, max(len(self._index), 1))
+            self._migrated = np.zeros(len(self._index), dtype=bool)
+            self._shadow_norms = np.ones(len(self._index), dtype=np.float32)
+
+    def _require_shadow(self) -> VectorIndex:
+        if self._shadow is None:
+            raise RuntimeError("No re-embedding in progress")
+        return self._shadow
+
+    def _migrated_rows(self) -> np.ndarray:
+        """Migration flags aligned with every row"""
+        self._migrated = _grow(self._migrated, len(self._index), False)
+        return self._migrated[: len(self._index)]
+
+    async def unmigrated_batch(self, after_id: int, limit: int) -> List[Tuple[int, str]]:
+        """(id, content) of memories still without a shadow embedding"""
+        self._require_shadow()
+        size = len(self._index)
+        start = int(np.searchsorted(self._row_ids[:size], after_id, side="right"))
+        pending = start + np.flatnonzero(~self._migrated_rows()[start:])[:limit]
+        return [
+            (memory_id, self._storage[memory_id].content)
+            for memory_id in self._row_ids[pending].tolist()
+        ]
+
+    async def write_shadow_embeddings(self, rows: List[Tuple[int, List[float]]]) -> None:
+        """Store shadow embeddings at the rows of existing memories"""
+        shadow = self._require_shadow()
+        known = [(self._storage[i]._row, e) for i, e in rows if i in self._storage]
+        if not known:
+            return
+        targets = np.fromiter((row for row, _ in known), dtype=np.int64, count=len(known))
+        vectors = np.asarray([e for _, e in known], dtype=np.float32)
+        shadow.set_batch(targets, vectors)
+        self._migrated_rows()[targets] = True
+        self._shadow_norms = _grow(self._shadow_norms, len(self._index), 1.0)
+        self._shadow_norms[targets] = np.linalg.norm(vectors, axis=1)
+
+    async def reembedding_progress(self) -> Dict[str, int]:
+        """Migrated and total memory counts"""
+        self._require_shadow()
+        return {"migrated": int(self._migrated_rows().sum()), "total": len(self._storage)}
+
+    async def search_similar_dual(
+        self,
+        query_embedding: List[float],
+        shadow_query_embedding: List[float],
+        memory_type: Optional[str],
+        limit: int,
+        similarity_threshold: float,
+        include_archived: bool,
+        user_id: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Search scoring migrated rows against the shadow index.
+
+        Eligible rows are split by migration state and each part is scored
+        by its own matrix before one shared top-k.
+        """
+        self._require_shadow()
+        if len(self._index) == 0:
+            return []
+
+        mask, scope = self._scoped_mask(include_archived, user_id)
+        if memory_type:
+            mask &= self._code_mask(self._memory_types, _MEMORY_TYPE_CODES, memory_type, scope)
+        rows, scores = self._dual_scores(
+            np.flatnonzero(mask) if scope is None else scope[mask],
+            query_embedding, shadow_query_embedding,
+        )
+        keep = scores >= similarity_threshold
+        rows, scores = top_k(rows[keep], scores[keep], limit)
+        return self._rows_to_results(rows, scores)
+
+    async def stream_similar_dual(
+        self,
+        query_embedding: List[float],
+        shadow_query_embedding: List[float],
+        memory_type: Optional[str],
+        similarity_threshold: float,
+        include_archived: bool,
+        limit: Optional[int] = None,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+        user_id: Optional[str] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream scoring migrated rows against the shadow index"""
+        self._require_shadow()
+        if len(self._index) == 0:
+            return
+
+        mask, scope = self._scoped_mask(include_archived, user_id)
+        if memory_type:
+            mask &= self._code_mask(self._memory_types, _MEMORY_TYPE_CODES, memory_type, scope)
+        rows, sims = self._dual_scores(
+            np.flatnonzero(mask) if scope is None else scope[mask],
+            query_embedding, shadow_query_embedding,
+        )
+        keep = sims >= similarity_threshold
+        rows, sims = rows[keep], sims[keep]
+        order = np.lexsort((rows, -sims))
+        async for result in self._stream_rows(rows[order], sims[order], limit, chunk_size):
+            yield result
+
+    async def search_hybrid_dual(
+        self,
+        query_embedding: List[float],
+        shadow_query_embedding: List[float],
+        filters: Dict[str, Any],
+        limit: int,
+    ) -> List[Dict[str, Any]]:
+        """Filtered search scoring migrated rows against the shadow index"""
+        self._require_shadow()
+        if len(self._index) == 0:
+            return []
+
+        mask, scope = self._hybrid_mask(filters)
+        rows, scores = self._dual_scores(
+            np.flatnonzero(mask) if scope is None else scope[mask],
+            query_embedding, shadow_query_embedding,
+        )
+        rows, scores = top_k(rows, scores, limit)
+        return self._rows_to_results(rows, scores)
+
+    def _dual_scores(
+        self,
+        candidates: np.ndarray,
+        query_embedding: List[float],
+        shadow_query_embedding: List[float],
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Migrated candidates scored by the shadow index, the rest by the search index"""
+        migrated = self._migrated_rows()[candidates]
+        new_rows, old_rows = candidates[migrated], candidates[~migrated]
+        if isinstance(self._index, RerankingVectorIndex):
+            score = self._index.exact_similarities
+        else:
+            score = self._index.similarities
+        rows = np.concatenate([new_rows, old_rows])
+        scores = np.concatenate([
+            self._shadow.similarities(shadow_query_embedding, new_rows),
+            score(query_embedding, old_rows),
+        ]).astype(np.float32, copy=False)
+        return rows, scores
+
+    async def cutover_embeddings(self) -> bool:
+        """Rebuild the search index from the shadow index"""
+        shadow = self._require_shadow()
+        size = len(self._index)
+        if not self._migrated_rows().all():
+            return False
+
+        self._dimensions = shadow.dimensions
+        index = self._new_index(max(size, self._initial_capacity))
+        if size:
+            index.add_batch(shadow.matrix[:size])
+        self._replace_index(index)
+        self._norms = _grow(self._shadow_norms, self._norms.shape[0], 1.0)
+        if self._keep_embeddings:
+            for record in self._storage.values():
+                record.embedding = self._embedding_of(record, cached=False)
+        self._shadow = None
+        self._migrated = np.zeros(0, dtype=bool)
+        self._shadow_norms = np.zeros(0, dtype=np.float32)
+        self._embedding_generation += 1
+        return True
+
+    async def abort_reembedding(self) -> None:
+        """Drop the shadow index"""
+        self._shadow = None
+        self._migrated = np.zeros(0, dtype=bool)
+        self._shadow_norms = np.zeros(0, dtype=np.float32)
+
+    async def reembedding_state(self) -> Dict[str, Any]:
+        """Cutover count and whether a shadow index exists"""
+        return {"generation": self._embedding_generation, "migrating": self._shadow is not None}
+
+    def clear(self) -> None:
+        """Clear all stored memories"""
+        super().clear()
+        self._shadow = None
+        self._migrated = np.zeros(0, dtype=bool)
+        self._shadow_norms = np.zeros(0, dtype=np.float32)
@@ -10,6 +10,7 @@ from typing import Dict, List, Optional
 
 from pydantic import BaseModel, Field, ConfigDict
 
+from memory_store.instrumentation import Instrumentation, get_default_instrumentation
 from memory_store.models import MemoryResult
 
 from .strategy import SearchStrategy
@@ -41,8 +42,14 @@ class MetricsCollector:
     検索の性能と品質を追跡し、モニタリングのためのデータを提供します。
     """
 
-    def __init__(self):
-        """メトリクスコレクターを初期化"""
+    def __init__(self, instrumentation: Optional[Instrumentation] = None):
+        """
+        メトリクスコレクターを初期化
+
+        Args:
+            instrumentation: log_metrics の出力先（未指定時はプロセス共通）
+        """
+        self.instrumentation = instrumentation or get_default_instrumentation()
         self._metrics_history: List[SearchMetrics] = []
         self._max_history_size = 1000  # 最大履歴サイズ
 
@@ -103,20 +110,20 @@ class MetricsCollector:
         Args:
             metrics: 検索メトリクス
         """
+        if not self.instrumentation.enabled:
+            return
         query_preview = metrics.query[:50] + "..." if len(metrics.query) > 50 else metrics.query
 
-        print(
-            f"""
-        [Search Metrics]
-        Query: {query_preview}
-        Strategy: {metrics.strategy.value}
-        Total Latency: {metrics.total_latency_ms:.2f}ms
-        Results: {metrics.num_results}
-        Avg Similarity: {metrics.avg_similarity:.3f}
-        Breakdown: {metrics.search_latencies}
-        Empty Results: {metrics.empty_results}
-        Rerank Time: {metrics.rerank_time_ms:.2f}ms
-        """
+        self.instrumentation.record(
+            "retrieval",
+            metrics.total_latency_ms,
+            metrics.num_results,
+            query=query_preview,
+            strategy=metrics.strategy.value,
+            avg_similarity=round(metrics.avg_similarity, 3),
+            breakdown=metrics.search_latencies,
+            empty_results=metrics.empty_results,
+            rerank_ms=metrics.rerank_time_ms,
         )
 
     def get_statistics(self) -> Dict:
@@ -30,13 +30,16 @@ class KeywordSearcher:
         """
         self.pool = pool
 
-    async def search(self, query: str, limit: int = 10) -> List[MemoryResult]:
+    async def search(
+        self, query: str, limit: int = 10, user_id: Optional[str] = None
+    ) -> List[MemoryResult]:
         """
         キーワード検索
 
         Args:
             query: 検索クエリ
             limit: 最大返却数
+            user_id: 指定時はそのユーザーの記憶のみを検索
 
         Returns:
             List[MemoryResult]: 検索結果
@@ -47,22 +50,27 @@ class KeywordSearcher:
             return []
 
         tsquery = " | ".join(keywords)
+        params: List[Any] = [tsquery, limit]
+        user_filter = ""
+        if user_id:
+            params.append(user_id)
+            user_filter = f"\n          AND user_id = ${len(params)}"
 
-        sql = """
+        sql = f"""
         SELECT
             id, content, memory_type, source_type, metadata, created_at,
             ts_rank(content_tsvector, to_tsquery('simple', $1)) as similarity
         FROM memories
         WHERE content_tsvector @@ to_tsquery('simple', $1)
           AND (expires_at IS NULL OR expires_at > NOW())
-          AND is_archived = FALSE
+          AND is_archived = FALSE{user_filter}
         ORDER BY similarity DESC
         LIMIT $2
         """
 
         try:
             async with self.pool.acquire() as conn:
-                rows = await conn.fetch(sql, tsquery, limit)
+                rows = await conn.fetch(sql, *params)
                 return [self._row_to_memory_result(row) for row in rows]
         except Exception as e:
             print(f"Keyword search error: {e}")
@@ -140,7 +148,11 @@ class TemporalSearcher:
         self.embedding_service = embedding_service
 
     async def search(
-        self, query: str, time_range: TimeRange, limit: int = 10
+        self,
+        query: str,
+        time_range: TimeRange,
+        limit: int = 10,
+        user_id: Optional[str] = None,
     ) -> List[MemoryResult]:
         """
         時系列検索
@@ -149,14 +161,20 @@ class TemporalSearcher:
             query: 検索クエリ
             time_range: 時間範囲
             limit: 最大返却数
+            user_id: 指定時はそのユーザーの記憶のみを検索
 
         Returns:
             List[MemoryResult]: 検索結果（新しい順）
         """
         # Embedding生成
         embedding = await self.embedding_service.generate_embedding(query)
+        params: List[Any] = [embedding, time_range.start, time_range.end, limit]
+        user_filter = ""
+        if user_id:
+            params.append(user_id)
+            user_filter = f"\n          AND user_id = ${len(params)}"
 
-        sql = """
+        sql = f"""
         SELECT
             id, content, memory_type, source_type, metadata, created_at,
             1 - (embedding <=> $1::vector) as similarity
@@ -164,14 +182,14 @@ class TemporalSearcher:
         WHERE created_at >= $2
           AND created_at <= $3
           AND (expires_at IS NULL OR expires_at > NOW())
-          AND is_archived = FALSE
+          AND is_archived = FALSE{user_filter}
         ORDER BY created_at DESC, similarity DESC
         LIMIT $4
         """
 
         try:
             async with self.pool.acquire() as conn:
-                rows = await conn.fetch(sql, embedding, time_range.start, time_range.end, limit)
+                rows = await conn.fetch(sql, *params)
                 return [self._row_to_memory_result(row) for row in rows]
         except Exception as e:
             print(f"Temporal search error: {e}")
@@ -221,7 +239,12 @@ class MultiSearchExecutor:
         self.temporal_searcher = temporal_searcher
 
     async def execute(
-        self, query: str, strategy: SearchStrategy, params: SearchParams, intent: QueryIntent
+        self,
+        query: str,
+        strategy: SearchStrategy,
+        params: SearchParams,
+        intent: QueryIntent,
+        user_id: Optional[str] = None,
     ) -> Dict[str, List[MemoryResult]]:
         """
         戦略に応じて複数検索を並行実行
@@ -231,6 +254,7 @@ class MultiSearchExecutor:
             strategy: 検索戦略
             params: 検索パラメータ
             intent: クエリ意図
+            user_id: 指定時はすべての検索をそのユーザーの記憶に限定
 
         Returns:
             Dict[str, List[MemoryResult]]: {検索手法: 結果リスト}
@@ -244,19 +268,25 @@ class MultiSearchExecutor:
             SearchStrategy.HYBRID,
         ]:
             tasks["vector"] = self.memory_store.search_similar(
-                query=query, limit=params.limit, similarity_threshold=params.similarity_threshold
+                query=query,
+                limit=params.limit,
+                similarity_threshold=params.similarity_threshold,
+                user_id=user_id,
             )
 
         # キーワード検索
         if strategy in [SearchStrategy.KEYWORD_BOOST, SearchStrategy.HYBRID]:
             if self.keyword_searcher:
-                tasks["keyword"] = self.keyword_searcher.search(query=query, limit=params.limit)
+                tasks["keyword"] = self.keyword_searcher.search(
+                    query=query, limit=params.limit, user_id=user_id
+                )
 
         # 時系列検索
         if strategy == SearchStrategy.TEMPORAL and intent.time_range:
             if self.temporal_searcher:
                 tasks["temporal"] = self.temporal_searcher.search(
-                    query=query, time_range=intent.time_range, limit=params.limit
+                    query=query, time_range=intent.time_range, limit=params.limit,
+                    user_id=user_id,
                 )
             else:
                 # Temporal Searcherがない場合はベクトル検索のみ
@@ -264,6 +294,7 @@ class MultiSearchExecutor:
                     query=query,
                     limit=params.limit,
                     similarity_threshold=params.similarity_threshold,
+                    user_id=user_id,
                 )
 
         if not tasks:
@@ -12,6 +12,7 @@ from pydantic import BaseModel, Field, ConfigDict
 
 from memory_store.models import MemoryResult
 from memory_store.service import MemoryStoreService
+from memory_store.timing import collect_phases
 
 from .metrics import MetricsCollector, SearchMetrics
 from .multi_search import KeywordSearcher, MultiSearchExecutor, TemporalSearcher
@@ -27,6 +28,7 @@ class RetrievalOptions(BaseModel):
     limit: Optional[int] = Field(default=None, ge=1, le=1000)
     include_metadata_details: bool = False
     log_metrics: bool = True
+    user_id: Optional[str] = None
 
     model_config = ConfigDict(use_enum_values=False)
 
@@ -38,6 +40,7 @@ class RetrievalMetadata(BaseModel):
     query_intent: QueryIntent
     total_latency_ms: float = Field(..., ge=0)
     search_breakdown: Dict[str, float] = Field(default_factory=dict)
+    phase_breakdown: Dict[str, float] = Field(default_factory=dict)
     num_results_before_rerank: int = Field(..., ge=0)
     num_results_after_rerank: int = Field(..., ge=0)
 
@@ -120,9 +123,14 @@ class RetrievalOrchestrator:
 
         # 3. Multi-Search Executor
         search_start = time.time()
-        search_results = await self.multi_search_executor.execute(
-            query=query, strategy=strategy, params=params, intent=intent
-        )
+        with collect_phases() as phase_timings:
+            search_results = await self.multi_search_executor.execute(
+                query=query,
+                strategy=strategy,
+                params=params,
+                intent=intent,
+                user_id=options.user_id,
+            )
         search_time = time.time() - search_start
 
         # 各検索手法のレイテンシを計算（簡易版：全体時間を均等に分割）
@@ -160,6 +168,11 @@ class RetrievalOrchestrator:
             query_intent=intent,
             total_latency_ms=total_latency,
             search_breakdown=search_latencies,
+            phase_breakdown={
+                **phase_timings.as_dict(),
+                "strategy_selection": round(strategy_selection_time, 3),
+                "rerank": round(rerank_latency, 3),
+            },
             num_results_before_rerank=num_before_rerank,
             num_results_after_rerank=len(final_results),
         )
@@ -207,11 +220,18 @@ class RetrievalOrchestrator:
         stats = self.metrics_collector.get_statistics()
         percentiles = self.metrics_collector.get_latency_percentiles()
 
-        return {
+        summary = {
             "statistics": stats,
             "latency_percentiles": percentiles,
         }
 
+        # Memory Store のフェーズ別パーセンタイル（埋め込み / DB / 変換）
+        memory_store = self.multi_search_executor.memory_store
+        if isinstance(memory_store, MemoryStoreService):
+            summary["memory_store_phases"] = memory_store.get_latency_summary()
+
+        return summary
+
 
 def create_orchestrator(
     memory_store: MemoryStoreService,
@@ -16,6 +16,8 @@ project_root = Path(__file__).parent.parent
 if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
+from memory_store.vector_codec import init_vector_codec
+
 
 @pytest_asyncio.fixture(scope="function")
 async def db_pool():
@@ -51,6 +53,7 @@ async def db_pool():
         database=db_name,
         min_size=1,
         max_size=10,
+        init=init_vector_codec,
     )
     
     yield pool
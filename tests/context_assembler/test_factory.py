@@ -9,6 +9,7 @@ from context_assembler.factory import (
     get_database_url,
 )
 from context_assembler.service import ContextAssemblerService
+from memory_store.vector_codec import init_vector_codec
 
 
 def test_get_database_url_success(monkeypatch):
@@ -121,5 +122,6 @@ async def test_create_context_assembler_creates_pool_when_none():
             min_size=2,
             max_size=10,
             timeout=30,
+            init=init_vector_codec,
         )
         assert ca is not None
@@ -7,7 +7,7 @@ from datetime import datetime
 
 from context_assembler.service import ContextAssemblerService
 from context_assembler.models import ContextConfig, AssemblyOptions
-from memory_store.models import MemoryResult, MemoryType
+from memory_store.models import MemoryResult, MemoryType, SummaryLevel, SummaryNode
 from backend.app.models.message import MessageResponse, MessageType
 
 
@@ -171,6 +171,32 @@ def test_build_messages_with_session_summary(context_assembler_service):
     assert "Previous discussion about Resonant Engine" in messages[0]["content"]
 
 
+def test_build_messages_with_history_summaries(context_assembler_service):
+    """要約ツリーから取得した過去セッション要約を含むメッセージ構築"""
+    service = context_assembler_service
+
+    memory_layers = {
+        "working": [],
+        "semantic": [],
+        "session_summary": None,
+        "history_summaries": [
+            SummaryNode(
+                id=1,
+                user_id="test",
+                level=SummaryLevel.SESSION,
+                period_start=datetime(2025, 3, 4, 10),
+                period_end=datetime(2025, 3, 4, 11),
+                summary="Memory Storeの設計を議論",
+            ),
+        ],
+    }
+
+    messages = service._build_messages(memory_layers, "続きを教えて")
+
+    assert "過去のセッション要約" in messages[0]["content"]
+    assert "2025-03-04: Memory Storeの設計を議論" in messages[0]["content"]
+
+
 def test_validate_context_success(context_assembler_service):
     """コンテキスト検証成功"""
     service = context_assembler_service
@@ -0,0 +1,64 @@
+"""
+pgvector ANN index EXPLAIN tests
+
+実際のPostgreSQL (pgvector) が必要です。POSTGRES_PASSWORD を設定してください。
+"""
+
+import os
+
+import pytest
+
+from memory_store.models import VectorSearchTuning
+from memory_store.pgvector_index import PgVectorIndexManager, plan_uses_index
+from memory_store.postgres_repository import PostgresMemoryRepository
+
+pytestmark = [
+    pytest.mark.skipif(not os.getenv("POSTGRES_PASSWORD"), reason="POSTGRES_PASSWORD not set"),
+    pytest.mark.asyncio,
+]
+
+INDEX_NAME = "idx_memories_embedding"
+QUERY = [0.01] * 1536
+
+
+async def test_search_similar_uses_hnsw_index(db_pool):
+    manager = PgVectorIndexManager(db_pool)
+    indexes = {index["name"]: index["definition"] for index in await manager.list_indexes()}
+    if INDEX_NAME not in indexes or "hnsw" not in indexes[INDEX_NAME]:
+        await manager.drop_index(INDEX_NAME)
+        await manager.create_hnsw_index(name=INDEX_NAME)
+
+    repo = PostgresMemoryRepository(db_pool)
+    sql, params = repo.build_search_similar_query(QUERY, "working", 10, 0.7, False)
+    plan = await manager.explain(
+        sql, params, tuning=VectorSearchTuning(ef_search=80), disable_seqscan=True
+    )
+
+    assert plan_uses_index(plan, INDEX_NAME)
+
+
+async def test_alias_ordered_query_cannot_use_index(db_pool):
+    """旧クエリ形状（ORDER BY similarity DESC）はインデックスを使えない"""
+    manager = PgVectorIndexManager(db_pool)
+    sql = """
+        SELECT id, 1 - (embedding <=> $1::vector) AS similarity
+        FROM memories
+        WHERE archived = false AND 1 - (embedding <=> $1::vector) >= $3
+        ORDER BY similarity DESC
+        LIMIT $2
+    """
+    plan = await manager.explain(sql, [QUERY, 10, 0.7], disable_seqscan=True)
+
+    assert not plan_uses_index(plan, INDEX_NAME)
+
+
+async def test_tuned_search_runs(db_pool):
+    repo = PostgresMemoryRepository(
+        db_pool,
+        search_tuning=VectorSearchTuning(ef_search=100, overfetch_factor=3),
+    )
+    results = await repo.search_similar(QUERY, None, 5, 0.0, False)
+
+    assert len(results) <= 5
+    similarities = [r["similarity"] for r in results]
+    assert similarities == sorted(similarities, reverse=True)
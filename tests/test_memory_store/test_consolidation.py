@@ -0,0 +1,157 @@
+"""
+Unit tests for near-duplicate memory consolidation
+"""
+
+import numpy as np
+import pytest
+
+from memory_store.consolidation import ConsolidationJob, near_duplicate_clusters
+from memory_store.embedding import MockEmbeddingService
+from memory_store.models import MemoryType
+from memory_store.repository import InMemoryRepository
+from memory_store.service import MemoryStoreService
+from memory_store.vectorized_repository import VectorizedMemoryRepository
+
+
+def _near(vector, seed, scale=0.01):
+    noise = np.random.default_rng(seed).standard_normal(len(vector))
+    return (np.asarray(vector) + scale * noise).tolist()
+
+
+class TestNearDuplicateClusters:
+    """Tests for near_duplicate_clusters"""
+
+    def test_groups_near_identical_vectors(self):
+        """Test near-identical rows are linked and distinct rows are not"""
+        base = np.random.default_rng(1).standard_normal((3, 32))
+        vectors = np.asarray([
+            base[0], _near(base[0], 2), base[1], _near(base[0], 3), base[2], _near(base[2], 4),
+        ])
+        assert near_duplicate_clusters(vectors, 0.95) == [[0, 1, 3], [4, 5]]
+
+    def test_matches_brute_force(self):
+        """Test blocked search finds the same high-threshold clusters as all pairs"""
+        rng = np.random.default_rng(5)
+        centers = rng.standard_normal((40, 64))
+        vectors = np.asarray([_near(centers[i % 40], i, 0.05) for i in range(200)])
+        clusters = near_duplicate_clusters(vectors, 0.9)
+        assert sorted(map(tuple, clusters)) == [
+            tuple(range(i, 200, 40)) for i in range(40)
+        ]
+
+    def test_small_inputs(self):
+        """Test fewer than two rows produce no clusters"""
+        assert near_duplicate_clusters(np.zeros((0, 4)), 0.9) == []
+        assert near_duplicate_clusters(np.ones((1, 4)), 0.9) == []
+
+
+class TestConsolidationJob:
+    """Tests for ConsolidationJob"""
+
+    @pytest.fixture(params=["reference", "vectorized"])
+    def service(self, request):
+        repository = InMemoryRepository() if request.param == "reference" else VectorizedMemoryRepository()
+        return MemoryStoreService(
+            repository=repository,
+            embedding_service=MockEmbeddingService(dimensions=16),
+            default_similarity_threshold=0.0,
+        )
+
+    async def _insert(self, service, content, embedding, memory_type="longterm", metadata=None, user_id=None):
+        return await service.repository.insert_memory(
+            content, embedding, memory_type, None, metadata or {}, None, user_id
+        )
+
+    @pytest.mark.asyncio
+    async def test_dry_run_reports_without_changes(self, service):
+        """Test a dry run returns the plan and leaves memories untouched"""
+        base = np.random.default_rng(0).standard_normal(16).tolist()
+        a = await self._insert(service, "prefers Python", base, user_id="u1")
+        b = await self._insert(service, "prefers python", _near(base, 1), user_id="u1")
+
+        report = await ConsolidationJob(service).run(dry_run=True)
+        assert report["clusters"] == 1
+        assert report["archived"] == 1
+        assert report["scanned"] == 2
+        assert {report["report"][0]["canonical_id"], *report["report"][0]["duplicate_ids"]} == {a, b}
+        assert not (await service.repository.get_by_id(a)).is_archived
+        assert not (await service.repository.get_by_id(b)).is_archived
+
+    @pytest.mark.asyncio
+    async def test_merges_into_canonical(self, service):
+        """Test duplicates are archived and provenance lands on the canonical memory"""
+        rng = np.random.default_rng(0)
+        base = rng.standard_normal(16).tolist()
+        other = rng.standard_normal(16).tolist()
+        ids = [
+            await self._insert(service, f"prefers Python {i}", _near(base, i), metadata={"access_count": 2})
+            for i in range(3)
+        ]
+        distinct = await self._insert(service, "lives in Tokyo", other)
+        await service.repository.increment_duplicate_count(ids[1], 4)
+
+        report = await ConsolidationJob(service).run()
+        assert report["clusters"] == 1
+        assert report["archived"] == 2
+
+        canonical_id = report["report"][0]["canonical_id"]
+        canonical = await service.repository.get_by_id(canonical_id)
+        merged = sorted(set(ids) - {canonical_id})
+        assert canonical.metadata["consolidated_from"] == merged
+        assert canonical.metadata["access_count"] == 6
+        assert canonical.duplicate_count == 6
+        for memory_id in merged:
+            duplicate = await service.repository.get_by_id(memory_id)
+            assert duplicate.is_archived
+            assert duplicate.metadata["consolidated_into"] == canonical_id
+
+        rows = await service.repository.search_similar(base, None, 10, 0.9, False)
+        assert [row["id"] for row in rows] == [canonical_id]
+        assert not (await service.repository.get_by_id(distinct)).is_archived
+
+        # A second run finds nothing left to merge
+        assert (await ConsolidationJob(service).run())["clusters"] == 0
+
+    @pytest.mark.asyncio
+    async def test_keeps_users_and_types_apart(self, service):
+        """Test memories of different users or memory types are never merged"""
+        base = np.random.default_rng(0).standard_normal(16).tolist()
+        await self._insert(service, "a", base, user_id="u1")
+        await self._insert(service, "b", _near(base, 1), user_id="u2")
+        await self._insert(service, "c", _near(base, 2), memory_type="working", user_id="u1")
+        await self._insert(service, "d", _near(base, 3))
+
+        report = await ConsolidationJob(service).run()
+        assert report["users"] == 3
+        assert report["clusters"] == 0
+
+        await self._insert(service, "e", _near(base, 4), user_id="u2")
+        report = await ConsolidationJob(service).run(user_ids=["u2"])
+        assert report["users"] == 1
+        assert report["clusters"] == 1
+        assert report["report"][0]["user_id"] == "u2"
+
+    @pytest.mark.asyncio
+    async def test_max_clusters_and_truncation(self, service):
+        """Test max_clusters bounds a run and large users are reported as truncated"""
+        rng = np.random.default_rng(0)
+        for group in range(3):
+            base = rng.standard_normal(16).tolist()
+            for i in range(2):
+                await self._insert(service, f"{group}-{i}", _near(base, group * 10 + i), user_id="u1")
+
+        report = await ConsolidationJob(service).run(max_clusters=2)
+        assert report["clusters"] == 2
+        assert report["archived"] == 2
+
+        report = await ConsolidationJob(service, max_memories_per_user=2, scan_batch_size=1).run()
+        assert report["scanned"] == 2
+        assert report["truncated_users"] == ["u1"]
+        assert report["clusters"] == 0
+
+        assert (await ConsolidationJob(service).run())["clusters"] == 1
+
+    def test_rejects_invalid_threshold(self, service):
+        """Test the similarity threshold must lie in (0, 1]"""
+        with pytest.raises(ValueError):
+            ConsolidationJob(service, similarity_threshold=0.0)
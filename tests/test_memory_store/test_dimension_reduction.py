@@ -0,0 +1,114 @@
+"""
+Unit tests for PCA / prefix dimension reduction
+"""
+
+import numpy as np
+import pytest
+
+from memory_store.dimension_reduction import (
+    PCAProjection,
+    PrefixTruncation,
+    ReducedEmbeddingService,
+    ReducedVectorIndex,
+    load_reducer,
+)
+from memory_store.embedding import MockEmbeddingService
+from memory_store.vector_index import VectorIndex, normalize_rows
+
+
+def _low_rank(rows=400, dimensions=32, rank=4, seed=0):
+    rng = np.random.default_rng(seed)
+    basis, _ = np.linalg.qr(rng.standard_normal((dimensions, rank)))
+    return (rng.standard_normal((rows, rank)) @ basis.T).astype(np.float32)
+
+
+class TestReducers:
+    """Tests for PCAProjection and PrefixTruncation"""
+
+    def test_pca_preserves_low_rank_similarities(self):
+        """Test a rank-4 corpus keeps its geometry in 4 components"""
+        corpus = _low_rank()
+        projection = PCAProjection.fit(corpus, 4, sample_size=300)
+
+        assert projection.explained_variance_ratio.sum() == pytest.approx(1.0, abs=1e-3)
+        assert projection.transform(corpus).shape == (400, 4)
+        # Components are orthonormal
+        gram = projection.components @ projection.components.T
+        assert np.allclose(gram, np.eye(4), atol=1e-4)
+
+        # Same ranking as the centered full vectors the projection spans
+        centered = normalize_rows(corpus) - projection.mean
+        full = VectorIndex()
+        full.add_batch(centered)
+        reduced = VectorIndex()
+        reduced.add_batch(projection.transform(corpus))
+        assert full.search(centered[7], 5)[0].tolist() == reduced.search(
+            projection.transform_one(corpus[7]), 5
+        )[0].tolist()
+
+    def test_save_and_load(self, tmp_path):
+        """Test reducers round-trip through .npz files"""
+        projection = PCAProjection.fit(_low_rank(), 3)
+        projection.save(str(tmp_path / "pca.npz"))
+        loaded = load_reducer(str(tmp_path / "pca.npz"))
+        assert np.allclose(loaded.transform(_low_rank(seed=1)), projection.transform(_low_rank(seed=1)))
+
+        PrefixTruncation(8).save(str(tmp_path / "prefix.npz"))
+        prefix = load_reducer(str(tmp_path / "prefix.npz"))
+        assert prefix.transform_one(list(range(10))) == list(range(8))
+
+    def test_invalid_dimensions(self):
+        with pytest.raises(ValueError):
+            PCAProjection.fit(_low_rank(), 33)
+        with pytest.raises(ValueError):
+            PrefixTruncation(8).transform(np.zeros((1, 4)))
+
+
+class TestReducedVectorIndex:
+    """Tests for ReducedVectorIndex"""
+
+    def test_rerank_returns_exact_similarities(self):
+        """Test re-ranked search matches exact search with exact scores"""
+        rng = np.random.default_rng(0)
+        corpus = _low_rank() + rng.standard_normal((400, 32)).astype(np.float32) * 0.01
+        index = ReducedVectorIndex(PCAProjection.fit(corpus, 4), rerank_candidates=50)
+        index.add_batch(corpus)
+        exact = VectorIndex()
+        exact.add_batch(corpus)
+
+        rows, sims = index.search(corpus[3], 5)
+        exact_rows, exact_sims = exact.search(corpus[3], 5)
+        assert rows.tolist() == exact_rows.tolist()
+        assert sims.tolist() == pytest.approx(exact_sims.tolist(), abs=1e-5)
+        assert index.measure_recall(corpus[:10], 5)["recall_at_k"] == 1.0
+        assert index.memory_bytes() == 400 * 4 * 4
+        assert index.get(3).tolist() == pytest.approx(normalize_rows(corpus[3:4])[0].tolist())
+
+    def test_without_rerank_scores_reduced_space(self):
+        """Test rerank_candidates=0 returns reduced-space similarities"""
+        index = ReducedVectorIndex(PrefixTruncation(1), rerank_candidates=0)
+        index.add_batch(np.array([[1.0, 1.0], [1.0, -1.0], [-1.0, 0.0]]))
+
+        rows, sims = index.search([1.0, 0.0], 5, similarity_threshold=0.0)
+        assert rows.tolist() == [0, 1]
+        assert sims.tolist() == pytest.approx([1.0, 1.0])
+        assert index.exact_similarities([1.0, 0.0]).tolist() == pytest.approx(
+            [0.7071, 0.7071, -1.0], abs=1e-4
+        )
+
+
+class TestReducedEmbeddingService:
+    """Tests for ReducedEmbeddingService"""
+
+    @pytest.mark.asyncio
+    async def test_embeddings_are_reduced(self):
+        """Test single and batch embeddings pass through the reducer"""
+        inner = MockEmbeddingService(dimensions=16)
+        service = ReducedEmbeddingService(inner, PrefixTruncation(4))
+
+        assert service.get_dimensions() == 4
+        single = await service.generate_embedding("hello")
+        batch = await service.generate_embeddings(["hello", "world"])
+        assert single == pytest.approx((await inner.generate_embedding("hello"))[:4])
+        assert batch[0] == pytest.approx(single)
+        assert len(batch[1]) == 4
@@ -2,11 +2,17 @@
 Unit tests for Embedding Service
 """
 
+import numpy as np
 import pytest
+import asyncio
+from types import SimpleNamespace
+
 from memory_store.embedding import (
     MockEmbeddingService,
+    OpenAIEmbeddingService,
     EmbeddingError,
     cosine_similarity,
+    mock_embeddings,
 )
 
 
@@ -97,6 +103,212 @@ class TestMockEmbeddingService:
         """Test cache size tracking"""
         assert embedding_service.get_cache_size() == 0
 
+    @pytest.mark.asyncio
+    async def test_generate_embeddings_matches_single(self, embedding_service):
+        """Test batch embeddings equal single embeddings in input order"""
+        texts = ["呼吸のリズム", "データベース設計", "memory vector"]
+        batch = await embedding_service.generate_embeddings(texts)
+
+        embedding_service.clear_cache()
+        singles = [await embedding_service.generate_embedding(t) for t in texts]
+
+        assert batch == singles
+
+    @pytest.mark.asyncio
+    async def test_generate_embeddings_uses_cache_and_dedupes(self, embedding_service):
+        """Test batch embeddings skip cached texts and embed duplicates once"""
+        await embedding_service.generate_embedding("cached")
+        assert embedding_service.get_call_count() == 1
+
+        results = await embedding_service.generate_embeddings(["new", "cached", "new"])
+
+        assert embedding_service.get_call_count() == 2
+        assert results[0] == results[2]
+
+    @pytest.mark.asyncio
+    async def test_generate_embeddings_empty_text_error(self, embedding_service):
+        """Test batch error on empty text"""
+        with pytest.raises(EmbeddingError, match="Text cannot be empty"):
+            await embedding_service.generate_embeddings(["ok", ""])
+
+
+class TestMockEmbeddings:
+    """Tests for the vectorized mock_embeddings generator"""
+
+    def test_rows_independent_of_batch(self):
+        """Test a text's row does not depend on the rest of the batch or chunking"""
+        texts = [f"corpus document {i}" for i in range(5000)]
+        matrix = mock_embeddings(texts, 64)
+
+        assert matrix.shape == (5000, 64) and matrix.dtype == np.float32
+        assert np.allclose(np.linalg.norm(matrix, axis=1), 1.0, atol=1e-5)
+        assert np.array_equal(mock_embeddings([texts[4321]], 64)[0], matrix[4321])
+        assert np.array_equal(MockEmbeddingService(dimensions=64).embed_matrix(texts[:3]), matrix[:3])
+
+    def test_random_rows_nearly_orthogonal(self):
+        """Test keyword-free texts look like independent Gaussian directions"""
+        matrix = mock_embeddings([f"doc {i}" for i in range(400)], 1536)
+        gram = matrix @ matrix.T
+        off_diagonal = gram[~np.eye(400, dtype=bool)]
+
+        assert abs(off_diagonal.mean()) < 0.01
+        assert np.abs(off_diagonal).max() < 0.15
+
+    def test_keyword_features_and_odd_dimensions(self):
+        """Test shared keywords raise similarity and odd / tiny dimensions work"""
+        matrix = mock_embeddings(["Memory design", "memory notes", "unrelated"], 33)
+        assert matrix.shape == (3, 33)
+        assert matrix[0] @ matrix[1] > matrix[0] @ matrix[2]
+
+        assert mock_embeddings(["test"], 1).tolist() in ([[1.0]], [[-1.0]])
+        assert mock_embeddings([], 8).shape == (0, 8)
+
+
+class _FakeEmbeddingsAPI:
+    """Records embeddings.create calls and returns index-tagged vectors"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def create(self, model, input, **options):
+        inputs = [input] if isinstance(input, str) else list(input)
+        self.calls.append(inputs)
+        self.options = options
+        # Return out of order to check the service re-sorts by index
+        data = [
+            SimpleNamespace(index=i, embedding=[float(len(text)), float(i)])
+            for i, text in enumerate(inputs)
+        ]
+        return SimpleNamespace(data=list(reversed(data)))
+
+
+class TestOpenAIEmbeddingServiceBatch:
+    """Tests for OpenAIEmbeddingService.generate_embeddings"""
+
+    @pytest.fixture
+    def api(self):
+        return _FakeEmbeddingsAPI()
+
+    @pytest.fixture
+    def service(self, api):
+        service = OpenAIEmbeddingService(api_key="test", max_batch_items=2)
+        service._client = SimpleNamespace(embeddings=api)
+        return service
+
+    @pytest.mark.asyncio
+    async def test_batches_respect_item_limit(self, service, api):
+        """Test inputs are split into requests of at most max_batch_items"""
+        results = await service.generate_embeddings(["a", "bb", "ccc", "dddd", "eeeee"])
+
+        assert api.calls == [["a", "bb"], ["ccc", "dddd"], ["eeeee"]]
+        assert [r[0] for r in results] == [1.0, 2.0, 3.0, 4.0, 5.0]
+
+    @pytest.mark.asyncio
+    async def test_batches_respect_token_limit(self, api):
+        """Test inputs are split when the estimated token budget is exceeded"""
+        service = OpenAIEmbeddingService(api_key="test", max_batch_tokens=60)
+        service._client = SimpleNamespace(embeddings=api)
+
+        await service.generate_embeddings(["x" * 100, "y" * 100, "z"])
+
+        assert api.calls == [["x" * 100], ["y" * 100, "z"]]
+
+    @pytest.mark.asyncio
+    async def test_cache_and_duplicates(self, service, api):
+        """Test cached texts are not re-sent and duplicates are sent once"""
+        await service.generate_embedding("aa")
+        results = await service.generate_embeddings(["aa", "b", "b"])
+
+        assert api.calls == [["aa"], ["b"]]
+        assert results[1] == results[2]
+        assert results[0][0] == 2.0
+
+    @pytest.mark.asyncio
+    async def test_shortened_dimensions(self, api):
+        """Test dimensions is sent to the API and separates cache entries"""
+        full = OpenAIEmbeddingService(api_key="test")
+        short = OpenAIEmbeddingService(api_key="test", dimensions=256)
+        short._client = SimpleNamespace(embeddings=api)
+
+        await short.generate_embedding("aa")
+        assert api.options == {"dimensions": 256}
+        assert short.get_dimensions() == 256 and full.get_dimensions() == 1536
+        assert short._generate_cache_key("aa") != full._generate_cache_key("aa")
+
+
+class _FlakyEmbeddingsAPI(_FakeEmbeddingsAPI):
+    """Fails with the queued errors before succeeding"""
+
+    def __init__(self, errors):
+        super().__init__()
+        self.errors = list(errors)
+
+    async def create(self, model, input, **options):
+        if self.errors:
+            self.calls.append(None)
+            raise self.errors.pop(0)
+        return await super().create(model, input, **options)
+
+
+def _status_error(status, headers=None):
+    error = Exception(f"HTTP {status}")
+    error.status_code = status
+    error.response = SimpleNamespace(status_code=status, headers=headers or {})
+    return error
+
+
+class TestOpenAIEmbeddingServiceRetries:
+    """Tests for OpenAIEmbeddingService retry and rate-limit handling"""
+
+    def _service(self, api, **kwargs):
+        service = OpenAIEmbeddingService(api_key="test", retry_base_delay=0.001, **kwargs)
+        service._client = SimpleNamespace(embeddings=api)
+        return service
+
+    @pytest.mark.asyncio
+    async def test_429_honors_retry_after(self):
+        """Test a 429 pauses the limiter for Retry-After before retrying"""
+        api = _FlakyEmbeddingsAPI([_status_error(429, {"retry-after-ms": "30"})])
+        service = self._service(api)
+
+        start = asyncio.get_running_loop().time()
+        assert await service.generate_embedding("abc") == [3.0, 0.0]
+
+        assert asyncio.get_running_loop().time() - start >= 0.03
+        stats = service.get_rate_limit_stats()
+        assert stats["retries"] == 1 and stats["throttled"] == 1
+        assert stats["queue_wait_ms"]["count"] == 2
+
+    @pytest.mark.asyncio
+    async def test_client_error_not_retried(self):
+        """Test non-retryable 4xx errors fail on the first attempt"""
+        api = _FlakyEmbeddingsAPI([_status_error(400)] * 3)
+        service = self._service(api)
+
+        with pytest.raises(EmbeddingError, match="HTTP 400"):
+            await service.generate_embedding("abc")
+        assert api.calls == [None]
+
+    @pytest.mark.asyncio
+    async def test_server_errors_retried_with_backoff(self):
+        """Test transient errors are retried up to retry_count"""
+        api = _FlakyEmbeddingsAPI([_status_error(500), ConnectionError("reset")])
+        service = self._service(api, retry_count=3)
+
+        assert await service.generate_embedding("ab") == [2.0, 0.0]
+        assert service.get_rate_limit_stats()["retries"] == 2
+
+    @pytest.mark.asyncio
+    async def test_batches_share_concurrency_limit(self):
+        """Test batch requests run concurrently but within max_concurrency"""
+        api = _FakeEmbeddingsAPI()
+        service = self._service(api, max_batch_items=1, max_concurrency=2)
+
+        results = await service.generate_embeddings(["a", "bb", "ccc", "dddd"])
+
+        assert [r[0] for r in results] == [1.0, 2.0, 3.0, 4.0]
+        assert service.get_rate_limit_stats()["acquired"] == 4
+
 
 class TestCosineSimilarity:
     """Tests for cosine_similarity function"""
@@ -127,3 +339,102 @@ class TestCosineSimilarity:
         vec2 = [1.0, 2.0, 3.0]
         with pytest.raises(ValueError, match="same length"):
             cosine_similarity(vec1, vec2)
+
+
+class TestRequestCoalescing:
+    """Tests for single-flight coalescing of concurrent embedding requests"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_requests_share_one_call(self):
+        """Test concurrent calls for the same text generate once"""
+        service = MockEmbeddingService(dimensions=8, simulate_latency=True, latency_ms=10)
+
+        results = await asyncio.gather(*[service.generate_embedding("same") for _ in range(5)])
+
+        assert service.get_call_count() == 1
+        assert all(r == results[0] for r in results)
+        stats = service.get_coalescing_stats()
+        assert stats["deduplicated"] == 4
+        assert stats["inflight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_batch_joins_inflight_request(self):
+        """Test a batch awaits texts already being embedded by another caller"""
+        service = MockEmbeddingService(dimensions=8, simulate_latency=True, latency_ms=10)
+
+        single, batch = await asyncio.gather(
+            service.generate_embedding("shared"),
+            service.generate_embeddings(["shared", "other"]),
+        )
+
+        assert service.get_call_count() == 2
+        assert batch[0] == single
+
+    @pytest.mark.asyncio
+    async def test_failure_propagates_to_all_waiters(self):
+        """Test a failed leader call raises in every waiting caller"""
+        calls = []
+
+        async def failing_create(model, input):
+            calls.append(input)
+            await asyncio.sleep(0.01)
+            raise RuntimeError("rate limited")
+
+        service = OpenAIEmbeddingService(api_key="test", retry_count=1)
+        service._client = SimpleNamespace(embeddings=SimpleNamespace(create=failing_create))
+
+        results = await asyncio.gather(
+            *[service.generate_embedding("same") for _ in range(3)],
+            return_exceptions=True,
+        )
+
+        assert len(calls) == 1
+        assert all(isinstance(r, EmbeddingError) for r in results)
+
+        # Nothing is left in flight, so a later call retries
+        with pytest.raises(EmbeddingError):
+            await service.generate_embedding("same")
+        assert len(calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_cancelled_leader_does_not_cancel_waiters(self):
+        """Test a disconnected leader leaves the shared call running for followers"""
+        service = MockEmbeddingService(dimensions=8, simulate_latency=True, latency_ms=20)
+
+        leader = asyncio.create_task(service.generate_embedding("same"))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(service.generate_embeddings(["same", "other"]))
+        await asyncio.sleep(0.005)
+        leader.cancel()
+
+        embeddings = await follower
+        assert leader.cancelled()
+        assert embeddings[0] == await service.generate_embedding("same")
+        assert service.get_call_count() == 2
+        assert service.get_coalescing_stats()["inflight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_last_waiter_leaving_cancels_the_call(self):
+        """Test the shared call is cancelled once nobody awaits it"""
+        started, cancelled = asyncio.Event(), asyncio.Event()
+
+        async def slow_create(model, input):
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        service = OpenAIEmbeddingService(api_key="test", retry_count=1)
+        service._client = SimpleNamespace(embeddings=SimpleNamespace(create=slow_create))
+
+        callers = [asyncio.create_task(service.generate_embedding("same")) for _ in range(2)]
+        await started.wait()
+        callers[0].cancel()
+        await asyncio.sleep(0)
+        assert not cancelled.is_set()
+
+        callers[1].cancel()
+        await asyncio.wait_for(cancelled.wait(), 1)
+        assert service.get_coalescing_stats()["inflight"] == 0
@@ -0,0 +1,167 @@
+"""
+Unit tests for Embedding Cache
+"""
+
+import pytest
+
+from memory_store.embedding import MockEmbeddingService
+from memory_store.embedding_cache import (
+    LRUEmbeddingCache,
+    SQLiteEmbeddingStore,
+    create_embedding_cache,
+)
+
+
+class TestLRUEmbeddingCache:
+    """Tests for LRUEmbeddingCache"""
+
+    def test_hit_and_miss_stats(self):
+        """Test hits and misses are counted"""
+        cache = LRUEmbeddingCache()
+        assert cache.get("a") is None
+        cache.set("a", [1.0, 2.0])
+        assert cache.get("a") == [1.0, 2.0]
+
+        stats = cache.get_stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+
+    def test_evicts_least_recently_used(self):
+        """Test entry bound evicts the least recently used key"""
+        cache = LRUEmbeddingCache(max_entries=2)
+        cache.set("a", [1.0])
+        cache.set("b", [2.0])
+        cache.get("a")
+        cache.set("c", [3.0])
+
+        assert "a" in cache
+        assert "b" not in cache
+        assert len(cache) == 2
+        assert cache.get_stats()["evictions"] == 1
+
+    def test_byte_bound(self):
+        """Test byte bound evicts until within budget"""
+        probe = LRUEmbeddingCache()
+        probe.set("x", [0.0] * 10)
+        entry_bytes = probe.get_stats()["bytes"]
+
+        cache = LRUEmbeddingCache(max_entries=None, max_bytes=entry_bytes * 2)
+        for key in "abc":
+            cache.set(key, [0.0] * 10)
+
+        assert len(cache) == 2
+        assert cache.get_stats()["bytes"] <= entry_bytes * 2
+
+    def test_ttl_expiry(self, monkeypatch):
+        """Test entries older than the TTL are treated as misses"""
+        now = [1000.0]
+        monkeypatch.setattr("memory_store.embedding_cache.time.time", lambda: now[0])
+
+        cache = LRUEmbeddingCache(ttl_seconds=60)
+        cache.set("a", [1.0])
+        now[0] += 30
+        assert cache.get("a") == [1.0]
+        now[0] += 31
+        assert cache.get("a") is None
+        assert cache.get_stats()["expirations"] == 1
+
+
+class TestSQLiteEmbeddingStore:
+    """Tests for the persistent tier"""
+
+    def test_survives_restart(self, tmp_path):
+        """Test a new cache on the same file serves embeddings from disk"""
+        path = tmp_path / "embeddings.sqlite"
+        cache = create_embedding_cache(disk_path=path)
+        cache.set("k", [0.1, 0.2, 0.3])
+        cache.disk_store.close()
+
+        restarted = create_embedding_cache(disk_path=path)
+        assert len(restarted) == 0
+        assert restarted.get("k") == [0.1, 0.2, 0.3]
+        assert restarted.get_stats()["disk_hits"] == 1
+        assert "k" in restarted
+
+    def test_clear_clears_disk(self, tmp_path):
+        """Test clear() empties the disk tier too"""
+        store = SQLiteEmbeddingStore(tmp_path / "embeddings.sqlite")
+        cache = LRUEmbeddingCache(disk_store=store)
+        cache.set("k", [1.0])
+        cache.clear()
+
+        assert store.count() == 0
+
+    @pytest.mark.asyncio
+    async def test_clear_async_clears_disk(self, tmp_path):
+        """Test clear_async() empties both tiers"""
+        cache = create_embedding_cache(disk_path=tmp_path / "embeddings.sqlite")
+        await cache.set_many({"a": [1.0], "b": [2.0]})
+        await cache.clear_async()
+
+        assert len(cache) == 0
+        assert cache.disk_store.count() == 0
+
+    def test_get_many_beyond_parameter_limit(self, tmp_path):
+        """Test get_many() with more keys than one SQLite statement may bind"""
+        store = SQLiteEmbeddingStore(tmp_path / "embeddings.sqlite")
+        keys = [f"k{i}" for i in range(2500)]
+        store.set_many({key: [float(i)] for i, key in enumerate(keys)}, created_at=1000.0)
+
+        found = store.get_many(keys + ["missing"])
+        assert len(found) == 2500
+        assert found["k1999"] == ([1999.0], 1000.0)
+
+    def test_prune_enforces_max_rows_and_ttl(self, tmp_path):
+        """Test the disk tier drops expired rows and the oldest beyond max_rows"""
+        store = SQLiteEmbeddingStore(tmp_path / "embeddings.sqlite", max_rows=3, ttl_seconds=100, prune_every=2)
+        for i in range(5):
+            store.set(f"k{i}", [float(i)], created_at=1000.0 + i)
+        # Pruned on the 2nd and 4th write; the 5th is pending
+        assert store.count() == 4
+        assert store.prune(now=1004.0) == 1
+        assert store.get("k0") is None and store.get("k1") is None
+        assert store.get("k4") == ([4.0], 1004.0)
+
+        assert store.prune(now=1103.5) == 2
+        assert list(store.get_many(["k2", "k3", "k4"])) == ["k4"]
+
+    @pytest.mark.asyncio
+    async def test_async_batch_round_trip(self, tmp_path):
+        """Test get_many / set_many go through the disk tier"""
+        path = tmp_path / "embeddings.sqlite"
+        cache = create_embedding_cache(disk_path=path)
+        await cache.set_many({"a": [1.0], "b": [2.0]})
+        assert cache.disk_store.count() == 2
+
+        restarted = create_embedding_cache(disk_path=path)
+        assert await restarted.get_many(["a", "b", "c"]) == {"a": [1.0], "b": [2.0]}
+        stats = restarted.get_stats()
+        assert stats["disk_hits"] == 2 and stats["misses"] == 1
+        assert await restarted.get_many(["a"]) == {"a": [1.0]}
+        assert restarted.get_stats()["hits"] == 1
+
+
+class TestEmbeddingServiceCache:
+    """Tests for cache integration in embedding services"""
+
+    @pytest.mark.asyncio
+    async def test_max_cache_size_is_enforced(self):
+        """Test MockEmbeddingService keeps at most max_cache_size entries"""
+        service = MockEmbeddingService(dimensions=8, max_cache_size=3)
+        for i in range(10):
+            await service.generate_embedding(f"text {i}")
+
+        assert service.get_cache_size() == 3
+        assert service.get_cache_stats()["evictions"] == 7
+
+    @pytest.mark.asyncio
+    async def test_custom_cache(self, tmp_path):
+        """Test a disk-backed cache avoids regeneration after restart"""
+        path = tmp_path / "embeddings.sqlite"
+        first = MockEmbeddingService(dimensions=8, cache=create_embedding_cache(disk_path=path))
+        embedding = await first.generate_embedding("hot query")
+
+        second = MockEmbeddingService(dimensions=8, cache=create_embedding_cache(disk_path=path))
+        assert await second.generate_embedding("hot query") == embedding
+        assert second.get_call_count() == 0
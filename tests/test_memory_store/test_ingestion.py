@@ -0,0 +1,270 @@
+"""
+Unit tests for the write-behind ingestion queue
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from memory_store.embedding import MockEmbeddingService
+from memory_store.ingestion import IngestionQueue, IngestionQueueFull
+from memory_store.repository import InMemoryRepository
+from memory_store.service import MemoryStoreService
+
+
+class _CountingEmbeddingService(MockEmbeddingService):
+    def __init__(self):
+        super().__init__()
+        self.batch_calls = []
+
+    async def generate_embeddings(self, texts):
+        self.batch_calls.append(len(texts))
+        return await super().generate_embeddings(texts)
+
+
+class _FailingRepository(InMemoryRepository):
+    def __init__(self):
+        super().__init__()
+        self.fail = True
+
+    async def insert_memories_bulk(self, rows):
+        if self.fail:
+            raise ConnectionError("database down")
+        return await super().insert_memories_bulk(rows)
+
+
+class _PoisonRepository(InMemoryRepository):
+    def __init__(self):
+        super().__init__()
+        self.down = False
+
+    async def insert_memories_bulk(self, rows):
+        if self.down or any(row["content"] == "poison" for row in rows):
+            raise ValueError("cannot insert")
+        return await super().insert_memories_bulk(rows)
+
+
+def _item(i, user_id="u1"):
+    return {"content": f"message {i}", "memory_type": "working", "user_id": user_id}
+
+
+class TestIngestionQueue:
+    """Tests for IngestionQueue"""
+
+    @pytest.fixture
+    def embedding(self):
+        return _CountingEmbeddingService()
+
+    @pytest.fixture
+    def service(self, embedding):
+        return MemoryStoreService(repository=InMemoryRepository(), embedding_service=embedding)
+
+    @pytest.mark.asyncio
+    async def test_size_trigger_flushes_full_batches(self, service, embedding):
+        """Test reaching batch_size flushes one batch embed + bulk insert"""
+        queue = IngestionQueue(service, batch_size=4, flush_interval=60.0)
+        queue.start()
+        for i in range(9):
+            queue.enqueue(_item(i))
+        await asyncio.sleep(0.05)
+
+        assert embedding.batch_calls == [4, 4]
+        assert len(queue) == 1
+        assert len(service.repository.get_all()) == 8
+
+        await queue.stop()
+        assert len(queue) == 0
+        assert [r.content for r in service.repository.get_all()][-1] == "message 8"
+
+    @pytest.mark.asyncio
+    async def test_interval_flushes_partial_batch(self, service):
+        """Test a partial batch is saved after flush_interval"""
+        queue = IngestionQueue(service, batch_size=100, flush_interval=0.02)
+        queue.start()
+        queue.enqueue(_item(1))
+        await asyncio.sleep(0.1)
+
+        stats = queue.get_stats()
+        assert stats["depth"] == 0
+        assert stats["saved"] == 1 and stats["batches"] == 1
+        assert service.repository.get_all()[0].user_id == "u1"
+        await queue.stop()
+
+    @pytest.mark.asyncio
+    async def test_spool_survives_restart(self, service, tmp_path):
+        """Test unacknowledged items are replayed by the next queue"""
+        spool = str(tmp_path / "ingest.spool")
+        first = IngestionQueue(service, batch_size=2, spool_path=spool)
+        for i in range(5):
+            first.enqueue(_item(i))
+        assert await first.flush() == 2
+        # Crash: the queue is dropped without stop()
+
+        with open(spool, "a", encoding="utf-8") as f:
+            f.write('{"seq": 99, "ts": 0, "item": {"cont')
+
+        second = IngestionQueue(service, batch_size=2, spool_path=spool)
+        assert [item.content for item in second.pending_items()] == [
+            "message 2", "message 3", "message 4"
+        ]
+        assert second.get_stats()["recovered"] == 3
+        assert second.enqueue(_item(5)) == 6
+
+        assert await second.drain() == 4
+        assert len(service.repository.get_all()) == 6
+        assert second.get_stats()["spool_bytes"] == 0
+        await second.stop()
+
+        third = IngestionQueue(service, spool_path=spool)
+        assert len(third) == 0
+        await third.stop()
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_keeps_items(self, tmp_path):
+        """Test a failing insert leaves the batch queued for retry"""
+        repository = _FailingRepository()
+        service = MemoryStoreService(repository=repository, embedding_service=MockEmbeddingService())
+        queue = IngestionQueue(service, batch_size=2, spool_path=str(tmp_path / "spool"))
+        queue.enqueue(_item(1))
+        queue.enqueue(_item(2))
+
+        with pytest.raises(ConnectionError):
+            await queue.flush()
+        stats = queue.get_stats()
+        assert stats["depth"] == 2 and stats["failed_flushes"] == 1
+        assert stats["lag_seconds"] >= 0.0
+
+        repository.fail = False
+        assert await queue.flush() == 2
+        await queue.stop()
+
+    @pytest.mark.asyncio
+    async def test_max_pending(self, service):
+        """Test enqueue refuses items beyond max_pending"""
+        queue = IngestionQueue(service, max_pending=1)
+        queue.enqueue(_item(1))
+        with pytest.raises(IngestionQueueFull):
+            queue.enqueue(_item(2))
+
+    @pytest.mark.asyncio
+    async def test_poison_item_is_dead_lettered(self, tmp_path):
+        """Test a batch failing max_attempts times is split and its bad item set aside"""
+        repository = _PoisonRepository()
+        service = MemoryStoreService(repository=repository, embedding_service=MockEmbeddingService())
+        spool = str(tmp_path / "spool")
+        queue = IngestionQueue(service, batch_size=3, spool_path=spool, max_attempts=2)
+        queue.enqueue(_item(1))
+        queue.enqueue({"content": "poison", "memory_type": "working"})
+        queue.enqueue(_item(2))
+        queue.enqueue(_item(3))
+
+        with pytest.raises(ValueError):
+            await queue.flush()
+        assert await queue.flush() == 2
+        assert [r.content for r in repository.get_all()] == ["message 1", "message 2"]
+        assert queue.get_stats()["dead_lettered"] == 1
+
+        with open(f"{spool}.dead", encoding="utf-8") as f:
+            dead = [json.loads(line) for line in f]
+        assert [(d["seq"], d["item"]["content"]) for d in dead] == [(2, "poison")]
+        assert "cannot insert" in dead[0]["error"]
+
+        # Later items are no longer blocked, and nothing is replayed after a restart
+        assert await queue.flush() == 1
+        await queue.stop()
+        assert len(IngestionQueue(service, spool_path=spool)) == 0
+
+    @pytest.mark.asyncio
+    async def test_outage_is_not_dead_lettered(self, tmp_path):
+        """Test a batch whose every item fails stays queued"""
+        repository = _PoisonRepository()
+        repository.down = True
+        service = MemoryStoreService(repository=repository, embedding_service=MockEmbeddingService())
+        queue = IngestionQueue(service, batch_size=2, spool_path=str(tmp_path / "spool"), max_attempts=1)
+        queue.enqueue(_item(1))
+        queue.enqueue(_item(2))
+
+        for _ in range(3):
+            with pytest.raises(ValueError):
+                await queue.flush()
+        assert len(queue) == 2 and queue.get_stats()["dead_lettered"] == 0
+
+        repository.down = False
+        assert await queue.flush() == 2
+        await queue.stop()
+
+    @pytest.mark.asyncio
+    async def test_outage_during_isolation_acks_saved_items(self, tmp_path):
+        """Test items saved before an outage are acked, not inserted again on retry"""
+        repository = _PoisonRepository()
+        service = MemoryStoreService(repository=repository, embedding_service=MockEmbeddingService())
+        spool = str(tmp_path / "spool")
+        queue = IngestionQueue(service, batch_size=3, spool_path=spool, max_attempts=1)
+        for i in range(1, 4):
+            queue.enqueue(_item(i))
+
+        original_save = queue._save
+
+        async def save(batch):
+            if len(batch) > 1:
+                raise ValueError("batch too large")
+            await original_save(batch)
+            # The store goes down right after the first single-item save
+            repository.down = True
+
+        queue._save = save
+        with pytest.raises(ValueError):
+            await queue.flush()
+        assert len(queue) == 2 and queue.get_stats()["dead_lettered"] == 0
+
+        repository.down = False
+        queue._save = original_save
+        assert await queue.flush() == 2
+        assert [r.content for r in repository.get_all()] == ["message 1", "message 2", "message 3"]
+        await queue.stop()
+        assert len(IngestionQueue(service, spool_path=spool)) == 0
+
+    @pytest.mark.asyncio
+    async def test_invalid_spool_entry_is_dead_lettered_and_replayed(self, service, tmp_path):
+        """Test recovery skips entries that fail validation instead of crashing"""
+        spool = str(tmp_path / "spool")
+        with open(spool, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"seq": 1, "ts": 0, "item": _item(1)}) + "\n")
+            f.write(json.dumps({"seq": 2, "ts": 0, "item": {"content": "x", "memory_type": "bogus"}}) + "\n")
+            f.write(json.dumps({"seq": 3, "ts": 0, "item": _item(3)}) + "\n")
+
+        queue = IngestionQueue(service, spool_path=spool)
+        assert [item.content for item in queue.pending_items()] == ["message 1", "message 3"]
+        assert queue.get_stats()["dead_lettered"] == 1
+
+        # Invalid lines stay in the dead-letter file; valid ones are re-queued
+        with open(f"{spool}.dead", "a", encoding="utf-8") as f:
+            f.write(json.dumps({"seq": 9, "ts": 0, "item": _item(9), "error": "x"}) + "\n")
+        assert queue.replay_dead_letters() == 1
+        assert queue.pending_items()[-1].content == "message 9"
+        with open(f"{spool}.dead", encoding="utf-8") as f:
+            assert len(f.readlines()) == 1
+        await queue.stop()
+
+    @pytest.mark.asyncio
+    async def test_spool_compaction_keeps_items_enqueued_meanwhile(self, service, tmp_path):
+        """Test items enqueued while the spool is rewritten off-loop are not lost"""
+        spool = str(tmp_path / "spool")
+        queue = IngestionQueue(service, batch_size=1, spool_path=spool)
+        queue.enqueue(_item(1))
+        write_spool_file = queue._write_spool_file
+
+        def write_and_enqueue(entries):
+            path = write_spool_file(entries)
+            queue.enqueue(_item(2))
+            return path
+
+        queue._write_spool_file = write_and_enqueue
+        assert await queue.flush() == 1
+        queue._write_spool_file = write_spool_file
+        # Crash: the queue is dropped without stop()
+
+        recovered = IngestionQueue(service, spool_path=spool)
+        assert [item.content for item in recovered.pending_items()] == ["message 2"]
+        await recovered.stop()
@@ -0,0 +1,124 @@
+"""
+Unit tests for memory store instrumentation
+"""
+
+import logging
+
+import pytest
+
+from memory_store.embedding import MockEmbeddingService
+from memory_store.instrumentation import (
+    Instrumentation,
+    InstrumentationEvent,
+    InstrumentationSink,
+    LoggingSink,
+    RingBufferSink,
+)
+from memory_store.models import MemoryType
+from memory_store.repository import InMemoryRepository
+from memory_store.service import MemoryStoreService
+
+
+class _FailingSink(InstrumentationSink):
+    def emit(self, event: InstrumentationEvent) -> None:
+        raise RuntimeError("sink down")
+
+
+class TestInstrumentation:
+    """Tests for Instrumentation and sinks"""
+
+    def test_disabled_without_sinks(self):
+        """Test record() is a no-op without active sinks"""
+        instrumentation = Instrumentation()
+        assert instrumentation.enabled is False
+        instrumentation.record("save", 1.0)
+
+    def test_ring_buffer_keeps_latest(self):
+        """Test the ring buffer is bounded and filters by operation"""
+        sink = RingBufferSink(capacity=3)
+        instrumentation = Instrumentation([sink])
+        for i in range(5):
+            instrumentation.record("save" if i % 2 else "search", float(i), result_count=i)
+
+        assert len(sink) == 3
+        assert [e.latency_ms for e in sink.events()] == [2.0, 3.0, 4.0]
+        assert [e.latency_ms for e in sink.events("save")] == [3.0]
+
+    def test_sampling(self):
+        """Test sample_rate keeps roughly that fraction of events"""
+        sink = RingBufferSink(capacity=10000)
+        instrumentation = Instrumentation([sink], sample_rate=0.1, seed=7)
+        for _ in range(2000):
+            instrumentation.record("search", 1.0)
+
+        assert 120 < len(sink) < 280
+        assert instrumentation.get_stats()["dropped_by_sampling"] == 2000 - len(sink)
+
+    def test_invalid_sample_rate(self):
+        """Test sample_rate outside [0, 1] is rejected"""
+        with pytest.raises(ValueError):
+            Instrumentation(sample_rate=1.5)
+
+    def test_failing_sink_does_not_propagate(self):
+        """Test a failing sink does not stop other sinks"""
+        sink = RingBufferSink()
+        instrumentation = Instrumentation([_FailingSink(), sink])
+        instrumentation.record("save", 1.0)
+        assert len(sink) == 1
+
+    def test_logging_sink_inactive_when_logger_disabled(self, caplog):
+        """Test a disabled logger makes the logging sink inactive"""
+        test_logger = logging.getLogger("tests.instrumentation")
+        instrumentation = Instrumentation([LoggingSink(test_logger, logging.DEBUG)])
+
+        test_logger.setLevel(logging.INFO)
+        assert instrumentation.enabled is False
+
+        with caplog.at_level(logging.DEBUG, logger="tests.instrumentation"):
+            instrumentation.record("save", 1.5, result_count=1, db_ms=0.5)
+        assert caplog.records[0].instrumentation["db_ms"] == 0.5
+        assert "save latency=1.50ms" in caplog.records[0].getMessage()
+
+
+class TestServiceInstrumentation:
+    """Tests for MemoryStoreService events"""
+
+    @pytest.fixture
+    def sink(self):
+        return RingBufferSink()
+
+    @pytest.fixture
+    def service(self, sink):
+        return MemoryStoreService(
+            repository=InMemoryRepository(),
+            embedding_service=MockEmbeddingService(),
+            instrumentation=Instrumentation([sink]),
+        )
+
+    @pytest.mark.asyncio
+    async def test_save_and_search_events(self, service, sink):
+        """Test save and search emit events with the embedding / db split"""
+        memory_id = await service.save_memory("Test content", MemoryType.LONGTERM)
+        await service.search_similar("Test content", similarity_threshold=0.0)
+        await service.save_memories_bulk([
+            {"content": "A", "memory_type": "longterm"},
+            {"content": "B", "memory_type": "longterm"},
+        ])
+
+        save, search, bulk = sink.events()
+        assert save.operation == "save"
+        assert save.attributes["memory_id"] == memory_id
+        assert search.operation == "search_similar"
+        assert search.result_count == 1
+        assert search.attributes["query"] == "Test content"
+        assert bulk.operation == "bulk_save"
+        assert bulk.result_count == 2
+        for event in (save, search, bulk):
+            assert event.embedding_ms is not None and event.db_ms is not None
+            assert event.latency_ms >= event.embedding_ms + event.db_ms
+
+    @pytest.mark.asyncio
+    async def test_cleanup_event(self, service, sink):
+        """Test archiving reports the archived count"""
+        await service.cleanup_expired_working_memory()
+        assert sink.events("archive_expired")[0].result_count == 0
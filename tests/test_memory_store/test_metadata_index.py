@@ -0,0 +1,149 @@
+"""
+Unit tests for MetadataIndex
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import memory_store.repository as repository_module
+from memory_store.metadata_index import MetadataIndex
+from memory_store.models import MemoryRecord, MemoryType, SourceType
+from memory_store.repository import InMemoryRepository
+
+BASE = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _record(memory_id, tags=(), importance=0.5, source_type=None, days=0):
+    return MemoryRecord(
+        id=memory_id,
+        content=f"M{memory_id}",
+        embedding=[],
+        memory_type=MemoryType.LONGTERM,
+        source_type=SourceType(source_type) if source_type else None,
+        metadata={"tags": list(tags), "importance": importance},
+        created_at=BASE + timedelta(days=days),
+        updated_at=BASE,
+    )
+
+
+class TestMetadataIndex:
+    """Tests for MetadataIndex"""
+
+    @pytest.fixture
+    def index(self):
+        index = MetadataIndex()
+        index.add(_record(1, tags=["a"], importance=0.1, source_type="decision", days=0))
+        index.add(_record(2, tags=["a", "b"], importance=0.5, days=1))
+        index.add(_record(3, tags=["c"], importance=0.9, source_type="decision", days=2))
+        index.add(_record(4, tags=[], importance="high", days=3))
+        return index
+
+    def test_no_indexable_filters(self, index):
+        assert index.candidates({}) is None
+        assert index.candidates({"unknown": 1}) is None
+
+    def test_equality_filters(self, index):
+        assert index.candidates({"tags": ["a"]}) == {1, 2}
+        assert index.candidates({"tags": ["b", "c"]}) == {2, 3}
+        assert index.candidates({"tags": ["a"], "source_type": "decision"}) == {1}
+        assert index.candidates({"tags": ["missing"]}) == set()
+        assert index.candidates({"memory_type": "working"}) == set()
+
+    def test_range_filters(self, index):
+        assert index.candidates({"created_after": BASE + timedelta(days=1),
+                                 "created_before": BASE + timedelta(days=2)}) == {2, 3}
+        # Non-numeric importance stays a candidate for the exact check
+        assert index.candidates({"importance_min": 0.5}) == {2, 3, 4}
+
+    def test_range_not_materialized_when_larger(self, index):
+        """A range wider than the equality result is left to the exact check"""
+        assert index.candidates({"tags": ["c"], "importance_max": 1.0}) == {3}
+
+    def test_remove(self, index):
+        index.remove(2)
+        index.remove(99)
+        assert index.candidates({"tags": ["a"]}) == {1}
+        assert index.candidates({"tags": ["b"]}) == set()
+        assert index.candidates({"importance_min": 0.4, "importance_max": 0.6}) == {4}
+        assert len(index) == 3
+
+    def test_bulk_adds_merge_in_key_order(self):
+        """Test many buffered adds (and removes) leave ranges exact"""
+        index = MetadataIndex()
+        for i in range(500):
+            index.add(_record(i, days=(i * 37) % 500))
+        for i in range(0, 500, 5):
+            index.remove(i)
+        index.add(_record(1000, days=10))
+
+        result = index.candidates({"created_after": BASE + timedelta(days=100),
+                                   "created_before": BASE + timedelta(days=199)})
+        expected = {i for i in range(500) if i % 5 and 100 <= (i * 37) % 500 <= 199}
+        assert result == expected
+        assert 1000 in index.candidates({"created_before": BASE + timedelta(days=10)})
+
+    def test_non_list_tags_stay_candidates(self):
+        """Test string or unhashable tags are left to the exact `tag in tags` check"""
+        index = MetadataIndex()
+        index.add(_record(1, tags=["a"]))
+        string_tags = _record(2)
+        string_tags.metadata["tags"] = "alpha"
+        index.add(string_tags)
+        index.add(_record(3, tags=[["a"], "b"]))
+        none_tags = _record(4)
+        none_tags.metadata["tags"] = None
+        index.add(none_tags)
+
+        assert index.candidates({"tags": ["a"]}) == {1, 2, 3}
+        assert index.candidates({"tags": [["a"]]}) == {2, 3}
+        index.remove(3)
+        assert index.candidates({"tags": ["b"]}) == {2}
+
+
+class TestIndexedHybridSearch:
+    """search_hybrid only scores indexed candidates"""
+
+    @pytest.mark.asyncio
+    async def test_rare_tag_scores_only_candidates(self, monkeypatch):
+        repo = InMemoryRepository()
+        for i in range(200):
+            tags = ["rare"] if i in (17, 150) else ["common"]
+            await repo.insert_memory(f"M{i}", [1.0, float(i)], "longterm", None, {"tags": tags}, None)
+
+        calls = []
+        original = repository_module.cosine_similarity
+
+        def counting(a, b):
+            calls.append(1)
+            return original(a, b)
+
+        monkeypatch.setattr(repository_module, "cosine_similarity", counting)
+        results = await repo.search_hybrid([1.0, 0.0], {"tags": ["rare"]}, 10)
+
+        assert [r["id"] for r in results] == [18, 151]
+        assert len(calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_string_tags_keep_substring_semantics(self):
+        """Test the index does not change matches for tags stored as a string"""
+        repo = InMemoryRepository()
+        await repo.insert_memory("S", [1.0, 0.0], "longterm", None, {"tags": "important"}, None)
+        await repo.insert_memory("L", [1.0, 0.0], "longterm", None, {"tags": ["port"]}, None)
+
+        results = await repo.search_hybrid([1.0, 0.0], {"tags": ["port"]}, 10)
+        assert [r["id"] for r in results] == [1, 2]
+
+    @pytest.mark.asyncio
+    async def test_index_follows_inserts_and_archiving(self):
+        repo = InMemoryRepository()
+        past = datetime.now(timezone.utc) - timedelta(hours=1)
+        await repo.insert_memory("W", [1.0, 0.0], "working", None, {"tags": ["x"]}, past)
+        await repo.search_hybrid([1.0, 0.0], {"tags": ["x"]}, 10)
+
+        await repo.insert_memory("L", [1.0, 0.0], "longterm", None, {"tags": ["x"]}, None)
+        assert await repo.archive_expired() == 1
+
+        results = await repo.search_hybrid([1.0, 0.0], {"tags": ["x"]}, 10)
+        assert [r["id"] for r in results] == [2]
+        assert repo._metadata_index.get_stats()["records"] == 1
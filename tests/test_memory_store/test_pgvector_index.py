@@ -0,0 +1,178 @@
+"""
+pgvector index management / ANN query shape tests
+"""
+
+import pytest
+
+from memory_store.models import VectorSearchTuning
+from memory_store.pgvector_index import PgVectorIndexManager, apply_search_tuning, plan_uses_index
+from memory_store.postgres_repository import PostgresMemoryRepository
+
+
+def _hnsw_plan(index_name="idx_memories_embedding"):
+    return [{
+        "Plan": {
+            "Node Type": "Limit",
+            "Plans": [{
+                "Node Type": "Index Scan",
+                "Index Name": index_name,
+                "Relation Name": "memories",
+            }],
+        }
+    }]
+
+
+class _RecordingConnection:
+    def __init__(self):
+        self.executed = []
+
+    async def execute(self, sql, *args):
+        self.executed.append((sql, args))
+
+
+class TestPlanUsesIndex:
+    def test_detects_nested_index_scan(self):
+        assert plan_uses_index(_hnsw_plan()) is True
+        assert plan_uses_index(_hnsw_plan(), "idx_memories_embedding") is True
+
+    def test_other_index_name(self):
+        assert plan_uses_index(_hnsw_plan(), "idx_other") is False
+
+    def test_seq_scan(self):
+        plan = [{"Plan": {"Node Type": "Sort", "Plans": [{"Node Type": "Seq Scan"}]}}]
+        assert plan_uses_index(plan) is False
+
+
+class TestSearchTuning:
+    @pytest.mark.asyncio
+    async def test_apply_sets_local_config(self):
+        conn = _RecordingConnection()
+        await apply_search_tuning(conn, VectorSearchTuning(ef_search=100, probes=10))
+
+        settings = {args[0]: args[1] for _, args in conn.executed}
+        assert settings == {"hnsw.ef_search": "100", "ivfflat.probes": "10"}
+        assert all("set_config($1, $2, true)" in sql for sql, _ in conn.executed)
+
+    @pytest.mark.asyncio
+    async def test_apply_none_is_noop(self):
+        conn = _RecordingConnection()
+        await apply_search_tuning(conn, None)
+        assert conn.executed == []
+
+    def test_rejects_invalid_identifier(self):
+        with pytest.raises(ValueError):
+            PgVectorIndexManager(pool=None, table="memories; DROP TABLE memories")
+
+
+class TestSearchQueryShape:
+    def test_orders_by_distance_operator(self):
+        repo = PostgresMemoryRepository(pool=None)
+        sql, params = repo.build_search_similar_query([0.1, 0.2], None, 5, 0.7, False)
+
+        assert "ORDER BY embedding <=> $1::vector" in sql
+        assert "ORDER BY similarity" not in sql
+        assert "archived = false" in sql
+        assert params[1:4] == [5, 0.7, 5]
+
+    def test_include_archived_drops_filter(self):
+        repo = PostgresMemoryRepository(pool=None)
+        sql, _ = repo.build_search_similar_query([0.1], None, 5, 0.7, True)
+        assert "archived" not in sql
+
+    def test_filters_and_overfetch(self):
+        repo = PostgresMemoryRepository(
+            pool=None, search_tuning=VectorSearchTuning(overfetch_factor=4)
+        )
+        sql, params = repo.build_search_similar_query([0.1], "working", 5, 0.7, False, "u1")
+
+        assert params == [[0.1], 20, 0.7, 5, "working", "u1"]
+        assert "memory_type = $5" in sql
+        assert "user_id = $6" in sql
+
+    def test_hybrid_orders_by_distance_operator(self):
+        repo = PostgresMemoryRepository(pool=None)
+        sql, params = repo.build_search_hybrid_query(
+            [0.1], {"source_type": "intent", "user_id": "u1"}, 3
+        )
+
+        assert "ORDER BY embedding <=> $1::vector" in sql
+        assert params == [[0.1], 3, "intent", "u1"]
+
+    def test_stream_query_is_exact_and_uncapped(self):
+        repo = PostgresMemoryRepository(pool=None)
+        sql, params = repo.build_stream_similar_query([0.1], "longterm", 0.5, False)
+
+        assert "LIMIT" not in sql
+        assert "ORDER BY embedding <=> $1::vector, id" in sql
+        assert params == [[0.1], 0.5, "longterm"]
+
+        sql, params = repo.build_stream_similar_query([0.1], None, 0.5, True, limit=10)
+        assert "archived" not in sql
+        assert "LIMIT $3" in sql
+        assert params == [[0.1], 0.5, 10]
+
+    def test_dual_query_reads_both_columns(self):
+        repo = PostgresMemoryRepository(pool=None)
+        sql, params = repo.build_search_similar_dual_query(
+            [0.1], [0.2, 0.3], "working", 5, 0.7, False, "u1"
+        )
+
+        assert "ORDER BY embedding_next <=> $2::vector" in sql
+        assert "ORDER BY embedding <=> $1::vector" in sql
+        assert "UNION ALL" in sql
+        assert params == [[0.1], [0.2, 0.3], 5, 0.7, 5, "working", "u1"]
+        assert sql.count("AND memory_type = $6 AND user_id = $7") == 2
+
+    def test_dual_stream_and_hybrid_queries(self):
+        repo = PostgresMemoryRepository(pool=None)
+        sql, params = repo.build_stream_similar_dual_query(
+            [0.1], [0.2, 0.3], None, 0.5, False, limit=10, user_id="u1"
+        )
+        assert "CASE WHEN embedding_next IS NULL" in sql
+        assert "END, id" in sql
+        assert params == [[0.1], [0.2, 0.3], 0.5, "u1", 10]
+
+        sql, params = repo.build_search_hybrid_dual_query(
+            [0.1], [0.2, 0.3], {"source_type": "intent", "user_id": "u1"}, 3
+        )
+        assert "UNION ALL" in sql
+        assert params == [[0.1], [0.2, 0.3], 3, "intent", "u1"]
+        assert sql.count("AND source_type = $4 AND user_id = $5") == 2
+
+
+class _RecordingPool:
+    def __init__(self):
+        self.conn = _RecordingConnection()
+
+    def acquire(self):
+        conn = self.conn
+
+        class _Acquire:
+            async def __aenter__(self):
+                return conn
+
+            async def __aexit__(self, *exc_info):
+                return False
+
+        return _Acquire()
+
+
+class TestTenantIndexes:
+    def test_index_name_is_stable_identifier(self):
+        manager = PgVectorIndexManager(pool=None)
+        name = manager.tenant_index_name("user'; DROP TABLE memories --")
+        assert name == manager.tenant_index_name("user'; DROP TABLE memories --")
+        assert name != manager.tenant_index_name("other")
+        assert name.startswith("idx_memories_embedding_hnsw_u")
+        assert len(name) <= 63
+
+    @pytest.mark.asyncio
+    async def test_partial_index_quotes_user_id(self):
+        pool = _RecordingPool()
+        manager = PgVectorIndexManager(pool=pool)
+        name = await manager.create_tenant_index("o'brien", m=8, concurrently=False)
+
+        sql, _ = pool.conn.executed[0]
+        assert f'"{name}"' in sql
+        assert "USING hnsw" in sql and "m = 8" in sql
+        assert sql.endswith("WHERE user_id = 'o''brien'")
@@ -0,0 +1,132 @@
+"""
+Unit tests for QuantizedVectorIndex
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+from memory_store.quantized_index import (
+    FileVectorStore,
+    QuantizedVectorIndex,
+    RerankingVectorIndex,
+    quantize_rows,
+    recall_at_k,
+)
+from memory_store.vector_index import VectorIndex, normalize_rows
+
+
+class TestQuantizeRows:
+    """Tests for quantize_rows"""
+
+    def test_int8_round_trip_error(self):
+        """Test int8 codes reconstruct rows within half a quantization step"""
+        vectors = normalize_rows(np.random.default_rng(0).normal(size=(50, 128)).astype(np.float32))
+        codes, scales = quantize_rows(vectors, "int8")
+
+        assert codes.dtype == np.int8
+        assert np.abs(codes).max() == 127
+        restored = codes.astype(np.float32) * scales[:, None]
+        assert np.all(np.abs(restored - vectors) <= scales[:, None] / 2 + 1e-7)
+
+    def test_zero_vector(self):
+        """Test zero rows quantize to zero codes"""
+        codes, scales = quantize_rows(np.zeros((1, 4), dtype=np.float32), "int8")
+        assert codes.tolist() == [[0, 0, 0, 0]]
+        assert scales.tolist() == [1.0]
+
+    def test_unsupported(self):
+        with pytest.raises(ValueError):
+            quantize_rows(np.zeros((1, 4), dtype=np.float32), "int4")
+
+
+class TestQuantizedVectorIndex:
+    """Tests for QuantizedVectorIndex"""
+
+    @pytest.mark.parametrize("quantization,ratio", [("int8", 4), ("float16", 2)])
+    def test_memory_reduction(self, quantization, ratio):
+        """Test the resident matrix is 4x (int8) / 2x (float16) smaller"""
+        vectors = np.random.default_rng(1).normal(size=(200, 1536))
+        index = QuantizedVectorIndex(quantization=quantization, initial_capacity=200)
+        index.add_batch(vectors)
+
+        float32_bytes = 200 * 1536 * 4
+        assert index.memory_bytes() <= float32_bytes / ratio + 200 * 4
+
+    def test_get_returns_full_precision(self):
+        """Test get() reads from the full-precision store"""
+        index = QuantizedVectorIndex(full_precision_in_memory=True)
+        index.add([3.0, 4.0])
+        np.testing.assert_allclose(index.get(0), [0.6, 0.8], rtol=1e-7)
+
+        with pytest.raises(IndexError):
+            index.get(1)
+
+    def test_search_returns_exact_similarities(self):
+        """Test re-ranked results carry exact scores and respect mask/threshold"""
+        rng = np.random.default_rng(2)
+        vectors = rng.normal(size=(500, 64))
+        exact = VectorIndex()
+        exact.add_batch(vectors)
+        index = QuantizedVectorIndex(rerank_candidates=100)
+        index.add_batch(vectors)
+
+        query = rng.normal(size=64)
+        mask = np.arange(500) % 2 == 0
+        expected_rows, expected_sims = exact.search(query, 10, mask=mask, similarity_threshold=0.1)
+        rows, sims = index.search(query, 10, mask=mask, similarity_threshold=0.1)
+
+        assert rows.tolist() == expected_rows.tolist()
+        np.testing.assert_allclose(sims, expected_sims, atol=1e-6)
+
+    def test_measure_recall(self):
+        """Test recall@k against brute-force search"""
+        rng = np.random.default_rng(4)
+        index = QuantizedVectorIndex(rerank_candidates=10)
+        index.add_batch(rng.normal(size=(1000, 32)))
+
+        report = index.measure_recall(rng.normal(size=(20, 32)), k=10)
+        assert report["queries"] == 20
+        assert 0.5 <= report["min_recall_at_k"] <= report["recall_at_k"] <= 1.0
+
+    def test_file_store(self, tmp_path):
+        """Test the memory-mapped full-precision store"""
+        store = FileVectorStore(3, str(tmp_path / "vectors.f32"))
+        store.add_batch(np.eye(3, dtype=np.float32))
+        store.add_batch(np.ones((1, 3), dtype=np.float32))
+
+        assert len(store) == 4
+        assert store.take(np.array([3, 1])).tolist() == [[1, 1, 1], [0, 1, 0]]
+        assert (tmp_path / "vectors.f32").stat().st_size == 4 * 3 * 4
+        store.close()
+
+    def test_file_store_reopen_keeps_live_store(self, tmp_path):
+        """Test a new store on the same path does not truncate one still in use"""
+        path = str(tmp_path / "vectors.f32")
+        old = FileVectorStore(3, path)
+        old.add_batch(np.eye(3, dtype=np.float32))
+        assert old.take(np.array([2])).tolist() == [[0, 0, 1]]
+
+        new = FileVectorStore(3, path)
+        new.add_batch(np.ones((1, 3), dtype=np.float32))
+        assert old.take(np.array([0, 2])).tolist() == [[1, 0, 0], [0, 0, 1]]
+        assert (tmp_path / "vectors.f32").stat().st_size == 3 * 4
+        old.close()
+        new.close()
+        assert os.listdir(tmp_path) == ["vectors.f32"]
+
+
+def test_reranking_index_is_abstract():
+    """Test an index without a compact matrix cannot be instantiated"""
+    class Incomplete(RerankingVectorIndex):
+        def add_batch(self, vectors):
+            return range(0)
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_recall_at_k():
+    assert recall_at_k([1, 2, 3], [1, 2, 4], 3) == pytest.approx(2 / 3)
+    assert recall_at_k([], [], 5) == 1.0
@@ -0,0 +1,116 @@
+"""
+Unit tests for embedding rate limiting
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from memory_store.rate_limit import RateLimiter, TokenBucket, backoff_delay, retry_after_seconds
+from memory_store.timing import collect_phases
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def _http_error(headers):
+    error = Exception("rate limited")
+    error.response = SimpleNamespace(headers=headers, status_code=429)
+    return error
+
+
+class TestTokenBucket:
+    """Tests for TokenBucket"""
+
+    def test_reserve_queues_callers_in_order(self):
+        """Test reservations beyond the balance return increasing waits"""
+        clock = _Clock()
+        bucket = TokenBucket(per_minute=60, capacity=2, clock=clock)
+
+        assert bucket.reserve() == 0.0
+        assert bucket.reserve() == 0.0
+        assert bucket.reserve() == pytest.approx(1.0)
+        assert bucket.reserve() == pytest.approx(2.0)
+
+        clock.now += 2.0
+        assert bucket.available == pytest.approx(0.0)
+        clock.now += 10.0
+        assert bucket.available == 2  # refill is capped at capacity
+
+    def test_oversized_request_paced_at_rate(self):
+        """Test a request larger than the bucket waits for its deficit"""
+        bucket = TokenBucket(per_minute=600, clock=_Clock())
+        assert bucket.capacity == 10  # one second's worth
+        assert bucket.reserve(50) == pytest.approx(4.0)
+        assert bucket.reserve(10) == pytest.approx(5.0)
+
+
+class TestRateLimiter:
+    """Tests for RateLimiter"""
+
+    @pytest.mark.asyncio
+    async def test_concurrency_bound_and_queue_wait(self):
+        """Test at most max_concurrency requests run and waits are measured"""
+        limiter = RateLimiter(max_concurrency=2)
+        running = 0
+        peak = 0
+
+        async def request():
+            nonlocal running, peak
+            async with limiter.acquire() as wait_ms:
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+            return wait_ms
+
+        with collect_phases() as timings:
+            waits = await asyncio.gather(*(request() for _ in range(6)))
+
+        assert peak == 2
+        assert max(waits) >= 15.0
+        assert timings.get("embed_queue") > 0
+        stats = limiter.get_stats()
+        assert stats["acquired"] == 6 and stats["in_flight"] == 0 and stats["waiting"] == 0
+        assert stats["queue_wait_ms"]["count"] == 6
+
+    @pytest.mark.asyncio
+    async def test_rate_and_pause(self):
+        """Test the request budget and a 429 pause both delay acquire()"""
+        # 100 requests per second, one at a time
+        limiter = RateLimiter(requests_per_minute=6000, burst_seconds=0.01)
+        async with limiter.acquire() as first:
+            pass
+        async with limiter.acquire() as second:
+            pass
+        assert first < 5.0 and second >= 5.0
+
+        limiter.pause(0.02)
+        async with limiter.acquire() as paused:
+            pass
+        assert paused >= 15.0
+        assert limiter.get_stats()["throttled"] == 1
+
+
+class TestRetryHelpers:
+    """Tests for retry_after_seconds and backoff_delay"""
+
+    def test_retry_after_headers(self):
+        """Test retry-after-ms, seconds and HTTP-date forms"""
+        assert retry_after_seconds(_http_error({"retry-after-ms": "250"})) == 0.25
+        assert retry_after_seconds(_http_error({"retry-after": "3"})) == 3.0
+        assert retry_after_seconds(_http_error({"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"})) == 0.0
+        assert retry_after_seconds(_http_error({"retry-after": "soon"})) is None
+        assert retry_after_seconds(ValueError("no response")) is None
+
+    def test_backoff_is_jittered_and_capped(self):
+        """Test full-jitter delays stay under the capped exponential"""
+        delays = [backoff_delay(10, base=0.5, cap=2.0) for _ in range(200)]
+        assert all(0 <= d <= 2.0 for d in delays)
+        assert len(set(delays)) > 1
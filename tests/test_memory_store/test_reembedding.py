@@ -0,0 +1,207 @@
+"""
+Unit tests for the online re-embedding migration
+"""
+
+import json
+
+import pytest
+
+from memory_store.embedding import MockEmbeddingService
+from memory_store.models import MemoryType
+from memory_store.reembedding import ReembeddingMigration
+from memory_store.repository import InMemoryRepository
+from memory_store.segmented_repository import SegmentedMemoryRepository
+from memory_store.service import MemoryStoreService
+from memory_store.vectorized_repository import VectorizedMemoryRepository
+
+
+class TestReembeddingMigration:
+    """Tests for ReembeddingMigration"""
+
+    @pytest.fixture(params=["reference", "vectorized"])
+    async def service(self, request):
+        repository = InMemoryRepository() if request.param == "reference" else VectorizedMemoryRepository()
+        service = MemoryStoreService(
+            repository=repository,
+            embedding_service=MockEmbeddingService(dimensions=64),
+            default_similarity_threshold=0.0,
+        )
+        for i in range(5):
+            await service.save_memory(f"memory number {i}", MemoryType.LONGTERM)
+        return service
+
+    @pytest.mark.asyncio
+    async def test_backfill_dual_read_and_cutover(self, service):
+        """Test batches backfill, searches dual-read, and cutover switches models"""
+        new_model = MockEmbeddingService(dimensions=32)
+        migration = ReembeddingMigration(service, new_model, batch_size=2)
+
+        assert await migration.step() == 2
+        assert service.shadow_embedding_service is new_model
+        assert await migration.progress() == {"migrated": 2, "total": 5}
+
+        # Migrated memories are found through the new model's query vector
+        results = await service.search_similar("memory number 1", limit=1)
+        assert results[0].content == "memory number 1"
+        assert results[0].similarity == pytest.approx(1.0, abs=1e-5)
+        results = await service.search_similar("memory number 4", limit=1)
+        assert results[0].content == "memory number 4"
+
+        assert await migration.run() == 3
+        # Saved memories get their new-model embedding right away
+        await service.save_memory("saved during the migration", MemoryType.LONGTERM)
+        assert await migration.progress() == {"migrated": 6, "total": 6}
+        assert await migration.cutover()
+
+        assert service.embedding_service is new_model
+        assert service.shadow_embedding_service is None
+        assert migration.get_stats()["migrated"] == 5
+        results = await service.search_similar("saved during the migration", limit=1)
+        assert results[0].content == "saved during the migration"
+        assert results[0].similarity == pytest.approx(1.0, abs=1e-5)
+
+    @pytest.mark.asyncio
+    async def test_checkpoint_resumes(self, service, tmp_path):
+        """Test a new migration resumes after the checkpointed id"""
+        checkpoint = str(tmp_path / "reembed.json")
+        new_model = MockEmbeddingService(dimensions=32)
+        first = ReembeddingMigration(service, new_model, batch_size=3, checkpoint_path=checkpoint)
+        assert await first.step() == 3
+        with open(checkpoint, encoding="utf-8") as f:
+            assert json.load(f)["after_id"] == 3
+
+        second = ReembeddingMigration(service, new_model, batch_size=3, checkpoint_path=checkpoint)
+        assert second.get_stats()["after_id"] == 3
+        assert await second.run() == 2
+        assert second.get_stats()["migrated"] == 5
+        assert await second.cutover()
+        assert not (tmp_path / "reembed.json").exists()
+
+        with pytest.raises(ValueError):
+            with open(checkpoint, "w", encoding="utf-8") as f:
+                json.dump({"after_id": 1, "dimensions": 16}, f)
+            ReembeddingMigration(service, new_model, checkpoint_path=checkpoint)
+
+    @pytest.mark.asyncio
+    async def test_background_task_and_abort(self, service):
+        """Test start() backfills in the background and abort() drops the shadow"""
+        migration = ReembeddingMigration(service, MockEmbeddingService(dimensions=32), batch_size=2)
+        await migration.start()
+        assert migration.get_stats()["completed"]
+        assert migration.get_stats()["batches"] == 3
+
+        await migration.abort()
+        assert service.shadow_embedding_service is None
+        assert service.embedding_service.get_dimensions() == 64
+        results = await service.search_similar("memory number 2", limit=1)
+        assert results[0].content == "memory number 2"
+
+    @pytest.mark.asyncio
+    async def test_other_workers_dual_write_and_follow_cutover(self, service):
+        """Test a second service on the same repository follows the persisted state"""
+        new_model = MockEmbeddingService(dimensions=32)
+        worker = MemoryStoreService(
+            repository=service.repository,
+            embedding_service=service.embedding_service,
+            default_similarity_threshold=0.0,
+            next_embedding_service=new_model,
+            embedding_state_ttl=0.0,
+        )
+        await worker.save_memory("saved before the migration", MemoryType.LONGTERM)
+        assert worker.shadow_embedding_service is None
+
+        migration = ReembeddingMigration(service, new_model, batch_size=100)
+        await migration.begin()
+        memory_id = await worker.save_memory("saved by the worker", MemoryType.LONGTERM)
+        assert worker.shadow_embedding_service is new_model
+        pending = await service.repository.unmigrated_batch(0, 100)
+        assert memory_id not in [i for i, _ in pending]
+        ids = await worker.save_memories_bulk([
+            {"content": f"bulk {i}", "memory_type": "longterm"} for i in range(3)
+        ])
+        assert (await migration.progress())["migrated"] == 4
+
+        assert await migration.cutover()
+        results = await worker.search_similar("saved by the worker", limit=1)
+        assert worker.embedding_service is new_model
+        assert worker.shadow_embedding_service is None
+        assert results[0].id == memory_id
+        assert results[0].similarity == pytest.approx(1.0, abs=1e-5)
+        assert (await worker.search_similar("bulk 2", limit=1))[0].id == ids[2]
+
+        # A worker without the new model refuses to search the new embeddings
+        stale = MemoryStoreService(
+            repository=service.repository, embedding_service=MockEmbeddingService(dimensions=64)
+        )
+        stale._embedding_generation = 0
+        with pytest.raises(RuntimeError):
+            await stale.search_similar("bulk 2")
+
+    @pytest.mark.asyncio
+    async def test_stream_and_hybrid_dual_read(self, service):
+        """Test stream_similar and search_hybrid score migrated memories in the new space"""
+        new_model = MockEmbeddingService(dimensions=32)
+        migration = ReembeddingMigration(service, new_model)
+        await migration.begin()
+        assert service.shadow_embedding_service is new_model
+        # Only the new-model embedding of memory 1 matches the query
+        await service.repository.write_shadow_embeddings(
+            [(1, await new_model.generate_embedding("planted"))]
+        )
+
+        streamed = [
+            r async for r in service.stream_similar("planted", similarity_threshold=-1.0, limit=2)
+        ]
+        assert streamed[0].id == 1
+        assert streamed[0].similarity == pytest.approx(1.0, abs=1e-5)
+        assert len(streamed) == 2
+
+        results = await service.search_hybrid("planted", {"memory_type": "longterm"}, limit=1)
+        assert results[0].id == 1
+        assert results[0].similarity == pytest.approx(1.0, abs=1e-5)
+
+    @pytest.mark.asyncio
+    async def test_dimension_mismatch_refreshes_state(self, service):
+        """Test a worker whose cached state predates a cutover re-reads it and retries"""
+        new_model = MockEmbeddingService(dimensions=32)
+        workers = [
+            MemoryStoreService(
+                repository=service.repository,
+                embedding_service=service.embedding_service,
+                default_similarity_threshold=0.0,
+                next_embedding_service=new_model,
+                embedding_state_ttl=3600.0,
+            )
+            for _ in range(3)
+        ]
+        for worker in workers:
+            await worker.sync_embedding_state()
+
+        migration = ReembeddingMigration(service, new_model, batch_size=100)
+        assert await migration.run() == 5
+        assert await migration.cutover()
+
+        # Within the TTL each worker still embeds queries with the old model
+        results = await workers[0].search_similar("memory number 3", limit=1)
+        assert results[0].content == "memory number 3"
+        results = await workers[1].search_hybrid("memory number 3", {}, limit=1)
+        assert results[0].content == "memory number 3"
+        streamed = [r async for r in workers[2].stream_similar("memory number 3", limit=1)]
+        assert streamed[0].content == "memory number 3"
+        assert all(worker.embedding_service is new_model for worker in workers)
+
+    @pytest.mark.asyncio
+    async def test_unsupported_repository(self, tmp_path):
+        """Test a backend without shadow storage refuses a migration and keeps searching"""
+        service = MemoryStoreService(
+            repository=SegmentedMemoryRepository(str(tmp_path / "segments")),
+            embedding_service=MockEmbeddingService(dimensions=64),
+            default_similarity_threshold=0.0,
+        )
+        await service.save_memory("memory number 0", MemoryType.LONGTERM)
+        with pytest.raises(TypeError):
+            ReembeddingMigration(service, MockEmbeddingService(dimensions=32))
+
+        service.shadow_embedding_service = MockEmbeddingService(dimensions=32)
+        results = await service.search_similar("memory number 0", limit=1)
+        assert results[0].content == "memory number 0"
@@ -2,20 +2,43 @@
 Unit tests for Memory Repository
 """
 
+import os
+
+import numpy as np
 import pytest
 from datetime import datetime, timedelta, timezone
 
-from memory_store.repository import InMemoryRepository
+from memory_store.repository import InMemoryRepository, ReembeddableRepository, RestorableRepository
+from memory_store.segmented_repository import SegmentedMemoryRepository
+from memory_store.vectorized_repository import VectorizedMemoryRepository
+from memory_store.dedup import duplicate_key
+from memory_store.dimension_reduction import PrefixTruncation
 from memory_store.embedding import MockEmbeddingService
+from memory_store.models import MemoryType, SourceType
 
 
 class TestInMemoryRepository:
-    """Tests for InMemoryRepository"""
+    """Tests for InMemoryRepository and VectorizedMemoryRepository"""
+
+    @pytest.fixture(params=["reference", "vectorized", "int8", "reduced", "segmented"])
+    def make_repo(self, request, tmp_path):
+        """Factory for fresh repositories of the parametrized kind"""
+        def make():
+            if request.param == "reference":
+                return InMemoryRepository()
+            if request.param == "int8":
+                return VectorizedMemoryRepository(quantization="int8")
+            if request.param == "reduced":
+                return VectorizedMemoryRepository(reducer=PrefixTruncation(2))
+            if request.param == "segmented":
+                return SegmentedMemoryRepository(str(tmp_path / "segments"), segment_rows=2)
+            return VectorizedMemoryRepository()
+        return make
 
     @pytest.fixture
-    def repo(self):
-        """Create an InMemoryRepository instance"""
-        return InMemoryRepository()
+    def repo(self, make_repo):
+        """Create an in-memory repository instance"""
+        return make_repo()
 
     @pytest.fixture
     def sample_embedding(self):
@@ -152,6 +175,22 @@ class TestInMemoryRepository:
         count = await repo.archive_expired()
         assert count == 1
 
+    @pytest.mark.asyncio
+    async def test_archive_expired_in_batches(self, repo, sample_embedding):
+        """Test limit bounds each archive pass and repeated passes finish the backlog"""
+        now = datetime.now(timezone.utc)
+        for minutes in (30, 10, 20, 40, 50):
+            await repo.insert_memory(
+                f"E{minutes}", sample_embedding, "working", None, {}, now - timedelta(minutes=minutes)
+            )
+        await repo.insert_memory("Valid", sample_embedding, "working", None, {}, now + timedelta(hours=1))
+
+        assert await repo.archive_expired(limit=2) == 2
+        assert await repo.archive_expired(limit=2) == 2
+        assert await repo.archive_expired(limit=2) == 1
+        assert await repo.archive_expired() == 0
+        assert await repo.count_by_type("working") == 1
+
     @pytest.mark.asyncio
     async def test_count_by_type(self, repo, sample_embedding):
         """Test counting memories by type"""
@@ -165,6 +204,233 @@ class TestInMemoryRepository:
         assert working_count == 2
         assert longterm_count == 1
 
+    @pytest.mark.asyncio
+    async def test_counters_follow_insert_and_archive(self, repo, sample_embedding):
+        """Test maintained counters track inserts and archiving after the first lookup"""
+        past = datetime.now(timezone.utc) - timedelta(hours=1)
+        await repo.insert_memory("W1", sample_embedding, "working", None, {}, past)
+        await repo.insert_memory("L1", sample_embedding, "longterm", None, {}, None, user_id="alice")
+
+        assert await repo.get_type_counts() == {"working": 1, "longterm": 1}
+
+        await repo.insert_memory("L2", sample_embedding, "longterm", None, {}, None, user_id="bob")
+        await repo.archive_expired()
+
+        assert await repo.get_type_counts() == {"working": 0, "longterm": 2}
+        assert await repo.get_type_counts(user_id="alice") == {"working": 0, "longterm": 1}
+        stats = await repo.get_user_memory_stats("alice")
+        assert stats["active_count"] == 1
+        assert stats["archive_count"] == 1
+        assert stats["total_size_bytes"] == len("W1") + len("L1")
+        assert await repo.reconcile_counters() == 0
+
+    @pytest.mark.asyncio
+    async def test_reconcile_counters_repairs_drift(self, sample_embedding):
+        """Test reconciliation rebuilds counters after untracked mutations"""
+        repo = InMemoryRepository()
+        memory_id = await repo.insert_memory("L1", sample_embedding, "longterm", None, {}, None)
+        assert await repo.count_by_type("longterm") == 1
+
+        # Plain records are not tracked when mutated directly
+        (await repo.get_by_id(memory_id)).is_archived = True
+        assert await repo.count_by_type("longterm") == 1
+
+        assert await repo.reconcile_counters() == 2
+        assert await repo.count_by_type("longterm") == 0
+
+    @pytest.mark.asyncio
+    async def test_stream_similar_matches_search(self, repo):
+        """Test streaming yields the search_similar order without a cap"""
+        rng = np.random.default_rng(3)
+        for i in range(25):
+            memory_type = "working" if i % 4 == 0 else "longterm"
+            await repo.insert_memory(
+                f"M{i}", rng.normal(size=8).tolist(), memory_type, None, {}, None
+            )
+        query = rng.normal(size=8).tolist()
+
+        expected = await repo.search_similar(query, "longterm", 100, -1.0, False)
+        streamed = [
+            row async for row in repo.stream_similar(query, "longterm", -1.0, False, chunk_size=4)
+        ]
+        assert [r["id"] for r in streamed] == [r["id"] for r in expected]
+        assert len(streamed) == 18
+
+        limited = [row async for row in repo.stream_similar(query, None, 0.0, False, limit=3)]
+        assert [r["id"] for r in limited] == [
+            r["id"] for r in await repo.search_similar(query, None, 3, 0.0, False)
+        ]
+
+    @pytest.mark.asyncio
+    async def test_user_scoped_search(self, repo):
+        """Test user_id limits every search to that user's shard"""
+        rng = np.random.default_rng(5)
+        # Shards below a quarter of the rows are gathered, not masked
+        users = ["alice", "bob", "carol", "dave", None]
+        owners = {}
+        for i in range(30):
+            user_id = users[i % 5]
+            memory_id = await repo.insert_memory(
+                f"M{i}", rng.normal(size=8).tolist(), "longterm", None, {"tags": ["t"]}, None,
+                user_id=user_id,
+            )
+            owners[memory_id] = user_id
+        query = rng.normal(size=8).tolist()
+
+        # The shard is built on first use and then maintained on insert
+        assert {owners[r["id"]] for r in await repo.search_similar(
+            query, None, 100, -1.0, False, user_id="alice"
+        )} == {"alice"}
+        late_id = await repo.insert_memory(
+            "late", query, "longterm", None, {"tags": ["t"]}, None, user_id="alice"
+        )
+        owners[late_id] = "alice"
+
+        results = await repo.search_similar(query, None, 5, -1.0, False, user_id="alice")
+        assert results[0]["id"] == late_id
+        everything = await repo.search_similar(query, None, 100, -1.0, False)
+        assert [r["id"] for r in results] == [
+            r["id"] for r in everything if owners[r["id"]] == "alice"
+        ][:5]
+
+        streamed = [row async for row in repo.stream_similar(query, None, -1.0, False, user_id="bob")]
+        assert len(streamed) == 6
+        assert {owners[r["id"]] for r in streamed} == {"bob"}
+
+        hybrid = await repo.search_hybrid(query, {"tags": ["t"], "user_id": "bob"}, 100)
+        assert [r["id"] for r in hybrid] == [r["id"] for r in streamed]
+        dense = await repo.search_hybrid(query, {"user_id": None}, 100)
+        assert len(dense) == 31
+        assert await repo.search_similar(query, None, 10, -1.0, False, user_id="erin") == []
+
+    @pytest.mark.asyncio
+    async def test_find_duplicates(self, repo):
+        """Test content-hash lookup matches normalized content per user and type"""
+        past = datetime.now(timezone.utc) - timedelta(hours=1)
+        first = await repo.insert_memory("User said: ok", [1.0, 0.0, 0.0], "working", None, {}, past, "u1")
+        key = duplicate_key("User said:  ok\n", "working", "u1")
+
+        # The hash index is built on first use and then maintained on insert
+        found = await repo.find_duplicates([key])
+        assert found[key][0] == first
+        assert np.allclose(found[key][1], [1.0, 0.0, 0.0])
+        latest = await repo.insert_memory("User said: ok", [0.0, 1.0, 0.0], "working", None, {}, past, "u1")
+        assert (await repo.find_duplicates([key]))[key][0] == latest
+
+        misses = [
+            duplicate_key("User said: OK", "working", "u1"),
+            duplicate_key("User said: ok", "longterm", "u1"),
+            duplicate_key("User said: ok", "working", "u2"),
+        ]
+        assert await repo.find_duplicates(misses) == {}
+
+        await repo.increment_duplicate_count(latest, 2)
+        assert (await repo.get_by_id(latest)).duplicate_count == 2
+
+        # Expired rows stay reusable until they are archived
+        assert await repo.archive_expired() == 2
+        assert await repo.find_duplicates([key]) == {}
+
+    @pytest.mark.asyncio
+    async def test_reembedding_shadow_and_cutover(self, repo):
+        """Test shadow embeddings are dual-read and swapped in at cutover"""
+        if isinstance(repo, SegmentedMemoryRepository):
+            assert not isinstance(repo, ReembeddableRepository)
+            return
+
+        a = await repo.insert_memory("a", [1.0, 0.0, 0.0], "longterm", None, {}, None)
+        b = await repo.insert_memory("b", [0.0, 1.0, 0.0], "longterm", None, {}, None)
+        await repo.begin_reembedding(2)
+        assert await repo.unmigrated_batch(0, 10) == [(a, "a"), (b, "b")]
+
+        await repo.write_shadow_embeddings([(b, [1.0, 0.0]), (999, [0.0, 1.0])])
+        assert await repo.unmigrated_batch(0, 10) == [(a, "a")]
+        assert await repo.unmigrated_batch(a, 10) == []
+        assert await repo.reembedding_progress() == {"migrated": 1, "total": 2}
+
+        # b is scored in the new space, a in the old one
+        rows = await repo.search_similar_dual([0.0, 0.0, 1.0], [1.0, 0.0], None, 10, 0.5, False)
+        assert [row["id"] for row in rows] == [b]
+        assert not await repo.cutover_embeddings()
+
+        c = await repo.insert_memory("c", [0.0, 0.0, 1.0], "longterm", None, {}, None)
+        await repo.write_shadow_embeddings([(a, [0.0, 1.0]), (c, [0.6, 0.8])])
+        assert await repo.cutover_embeddings()
+
+        rows = await repo.search_similar([0.0, 1.0], None, 10, 0.5, False)
+        assert [row["id"] for row in rows] == [a, c]
+        with pytest.raises(RuntimeError):
+            await repo.reembedding_progress()
+
+    @pytest.mark.asyncio
+    async def test_export_and_restore_memory_batch(self, repo, make_repo):
+        """Test keyset export pages (archived included) restore with their ids"""
+        past = datetime.now(timezone.utc) - timedelta(hours=1)
+        a = await repo.insert_memory("a", [1.0, 0.0, 0.0], "longterm", None, {"tags": ["x"]}, None, "u1")
+        b = await repo.insert_memory("b", [0.0, 1.0, 0.0], "working", None, {}, past, "u2")
+        c = await repo.insert_memory("c", [0.0, 0.0, 1.0], "longterm", None, {}, None, "u1")
+        await repo.archive_expired()
+
+        rows, embeddings = await repo.export_memory_batch(0, 2)
+        assert [row["id"] for row in rows] == [a, b]
+        assert rows[1]["is_archived"] and rows[0]["metadata"] == {"tags": ["x"]}
+        assert embeddings.shape[0] == 2
+        assert [row["id"] for row in (await repo.export_memory_batch(a, 10, "u1"))[0]] == [c]
+        assert (await repo.export_memory_batch(c, 10))[0] == []
+
+        if isinstance(repo, SegmentedMemoryRepository):
+            assert not isinstance(repo, RestorableRepository)
+            return
+
+        target = make_repo()
+        assert await target.restore_memory_batch(rows, embeddings) == [a, b]
+        assert (await target.export_memory_batch(0, 10))[0] == rows
+        with pytest.raises(ValueError):
+            await target.restore_memory_batch(rows, embeddings)
+        assert await target.restore_memory_batch(rows[:1], embeddings[:1], preserve_ids=False) == [b + 1]
+        assert await target.search_similar([1.0, 0.0, 0.0], None, 1, 0.5, False) != []
+
+        # Saved created_at is what date filters see, also once the metadata index is built
+        assert [row["id"] for row in await target.search_hybrid([1.0, 0.0, 0.0], {"tags": ["x"]}, 10)] == [a, b + 1]
+        old = dict(rows[0], id=100, created_at=datetime(2020, 1, 1, tzinfo=timezone.utc))
+        await target.restore_memory_batch([old], embeddings[:1])
+        found = await target.search_hybrid(
+            [1.0, 0.0, 0.0], {"created_before": datetime(2021, 1, 1, tzinfo=timezone.utc)}, 10
+        )
+        assert [row["id"] for row in found] == [100]
+
+    @pytest.mark.asyncio
+    async def test_scan_and_merge_memories(self, repo):
+        """Test per-user keyset scans and merging duplicates into a canonical memory"""
+        a = await repo.insert_memory("a", [1.0, 0.0, 0.0], "longterm", None, {"tags": ["x"]}, None, "u1")
+        b = await repo.insert_memory("b", [0.0, 1.0, 0.0], "longterm", None, {}, None, "u2")
+        c = await repo.insert_memory("c", [1.0, 0.1, 0.0], "longterm", None, {}, None, "u1")
+        d = await repo.insert_memory("d", [0.0, 0.0, 1.0], "working", None, {}, None)
+        assert await repo.list_memory_users() == [None, "u1", "u2"]
+
+        page = await repo.scan_user_memories("u1", 0, 1)
+        assert [r.id for r in page] == [a]
+        assert page[0].user_id == "u1"
+        assert np.allclose(page[0].embedding, [1.0, 0.0, 0.0])
+        assert [r.id for r in await repo.scan_user_memories("u1", a, 10)] == [c]
+        assert [r.id for r in await repo.scan_user_memories(None, 0, 10)] == [d]
+
+        merged = {"tags": ["y"], "consolidated_from": [c]}
+        assert await repo.merge_memories(a, [c], merged, 3) == 1
+        canonical = await repo.get_by_id(a)
+        assert canonical.metadata == merged
+        assert canonical.duplicate_count == 3
+        duplicate = await repo.get_by_id(c)
+        assert duplicate.is_archived
+        assert duplicate.metadata["consolidated_into"] == a
+        assert [r.id for r in await repo.scan_user_memories("u1", 0, 10)] == [a]
+
+        # The canonical memory is re-indexed under its new metadata
+        rows = await repo.search_hybrid([1.0, 0.0, 0.0], {"tags": ["y"]}, 10)
+        assert [row["id"] for row in rows] == [a]
+        assert await repo.search_hybrid([1.0, 0.0, 0.0], {"tags": ["x"]}, 10) == []
+        assert await repo.merge_memories(a, [c, b + d], merged, 3) == 0
+
     @pytest.mark.asyncio
     async def test_search_hybrid_with_filters(self, repo, sample_embedding):
         """Test hybrid search with metadata filters"""
@@ -196,3 +462,197 @@ class TestInMemoryRepository:
             sample_embedding, {"tags": ["important"]}, 10
         )
         assert len(results) == 1
+
+
+class TestVectorizedMemoryRepository:
+    """Parity tests between VectorizedMemoryRepository and InMemoryRepository"""
+
+    @pytest.mark.asyncio
+    async def test_replaced_index_releases_full_precision_file(self, tmp_path):
+        """Test clear() and cutover close the old index and keep the path usable"""
+        repo = VectorizedMemoryRepository(
+            quantization="int8", full_precision_path=str(tmp_path / "full.f32")
+        )
+        a = await repo.insert_memory("a", [1.0, 0.0, 0.0], "longterm", None, {}, None)
+        old_index = repo._index
+        await repo.begin_reembedding(2)
+        await repo.write_shadow_embeddings([(a, [0.0, 1.0])])
+        assert await repo.cutover_embeddings()
+        assert old_index._full is None
+        assert repo.get_embedding(a) == [0.0, 1.0]
+
+        old_index = repo._index
+        repo.clear()
+        assert old_index._full is None
+        b = await repo.insert_memory("b", [0.6, 0.8], "longterm", None, {}, None)
+        assert repo.get_embedding(b) == pytest.approx([0.6, 0.8])
+        assert sorted(os.listdir(tmp_path)) == ["full.f32"]
+
+    @pytest.mark.asyncio
+    async def test_search_matches_in_memory_repository(self):
+        """Test vectorized search returns the same ranking as the reference"""
+        emb_service = MockEmbeddingService(dimensions=64)
+        reference = InMemoryRepository()
+        vectorized = VectorizedMemoryRepository()
+
+        past = datetime.now(timezone.utc) - timedelta(hours=1)
+        for i in range(50):
+            emb = await emb_service.generate_embedding(f"memory {i} design test")
+            memory_type = "working" if i % 3 == 0 else "longterm"
+            source_type = "decision" if i % 2 == 0 else None
+            expires_at = past if i % 7 == 0 else None
+            metadata = {"tags": ["even"] if i % 2 == 0 else ["odd"], "importance": i / 50}
+            for repo in (reference, vectorized):
+                await repo.insert_memory(
+                    f"memory {i}", emb, memory_type, source_type, metadata, expires_at
+                )
+
+        query = await emb_service.generate_embedding("design memory")
+
+        expected = await reference.search_similar(query, None, 10, -1.0, False)
+        actual = await vectorized.search_similar(query, None, 10, -1.0, False)
+        assert [r["id"] for r in actual] == [r["id"] for r in expected]
+        for a, e in zip(actual, expected):
+            assert a["similarity"] == pytest.approx(e["similarity"], abs=1e-5)
+
+        expected = await reference.search_similar(query, "working", 5, 0.0, True)
+        actual = await vectorized.search_similar(query, "working", 5, 0.0, True)
+        assert [r["id"] for r in actual] == [r["id"] for r in expected]
+
+        filters = {"source_type": "decision", "tags": ["even"], "importance_min": 0.3}
+        expected = await reference.search_hybrid(query, filters, 10)
+        actual = await vectorized.search_hybrid(query, filters, 10)
+        assert [r["id"] for r in actual] == [r["id"] for r in expected]
+
+        assert await vectorized.archive_expired() == await reference.archive_expired()
+        assert await vectorized.count_by_type("working") == await reference.count_by_type("working")
+
+    @pytest.mark.asyncio
+    async def test_dense_user_scope_matches_reference(self):
+        """Test a user owning most rows (masked, not gathered) ranks like the reference"""
+        rng = np.random.default_rng(11)
+        reference = InMemoryRepository()
+        vectorized = VectorizedMemoryRepository()
+        for i in range(40):
+            emb = rng.normal(size=16).tolist()
+            user_id = "big" if i % 5 else "small"
+            for repo in (reference, vectorized):
+                await repo.insert_memory(f"M{i}", emb, "longterm", None, {}, None, user_id=user_id)
+        query = rng.normal(size=16).tolist()
+
+        for user_id in ("big", "small"):
+            expected = await reference.search_similar(query, None, 10, -1.0, False, user_id=user_id)
+            actual = await vectorized.search_similar(query, None, 10, -1.0, False, user_id=user_id)
+            assert [r["id"] for r in actual] == [r["id"] for r in expected]
+
+    @pytest.mark.asyncio
+    async def test_expiry_heap_tracks_mutations(self):
+        """Test archive_expired follows expires_at changes and pops only due entries"""
+        repo = VectorizedMemoryRepository()
+        now = datetime.now(timezone.utc)
+        soon = await repo.insert_memory("Soon", [1.0, 0.0], "working", None, {}, now + timedelta(hours=1))
+        await repo.insert_memory("Later", [1.0, 0.0], "working", None, {}, now + timedelta(hours=2))
+
+        assert repo.next_expiry() == now + timedelta(hours=1)
+        assert await repo.archive_expired() == 0
+        assert len(repo._expiry_heap) == 2
+
+        (await repo.get_by_id(soon)).expires_at = now - timedelta(minutes=1)
+        assert await repo.archive_expired() == 1
+        assert (await repo.get_by_id(soon)).is_archived is True
+        assert len(repo._expiry_heap) == 2
+
+    @pytest.mark.asyncio
+    async def test_unrelated_mutations_and_unarchive(self):
+        """Test only expiry changes push heap entries and un-archiving re-indexes metadata"""
+        repo = VectorizedMemoryRepository()
+        now = datetime.now(timezone.utc)
+        memory_id = await repo.insert_memory(
+            "Tagged", [1.0, 0.0], "working", None, {"tags": ["keep"]}, now + timedelta(hours=1)
+        )
+        assert len(await repo.search_hybrid([1.0, 0.0], {"tags": ["keep"]}, 10)) == 1
+
+        record = await repo.get_by_id(memory_id)
+        record.source_type = SourceType.THOUGHT
+        record.expires_at = now + timedelta(hours=1)
+        assert len(repo._expiry_heap) == 1
+
+        record.is_archived = True
+        assert await repo.search_hybrid([1.0, 0.0], {"tags": ["keep"]}, 10) == []
+        record.is_archived = False
+        assert len(await repo.search_hybrid([1.0, 0.0], {"tags": ["keep"]}, 10)) == 1
+
+    @pytest.mark.asyncio
+    async def test_counters_track_record_mutations(self):
+        """Test counters follow indexed-field mutations without reconciliation"""
+        repo = VectorizedMemoryRepository()
+        memory_id = await repo.insert_memory("M", [1.0, 0.0], "working", None, {}, None)
+        assert await repo.count_by_type("working") == 1
+
+        record = await repo.get_by_id(memory_id)
+        record.memory_type = MemoryType.LONGTERM
+        record.is_archived = True
+
+        assert await repo.get_type_counts() == {"working": 0, "longterm": 0}
+        assert (await repo.get_user_memory_stats("anyone"))["archive_count"] == 1
+        assert await repo.reconcile_counters() == 0
+
+    @pytest.mark.asyncio
+    async def test_ties_keep_insertion_order(self):
+        """Test equal similarities are returned in insertion order"""
+        repo = VectorizedMemoryRepository()
+        for i in range(20):
+            await repo.insert_memory(f"M{i}", [1.0, 0.0], "longterm", None, {}, None)
+
+        results = await repo.search_similar([1.0, 0.0], None, 5, 0.0, False)
+        assert [r["id"] for r in results] == [1, 2, 3, 4, 5]
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("keep_embeddings", [True, False])
+    async def test_get_embedding_and_clear(self, keep_embeddings):
+        """Test the original embedding is returned and cleared with the repo"""
+        repo = VectorizedMemoryRepository(quantization="int8", keep_embeddings=keep_embeddings)
+        memory_id = await repo.insert_memory("M", [3.0, 4.0], "longterm", None, {}, None)
+
+        assert repo.get_embedding(memory_id) == pytest.approx([3.0, 4.0])
+        record = await repo.get_by_id(memory_id)
+        assert record.embedding == ([3.0, 4.0] if keep_embeddings else [])
+        _, embeddings = await repo.export_memory_batch(0, 10)
+        assert embeddings[0].tolist() == pytest.approx([3.0, 4.0])
+        key = duplicate_key("M", "longterm", None)
+        assert (await repo.find_duplicates([key]))[key][1] == pytest.approx([3.0, 4.0])
+
+        # Cutover brings in the new model's vectors at their own scale
+        await repo.begin_reembedding(2)
+        await repo.write_shadow_embeddings([(memory_id, [0.0, 2.0])])
+        assert await repo.cutover_embeddings()
+        assert repo.get_embedding(memory_id) == pytest.approx([0.0, 2.0])
+        assert (await repo.get_by_id(memory_id)).embedding == ([0.0, 2.0] if keep_embeddings else [])
+
+        repo.clear()
+        assert repo.get_embedding(memory_id) is None
+        assert await repo.search_similar([1.0, 0.0], None, 10, -1.0, True) == []
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("quantization", ["int8", "float16"])
+    async def test_quantized_search_matches_exact(self, quantization):
+        """Test quantized candidates with exact re-ranking keep the exact ranking"""
+        rng = np.random.default_rng(3)
+        exact = VectorizedMemoryRepository()
+        quantized = VectorizedMemoryRepository(quantization=quantization, rerank_candidates=50)
+
+        for i, emb in enumerate(rng.normal(size=(300, 64)).tolist()):
+            for repo in (exact, quantized):
+                await repo.insert_memory(f"M{i}", emb, "longterm", None, {}, None)
+
+        queries = rng.normal(size=(10, 64)).tolist()
+        for query in queries:
+            expected = await exact.search_similar(query, None, 10, -1.0, False)
+            actual = await quantized.search_similar(query, None, 10, -1.0, False)
+            assert [r["id"] for r in actual] == [r["id"] for r in expected]
+            for a, e in zip(actual, expected):
+                assert a["similarity"] == pytest.approx(e["similarity"], abs=1e-5)
+
+        recall = quantized.measure_recall(queries, k=10)
+        assert recall["recall_at_k"] == 1.0
+        assert exact.measure_recall(queries, k=10)["recall_at_k"] == 1.0
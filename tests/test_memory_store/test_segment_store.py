@@ -0,0 +1,189 @@
+"""
+Unit tests for SegmentStore and SegmentedMemoryRepository
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+from memory_store.segment_store import SegmentStoreError
+from memory_store.segmented_repository import SegmentedMemoryRepository
+
+
+async def _populate(repo, count, dimensions=8, seed=0):
+    rng = np.random.default_rng(seed)
+    ids = []
+    for i, emb in enumerate(rng.normal(size=(count, dimensions)).tolist()):
+        ids.append(await repo.insert_memory(
+            f"memory {i}",
+            emb,
+            "working" if i % 2 else "longterm",
+            "decision" if i % 3 == 0 else None,
+            {"tags": [f"t{i % 4}"], "importance": i / count},
+            None,
+            user_id="u1",
+        ))
+    return ids
+
+
+class TestSegmentedMemoryRepository:
+    """Tests for SegmentedMemoryRepository"""
+
+    @pytest.mark.asyncio
+    async def test_reopen_restores_records_and_search(self, tmp_path):
+        """Test a reopened store returns identical search results"""
+        path = str(tmp_path / "store")
+        repo = SegmentedMemoryRepository(path, segment_rows=16)
+        await _populate(repo, 50)
+        query = np.random.default_rng(9).normal(size=8).tolist()
+        expected = await repo.search_similar(query, None, 10, -1.0, False)
+        repo.close()
+
+        reopened = SegmentedMemoryRepository(path)
+        actual = await reopened.search_similar(query, None, 10, -1.0, False)
+        assert actual == expected
+
+        record = await reopened.get_by_id(expected[0]["id"])
+        assert record.user_id == "u1"
+        assert record.metadata == expected[0]["metadata"]
+        assert reopened.get_segment_stats()["segments"] == 4
+
+        new_id = await reopened.insert_memory("new", query, "longterm", None, {}, None)
+        assert new_id == 51
+
+    @pytest.mark.asyncio
+    async def test_delete_archive_and_compact(self, tmp_path):
+        """Test tombstones and archive flags survive compaction and reload"""
+        path = str(tmp_path / "store")
+        repo = SegmentedMemoryRepository(path, segment_rows=10)
+        ids = await _populate(repo, 35)
+        before = await repo.get_type_counts()
+
+        assert await repo.delete_memory(ids[0]) is True
+        assert await repo.delete_memory(ids[0]) is False
+        assert await repo.get_by_id(ids[0]) is None
+        (await repo.get_by_id(ids[1])).is_archived = True
+        after = await repo.get_type_counts()
+        assert sum(before.values()) - sum(after.values()) == 2
+        assert await repo.reconcile_counters() == 0
+
+        stats = await repo.compact()
+        assert stats == {"segments_merged": 3, "rows_written": 29, "rows_dropped": 1}
+        assert repo.get_segment_stats() == {
+            "segments": 2,
+            "sealed_segments": 1,
+            "rows": 34,
+            "tombstones": 0,
+            "archived_log": 0,
+            "update_log": 0,
+            "live_rows": 34,
+        }
+        assert len([f for f in os.listdir(path) if f.endswith(".vec")]) == 2
+
+        reopened = SegmentedMemoryRepository(path)
+        assert await reopened.get_by_id(ids[0]) is None
+        assert (await reopened.get_by_id(ids[1])).is_archived is True
+        assert await reopened.count_by_type("working") == await repo.count_by_type("working")
+        results = await reopened.search_similar([1.0] * 8, None, 50, -1.0, False)
+        assert {r["id"] for r in results} == set(ids[2:])
+
+    @pytest.mark.asyncio
+    async def test_compaction_keeps_in_memory_updates(self, tmp_path):
+        """Test record mutations held in memory are not reverted by compaction"""
+        repo = SegmentedMemoryRepository(str(tmp_path / "store"), segment_rows=4)
+        ids = await _populate(repo, 12)
+        await repo.increment_duplicate_count(ids[1], 7)
+        (await repo.get_by_id(ids[2])).metadata = {"tags": ["canonical"]}
+        await repo.delete_memory(ids[0])
+
+        assert (await repo.compact())["segments_merged"] == 2
+        assert (await repo.get_by_id(ids[1])).duplicate_count == 7
+        assert (await repo.get_by_id(ids[2])).metadata == {"tags": ["canonical"]}
+        results = await repo.search_hybrid([1.0] * 8, {"tags": ["canonical"]}, 10)
+        assert [r["id"] for r in results] == [ids[2]]
+
+        # Adopted records sync to their new rows
+        (await repo.get_by_id(ids[1])).is_archived = True
+        assert await repo.reconcile_counters() == 0
+
+    @pytest.mark.asyncio
+    async def test_duplicate_counts_and_merges_survive_reopen(self, tmp_path):
+        """Test duplicate counts and consolidation merges are persisted"""
+        path = str(tmp_path / "store")
+        repo = SegmentedMemoryRepository(path, segment_rows=4)
+        ids = await _populate(repo, 12)
+        await repo.increment_duplicate_count(ids[1], 3)
+        assert await repo.merge_memories(ids[2], [ids[6], ids[10]], {"tags": ["merged"]}, 5) == 2
+        assert repo.get_segment_stats()["update_log"] == 4
+        repo.close()
+
+        reopened = SegmentedMemoryRepository(path)
+        assert (await reopened.get_by_id(ids[1])).duplicate_count == 3
+        canonical = await reopened.get_by_id(ids[2])
+        assert (canonical.metadata, canonical.duplicate_count) == ({"tags": ["merged"]}, 5)
+        duplicate = await reopened.get_by_id(ids[6])
+        assert duplicate.is_archived and duplicate.metadata["consolidated_into"] == ids[2]
+
+        # Compaction folds the logged updates of sealed rows into the sidecar;
+        # ids[10] is in the active segment and stays in the log
+        assert (await reopened.compact())["segments_merged"] == 2
+        assert reopened.get_segment_stats()["update_log"] == 1
+        reopened.close()
+        compacted = SegmentedMemoryRepository(path)
+        assert (await compacted.get_by_id(ids[1])).duplicate_count == 3
+        assert (await compacted.get_by_id(ids[2])).metadata == {"tags": ["merged"]}
+        assert (await compacted.get_by_id(ids[10])).metadata["consolidated_into"] == ids[2]
+        results = await compacted.search_hybrid([1.0] * 8, {"tags": ["merged"]}, 10)
+        assert [r["id"] for r in results] == [ids[2]]
+
+    @pytest.mark.asyncio
+    async def test_rejected_insert_leaves_store_usable(self, tmp_path):
+        """Test an invalid insert appends no vector"""
+        repo = SegmentedMemoryRepository(str(tmp_path / "store"))
+        with pytest.raises(ValueError):
+            await repo.insert_memory("bad", [1.0] * 8, "nonsense", None, {}, None)
+        assert await repo.insert_memory("ok", [1.0] * 8, "longterm", None, {}, None) == 1
+        assert [r["id"] for r in await repo.search_similar([1.0] * 8, None, 5, 0.5, False)] == [1]
+
+    @pytest.mark.asyncio
+    async def test_read_only_worker_refresh(self, tmp_path):
+        """Test a read-only worker sees new rows after refresh()"""
+        path = str(tmp_path / "store")
+        writer = SegmentedMemoryRepository(path, segment_rows=8)
+        await _populate(writer, 5)
+
+        reader = SegmentedMemoryRepository(path, read_only=True)
+        assert len(reader.get_all()) == 5
+        with pytest.raises(SegmentStoreError):
+            await reader.insert_memory("x", [0.0] * 8, "longterm", None, {}, None)
+
+        await _populate(writer, 10, seed=1)
+        assert len(reader.get_all()) == 5
+        reader.refresh()
+        assert len(reader.get_all()) == 15
+
+    @pytest.mark.asyncio
+    async def test_torn_write_is_ignored(self, tmp_path):
+        """Test uncommitted vector bytes are dropped on reopen"""
+        path = str(tmp_path / "store")
+        repo = SegmentedMemoryRepository(path)
+        await _populate(repo, 3)
+        repo._store.append_vectors(np.ones((1, 8), dtype=np.float32))
+        repo.close()
+
+        reopened = SegmentedMemoryRepository(path)
+        assert len(reopened.get_all()) == 3
+        new_id = await reopened.insert_memory("after", [1.0] * 8, "longterm", None, {}, None)
+        assert reopened.get_embedding(new_id) == pytest.approx([8 ** -0.5] * 8)
+
+    @pytest.mark.asyncio
+    async def test_clear_removes_files(self, tmp_path):
+        """Test clear() deletes all segment files"""
+        path = str(tmp_path / "store")
+        repo = SegmentedMemoryRepository(path)
+        await _populate(repo, 3)
+
+        repo.clear()
+        assert os.listdir(path) == []
+        assert await repo.insert_memory("m", [1.0] * 8, "longterm", None, {}, None) == 1
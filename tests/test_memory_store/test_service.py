@@ -2,13 +2,15 @@
 Unit tests for Memory Store Service
 """
 
+import asyncio
+
 import pytest
 from datetime import datetime, timedelta, timezone
 
 from memory_store.service import MemoryStoreService
 from memory_store.repository import InMemoryRepository
 from memory_store.embedding import MockEmbeddingService
-from memory_store.models import MemoryType, SourceType
+from memory_store.models import DedupMode, MemoryCreate, MemoryType, SourceType
 
 
 class TestMemoryStoreService:
@@ -213,6 +215,57 @@ class TestMemoryStoreService:
         count = await service.cleanup_expired_working_memory()
         assert count >= 1
 
+    @pytest.mark.asyncio
+    async def test_cleanup_in_batches_and_background_task(self, service):
+        """Test batched cleanup and the background expiry task"""
+        past = datetime.now(timezone.utc) - timedelta(hours=1)
+        for i in range(5):
+            await service.repository.insert_memory(
+                f"Expired {i}", [0.1] * 8, "working", None, {}, past
+            )
+
+        assert await service.cleanup_expired_working_memory(batch_size=2) == 5
+
+        await service.repository.insert_memory("Expired 5", [0.1] * 8, "working", None, {}, past)
+        task = service.start_expiry_task(interval_seconds=3600, batch_size=2)
+        assert service.start_expiry_task() is task
+        for _ in range(5):
+            await asyncio.sleep(0)
+        await service.stop_expiry_task()
+
+        assert task.cancelled()
+        assert await service.repository.count_by_type("working") == 0
+
+    @pytest.mark.asyncio
+    async def test_stream_similar(self, service):
+        """Test streaming search yields MemoryResults lazily in similarity order"""
+        for i in range(12):
+            await service.save_memory(f"記憶 {i}", MemoryType.LONGTERM)
+
+        stream = service.stream_similar("記憶 3", similarity_threshold=-1.0, chunk_size=5)
+        first = await stream.__anext__()
+        assert first.content == "記憶 3"
+
+        rest = [result async for result in stream]
+        assert len(rest) == 11
+        similarities = [first.similarity] + [r.similarity for r in rest]
+        assert similarities == sorted(similarities, reverse=True)
+        assert service.get_latency_summary()["stream_similar"]["total"]["count"] == 1
+
+    @pytest.mark.asyncio
+    async def test_user_scoped_search(self, service):
+        """Test user_id scopes similar and hybrid search to one user"""
+        await service.save_memory("共有の記憶", MemoryType.LONGTERM, metadata={"tags": ["t"]})
+        await service.save_memory("Aの記憶", MemoryType.LONGTERM, user_id="a", metadata={"tags": ["t"]})
+        await service.save_memory("Bの記憶", MemoryType.LONGTERM, user_id="b", metadata={"tags": ["t"]})
+
+        results = await service.search_similar("記憶", similarity_threshold=-1.0, user_id="a")
+        assert [r.content for r in results] == ["Aの記憶"]
+
+        results = await service.search_hybrid("記憶", {"tags": ["t"]}, user_id="b")
+        assert [r.content for r in results] == ["Bの記憶"]
+        assert len(await service.search_hybrid("記憶", {"tags": ["t"]})) == 3
+
     @pytest.mark.asyncio
     async def test_get_memory_stats(self, service):
         """Test getting memory statistics"""
@@ -260,3 +313,150 @@ class TestMemoryStoreService:
         # All results should be sorted by similarity
         for i in range(len(results) - 1):
             assert results[i].similarity >= results[i + 1].similarity
+
+
+class TestSaveMemoriesBulk:
+    """Tests for MemoryStoreService.save_memories_bulk"""
+
+    @pytest.fixture
+    def repo(self):
+        return InMemoryRepository()
+
+    @pytest.fixture
+    def embedding_service(self):
+        return MockEmbeddingService()
+
+    @pytest.fixture
+    def service(self, repo, embedding_service):
+        return MemoryStoreService(repository=repo, embedding_service=embedding_service)
+
+    @pytest.mark.asyncio
+    async def test_ids_in_input_order(self, service, repo):
+        """Test bulk save returns ids matching input order"""
+        items = [
+            MemoryCreate(content=f"記憶 {i}", memory_type=MemoryType.LONGTERM)
+            for i in range(7)
+        ]
+
+        ids = await service.save_memories_bulk(items, batch_size=3)
+
+        assert len(ids) == 7
+        for i, memory_id in enumerate(ids):
+            record = await repo.get_by_id(memory_id)
+            assert record.content == f"記憶 {i}"
+
+    @pytest.mark.asyncio
+    async def test_async_iterator_of_dicts(self, service, repo):
+        """Test bulk save accepts an async iterator of plain dicts"""
+        async def stream():
+            for i in range(5):
+                yield {
+                    "content": f"line {i}",
+                    "memory_type": "working",
+                    "source_type": "thought",
+                    "metadata": {"user_id": "u1"},
+                }
+
+        ids = await service.save_memories_bulk(stream(), batch_size=2)
+
+        record = await repo.get_by_id(ids[-1])
+        assert record.source_type == SourceType.THOUGHT
+        assert record.user_id == "u1"
+        assert record.expires_at is not None  # working memory TTL applied
+
+    @pytest.mark.asyncio
+    async def test_embeddings_match_single_save(self, service, repo, embedding_service):
+        """Test bulk-saved memories are searchable like individually saved ones"""
+        await service.save_memories_bulk([
+            MemoryCreate(content="Resonant Engineは呼吸で動く", memory_type=MemoryType.LONGTERM),
+            MemoryCreate(content="データベースの設計パターン", memory_type=MemoryType.LONGTERM),
+        ])
+
+        results = await service.search_similar("呼吸", similarity_threshold=0.0)
+        assert results[0].content == "Resonant Engineは呼吸で動く"
+        assert embedding_service.get_call_count() == 3
+
+    @pytest.mark.asyncio
+    async def test_invalid_batch_size(self, service):
+        """Test batch_size must be positive"""
+        with pytest.raises(ValueError):
+            await service.save_memories_bulk([], batch_size=0)
+
+
+class TestDeduplication:
+    """Tests for content-hash deduplication on save"""
+
+    @pytest.fixture
+    def embedding_service(self):
+        return MockEmbeddingService()
+
+    @pytest.fixture
+    def service(self, embedding_service):
+        return MemoryStoreService(repository=InMemoryRepository(), embedding_service=embedding_service)
+
+    @pytest.mark.asyncio
+    async def test_reuse_embedding_skips_embedding_call(self, service, embedding_service):
+        """Test an identical memory is inserted with the existing embedding"""
+        first = await service.save_memory("User said: ok", MemoryType.WORKING, user_id="u1")
+        second = await service.save_memory(
+            " User said:  ok ", MemoryType.WORKING, user_id="u1", dedup=DedupMode.REUSE_EMBEDDING
+        )
+
+        assert second != first
+        assert embedding_service.get_call_count() == 1
+        repo = service.repository
+        assert (await repo.get_by_id(second)).embedding == (await repo.get_by_id(first)).embedding
+
+        # Another user's identical text is not a duplicate
+        await service.save_memory(
+            "User said:  ok", MemoryType.WORKING, user_id="u2", dedup=DedupMode.REUSE_EMBEDDING
+        )
+        assert embedding_service.get_call_count() == 2
+
+    @pytest.mark.asyncio
+    async def test_count_mode_bumps_existing_row(self, service, embedding_service):
+        """Test COUNT returns the existing id and increments its counter"""
+        first = await service.save_memory("User said: ok", MemoryType.WORKING, user_id="u1")
+        for _ in range(2):
+            assert await service.save_memory(
+                "User said: ok", MemoryType.WORKING, user_id="u1", dedup=DedupMode.COUNT
+            ) == first
+
+        assert len(service.repository.get_all()) == 1
+        assert (await service.repository.get_by_id(first)).duplicate_count == 2
+        assert embedding_service.get_call_count() == 1
+
+    @pytest.mark.asyncio
+    async def test_bulk_count_folds_batch_duplicates(self, service, embedding_service):
+        """Test bulk COUNT folds repeats within and across batches"""
+        existing = await service.save_memory("ok", MemoryType.WORKING, user_id="u1")
+        items = [
+            {"content": text, "memory_type": "working", "user_id": "u1"}
+            for text in ["ok", "new", "new", "other", "ok"]
+        ]
+
+        ids = await service.save_memories_bulk(items, batch_size=3, dedup=DedupMode.COUNT)
+
+        assert ids[0] == ids[4] == existing
+        assert ids[1] == ids[2]
+        assert len(set(ids)) == 3
+        assert len(service.repository.get_all()) == 3
+        assert (await service.repository.get_by_id(existing)).duplicate_count == 2
+        assert (await service.repository.get_by_id(ids[1])).duplicate_count == 1
+        # "ok" is never re-embedded; "new" and "other" once each
+        assert embedding_service.get_call_count() == 3
+
+    @pytest.mark.asyncio
+    async def test_bulk_reuse_embedding(self, service, embedding_service):
+        """Test bulk REUSE_EMBEDDING inserts every row but embeds only new content"""
+        await service.save_memory("ok", MemoryType.WORKING, user_id="u1")
+        items = [
+            MemoryCreate(content=text, memory_type=MemoryType.WORKING, user_id="u1")
+            for text in ["ok", "fresh"]
+        ]
+
+        ids = await service.save_memories_bulk(items, dedup=DedupMode.REUSE_EMBEDDING)
+
+        assert len(set(ids)) == 2
+        assert len(service.repository.get_all()) == 3
+        assert embedding_service.get_call_count() == 2
@@ -0,0 +1,250 @@
+"""
+Unit tests for columnar snapshots
+"""
+
+import os
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import numpy as np
+import pytest
+
+from memory_store.embedding import MockEmbeddingService
+from memory_store.models import MemoryType
+from memory_store.postgres_repository import PostgresMemoryRepository
+from memory_store.repository import InMemoryRepository
+from memory_store.segmented_repository import SegmentedMemoryRepository
+from memory_store.service import MemoryStoreService
+from memory_store.snapshot import MemorySnapshot, SnapshotError, SnapshotReader, SnapshotWriter
+from memory_store.vectorized_repository import VectorizedMemoryRepository
+
+
+def _service(kind="reference"):
+    repository = InMemoryRepository() if kind == "reference" else VectorizedMemoryRepository()
+    return MemoryStoreService(
+        repository=repository,
+        embedding_service=MockEmbeddingService(dimensions=16),
+        default_similarity_threshold=0.0,
+    )
+
+
+class _CopyConnection:
+    def __init__(self):
+        self.copies = []
+        self.executed = []
+
+    def transaction(self):
+        class _Transaction:
+            async def __aenter__(self):
+                return None
+
+            async def __aexit__(self, *exc_info):
+                return False
+
+        return _Transaction()
+
+    async def copy_records_to_table(self, table, columns, records):
+        self.copies.append((table, columns, list(records)))
+
+    async def execute(self, sql, *args):
+        self.executed.append(sql)
+
+
+class _CopyPool:
+    def __init__(self):
+        self.conn = _CopyConnection()
+
+    async def acquire(self):
+        return self.conn
+
+    async def release(self, conn):
+        pass
+
+
+async def _populate(service):
+    repository = service.repository
+    past = datetime.now(timezone.utc) - timedelta(hours=1)
+    ids = []
+    for i in range(7):
+        ids.append(await service.save_memory(
+            f"memory {i}", MemoryType.LONGTERM, metadata={"tags": [f"t{i % 2}"], "n": i},
+            user_id="u1" if i % 3 else "u2",
+        ))
+    ids.append(await repository.insert_memory("expired", [1.0] * 16, "working", None, {}, past, "u1"))
+    await repository.archive_expired()
+    await repository.increment_duplicate_count(ids[2], 3)
+    return ids
+
+
+class TestSnapshotFile:
+    """Tests for SnapshotWriter / SnapshotReader"""
+
+    def test_round_trip_columns_and_vector_nulls(self, tmp_path):
+        """Test typed columns, vectors and missing vectors survive a round trip"""
+        path = str(tmp_path / "t.rms")
+        rows = [
+            {"id": uuid4(), "at": datetime(2025, 1, 2, 3, tzinfo=timezone.utc), "doc": '{"a": 1}', "score": 0.5},
+            {"id": uuid4(), "at": None, "doc": {"b": [1, 2]}, "score": None},
+        ]
+        vectors = np.array([[0.25, -1.0, 3.0], [np.nan, np.nan, np.nan]], dtype=np.float32)
+        with SnapshotWriter(path) as writer:
+            table = writer.add_table(
+                "things", {"id": "uuid", "at": "timestamp", "doc": "json", "score": "float"}, "embedding"
+            )
+            writer.write_chunk(table, rows, vectors)
+            writer.write_chunk(table, rows[:1], vectors[:1])
+
+        reader = SnapshotReader(path)
+        chunks = list(reader.chunks())
+        assert [len(r) for _, r, _ in chunks] == [2, 1]
+        schema, restored, restored_vectors = chunks[0]
+        assert schema.vector_column == "embedding"
+        assert restored[0] == {**rows[0], "doc": {"a": 1}}
+        assert restored[1] == rows[1]
+        assert np.array_equal(restored_vectors[0], vectors[0])
+        assert np.isnan(restored_vectors[1]).all()
+        assert reader.verify()["tables"] == {"things": 3}
+
+    def test_detects_corruption_and_truncation(self, tmp_path):
+        """Test a flipped byte or a cut-off file is reported, not read"""
+        path = str(tmp_path / "t.rms")
+        with SnapshotWriter(path) as writer:
+            table = writer.add_table("t", {"n": "int"}, "v")
+            writer.write_chunk(table, [{"n": i} for i in range(100)], np.ones((100, 8)))
+        data = open(path, "rb").read()
+
+        corrupt = bytearray(data)
+        corrupt[len(data) // 2] ^= 0xFF
+        open(path, "wb").write(bytes(corrupt))
+        with pytest.raises(SnapshotError, match="checksum"):
+            SnapshotReader(path).verify()
+
+        open(path, "wb").write(data[:-10])
+        with pytest.raises(SnapshotError, match="truncated"):
+            SnapshotReader(path).verify()
+
+        open(path, "wb").write(b"not a snapshot")
+        with pytest.raises(SnapshotError):
+            SnapshotReader(path)
+
+    def test_failed_export_leaves_no_file(self, tmp_path):
+        """Test an exception inside the writer discards the partial file"""
+        path = str(tmp_path / "t.rms")
+        with pytest.raises(RuntimeError):
+            with SnapshotWriter(path) as writer:
+                writer.add_table("t", {"n": "int"})
+                raise RuntimeError("boom")
+        assert os.listdir(tmp_path) == []
+
+    def test_shuffled_vectors_compress(self, tmp_path):
+        """Test byte-plane shuffling lets zlib shrink typical embeddings"""
+        path = str(tmp_path / "t.rms")
+        vectors = np.random.default_rng(0).standard_normal((500, 64)).astype(np.float32) * 0.05
+        with SnapshotWriter(path) as writer:
+            table = writer.add_table("t", {"n": "int"}, "v")
+            writer.write_chunk(table, [{"n": i} for i in range(500)], vectors)
+        assert os.path.getsize(path) < vectors.nbytes * 0.95
+
+
+class TestMemorySnapshot:
+    """Tests for MemorySnapshot export / restore"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("kind", ["reference", "vectorized"])
+    async def test_round_trip(self, tmp_path, kind):
+        """Test every memory, archived ones included, is restored with its fields"""
+        source = _service(kind)
+        await _populate(source)
+        path = str(tmp_path / "all.rms")
+
+        result = await MemorySnapshot(source, batch_size=3).export(path)
+        assert result["tables"] == {"memories": 8}
+        assert result["bytes"] == os.path.getsize(path)
+
+        target = _service(kind)
+        restored = await MemorySnapshot(target).restore(path)
+        assert restored["tables"] == {"memories": 8}
+
+        before, before_vectors = await source.repository.export_memory_batch(0, 100)
+        after, after_vectors = await target.repository.export_memory_batch(0, 100)
+        assert after == before
+        assert np.allclose(after_vectors, before_vectors)
+        assert sum(r["is_archived"] for r in after) == 1
+
+        # Restored memories are searchable and counted like inserted ones
+        results = await target.search_similar("memory 4", limit=1)
+        assert results[0].content == "memory 4"
+        assert await target.repository.get_type_counts() == await source.repository.get_type_counts()
+        new_id = await target.repository.insert_memory("new", [1.0] * 16, "longterm", None, {}, None)
+        assert new_id == 9
+
+    @pytest.mark.asyncio
+    async def test_user_export_and_remapped_ids(self, tmp_path):
+        """Test a one-user snapshot can be loaded next to existing memories"""
+        source = _service()
+        await _populate(source)
+        path = str(tmp_path / "u2.rms")
+        assert (await MemorySnapshot(source).export(path, user_id="u2"))["tables"] == {"memories": 3}
+
+        # Clashing ids are refused when ids are preserved
+        with pytest.raises(ValueError):
+            await MemorySnapshot(source).restore(path)
+
+        result = await MemorySnapshot(source).restore(path, preserve_ids=False)
+        assert result["tables"] == {"memories": 3}
+        rows, _ = await source.repository.export_memory_batch(8, 100)
+        assert [r["id"] for r in rows] == [9, 10, 11]
+        assert {r["user_id"] for r in rows} == {"u2"}
+
+    @pytest.mark.asyncio
+    async def test_restore_verifies_before_loading(self, tmp_path):
+        """Test a corrupt snapshot is rejected before anything is loaded"""
+        source = _service()
+        await _populate(source)
+        path = str(tmp_path / "all.rms")
+        await MemorySnapshot(source, batch_size=2).export(path)
+        data = bytearray(open(path, "rb").read())
+        data[-40] ^= 0xFF
+        open(path, "wb").write(bytes(data))
+
+        target = _service()
+        with pytest.raises(SnapshotError):
+            await MemorySnapshot(target).restore(path)
+        assert target.repository.get_all() == []
+
+    @pytest.mark.asyncio
+    async def test_restore_needs_restorable_repository(self, tmp_path):
+        """Test a backend that is not a RestorableRepository refuses a restore"""
+        source = _service()
+        await _populate(source)
+        path = str(tmp_path / "all.rms")
+        await MemorySnapshot(source).export(path)
+
+        target = MemoryStoreService(
+            repository=SegmentedMemoryRepository(str(tmp_path / "segments")),
+            embedding_service=MockEmbeddingService(dimensions=16),
+        )
+        with pytest.raises(TypeError):
+            await MemorySnapshot(target).restore(path)
+        assert target.repository.get_all() == []
+
+    @pytest.mark.asyncio
+    async def test_postgres_restore_keeps_updated_at(self):
+        """Test the COPY into memories carries every saved timestamp"""
+        source = _service()
+        await _populate(source)
+        rows, embeddings = await source.repository.export_memory_batch(0, 100)
+
+        pool = _CopyPool()
+        ids = await PostgresMemoryRepository(pool).restore_memory_batch(rows, embeddings)
+        assert ids == [row["id"] for row in rows]
+
+        table, columns, records = pool.conn.copies[0]
+        assert table == "memories"
+        copied = [dict(zip(columns, record)) for record in records]
+        for row, record in zip(rows, copied):
+            assert record["created_at"] == row["created_at"]
+            assert record["updated_at"] == row["updated_at"]
+            assert record["archived"] == row["is_archived"]
+            assert record["duplicate_count"] == row["duplicate_count"]
+        assert "setval" in pool.conn.executed[0]
@@ -0,0 +1,204 @@
+"""
+Unit tests for the hierarchical summary tree
+"""
+
+import hashlib
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import numpy as np
+import pytest
+
+from memory_store.embedding import MockEmbeddingService
+from memory_store.models import SessionSummaryResponse, SummaryLevel
+from memory_store.summary_tree import (
+    ExtractiveSummarizer,
+    SummaryTreeBuilder,
+    SummaryTreeRetriever,
+    period_bounds,
+)
+from memory_store.summary_tree_repository import InMemorySummaryTreeRepository
+
+
+def _session(user_id, start, summary, message_count=10):
+    now = datetime.now(timezone.utc)
+    return SessionSummaryResponse(
+        id=uuid4(), user_id=user_id, session_id=uuid4(), summary=summary,
+        message_count=message_count, start_time=start, end_time=start + timedelta(hours=1),
+        created_at=now, updated_at=now,
+    )
+
+
+class _CountingEmbeddingService(MockEmbeddingService):
+    def __init__(self):
+        super().__init__(dimensions=32)
+        self.texts = []
+
+    async def generate_embeddings(self, texts):
+        self.texts.extend(texts)
+        return await super().generate_embeddings(texts)
+
+
+class _BagOfWordsEmbeddingService(MockEmbeddingService):
+    """Token-hash embeddings: parent summaries stay close to the children they contain"""
+
+    def __init__(self):
+        super().__init__(dimensions=512)
+
+    async def generate_embedding(self, text):
+        vector = np.zeros(self.dimensions)
+        for token in text.replace("-", " ").split():
+            vector[int(hashlib.sha256(token.encode()).hexdigest(), 16) % self.dimensions] += 1.0
+        return vector.tolist()
+
+    async def generate_embeddings(self, texts):
+        return [await self.generate_embedding(text) for text in texts]
+
+
+class _SpyRepository(InMemorySummaryTreeRepository):
+    def __init__(self):
+        super().__init__()
+        self.searches = []
+
+    async def search_nodes(self, user_id, query_embedding, limit, parent_ids=None):
+        hits = await super().search_nodes(user_id, query_embedding, limit, parent_ids)
+        self.searches.append((parent_ids, len(hits)))
+        return hits
+
+
+def test_period_bounds():
+    """Test weeks start on Monday and months on the 1st (UTC)"""
+    ts = datetime(2025, 3, 5, 15, 30, tzinfo=timezone.utc)  # Wednesday
+    assert period_bounds(SummaryLevel.WEEK, ts) == (
+        datetime(2025, 3, 3, tzinfo=timezone.utc), datetime(2025, 3, 10, tzinfo=timezone.utc)
+    )
+    assert period_bounds(SummaryLevel.MONTH, datetime(2024, 12, 31)) == (
+        datetime(2024, 12, 1, tzinfo=timezone.utc), datetime(2025, 1, 1, tzinfo=timezone.utc)
+    )
+    with pytest.raises(ValueError):
+        period_bounds(SummaryLevel.SESSION, ts)
+
+
+@pytest.mark.asyncio
+async def test_extractive_summarizer_bounds_length():
+    """Test the parent summary stays within max_chars however many children it has"""
+    summarizer = ExtractiveSummarizer(max_chars=200)
+    summary = await summarizer.summarize(SummaryLevel.WEEK, ["x" * 500] * 10)
+    assert len(summary) <= 200
+    assert summary.count("- ") == 10
+    assert await summarizer.summarize(SummaryLevel.WEEK, ["  "]) == ""
+
+
+class TestSummaryTree:
+    """Tests for SummaryTreeBuilder and SummaryTreeRetriever"""
+
+    @pytest.fixture
+    def repository(self):
+        return _SpyRepository()
+
+    @pytest.fixture
+    def embedding_service(self):
+        return _CountingEmbeddingService()
+
+    @pytest.fixture
+    def builder(self, repository, embedding_service):
+        return SummaryTreeBuilder(repository, embedding_service)
+
+    @pytest.mark.asyncio
+    async def test_rollup_builds_weeks_and_months(self, builder, repository):
+        """Test sessions roll into closed weeks, weeks into closed months"""
+        base = datetime(2025, 3, 3, 9, tzinfo=timezone.utc)  # Monday
+        sessions = [
+            _session("u1", base, "planned the memory store"),
+            _session("u1", base + timedelta(days=2), "benchmarked pgvector"),
+            _session("u1", base + timedelta(days=8), "reviewed dedup"),
+            _session("u1", base + timedelta(days=31), "open month session"),
+        ]
+        assert await builder.add_sessions(sessions) == 4
+
+        now = base + timedelta(days=32)
+        assert await builder.rollup("u1", now=now) == {"week": 2, "month": 1}
+
+        weeks = await repository.list_nodes("u1", SummaryLevel.WEEK)
+        assert [w.source_count for w in weeks] == [2, 1]
+        assert weeks[0].message_count == 20
+        assert "planned the memory store" in weeks[0].summary
+        months = await repository.list_nodes("u1", SummaryLevel.MONTH)
+        assert len(months) == 1
+        assert months[0].source_count == 2
+        assert months[0].period_start == datetime(2025, 3, 1, tzinfo=timezone.utc)
+        assert all(w.parent_id == months[0].id for w in weeks)
+
+        # The session in the still-open week stays a root
+        pending = await repository.list_nodes("u1", SummaryLevel.SESSION, pending_only=True)
+        assert [p.summary for p in pending] == ["open month session"]
+
+        # Nothing pending in closed periods: a second rollup does no work
+        assert await builder.rollup("u1", now=now) == {"week": 0, "month": 0}
+
+    @pytest.mark.asyncio
+    async def test_changed_session_rebuilds_ancestors(self, builder, repository, embedding_service):
+        """Test only changed sessions are re-embedded and their week / month are rebuilt"""
+        base = datetime(2025, 3, 3, 9, tzinfo=timezone.utc)
+        first = _session("u1", base, "planned the memory store")
+        second = _session("u1", base + timedelta(days=1), "benchmarked pgvector")
+        await builder.add_sessions([first, second])
+        now = base + timedelta(days=40)
+        await builder.rollup("u1", now=now)
+
+        embedding_service.texts.clear()
+        updated = second.model_copy(update={"summary": "benchmarked pgvector and HNSW"})
+        assert await builder.add_sessions([first, updated]) == 1
+        assert embedding_service.texts == ["benchmarked pgvector and HNSW"]
+
+        assert await builder.rollup("u1", now=now) == {"week": 1, "month": 1}
+        week = (await repository.list_nodes("u1", SummaryLevel.WEEK))[0]
+        assert "HNSW" in week.summary
+        assert len(await repository.list_nodes("u1", SummaryLevel.WEEK)) == 1
+        assert await repository.list_nodes("u1", SummaryLevel.SESSION, pending_only=True) == []
+
+    @pytest.mark.asyncio
+    async def test_retrieve_descends_relevant_branches(self, repository):
+        """Test retrieval expands only the best branches down to sessions"""
+        embedding_service = _BagOfWordsEmbeddingService()
+        builder = SummaryTreeBuilder(repository, embedding_service)
+        base = datetime(2024, 1, 1, 9, tzinfo=timezone.utc)  # Monday
+        sessions = [
+            _session("u1", base + timedelta(weeks=week, days=day), f"subject{week} note{week}x{day}")
+            for week in range(12)
+            for day in range(3)
+        ]
+        await builder.add_sessions(sessions)
+        await builder.rollup("u1", now=base + timedelta(days=365))
+        assert len(await repository.list_nodes("u1", SummaryLevel.MONTH)) == 3
+
+        retriever = SummaryTreeRetriever(repository, embedding_service, beam_width=2)
+        target = sessions[17]
+        query = await embedding_service.generate_embedding(target.summary)
+        repository.searches.clear()
+        hits = await retriever.retrieve("u1", target.summary, limit=2, query_embedding=query)
+
+        assert hits[0][0].session_id == target.session_id
+        assert hits[0][1] == pytest.approx(1.0, abs=1e-5)
+        assert len(hits) <= 2
+        # roots (months), then weeks, then sessions; each step scores at most beam_width nodes
+        assert len(repository.searches) == 3
+        assert all(count <= 2 for _, count in repository.searches)
+
+    @pytest.mark.asyncio
+    async def test_retrieve_includes_unrolled_sessions_and_scopes_users(self, builder, repository, embedding_service):
+        """Test recent sessions without a week are searched as roots, per user"""
+        base = datetime(2025, 3, 3, 9, tzinfo=timezone.utc)
+        await builder.add_sessions([
+            _session("u1", base, "recent work on the tree"),
+            _session("u2", base, "someone else"),
+        ])
+        retriever = SummaryTreeRetriever(repository, embedding_service)
+
+        hits = await retriever.retrieve("u1", "recent work on the tree")
+        assert [node.summary for node, _ in hits] == ["recent work on the tree"]
+        assert await retriever.retrieve("u3", "anything") == []
+
+        strict = SummaryTreeRetriever(repository, embedding_service, min_similarity=1.01)
+        assert await strict.retrieve("u1", "recent work on the tree") == []
+        assert await repository.list_users() == ["u1", "u2"]
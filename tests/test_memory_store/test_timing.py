@@ -0,0 +1,107 @@
+"""
+Unit tests for per-phase timing
+"""
+
+import asyncio
+
+import pytest
+
+from memory_store.embedding import MockEmbeddingService
+from memory_store.models import MemoryType
+from memory_store.repository import InMemoryRepository
+from memory_store.service import MemoryStoreService
+from memory_store.timing import LatencySummary, collect_phases, phase
+
+
+class TestPhaseTiming:
+    """Tests for phase() / collect_phases()"""
+
+    def test_phase_without_collector_is_noop(self):
+        """Test phases outside a collector are dropped"""
+        with phase("query"):
+            pass
+
+    def test_phases_accumulate_and_roll_up(self):
+        """Test repeated phases add up and nested collectors report to the parent"""
+        with collect_phases() as outer:
+            with phase("embed"):
+                pass
+            with collect_phases() as inner:
+                with phase("query"):
+                    pass
+                with phase("query"):
+                    pass
+
+        assert set(inner.as_dict()) == {"query"}
+        assert set(outer.as_dict()) == {"embed", "query"}
+        assert outer.get("query") == pytest.approx(inner.get("query"))
+
+    @pytest.mark.asyncio
+    async def test_collectors_are_task_local(self):
+        """Test concurrent tasks collect into their own timings"""
+        async def work(name: str):
+            with collect_phases() as timings:
+                with phase(name):
+                    await asyncio.sleep(0)
+            return timings
+
+        first, second = await asyncio.gather(work("a"), work("b"))
+        assert set(first.as_dict()) == {"a"}
+        assert set(second.as_dict()) == {"b"}
+
+    @pytest.mark.asyncio
+    async def test_gathered_phases_count_wall_clock(self):
+        """Test overlapping phases in gathered tasks are not summed"""
+        async def work():
+            with phase("embed"):
+                await asyncio.sleep(0.05)
+
+        async def nested():
+            with collect_phases():
+                await work()
+
+        with collect_phases() as timings:
+            await asyncio.gather(work(), work(), nested())
+
+        # Three concurrent 50ms phases: ~50ms wall-clock, not ~150ms
+        assert 45 <= timings.get("embed") < 100
+
+    def test_latency_summary_percentiles(self):
+        """Test percentiles use the same index rule as MetricsCollector"""
+        summary = LatencySummary(window=100)
+        for ms in range(1, 101):
+            summary.record("search", float(ms))
+
+        total = summary.summary()["search"]["total"]
+        assert total["count"] == 100
+        assert total["p50"] == 51.0
+        assert total["p99"] == 100.0
+
+
+class TestServicePhases:
+    """Tests for MemoryStoreService phase breakdown"""
+
+    @pytest.fixture
+    def service(self):
+        return MemoryStoreService(
+            repository=InMemoryRepository(),
+            embedding_service=MockEmbeddingService(),
+        )
+
+    @pytest.mark.asyncio
+    async def test_search_phases(self, service):
+        """Test search reports embedding, database and conversion phases"""
+        await service.save_memory("Test content", MemoryType.LONGTERM)
+
+        with collect_phases() as timings:
+            await service.search_similar("Test content", similarity_threshold=0.0)
+
+        phases = timings.as_dict()
+        # Query text was embedded by save_memory, so only the cache is hit
+        assert {"embedding", "embed_cache", "db", "convert"} <= set(phases)
+        assert "embed" not in phases
+
+        summary = service.get_latency_summary()
+        assert summary["save"]["embed"]["count"] == 1
+        assert summary["search_similar"]["total"]["count"] == 1
+        assert {"p50", "p90", "p95", "p99"} <= set(summary["search_similar"]["db"])
@@ -0,0 +1,82 @@
+"""
+Unit tests for the pgvector binary codec
+"""
+
+import struct
+
+import numpy as np
+import pytest
+
+from memory_store.vector_codec import (
+    decode_vector,
+    encode_vector,
+    register_vector_codec,
+)
+
+
+class TestVectorCodec:
+    """Tests for encode_vector / decode_vector"""
+
+    def test_wire_format(self):
+        """Test header and big-endian float32 payload match pgvector's vector_send"""
+        data = encode_vector([1.0, -2.5])
+        assert data == struct.pack(">HH2f", 2, 0, 1.0, -2.5)
+
+    def test_round_trip(self):
+        """Test decode(encode(v)) returns v at float32 precision"""
+        vector = np.random.default_rng(0).standard_normal(1536).tolist()
+        decoded = decode_vector(encode_vector(vector))
+
+        assert len(decoded) == 1536
+        assert all(isinstance(v, float) for v in decoded)
+        np.testing.assert_allclose(decoded, vector, rtol=1e-6)
+
+    def test_accepts_numpy_and_text(self):
+        """Test NumPy arrays and the legacy text form encode identically"""
+        expected = encode_vector([0.1, 0.2, 0.3])
+        assert encode_vector(np.array([0.1, 0.2, 0.3])) == expected
+        assert encode_vector("[0.1, 0.2, 0.3]") == expected
+
+    def test_binary_is_smaller_than_text(self):
+        """Test binary payload is much smaller than str(embedding)"""
+        vector = np.random.default_rng(1).standard_normal(1536).tolist()
+        assert len(encode_vector(vector)) * 3 < len(str(vector))
+
+    def test_rejects_matrix(self):
+        """Test multi-dimensional input is rejected"""
+        with pytest.raises(ValueError):
+            encode_vector([[1.0], [2.0]])
+
+
+class _FakeConnection:
+    def __init__(self, schema):
+        self.schema = schema
+        self.codecs = []
+
+    async def fetchval(self, query):
+        return self.schema
+
+    async def set_type_codec(self, typename, **kwargs):
+        self.codecs.append((typename, kwargs))
+
+
+class TestRegisterVectorCodec:
+    """Tests for register_vector_codec"""
+
+    @pytest.mark.asyncio
+    async def test_registers_binary_codec(self):
+        """Test the codec is registered in the extension's schema"""
+        conn = _FakeConnection("extensions")
+        assert await register_vector_codec(conn) is True
+
+        typename, kwargs = conn.codecs[0]
+        assert typename == "vector"
+        assert kwargs["schema"] == "extensions"
+        assert kwargs["format"] == "binary"
+
+    @pytest.mark.asyncio
+    async def test_skips_without_pgvector(self):
+        """Test missing extension is tolerated"""
+        conn = _FakeConnection(None)
+        assert await register_vector_codec(conn) is False
+        assert conn.codecs == []
@@ -0,0 +1,109 @@
+"""
+Unit tests for VectorIndex
+"""
+
+import numpy as np
+import pytest
+
+from memory_store.embedding import cosine_similarity
+from memory_store.vector_index import VectorIndex, top_k
+
+
+class TestVectorIndex:
+    """Tests for VectorIndex"""
+
+    def test_add_infers_dimensions(self):
+        """Test that the first vector fixes the dimensions"""
+        index = VectorIndex()
+        assert index.add([1.0, 0.0, 0.0]) == 0
+        assert index.dimensions == 3
+
+        with pytest.raises(ValueError):
+            index.add([1.0, 0.0])
+
+    def test_grows_past_initial_capacity(self):
+        """Test that the matrix grows while keeping existing rows"""
+        index = VectorIndex(dimensions=4, initial_capacity=2)
+        rng = np.random.default_rng(0)
+        vectors = rng.normal(size=(10, 4))
+        for vector in vectors:
+            index.add(vector.tolist())
+
+        assert len(index) == 10
+        np.testing.assert_allclose(
+            index.get(9), vectors[9] / np.linalg.norm(vectors[9]), rtol=1e-6
+        )
+
+    def test_similarities_match_cosine_similarity(self):
+        """Test matrix similarities agree with the pure Python implementation"""
+        rng = np.random.default_rng(1)
+        vectors = rng.normal(size=(20, 32))
+        index = VectorIndex()
+        index.add_batch(vectors)
+        query = rng.normal(size=32).tolist()
+
+        sims = index.similarities(query)
+        expected = [cosine_similarity(query, v.tolist()) for v in vectors]
+        np.testing.assert_allclose(sims, expected, atol=1e-5)
+
+    def test_zero_vectors_score_zero(self):
+        """Test zero vectors behave like cosine_similarity()"""
+        index = VectorIndex()
+        index.add([0.0, 0.0])
+        assert index.similarities([1.0, 0.0]).tolist() == [0.0]
+        assert index.similarities([0.0, 0.0]).tolist() == [0.0]
+
+    def test_search_with_mask_and_threshold(self):
+        """Test search applies the mask and threshold before top-k"""
+        index = VectorIndex()
+        index.add_batch(np.array([[1.0, 0.0], [0.9, 0.1], [0.0, 1.0], [1.0, 0.05]]))
+
+        rows, sims = index.search([1.0, 0.0], limit=10, similarity_threshold=0.5)
+        assert rows.tolist() == [0, 3, 1]
+        assert np.all(np.diff(sims) <= 0)
+
+        mask = np.array([False, True, True, True])
+        rows, _ = index.search([1.0, 0.0], limit=1, mask=mask)
+        assert rows.tolist() == [3]
+
+    def test_search_scores_only_given_rows(self):
+        """Test rows= restricts scoring and still applies mask and threshold"""
+        index = VectorIndex()
+        index.add_batch(np.array([[1.0, 0.0], [0.9, 0.1], [0.0, 1.0], [1.0, 0.05]]))
+
+        assert index.similarities([1.0, 0.0], np.array([2, 3])).tolist() == pytest.approx(
+            index.similarities([1.0, 0.0])[[2, 3]].tolist()
+        )
+        rows, _ = index.search([1.0, 0.0], limit=10, rows=np.array([1, 2]))
+        assert rows.tolist() == [1, 2]
+        rows, _ = index.search([1.0, 0.0], limit=10, similarity_threshold=0.5, rows=np.array([1, 2]))
+        assert rows.tolist() == [1]
+        mask = np.array([True, False, True, True])
+        rows, _ = index.search([1.0, 0.0], limit=10, mask=mask, rows=np.array([1, 2, 3]))
+        assert rows.tolist() == [3, 2]
+
+    def test_set_batch_writes_and_grows(self):
+        """Test set_batch writes arbitrary rows and zero-fills skipped ones"""
+        index = VectorIndex(initial_capacity=1)
+        index.set_batch(np.array([3, 1]), np.array([[0.0, 2.0], [3.0, 4.0]]))
+
+        assert len(index) == 4
+        assert index.get(1).tolist() == pytest.approx([0.6, 0.8])
+        assert index.get(0).tolist() == [0.0, 0.0]
+        index.set_batch(np.array([0]), np.array([[1.0, 0.0]]))
+        assert len(index) == 4
+        assert index.similarities([1.0, 0.0]).tolist() == pytest.approx([1.0, 0.6, 0.0, 0.0])
+
+    def test_top_k_breaks_ties_by_row(self):
+        """Test ties at the k-th score keep row order"""
+        rows = np.array([5, 1, 3, 2, 4])
+        scores = np.array([0.5, 0.9, 0.5, 0.5, 0.1], dtype=np.float32)
+
+        selected, selected_scores = top_k(rows, scores, 3)
+        assert selected.tolist() == [1, 2, 3]
+        assert selected_scores.tolist() == pytest.approx([0.9, 0.5, 0.5])
+
+    def test_top_k_empty(self):
+        """Test top_k with nothing to select"""
+        selected, _ = top_k(np.array([], dtype=np.int64), np.array([], dtype=np.float32), 5)
+        assert selected.size == 0
@@ -0,0 +1,108 @@
+"""
+Multi-Search Executor Tests
+"""
+
+import re
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock
+
+import pytest
+
+from memory_store.embedding import MockEmbeddingService
+from retrieval.multi_search import KeywordSearcher, MultiSearchExecutor, TemporalSearcher
+from retrieval.query_analyzer import QueryIntent, QueryType, TimeRange
+from retrieval.strategy import SearchParams, SearchStrategy
+
+NOW = datetime.now(timezone.utc)
+
+
+class _TenantConnection:
+    """Returns the stored rows, applying only the query's user_id filter"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    async def fetch(self, sql, *params):
+        self.queries.append((sql, params))
+        match = re.search(r"user_id = \$(\d+)", sql)
+        if match is None:
+            return self.rows
+        user_id = params[int(match.group(1)) - 1]
+        return [row for row in self.rows if row["user_id"] == user_id]
+
+
+class _TenantPool:
+    def __init__(self, rows):
+        self.conn = _TenantConnection(rows)
+
+    def acquire(self):
+        pool = self
+
+        class _Acquire:
+            async def __aenter__(self):
+                return pool.conn
+
+            async def __aexit__(self, *exc_info):
+                return False
+
+        return _Acquire()
+
+
+def _row(memory_id, user_id):
+    return {
+        "id": memory_id,
+        "content": f"design note {memory_id}",
+        "memory_type": "longterm",
+        "source_type": None,
+        "metadata": {},
+        "created_at": NOW,
+        "similarity": 0.5,
+        "user_id": user_id,
+    }
+
+
+class TestUserScopedMultiSearch:
+    """user_id scopes every search method"""
+
+    @pytest.fixture
+    def pool(self):
+        return _TenantPool([_row(1, "alice"), _row(2, "bob")])
+
+    @pytest.fixture
+    def executor(self, pool):
+        memory_store = AsyncMock()
+        memory_store.search_similar = AsyncMock(return_value=[])
+        return MultiSearchExecutor(
+            memory_store,
+            keyword_searcher=KeywordSearcher(pool),
+            temporal_searcher=TemporalSearcher(pool, MockEmbeddingService(dimensions=8)),
+        )
+
+    @pytest.mark.asyncio
+    async def test_keyword_hits_of_other_users_excluded(self, executor, pool):
+        intent = QueryIntent(query_type=QueryType.FACTUAL)
+        results = await executor.execute(
+            "design note", SearchStrategy.HYBRID, SearchParams(), intent, user_id="alice"
+        )
+        assert [r.id for r in results["keyword"]] == [1]
+        executor.memory_store.search_similar.assert_awaited_once()
+        assert executor.memory_store.search_similar.call_args.kwargs["user_id"] == "alice"
+
+    @pytest.mark.asyncio
+    async def test_temporal_hits_of_other_users_excluded(self, executor, pool):
+        intent = QueryIntent(
+            query_type=QueryType.TEMPORAL,
+            time_range=TimeRange(start=NOW - timedelta(days=1), end=NOW + timedelta(days=1)),
+        )
+        results = await executor.execute(
+            "design note", SearchStrategy.TEMPORAL, SearchParams(), intent, user_id="alice"
+        )
+        assert [r.id for r in results["temporal"]] == [1]
+
+    @pytest.mark.asyncio
+    async def test_unscoped_search_sees_every_user(self, executor, pool):
+        intent = QueryIntent(query_type=QueryType.FACTUAL)
+        results = await executor.execute("design note", SearchStrategy.HYBRID, SearchParams(), intent)
+        assert [r.id for r in results["keyword"]] == [1, 2]
+        assert "user_id" not in pool.conn.queries[0][0]
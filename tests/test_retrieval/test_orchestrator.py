@@ -16,7 +16,10 @@ from retrieval.strategy import StrategySelector, SearchStrategy
 from retrieval.multi_search import MultiSearchExecutor
 from retrieval.reranker import Reranker
 from retrieval.metrics import MetricsCollector
+from memory_store.embedding import MockEmbeddingService
 from memory_store.models import MemoryResult, MemoryType
+from memory_store.repository import InMemoryRepository
+from memory_store.service import MemoryStoreService
 
 
 @pytest.fixture
@@ -195,6 +198,19 @@ class TestMetricsCollection:
         assert "avg_latency_ms" in summary["statistics"]
         assert "p95" in summary["latency_percentiles"]
 
+    @pytest.mark.asyncio
+    async def test_phase_breakdown(self):
+        """Memory Store のフェーズ別レイテンシ"""
+        memory_store = MemoryStoreService(InMemoryRepository(), MockEmbeddingService())
+        await memory_store.save_memory("テスト記憶", MemoryType.LONGTERM)
+        orchestrator = create_orchestrator(memory_store)
+
+        response = await orchestrator.retrieve(query="テスト", options=RetrievalOptions(log_metrics=False))
+
+        assert {"embedding", "db", "convert", "rerank"} <= set(response.metadata.phase_breakdown)
+        summary = orchestrator.get_metrics_summary()
+        assert "search_similar" in summary["memory_store_phases"]
+
     @pytest.mark.asyncio
     async def test_empty_results_rate(self, orchestrator, mock_memory_store):
         """空結果率の追跡"""